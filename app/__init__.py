@@ -10,6 +10,7 @@ from datetime import datetime
 
 from flask import Flask, redirect, render_template, url_for
 from flask_login import current_user
+from jinja2 import FileSystemBytecodeCache
 
 from app.db import db
 from app.extensions import cache, csrf, limiter, login_manager, mail, socketio
@@ -25,12 +26,74 @@ from app.routes.reset import reset_bp
 from app.routes.reviews import reviews_bp
 from app.routes.social import facebook_bp, google_bp, social_bp
 from app.routes.wishlist import wishlist_bp
+from app.services.assets import assets
+from app.services.compression import compression
+from app.services.dashboard_stats import dashboard_stats
+from app.services.image_store import image_store
+from app.services.images import image_pipeline
+from app.services.mailer import mail_outbox
+from app.services.payments import payment_queue
+from app.services.payu import payu_client
+from app.services.search import product_search
+from app.services.sms import sms_sender
 from config.logging import setup_logging
 
 
-def create_app():
+def _init_bytecode_cache(app):
+    """
+    Guarda las plantillas compiladas en disco.
 
-    """Crea y configura la aplicación Flask con todas sus extensiones."""
+    Un worker nuevo no recompila las que ya compiló otro (Jinja descarta
+    el bytecode si cambia la plantilla). JINJA_BYTECODE_CACHE_DIR vacío lo
+    desactiva.
+    """
+    bytecode_dir = app.config.get('JINJA_BYTECODE_CACHE_DIR')
+    if bytecode_dir:
+        os.makedirs(bytecode_dir, exist_ok=True)
+        app.jinja_env.bytecode_cache = FileSystemBytecodeCache(bytecode_dir)
+
+
+def _init_extensions(app):
+    """Inicializa las extensiones y los servicios en segundo plano."""
+    db.init_app(app)
+    login_manager.init_app(app)
+    login_manager.login_view = 'auth.login'
+    csrf.init_app(app)
+    cache.init_app(app)
+    if app.config.get('SOCKETIO_MESSAGE_QUEUE'):
+        socketio.init_app(
+            app,
+            message_queue=app.config['SOCKETIO_MESSAGE_QUEUE'],
+            channel=app.config.get('SOCKETIO_CHANNEL', 'flask-socketio')
+        )
+    else:
+        # La extensión es compartida: no heredar la cola de otra app del proceso
+        socketio.init_app(app, client_manager=None)
+
+    mail.init_app(app)
+    mail_outbox.init_app(app)
+    product_search.init_app(app)
+    payment_queue.init_app(app)
+    sms_sender.init_app(app)
+    image_pipeline.init_app(app)
+    image_store.init_app(app)
+    assets.init_app(app)
+    compression.init_app(app)
+    dashboard_stats.init_app(app)
+    payu_client.init_app(app)
+    # Limiter activado para producción y pruebas
+    limiter.init_app(app)
+
+
+def create_app(config_overrides=None):
+
+    """
+    Crea y configura la aplicación Flask con todas sus extensiones.
+
+    Args:
+        config_overrides: Valores que reemplazan la configuración del entorno
+            antes de inicializar las extensiones (p. ej. la base de datos en tests)
+    """
     app = Flask(__name__)
 
     # Hacer now disponible en todos los templates
@@ -51,25 +114,20 @@ def create_app():
         app.config.from_object('config.testing.TestingConfig')
     else:
         app.config.from_object('config.Config')
+    if config_overrides:
+        app.config.update(config_overrides)
 
     # Configurar logging
     setup_logging(app)
 
+    _init_bytecode_cache(app)
+
     # Registrar blueprints sociales
     app.register_blueprint(google_bp, url_prefix="/login")
     app.register_blueprint(facebook_bp, url_prefix="/login")
     app.register_blueprint(social_bp)
 
-    db.init_app(app)
-    login_manager.init_app(app)
-    login_manager.login_view = 'auth.login'
-    csrf.init_app(app)
-    cache.init_app(app)
-    socketio.init_app(app)
-
-    mail.init_app(app)
-    # Limiter activado para producción y pruebas
-    limiter.init_app(app)
+    _init_extensions(app)
 
     @login_manager.user_loader
     def load_user(user_id):
@@ -90,7 +148,6 @@ def create_app():
     app.register_blueprint(reset_bp)
     app.register_blueprint(health_bp)
 
-
     # Manejo de errores personalizados
     @app.errorhandler(404)
     def not_found_error(_error):
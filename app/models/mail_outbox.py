@@ -0,0 +1,35 @@
+"""
+Modelo de la bandeja de salida de correos.
+
+Las rutas guardan aquí el correo ya armado y un worker lo envía después,
+así una petición no depende de la latencia del servidor SMTP.
+"""
+
+from datetime import datetime
+
+from app.db import db
+
+
+class OutboxEmail(db.Model):
+    """Correo pendiente de envío."""
+    __tablename__ = 'mail_outbox'
+    id = db.Column(db.Integer, primary_key=True)
+    subject = db.Column(db.String(255), nullable=False)
+    sender = db.Column(db.String(255))
+    recipients = db.Column(db.JSON, nullable=False)
+    body = db.Column(db.Text)
+    html = db.Column(db.Text)
+    # pendiente -> enviando -> enviado | error (se reintenta) | fallido
+    status = db.Column(db.String(20), nullable=False, default='pendiente')
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    last_error = db.Column(db.Text)
+    batch_id = db.Column(db.String(32))
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    claimed_at = db.Column(db.DateTime)
+    sent_at = db.Column(db.DateTime)
+    __table_args__ = (
+        # Próximo lote: pendientes y reintentos vencidos, los más antiguos primero
+        db.Index('ix_mail_outbox_status_next_attempt', 'status', 'next_attempt_at'),
+        db.Index('ix_mail_outbox_batch_id', 'batch_id'),
+    )
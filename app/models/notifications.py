@@ -17,6 +17,10 @@ class Notification(db.Model):
     mensaje = db.Column(db.String(255), nullable=False)
     leida = db.Column(db.Boolean, default=False)
     fecha = db.Column(db.DateTime, default=datetime.utcnow)
+    __table_args__ = (
+        # Consulta de no leídas por usuario, la más reciente primero
+        db.Index('ix_notifications_user_leida_fecha', 'user_id', 'leida', 'fecha'),
+    )
 
     def to_dict(self):
         """Convierte la notificación a un diccionario."""
@@ -8,7 +8,15 @@ class Order(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     total = db.Column(db.Float, nullable=False)
     status = db.Column(db.String(30), default='pendiente')
+    # True cuando el stock reservado en el checkout ya se devolvió
+    # (pago fallido o vencido)
+    stock_released = db.Column(db.Boolean, nullable=False, default=False,
+                               server_default=db.false())
     details = db.relationship('OrderDetail', backref='order', lazy=True, cascade='all, delete-orphan')
+    user = db.relationship('Users', lazy=True)
+    __table_args__ = (
+        db.Index('ix_orders_user_created_at', 'user_id', 'created_at'),
+    )
 
 class OrderDetail(db.Model):
     __tablename__ = 'order_details'
@@ -18,3 +26,7 @@ class OrderDetail(db.Model):
     quantity = db.Column(db.Integer, nullable=False)
     price = db.Column(db.Float, nullable=False)
     product = db.relationship('Product', backref='order_details', lazy=True)
+    __table_args__ = (
+        db.Index('ix_order_details_order_id', 'order_id'),
+        db.Index('ix_order_details_product_id', 'product_id'),
+    )
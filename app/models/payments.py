@@ -0,0 +1,37 @@
+"""
+Modelo de notificaciones de pago recibidas de la pasarela.
+
+Cada confirmación de PayU se guarda una sola vez por ``reference_sale`` y
+``state_pol`` antes de procesarla, de modo que los reintentos de PayU no
+vuelven a aplicar el mismo cambio de estado.
+"""
+
+from datetime import datetime
+
+from app.db import db
+
+
+class PaymentNotification(db.Model):
+    """Confirmación de pago tal como llegó al webhook."""
+    __tablename__ = 'payment_notifications'
+    id = db.Column(db.Integer, primary_key=True)
+    provider = db.Column(db.String(20), nullable=False, default='payu')
+    reference_sale = db.Column(db.String(255), nullable=False)
+    state_pol = db.Column(db.String(10), nullable=False)
+    order_id = db.Column(db.Integer, db.ForeignKey('orders.id'), nullable=False)
+    payload = db.Column(db.JSON, nullable=False)
+    # pendiente -> procesando -> procesada | error
+    status = db.Column(db.String(20), nullable=False, default='pendiente')
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    error = db.Column(db.Text)
+    received_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    # Momento en que un worker la reclamó; pasado PAYMENT_NOTIFICATION_CLAIM_TIMEOUT
+    # una notificación 'procesando' se da por abandonada y se puede volver a reclamar
+    claimed_at = db.Column(db.DateTime)
+    processed_at = db.Column(db.DateTime)
+    __table_args__ = (
+        db.UniqueConstraint('reference_sale', 'state_pol',
+                            name='uq_payment_notifications_reference_state'),
+        # Barrido de pendientes y reprocesos, las más antiguas primero
+        db.Index('ix_payment_notifications_status_received', 'status', 'received_at'),
+    )
@@ -0,0 +1,21 @@
+"""
+Modelo de la popularidad de los productos.
+
+Guarda, por producto, las unidades vendidas ponderadas por antigüedad que
+``app.services.popularity`` suma cuando un pedido pasa a pagado. Ordenar
+por ``score`` da el ranking de populares sin agrupar las líneas de pedido.
+"""
+
+from app.db import db
+
+
+class ProductPopularity(db.Model):
+    """Puntaje de popularidad de un producto (decaimiento exponencial)."""
+    __tablename__ = 'product_popularity'
+    product_id = db.Column(db.Integer, db.ForeignKey('products.id'), primary_key=True)
+    # Unidades × 2^(edad / vida media), medidas desde popularity.EPOCH
+    score = db.Column(db.Float, nullable=False, default=0)
+    __table_args__ = (
+        # Top N: ORDER BY score DESC LIMIT N
+        db.Index('ix_product_popularity_score', 'score'),
+    )
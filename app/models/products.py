@@ -1,3 +1,5 @@
+from datetime import datetime
+
 from app.db import db
 
 class Category(db.Model):
@@ -16,16 +18,65 @@ class Product(db.Model):
     price = db.Column(db.Numeric(10, 2), nullable=False)
     stock = db.Column(db.Integer, default=0)
     image = db.Column(db.String(255))  # Nombre del archivo de imagen
+    # Variantes generadas por el pipeline de imágenes: anchos, formatos y
+    # ancho por vista
+    image_variants = db.Column(db.JSON)
     size = db.Column(db.String(20))
     color = db.Column(db.String(30))
     category_id = db.Column(db.Integer, db.ForeignKey('categories.id'), nullable=False)
     created_at = db.Column(db.DateTime, server_default=db.func.now())
-    updated_at = db.Column(db.DateTime, server_default=db.func.now(), onupdate=db.func.now())
+    # Con microsegundos: forma parte de la clave de los fragmentos cacheados
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow,
+                           server_default=db.func.now(), onupdate=datetime.utcnow)
     promo = db.Column(db.String(255))  # Texto de promoción, si aplica
     destacado = db.Column(db.Boolean, default=False)  # Si es producto destacado
+    __table_args__ = (
+        # Catálogo sin filtros, ordenado por fecha
+        db.Index('ix_products_created_at', 'created_at'),
+        # Destacados y feed: destacado = ? ORDER BY created_at DESC
+        db.Index('ix_products_destacado_created_at', 'destacado', 'created_at'),
+        # Filtros del catálogo por categoría y rango de precio
+        db.Index('ix_products_category_price_created_at',
+                 'category_id', 'price', 'created_at'),
+    )
+
+    @property
+    def fragment_key(self):
+        """
+        Clave de los fragmentos de plantilla de este producto.
+
+        Cambia con cada modificación del producto, así que las tarjetas
+        cacheadas con ``{% cache %}`` se regeneran solas al editarlo.
+        """
+        if self.updated_at is None:
+            return str(self.id)
+        return f"{self.id}-{self.updated_at:%Y%m%d%H%M%S%f}"
+
+    def image_url(self, view='grid', fmt='webp'):
+        """
+        Devuelve la URL de la imagen del producto.
+
+        Con variantes generadas devuelve la del ancho de la vista
+        ('grid', 'detail' o 'zoom'); si no, el archivo original.
+        """
+        if not self.image:
+            return "/static/logo.png"
+        variants = self.image_variants
+        if variants and fmt in variants['formats']:
+            width = variants['views'].get(view, variants['widths'][-1])
+            return f"/static/product_images/{self._variant(width, fmt)}"
+        return f"/static/product_images/{self.image}"
+
+    def image_srcset(self, fmt='webp'):
+        """Valor para el atributo srcset ('' si la imagen aún no tiene variantes)."""
+        variants = self.image_variants
+        if not self.image or not variants or fmt not in variants['formats']:
+            return ''
+        return ', '.join(
+            f"/static/product_images/{self._variant(width, fmt)} {width}w"
+            for width in variants['widths']
+        )
 
-    def image_url(self):
-        """Devuelve la URL de la imagen del producto."""
-        if self.image:
-            return f"/static/product_images/{self.image}"
-        return "/static/logo.png"
+    def _variant(self, width, fmt):
+        from app.services.images import variant_name
+        return variant_name(self.image, width, fmt)
@@ -11,3 +11,42 @@ class Review(db.Model):
     image_path = db.Column(db.String(256))  # Ruta de la imagen subida
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     aprobada = db.Column(db.Boolean, default=False)  # Moderación: solo reseñas aprobadas se muestran
+    __table_args__ = (
+        db.Index('ix_reviews_product_aprobada_created_at',
+                 'product_id', 'aprobada', 'created_at'),
+    )
+
+
+class ProductRating(db.Model):
+    """
+    Agregados de las reseñas aprobadas de un producto.
+
+    Se mantienen al aprobar o rechazar reseñas (app.services.ratings) para
+    que el detalle del producto no recorra todas sus reseñas.
+    """
+    __tablename__ = 'product_ratings'
+    product_id = db.Column(db.Integer, db.ForeignKey('products.id'), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    # Suma de las calificaciones
+    total = db.Column(db.Integer, nullable=False, default=0)
+    stars_1 = db.Column(db.Integer, nullable=False, default=0)
+    stars_2 = db.Column(db.Integer, nullable=False, default=0)
+    stars_3 = db.Column(db.Integer, nullable=False, default=0)
+    stars_4 = db.Column(db.Integer, nullable=False, default=0)
+    stars_5 = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow,
+                           onupdate=datetime.utcnow)
+
+    @property
+    def average(self):
+        """Calificación promedio con un decimal (0 sin reseñas)."""
+        return round(self.total / self.count, 1) if self.count else 0
+
+    @property
+    def histogram(self):
+        """Lista de (estrellas, cantidad, porcentaje) de 5 a 1 estrellas."""
+        counts = [(stars, getattr(self, f'stars_{stars}')) for stars in range(5, 0, -1)]
+        return [
+            (stars, count, round(count * 100 / self.count) if self.count else 0)
+            for stars, count in counts
+        ]
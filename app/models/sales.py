@@ -0,0 +1,38 @@
+"""
+Modelos de los resúmenes diarios de ventas.
+
+Guardan, por día de creación del pedido, lo que los reportes del
+administrador calculaban recorriendo todo el historial de pedidos. Los
+mantiene ``app.services.sales_rollup`` en la misma transacción que cambia
+el estado del pedido o registra un reembolso.
+"""
+
+from datetime import datetime
+
+from app.db import db
+
+
+class SalesDaily(db.Model):
+    """Ventas de un día: pedidos, unidades, ingresos y reembolsos."""
+    __tablename__ = 'sales_daily'
+    day = db.Column(db.Date, primary_key=True)
+    orders = db.Column(db.Integer, nullable=False, default=0)
+    units = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Float, nullable=False, default=0)
+    # Reembolsos registrados ese día (por fecha del reembolso)
+    refunds = db.Column(db.Float, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow,
+                           onupdate=datetime.utcnow)
+
+
+class ProductSalesDaily(db.Model):
+    """Unidades e ingresos de un producto en un día."""
+    __tablename__ = 'product_sales_daily'
+    day = db.Column(db.Date, primary_key=True)
+    product_id = db.Column(db.Integer, db.ForeignKey('products.id'), primary_key=True)
+    units = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Float, nullable=False, default=0)
+    __table_args__ = (
+        # Historial de un producto por rango de fechas
+        db.Index('ix_product_sales_daily_product_day', 'product_id', 'day'),
+    )
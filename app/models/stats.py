@@ -0,0 +1,18 @@
+"""
+Modelo de los contadores del panel de administración.
+
+Cada fila guarda un total (usuarios, productos, pedidos, notificaciones,
+suma de ventas) que ``app.services.dashboard_stats`` mantiene al insertar
+o eliminar registros y recalcula cada cierto tiempo.
+"""
+
+from app.db import db
+
+
+class DashboardStat(db.Model):
+    """Un contador del panel de administración."""
+    __tablename__ = 'dashboard_stats'
+    name = db.Column(db.String(40), primary_key=True)
+    value = db.Column(db.Float, nullable=False, default=0)
+    # Último recálculo desde las tablas; None obliga a recalcular en la próxima lectura
+    reconciled_at = db.Column(db.DateTime, nullable=True)
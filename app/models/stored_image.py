@@ -0,0 +1,27 @@
+"""
+Modelo de los archivos de imagen guardados por contenido.
+
+Cada archivo se nombra con el hash de su contenido y se comparte entre
+todos los productos que suben la misma imagen; ``refcount`` cuenta cuántos
+la usan para poder borrar el archivo cuando ninguno la necesita.
+"""
+
+from datetime import datetime
+
+from app.db import db
+
+
+class StoredImage(db.Model):
+    """Archivo de imagen con su contador de referencias."""
+    __tablename__ = 'stored_images'
+    # <hash>.<extensión>, el mismo nombre del archivo en la carpeta de subidas
+    name = db.Column(db.String(80), primary_key=True)
+    size = db.Column(db.Integer, nullable=False)
+    refcount = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    # Momento en que dejó de usarse (refcount llegó a 0)
+    released_at = db.Column(db.DateTime)
+    __table_args__ = (
+        # Recolección de basura: sin referencias, liberadas hace tiempo
+        db.Index('ix_stored_images_refcount_released', 'refcount', 'released_at'),
+    )
@@ -30,6 +30,12 @@ class Users(db.Model, UserMixin):
     wishlist_token = db.Column(db.String(32), unique=True, nullable=True)
 
     is_blocked = db.Column(db.Boolean, default=False)  # Nuevo campo: usuario bloqueado
+    __table_args__ = (
+        # Búsqueda por prefijo del nombre o email, sin distinguir mayúsculas
+        # (panel de administración)
+        db.Index('ix_user_name_lower', db.func.lower(nameUser)),
+        db.Index('ix_user_email_lower', db.func.lower(email)),
+    )
 
     def get_id(self):
         """Obtener el ID del usuario para Flask-Login."""
@@ -14,4 +14,6 @@ class Wishlist(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey('user.idUser'), nullable=False)
     product_id = db.Column(db.Integer, db.ForeignKey('products.id'), nullable=False)
     product = db.relationship('Product', backref='wishlists', lazy=True)
+    # unique_wishlist empieza por user_id, así que también sirve de índice
+    # para listar la lista de deseos de un usuario.
     __table_args__ = (db.UniqueConstraint('user_id', 'product_id', name='unique_wishlist'),)
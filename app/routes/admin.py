@@ -8,38 +8,47 @@ del sistema, incluyendo gestión de productos, usuarios, pedidos, etc.
 """
 
 import os
-import csv
 import secrets
 from datetime import datetime, timedelta
 from decimal import Decimal
 from functools import wraps
-from io import StringIO
 
 from flask import (
     Blueprint, Response, current_app, flash, redirect,
-    render_template, request, url_for
+    render_template, request, stream_with_context, url_for
 )
 from flask_login import current_user, login_required
 from flask_mail import Message
 from sqlalchemy import func
+from sqlalchemy.orm import joinedload, selectinload
 from werkzeug.utils import secure_filename
 
-from app import db, mail
+from app import db
 from app.extensions import csrf
 from app.forms import CategoryForm, DiscountForm, ProductForm, CouponForm
 from app.models.admin_notification import AdminNotification
 from app.models.audit_log import AuditLog
 from app.models.banner import Banner
 from app.models.coupons import Coupon
-from app.models.notifications import Notification
 from app.models.orders import Order, OrderDetail
+from app.models.popularity import ProductPopularity
 from app.models.products import Category, Product
 from app.models.returns import ReturnRequest
-from app.models.reviews import Review
+from app.models.sales import SalesDaily
+from app.models.reviews import ProductRating, Review
 from app.models.store_config import StoreConfig
 from app.models.support_ticket import SupportTicket
 from app.models.users import UserRole, Users
 from app.models.wishlist import Wishlist
+from app.services import dashboard_stats, exports, popularity, ratings, sales_rollup
+from app.services.checkout import CANCELLED, release_stock, retake_stock
+from app.services.conditional import conditional
+from app.services.feed import invalidate_feed
+from app.services.image_store import InvalidImageError, image_store
+from app.services.images import image_pipeline
+from app.services.mailer import mail_outbox
+from app.services.page_cache import CATEGORIES_TAG, PRODUCTS_TAG, invalidate_pages
+from app.services.search import product_search
 
 def admin_required(view_func):
     """Decorador que verifica si el usuario actual es administrador."""
@@ -82,6 +91,7 @@ def add_discount(product_id):
         discount_value = form.discount.data
         product_obj.discount = discount_value
         db.session.commit()
+        invalidate_pages(PRODUCTS_TAG)
         flash('Descuento asignado al producto.', 'success')
         return redirect(url_for('admin.products'))
     return render_template('admin/add_discount.html', product=product_obj, form=form)
@@ -98,6 +108,8 @@ def add_promo(product_id):
         promo_text = request.form.get('promo', '').strip()
         product_obj.promo = promo_text
         db.session.commit()
+        invalidate_feed()
+        invalidate_pages(PRODUCTS_TAG)
         flash('Promoción asignada al producto.', 'success')
         return redirect(url_for('admin.products'))
     return render_template('admin/add_promo.html', product=product_obj)
@@ -160,26 +172,44 @@ def create_admin_notification():
     flash('Notificación creada.', 'success')
     return redirect(url_for('admin.admin_notifications'))
 # --- EXPORTACIÓN DE DATOS ---
+def _export_date_range():
+    """Lee `start_date`/`end_date` (YYYY-MM-DD, inclusivos) de la query string."""
+    start_str = request.args.get('start_date', '').strip()
+    end_str = request.args.get('end_date', '').strip()
+    start = datetime.strptime(start_str, '%Y-%m-%d') if start_str else None
+    end = None
+    if end_str:
+        end = datetime.strptime(end_str, '%Y-%m-%d') + timedelta(days=1)
+    return start, end
+
+
+def _export_response(chunks_factory, filename):
+    """Responde un CSV en streaming, comprimido con gzip si se pide `?gzip=1`."""
+    try:
+        start, end = _export_date_range()
+    except ValueError:
+        flash('Rango de fechas inválido, usa el formato AAAA-MM-DD.', 'danger')
+        return redirect(url_for('admin.dashboard'))
+    chunks = chunks_factory(start, end)
+    if request.args.get('gzip') == '1':
+        return Response(
+            stream_with_context(exports.gzip_stream(chunks)),
+            mimetype='application/gzip',
+            headers={"Content-Disposition": f"attachment;filename={filename}.gz"}
+        )
+    return Response(
+        stream_with_context(chunks),
+        mimetype='text/csv',
+        headers={"Content-Disposition": f"attachment;filename={filename}"}
+    )
+
+
 @admin_bp.route('/export/users')
 @login_required
 @admin_required
 def export_users():
     """Exporta la lista de usuarios a CSV."""
-    users_list = Users.query.all()
-    output = StringIO()
-    writer = csv.writer(output)
-    writer.writerow(['ID', 'Nombre', 'Email', 'Rol', 'Activo', 'Fecha registro'])
-    for user in users_list:
-        writer.writerow([
-            user.idUser, user.nameUser, user.email,
-            user.role, user.is_active_db, user.created_at
-        ])
-    csv_content = output.getvalue()
-    return Response(
-        csv_content,
-        mimetype='text/csv',
-        headers={"Content-Disposition": "attachment;filename=usuarios.csv"}
-    )
+    return _export_response(exports.users_csv, 'usuarios.csv')
 
 
 @admin_bp.route('/export/products')
@@ -187,42 +217,17 @@ def export_users():
 @admin_required
 def export_products():
     """Exporta la lista de productos a CSV."""
-    products_list = Product.query.all()
-    output = StringIO()
-    writer = csv.writer(output)
-    writer.writerow(['ID', 'Nombre', 'Precio', 'Stock', 'Categoría', 'Fecha creación'])
-    for product in products_list:
-        writer.writerow([
-            product.id, product.name, product.price,
-            product.stock, product.category_id, product.created_at
-        ])
-    csv_content = output.getvalue()
-    return Response(
-        csv_content,
-        mimetype='text/csv',
-        headers={"Content-Disposition": "attachment;filename=productos.csv"}
-    )
+    return _export_response(exports.products_csv, 'productos.csv')
 
 
 @admin_bp.route('/export/orders')
 @login_required
 @admin_required
 def export_orders():
-    """Exporta la lista de pedidos a CSV."""
-    orders_list = Order.query.all()
-    output = StringIO()
-    writer = csv.writer(output)
-    writer.writerow(['ID', 'Usuario', 'Total', 'Estado', 'Fecha'])
-    for order in orders_list:
-        writer.writerow([
-            order.id, order.user_id, order.total, order.status, order.created_at
-        ])
-    csv_content = output.getvalue()
-    return Response(
-        csv_content,
-        mimetype='text/csv',
-        headers={"Content-Disposition": "attachment;filename=pedidos.csv"}
-    )
+    """Exporta la lista de pedidos a CSV; con `?lines=1` incluye sus productos."""
+    if request.args.get('lines') == '1':
+        return _export_response(exports.order_lines_csv, 'pedidos_detalle.csv')
+    return _export_response(exports.orders_csv, 'pedidos.csv')
 # --- BANNERS Y CONTENIDO DESTACADO ---
 @admin_bp.route('/banners')
 @login_required
@@ -312,14 +317,18 @@ def delete_banner(banner_id):
 @admin_required
 def support_tickets():
     """Muestra la lista de tickets de soporte."""
-    tickets_list = SupportTicket.query.order_by(SupportTicket.created_at.desc()).all()
-    for ticket in tickets_list:
-        ticket.user = Users.query.get(ticket.user_id)
-        ticket.assigned_admin = (
-            Users.query.get(ticket.assigned_admin_id)
-            if ticket.assigned_admin_id else None
-        )
-    return render_template('admin/support_tickets.html', tickets=tickets_list)
+    page = request.args.get('page', 1, type=int)
+    tickets_paginated = SupportTicket.query.options(
+        joinedload(SupportTicket.user),
+        joinedload(SupportTicket.assigned_admin)
+    ).order_by(SupportTicket.created_at.desc()).paginate(
+        page=page, per_page=20, error_out=False
+    )
+    return render_template(
+        'admin/support_tickets.html',
+        tickets=tickets_paginated.items,
+        pagination=tickets_paginated
+    )
 
 
 @admin_bp.route('/support_tickets/<int:ticket_id>')
@@ -327,12 +336,10 @@ def support_tickets():
 @admin_required
 def view_ticket(ticket_id):
     """Muestra los detalles de un ticket específico."""
-    ticket_obj = SupportTicket.query.get_or_404(ticket_id)
-    ticket_obj.user = Users.query.get(ticket_obj.user_id)
-    ticket_obj.assigned_admin = (
-        Users.query.get(ticket_obj.assigned_admin_id)
-        if ticket_obj.assigned_admin_id else None
-    )
+    ticket_obj = SupportTicket.query.options(
+        joinedload(SupportTicket.user),
+        joinedload(SupportTicket.assigned_admin)
+    ).filter_by(id=ticket_id).first_or_404()
     return render_template('admin/view_ticket.html', ticket=ticket_obj)
 
 
@@ -383,10 +390,13 @@ def close_ticket(ticket_id):
 @admin_required
 def audit():
     """Muestra el registro de auditoría de acciones administrativas."""
-    audit_logs = AuditLog.query.order_by(AuditLog.timestamp.desc()).limit(200).all()
-    for log_entry in audit_logs:
-        log_entry.admin = Users.query.get(log_entry.admin_id)
-    return render_template('admin/audit.html', logs=audit_logs)
+    page = request.args.get('page', 1, type=int)
+    audit_paginated = AuditLog.query.options(joinedload(AuditLog.admin))\
+        .order_by(AuditLog.timestamp.desc())\
+        .paginate(page=page, per_page=50, error_out=False)
+    return render_template(
+        'admin/audit.html', logs=audit_paginated.items, pagination=audit_paginated
+    )
 
 # --- CUPONES ---
 @admin_bp.route('/coupons')
@@ -474,11 +484,15 @@ def delete_coupon(coupon_id):
 @admin_required
 def returns():
     """Muestra la lista de solicitudes de devolución."""
-    returns_list = ReturnRequest.query.order_by(ReturnRequest.created_at.desc()).all()
-    for return_request in returns_list:
-        return_request.user = Users.query.get(return_request.user_id)
-        return_request.order = Order.query.get(return_request.order_id)
-    return render_template('admin/returns.html', returns=returns_list)
+    page = request.args.get('page', 1, type=int)
+    returns_paginated = ReturnRequest.query.options(joinedload(ReturnRequest.user))\
+        .order_by(ReturnRequest.created_at.desc())\
+        .paginate(page=page, per_page=20, error_out=False)
+    return render_template(
+        'admin/returns.html',
+        returns=returns_paginated.items,
+        pagination=returns_paginated
+    )
 
 
 @admin_bp.route('/returns/approve/<int:return_id>', methods=['POST'])
@@ -515,9 +529,15 @@ def refund_return(return_id):
     return_request = ReturnRequest.query.get_or_404(return_id)
     try:
         amount = float(request.form.get('refund_amount', 0))
-        return_request.status = 'reembolsado'
+        if return_request.status == sales_rollup.REFUNDED \
+                and return_request.refund_amount:
+            # Corrección de un reembolso ya registrado
+            sales_rollup.refund_recorded(return_request.processed_at.date(),
+                                         -return_request.refund_amount)
+        return_request.status = sales_rollup.REFUNDED
         return_request.refund_amount = amount
         return_request.processed_at = datetime.utcnow()
+        sales_rollup.refund_recorded(return_request.processed_at.date(), amount)
         db.session.commit()
         flash(f'Reembolso de ${amount:.2f} registrado.', 'info')
     except ValueError:
@@ -533,10 +553,13 @@ def refund_return(return_id):
 @admin_required
 def orders():
     """Muestra la lista de pedidos."""
-    orders_list = Order.query.order_by(Order.created_at.desc()).all()
-    for order_obj in orders_list:
-        order_obj.user = Users.query.get(order_obj.user_id)
-    return render_template('admin/orders.html', orders=orders_list)
+    page = request.args.get('page', 1, type=int)
+    orders_paginated = Order.query.options(joinedload(Order.user))\
+        .order_by(Order.created_at.desc())\
+        .paginate(page=page, per_page=20, error_out=False)
+    return render_template(
+        'admin/orders.html', orders=orders_paginated.items, pagination=orders_paginated
+    )
 
 
 @admin_bp.route('/orders/update_status/<int:order_id>', methods=['POST'])
@@ -545,8 +568,28 @@ def orders():
 def update_order_status(order_id):
     """Actualiza el estado de un pedido."""
     order_obj = Order.query.get_or_404(order_id)
+    old_status = order_obj.status
     new_status = request.form.get('status', order_obj.status)
-    order_obj.status = new_status
+    if new_status == old_status:
+        flash(f'Pedido {order_obj.id} actualizado a {new_status}.', 'success')
+        return redirect(url_for('admin.orders'))
+    if not sales_rollup.change_status(order_obj, old_status, new_status):
+        # Otra petición (pago, otro administrador) lo cambió después de leerlo
+        db.session.rollback()
+        flash(f'El pedido {order_obj.id} cambió de estado mientras se editaba; '
+              'revisa su estado actual.', 'warning')
+        return redirect(url_for('admin.orders'))
+    if new_status == CANCELLED:
+        # El stock reservado en el checkout vuelve al inventario
+        release_stock(order_obj)
+    elif new_status in sales_rollup.SALE_STATUSES:
+        # Un pedido que había devuelto su stock lo vuelve a tomar
+        short = retake_stock(order_obj)
+        if short:
+            db.session.rollback()
+            flash(f'No hay stock suficiente para pasar el pedido {order_obj.id} '
+                  f'a {new_status}.', 'danger')
+            return redirect(url_for('admin.orders'))
     db.session.commit()
     flash(f'Pedido {order_obj.id} actualizado a {new_status}.', 'success')
     return redirect(url_for('admin.orders'))
@@ -569,7 +612,7 @@ def admin_reset_password(user_id):
         f'Haz clic en el siguiente enlace: {reset_url}\n'
         'Este enlace expirará en 1 hora.'
     )
-    mail.send(msg)
+    mail_outbox.send(msg)
     flash(f'Se ha enviado un correo de restablecimiento a {user_obj.email}.', 'info')
     return redirect(url_for('admin.dashboard'))
 
@@ -612,13 +655,19 @@ def unblock_user(user_id):
 def user_orders(user_id):
     """Muestra los pedidos de un usuario específico."""
     user_obj = Users.query.get_or_404(user_id)
-    user_orders_list = (
+    page = request.args.get('page', 1, type=int)
+    orders_paginated = (
         Order.query.filter_by(user_id=user_id)
-        .order_by(Order.created_at.desc()).all()
+        .options(selectinload(Order.details).joinedload(OrderDetail.product))
+        .order_by(Order.created_at.desc())
+        .paginate(page=page, per_page=20, error_out=False)
+    )
+    return render_template(
+        'admin/user_orders.html',
+        user=user_obj,
+        orders=orders_paginated.items,
+        pagination=orders_paginated
     )
-    for order_obj in user_orders_list:
-        order_obj.details = OrderDetail.query.filter_by(order_id=order_obj.id).all()
-    return render_template('admin/user_orders.html', user=user_obj, orders=user_orders_list)
 
 
 @admin_bp.route('/users/delete/<int:user_id>', methods=['POST'])
@@ -655,30 +704,23 @@ def make_admin(user_id):
 def dashboard():
     """Muestra el panel de administración principal."""
     search_query = request.args.get('q', '').strip()
-    user_query = Users.query
-    if search_query:
-        user_query = user_query.filter(
-            (Users.nameUser.ilike(f'%{search_query}%')) |
-            (Users.email.ilike(f'%{search_query}%'))
-        )
-    users_list = user_query.all()
-    total_registered_users = Users.query.count()
-    # Estadísticas reales
-    total_products = Product.query.count()
-    total_orders = Order.query.count()
-    total_sales = db.session.query(func.sum(Order.total)).scalar() or 0.0
+    page = request.args.get('page', 1, type=int)
+    counters = dashboard_stats.get_stats()
+    users_paginated = dashboard_stats.search_users(
+        search_query, page=page, total=counters['users']
+    )
     stats = {
-        'total_products': total_products,
-        'total_orders': total_orders,
-        'total_sales': float(total_sales)
+        'total_products': counters['products'],
+        'total_orders': counters['orders'],
+        'total_sales': counters['sales_total']
     }
-    total_notifications = Notification.query.count()
     return render_template(
         'admin/dashboard.html',
-        usuarios=users_list,
-        usuarios_registrados=total_registered_users,
+        usuarios=users_paginated.items,
+        pagination=users_paginated,
+        usuarios_registrados=counters['users'],
         estadisticas=stats,
-        notificaciones=total_notifications,
+        notificaciones=counters['notifications'],
         q=search_query
     )
 
@@ -708,6 +750,7 @@ def categories():
             category_obj = Category(name=name, description=description)
             db.session.add(category_obj)
             db.session.commit()
+            invalidate_pages(CATEGORIES_TAG)
             log_admin_action(
                 current_user.idUser, 'crear', 'categoria',
                 category_obj.id, f'Categoría: {name}'
@@ -737,27 +780,26 @@ def add_product():
             image_filename = None
             image_file = form.image.data
             if image_file and hasattr(image_file, 'filename') and image_file.filename:
-                filename = secure_filename(image_file.filename)
-                upload_folder = os.path.join(
-                    current_app.root_path,
-                    current_app.config.get('UPLOAD_FOLDER', 'static/product_images')
-                )
-                os.makedirs(upload_folder, exist_ok=True)
-                image_path = os.path.join(upload_folder, filename)
-                image_file.save(image_path)
-                image_filename = filename
+                image_filename = image_store.save(image_file)
             product_obj = Product(
                 name=name, description=description, price=price, stock=stock,
                 image=image_filename, size=size, color=color, category_id=category_id
             )
             db.session.add(product_obj)
             db.session.commit()
+            invalidate_feed()
+            invalidate_pages(PRODUCTS_TAG)
+            product_search.index_product(product_obj)
+            image_pipeline.enqueue_product(product_obj)
             log_admin_action(
                 current_user.idUser, 'crear', 'producto',
                 product_obj.id, f'Producto: {name}'
             )
             flash('Producto agregado correctamente.', 'success')
             return redirect(url_for('admin.products'))
+        except InvalidImageError:
+            db.session.rollback()
+            flash('La imagen debe ser JPG, PNG, GIF, WebP o AVIF.', 'danger')
         except ValueError as exc:
             current_app.logger.error(f'Error en add_product: {exc}')
             flash('Error en los datos numéricos.', 'danger')
@@ -768,6 +810,22 @@ def add_product():
             flash('Error al procesar imagen.', 'danger')
     return render_template('admin/add_product.html', form=form)
 
+
+def _replace_product_image(product_obj):
+    """Guarda la imagen subida, si hay, y libera la anterior. True si cambió."""
+    image_file = request.files.get('image')
+    if not image_file or not image_file.filename:
+        return False
+    previous_image = product_obj.image
+    product_obj.image = image_store.save(image_file)
+    image_store.release(previous_image)
+    if product_obj.image == previous_image:
+        return False
+    # Se sirve el original hasta que el pipeline genere las nuevas variantes
+    product_obj.image_variants = None
+    return True
+
+
 @admin_bp.route('/products/edit/<int:product_id>', methods=['GET', 'POST'])
 @login_required
 @admin_required
@@ -794,24 +852,23 @@ def edit_product(product_id):
                 not Category.query.get(product_obj.category_id)):
                 flash('Datos inválidos: precio > 0, stock >= 0 y categoría válida.', 'danger')
                 return redirect(url_for('admin.edit_product', product_id=product_id))
-            image_file = request.files.get('image')
-            if image_file and image_file.filename:
-                filename = secure_filename(image_file.filename)
-                upload_folder = os.path.join(
-                    current_app.root_path,
-                    current_app.config.get('UPLOAD_FOLDER', 'static/product_images')
-                )
-                os.makedirs(upload_folder, exist_ok=True)
-                image_path = os.path.join(upload_folder, filename)
-                image_file.save(image_path)
-                product_obj.image = filename
+            image_changed = _replace_product_image(product_obj)
             db.session.commit()
+            invalidate_feed()
+            invalidate_pages(PRODUCTS_TAG)
+            product_search.index_product(product_obj)
+            if image_changed:
+                image_pipeline.enqueue_product(product_obj)
             log_admin_action(
                 current_user.idUser, 'editar', 'producto',
                 product_obj.id, f'Editado: {product_obj.name}'
             )
             flash('Producto actualizado.', 'success')
             return redirect(url_for('admin.products'))
+        except InvalidImageError:
+            db.session.rollback()
+            flash('La imagen debe ser JPG, PNG, GIF, WebP o AVIF.', 'danger')
+            return redirect(url_for('admin.edit_product', product_id=product_id))
         except ValueError as exc:
             current_app.logger.error(f'Error en edit_product: {exc}')
             flash('Error en los datos numéricos.', 'danger')
@@ -839,11 +896,22 @@ def delete_product(product_id):
     product_obj = Product.query.get_or_404(product_id)
 
     # Eliminar order_details y wishlists relacionadas para evitar constraint violation
+    # (antes, restar sus líneas de los resúmenes de ventas)
+    sales_rollup.product_deleted(product_id)
     OrderDetail.query.filter_by(product_id=product_id).delete()
     Wishlist.query.filter_by(product_id=product_id).delete()
+    ProductRating.query.filter_by(product_id=product_id).delete()
+    ProductPopularity.query.filter_by(product_id=product_id).delete()
 
+    image_store.release(product_obj.image)
     db.session.delete(product_obj)
     db.session.commit()
+    # Después del commit, para que nadie vuelva a cachear el top con el producto
+    popularity.invalidate_top()
+    invalidate_feed()
+    invalidate_pages(PRODUCTS_TAG)
+    product_search.remove_product(product_id)
+    image_store.collect_garbage()
     flash('Producto eliminado.', 'info')
     return redirect(url_for('admin.products'))
 
@@ -865,6 +933,7 @@ def add_category():
         category_obj = Category(name=category_name, description=category_description)
         db.session.add(category_obj)
         db.session.commit()
+        invalidate_pages(CATEGORIES_TAG)
         log_admin_action(
             current_user.idUser, 'crear', 'categoria',
             category_obj.id, f'Categoría: {category_name}'
@@ -893,6 +962,7 @@ def edit_category(category_id):
             'description', category_obj.description
         ).strip()
         db.session.commit()
+        invalidate_pages(CATEGORIES_TAG)
         log_admin_action(
             current_user.idUser, 'editar', 'categoria',
             category_obj.id, f'Editada: {category_obj.name}'
@@ -920,6 +990,7 @@ def delete_category(category_id):
         return redirect(url_for('admin.categories'))
     db.session.delete(category_obj)
     db.session.commit()
+    invalidate_pages(CATEGORIES_TAG)
     flash('Categoría eliminada.', 'info')
     return redirect(url_for('admin.categories'))
 
@@ -947,6 +1018,7 @@ def update_stock(product_id):
             return redirect(url_for('admin.inventory'))
         product_obj.stock = new_stock
         db.session.commit()
+        invalidate_pages(PRODUCTS_TAG)
         flash(f'Stock de "{product_obj.name}" actualizado a {new_stock}.', 'success')
     except ValueError:
         flash('Valor de stock inválido.', 'danger')
@@ -972,7 +1044,7 @@ def moderate_reviews():
 def approve_review(review_id):
     """Aprueba una reseña."""
     review_obj = Review.query.get_or_404(review_id)
-    review_obj.aprobada = True
+    ratings.approve(review_obj)
     db.session.commit()
     flash('Reseña aprobada.', 'success')
     return redirect(url_for('admin.moderate_reviews'))
@@ -984,7 +1056,7 @@ def approve_review(review_id):
 def reject_review(review_id):
     """Rechaza y elimina una reseña."""
     review_obj = Review.query.get_or_404(review_id)
-    db.session.delete(review_obj)
+    ratings.remove(review_obj)
     db.session.commit()
     flash('Reseña eliminada.', 'info')
     return redirect(url_for('admin.moderate_reviews'))
@@ -995,40 +1067,42 @@ def reject_review(review_id):
 @login_required
 @admin_required
 def reports():
-    """Muestra reportes de ventas y estadísticas."""
-    total_sales = db.session.query(func.sum(Order.total)).scalar() or 0
-    sales_by_product = db.session.query(
-        Product.name,
-        func.sum(OrderDetail.quantity).label('cantidad'),
-        func.sum(OrderDetail.price * OrderDetail.quantity).label('total')
-    ).join(Product, OrderDetail.product_id == Product.id).group_by(
-        OrderDetail.product_id, Product.name
-    ).all()
-    sales_by_date = db.session.query(
-        func.date(Order.created_at).label('fecha'),
-        func.sum(Order.total).label('total')
-    ).group_by('fecha').all()
-    sales_by_date_formatted = [(str(fecha), total) for fecha, total in sales_by_date]
+    """Muestra reportes de ventas y estadísticas del rango de fechas pedido."""
+    start, end = sales_rollup.date_range(request.args)
+    days = sales_rollup.daily_sales(start, end)
     return render_template(
         'admin/reports.html',
-        total_ventas=total_sales,
-        ventas_por_producto=sales_by_product,
-        ventas_por_fecha=sales_by_date_formatted
+        start=start,
+        end=end,
+        total_ventas=sum(day.revenue for day in days),
+        total_reembolsos=sum(day.refunds for day in days),
+        ventas_por_producto=sales_rollup.product_sales(start, end),
+        ventas_por_fecha=[(str(day.day), day.revenue) for day in days]
     )
 
 
 # --- API DE VENTAS POR DÍA ---
+def _sales_version():
+    """Validadores de las ventas del rango: días y última actualización del resumen."""
+    start, end = sales_rollup.date_range(request.args)
+    days, last_update = db.session.query(
+        func.count(SalesDaily.day),  # pylint: disable=E1102
+        func.max(SalesDaily.updated_at)
+    ).filter(SalesDaily.day >= start, SalesDaily.day <= end).one()
+    return [start, end, days, last_update], None
+
+
 @admin_bp.route('/api/sales_by_day')
 @login_required
 @admin_required
+@conditional(_sales_version)
 def api_sales_by_day():
-    """API que retorna datos de ventas por día en formato JSON."""
-    sales_by_date = db.session.query(
-        func.date(Order.created_at).label('fecha'),
-        func.sum(Order.total).label('total')
-    ).group_by('fecha').order_by('fecha').all()
+    """API que retorna las ventas por día del rango ``start``-``end`` en JSON."""
+    start, end = sales_rollup.date_range(request.args)
+    days = sales_rollup.daily_sales(start, end)
     sales_data = {
-        'labels': [str(fecha) for fecha, _ in sales_by_date],
-        'totals': [float(total) for _, total in sales_by_date]
+        'labels': [str(day.day) for day in days],
+        'totals': [float(day.revenue) for day in days],
+        'refunds': [float(day.refunds) for day in days]
     }
     return sales_data
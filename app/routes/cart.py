@@ -7,19 +7,22 @@ Este módulo maneja la visualización, adición, eliminación y checkout del car
 import hashlib
 import uuid
 
-import requests
 from flask import (
     Blueprint, jsonify, render_template, redirect, url_for,
     request, flash, current_app
 )
 from flask_login import login_required, current_user
+from sqlalchemy.exc import SQLAlchemyError
 from app.extensions import csrf
 from app import db
 from app.models.cart import Cart, CartItem
 from app.models.products import Product
-from app.models.orders import (
-    Order, OrderDetail
+from app.models.orders import Order
+from app.services.checkout import cancel_checkout, checkout_cart
+from app.services.payments import (
+    PAYABLE_STATUSES, PAYMENT_STATUS_EVENT, STATUS_PROCESSING, payment_queue
 )
+from app.services.payu import CircuitOpenError, PaymentGatewayError, payu_client
 
 cart_bp = Blueprint('cart', __name__, url_prefix='/cart')
 
@@ -118,32 +121,73 @@ def checkout():
     total = sum(item.quantity * item.product.price for item in cart.items)
     if request.method == 'POST':
         try:
-            # Crear orden
-            order = Order(user_id=current_user.idUser, total=total)
-            db.session.add(order)
-            db.session.commit()  # Commit para obtener order.id
-            for item in cart.items:
-                detail = OrderDetail(
-                    order_id=order.id,
-                    product_id=item.product_id,
-                    quantity=item.quantity,
-                    price=item.product.price
-                )
-                db.session.add(detail)
-                # Reducir stock
-                item.product.stock -= item.quantity
-            db.session.commit()
-            # Vaciar carrito
-            db.session.delete(cart)
-            db.session.commit()
-            flash('Pedido confirmado. Redirigiendo a la pasarela de pago...', 'success')
-            return redirect(url_for('cart.payment', order_id=order.id))
-        except (ValueError, TypeError) as e:
-            db.session.rollback()
+            result = checkout_cart(current_user.idUser)
+        except SQLAlchemyError as e:
             current_app.logger.error(f'Error en checkout: {e}')
             flash('Error al confirmar pedido.', 'danger')
+            return redirect(url_for('cart.view_cart'))
+        if not result.ok:
+            flash(result.message(), 'danger')
+            return redirect(url_for('cart.view_cart'))
+        flash('Pedido confirmado. Redirigiendo a la pasarela de pago...', 'success')
+        return redirect(url_for('orders.pay', order_id=result.order.id))
     return render_template('cart/checkout.html', items=cart.items, total=total)
 
+
+def _start_payu_checkout(order, api_key, merchant_id, account_id):
+    """Envía el pedido a PayU; devuelve la redirección o None si no se pudo."""
+    total = order.total
+    try:
+        # Configuración PayU
+        test_mode = current_app.config.get('PAYU_TEST_MODE', True)
+        response_url = url_for('cart.view_cart', _external=True)
+        confirmation_url = url_for('webhook.payu_webhook', _external=True)
+
+        # Generar referencia única
+        reference_code = f"ORDER_{order.id}_{uuid.uuid4().hex[:8]}"
+
+        # Crear firma MD5
+        signature_string = f"{api_key}~{merchant_id}~{reference_code}~{int(total)}~COP"
+        signature = hashlib.md5(signature_string.encode('utf-8')).hexdigest()
+
+        # Datos para PayU
+        payu_data = {
+            'merchantId': merchant_id,
+            'accountId': account_id,
+            'description': f'Compra en SAMMS.FO - Orden {order.id}',
+            'referenceCode': reference_code,
+            'amount': str(int(total)),
+            'currency': 'COP',
+            'tax': '0',
+            'taxReturnBase': '0',
+            'signature': signature,
+            'test': '1' if test_mode else '0',
+            'buyerEmail': current_user.email,
+            'buyerFullName': current_user.nameUser,
+            'responseUrl': response_url,
+            'confirmationUrl': confirmation_url,
+            'extra1': str(order.id),
+            'lng': 'es'
+        }
+
+        # Enviar a PayU y redirigir
+        response = payu_client.post_checkout(payu_data, allow_redirects=False)
+        if response.status_code in [200, 302]:
+            return redirect(response.headers.get('Location', response.url), code=303)
+        else:
+            current_app.logger.error(
+                f'PayU error: {response.status_code} - {response.text}'
+            )
+            flash('Error al procesar pago.', 'danger')
+
+    except CircuitOpenError:
+        flash('PayU no está disponible en este momento, intenta más tarde.', 'danger')
+    except PaymentGatewayError as e:
+        current_app.logger.error(f'PayU request failed: {e}')
+        flash('Error de conexión con PayU.', 'danger')
+    return None
+
+
 @cart_bp.route('/payment', methods=['GET', 'POST'])
 @login_required
 @csrf.exempt
@@ -167,73 +211,22 @@ def payment():
 
     if request.method == 'POST':
         metodo = request.form.get('metodo_pago')
+        if metodo in ('simulada', 'payu'):
+            # Crear el pedido reservando el stock antes de ir a pagar
+            result = checkout_cart(current_user.idUser)
+            if not result.ok:
+                flash(result.message(), 'danger')
+                return redirect(url_for('cart.view_cart'))
+            order = result.order
+            total = order.total
         if metodo == 'simulada':
-            # Crear orden primero
-            order = Order(user_id=current_user.idUser, total=total, status='pendiente')
-            db.session.add(order)
-            db.session.commit()
             return redirect(url_for('cart.payment_simulated', order_id=order.id))
         elif metodo == 'payu':
-            try:
-                # Crear orden primero
-                order = Order(user_id=current_user.idUser, total=total, status='pendiente')
-                db.session.add(order)
-                db.session.commit()
-
-                # Configuración PayU
-                test_mode = current_app.config.get('PAYU_TEST_MODE', True)
-                base_url = (
-                    'https://sandbox.checkout.payulatam.com' if test_mode
-                    else 'https://checkout.payulatam.com'
-                )
-                response_url = url_for('cart.view_cart', _external=True)
-                confirmation_url = url_for('webhook.payu_webhook', _external=True)
-
-                # Generar referencia única
-                reference_code = f"ORDER_{order.id}_{uuid.uuid4().hex[:8]}"
-
-                # Crear firma MD5
-                signature_string = f"{api_key}~{merchant_id}~{reference_code}~{int(total)}~COP"
-                signature = hashlib.md5(signature_string.encode('utf-8')).hexdigest()
-
-                # Datos para PayU
-                payu_data = {
-                    'merchantId': merchant_id,
-                    'accountId': account_id,
-                    'description': f'Compra en SAMMS.FO - Orden {order.id}',
-                    'referenceCode': reference_code,
-                    'amount': str(int(total)),
-                    'currency': 'COP',
-                    'tax': '0',
-                    'taxReturnBase': '0',
-                    'signature': signature,
-                    'test': '1' if test_mode else '0',
-                    'buyerEmail': current_user.email,
-                    'buyerFullName': current_user.nameUser,
-                    'responseUrl': response_url,
-                    'confirmationUrl': confirmation_url,
-                    'extra1': str(order.id),
-                    'lng': 'es'
-                }
-
-                # Enviar a PayU y redirigir
-                response = requests.post(
-                    f'{base_url}/ppp-web-gateway-payu/',
-                    data=payu_data,
-                    timeout=30,
-                    allow_redirects=False
-                )
-                if response.status_code in [200, 302]:
-                    return redirect(response.headers.get('Location', response.url), code=303)
-                else:
-                    current_app.logger.error(
-                        f'PayU error: {response.status_code} - {response.text}'
-                    )
-                    flash('Error al procesar pago.', 'danger')
-
-            except requests.RequestException as e:
-                current_app.logger.error(f'PayU request failed: {e}')
-                flash('Error de conexión con PayU.', 'danger')
+            response = _start_payu_checkout(order, api_key, merchant_id, account_id)
+            if response is not None:
+                return response
+            # No se pudo ir a pagar: devolver el stock y los productos al carrito
+            cancel_checkout(order)
 
         elif metodo == 'nequi':
             flash('Realiza tu pago a Nequi: 3001234567 y envía el comprobante.', 'info')
@@ -256,42 +249,35 @@ def payment_simulated(order_id):
         flash('Acceso denegado.', 'danger')
         return redirect(url_for('cart.view_cart'))
 
+    if order.status not in PAYABLE_STATUSES:
+        flash('Este pedido ya no admite pagos.', 'info')
+        return redirect(url_for('orders.detail', order_id=order.id))
+
     if request.method == 'POST':
-        # Simular procesamiento de pago
-        import time
-        time.sleep(2)  # Simular delay de procesamiento
+        # El cobro se procesa en segundo plano; la página de estado espera
+        # el aviso por Socket.IO sin bloquear esta petición.
+        payment_queue.enqueue(order.id, 'simulada')
+        return redirect(url_for('cart.payment_status', order_id=order.id))
 
-        # Marcar orden como pagada
-        order.status = 'pagado'
-        db.session.commit()
+    return render_template('cart/payment_simulated.html', order=order)
 
-        # Procesar carrito solo si el pedido no tiene detalles
-        if not order.details:
-            cart = Cart.query.filter_by(user_id=current_user.idUser).first()
-            if cart:
-                for item in cart.items:
-                    detail = OrderDetail(
-                        order_id=order.id,
-                        product_id=item.product_id,
-                        quantity=item.quantity,
-                        price=item.price_snapshot
-                    )
-                    db.session.add(detail)
-                    product = Product.query.get(item.product_id)
-                    if product:
-                        product.stock = max(0, product.stock - item.quantity)
-                    db.session.delete(item)
-                db.session.delete(cart)
-        else:
-            # Si el pedido ya tiene detalles, reducir stock de los productos
-            for detail in order.details:
-                product = Product.query.get(detail.product_id)
-                if product:
-                    product.stock = max(0, product.stock - detail.quantity)
 
-        db.session.commit()
+@cart_bp.route('/payment/status/<int:order_id>')
+@login_required
+def payment_status(order_id):
+    """Muestra el estado de un pago en proceso hasta que el worker lo resuelva."""
+    order = Order.query.get_or_404(order_id)
+    if order.user_id != current_user.idUser:
+        flash('Acceso denegado.', 'danger')
+        return redirect(url_for('cart.view_cart'))
 
-        flash('Pago simulado exitoso. ¡Gracias por tu compra!', 'success')
+    if request.args.get('format') == 'json':
+        return jsonify({'order_id': order.id, 'status': order.status})
+    if order.status != STATUS_PROCESSING:
+        if order.status == 'pagado':
+            flash('Pago exitoso. ¡Gracias por tu compra!', 'success')
+        else:
+            flash('No pudimos completar el pago.', 'danger')
         return redirect(url_for('orders.detail', order_id=order.id))
-
-    return render_template('cart/payment_simulated.html', order=order)
+    return render_template('cart/payment_status.html', order=order,
+                           status_event=PAYMENT_STATUS_EVENT)
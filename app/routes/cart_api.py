@@ -8,18 +8,37 @@ y procesar pagos a través de PayU.
 import hashlib
 import uuid
 
-import requests
 from flask import Blueprint, jsonify, request, current_app, url_for
 from flask_login import login_required, current_user
+from sqlalchemy import func
 from app import db
+from app.extensions import csrf, limiter
 from app.models.cart import Cart, CartItem
 from app.models.products import Product
-from app.models.orders import Order, OrderDetail
+from app.models.orders import Order
+from app.services.checkout import cancel_checkout, checkout_cart
+from app.services.conditional import conditional
+from app.services.payments import payment_queue, record_notification
+from app.services.payu import CircuitOpenError, PaymentGatewayError, payu_client
 
 cart_api_bp = Blueprint('cart_api', __name__, url_prefix='/api/cart')
 
+def _cart_version():
+    """Validadores del carrito: una sola consulta agregada sobre sus items."""
+    return list(db.session.query(
+        func.count(CartItem.id),  # pylint: disable=E1102
+        func.sum(CartItem.quantity),
+        func.sum(CartItem.id * CartItem.quantity),
+        func.sum(CartItem.price_snapshot * CartItem.quantity),
+        func.max(Product.updated_at)
+    ).join(Cart, CartItem.cart_id == Cart.id)
+     .join(Product, CartItem.product_id == Product.id)
+     .filter(Cart.user_id == current_user.idUser).one()), None
+
+
 @cart_api_bp.route('/', methods=['GET'])
 @login_required
+@conditional(_cart_version)
 def get_cart():
     """Obtiene los items del carrito del usuario actual."""
     cart = Cart.query.filter_by(user_id=current_user.idUser).first()
@@ -104,18 +123,6 @@ def remove_item():
 @login_required
 def create_checkout_session():
     """Crea una sesión de checkout con PayU."""
-    cart = Cart.query.filter_by(user_id=current_user.idUser).first()
-    items = cart.items if cart else []
-    if not items:
-        return jsonify({'error': 'Carrito vacío'}), 400
-
-    total = sum(item.quantity * item.price_snapshot for item in items)
-
-    # Crear orden primero
-    order = Order(user_id=current_user.idUser, total=total, status='pendiente')
-    db.session.add(order)
-    db.session.commit()
-
     # Configuración PayU
     api_key = current_app.config.get('PAYU_API_KEY')
     api_login = current_app.config.get('PAYU_API_LOGIN')
@@ -126,11 +133,15 @@ def create_checkout_session():
     if not all([api_key, api_login, merchant_id, account_id]):
         return jsonify({'error': 'Configuración de PayU incompleta'}), 500
 
-    # URLs de PayU
-    base_url = (
-        'https://sandbox.checkout.payulatam.com' if test_mode
-        else 'https://checkout.payulatam.com'
-    )
+    # Crear el pedido reservando el stock antes de ir a pagar
+    result = checkout_cart(current_user.idUser)
+    if result.empty:
+        return jsonify({'error': 'Carrito vacío'}), 400
+    if not result.ok:
+        return jsonify({'error': result.message(), 'failures': result.failures}), 409
+    order = result.order
+    total = order.total
+
     response_url = (
         request.host_url.rstrip('/') +
         url_for('cart_api.checkout_success')
@@ -167,18 +178,25 @@ def create_checkout_session():
         'lng': 'es'
     }
 
-    # Enviar a PayU
+    # Enviar a PayU por el cliente compartido (pool, reintentos y circuit breaker)
     try:
-        response = requests.post(f'{base_url}/ppp-web-gateway-payu/', data=payu_data, timeout=30)
+        response = payu_client.post_checkout(payu_data)
         if response.status_code == 200:
             # PayU redirige automáticamente, devolver la URL
             return jsonify({'url': response.url, 'order_id': order.id})
-        else:
-            current_app.logger.error(f'PayU error: {response.status_code} - {response.text}')
-            return jsonify({'error': 'Error al procesar pago'}), 500
-    except requests.RequestException as e:
+        current_app.logger.error(
+            f'PayU error: {response.status_code} - {response.text}'
+        )
+        error = ({'error': 'Error al procesar pago'}, 500)
+    except CircuitOpenError:
+        error = ({'error': 'PayU no está disponible, intenta más tarde'}, 503)
+    except PaymentGatewayError as e:
         current_app.logger.error(f'PayU request failed: {e}')
-        return jsonify({'error': 'Error de conexión con PayU'}), 500
+        error = ({'error': 'Error de conexión con PayU'}, 502)
+    # No se pudo ir a pagar: devolver el stock y los productos al carrito
+    cancel_checkout(order)
+    body, status_code = error
+    return jsonify(body), status_code
 
 @cart_api_bp.route('/success')
 def checkout_success():
@@ -194,6 +212,8 @@ def checkout_cancel():
 webhook_bp = Blueprint('webhook', __name__, url_prefix='/webhook')
 
 @webhook_bp.route('/payu', methods=['POST'])
+@limiter.exempt  # Llega desde pocas IPs de PayU y ya se valida por firma
+@csrf.exempt  # PayU no envía token CSRF; la firma autentica la petición
 def payu_webhook():
     """Webhook para procesar notificaciones de PayU."""
     # PayU envía datos por POST sin firma especial
@@ -216,42 +236,25 @@ def payu_webhook():
         current_app.logger.error('PayU webhook signature mismatch')
         return 'ERROR', 400
 
-    # Procesar pago aprobado
-    if state_pol == '4':  # Aprobado
-        # Extraer order_id de reference_sale (formato: ORDER_{order_id}_{random})
-        try:
-            order_id = int(reference_sale.split('_')[1])
-        except (IndexError, ValueError):
-            current_app.logger.error(f'Invalid reference_sale format: {reference_sale}')
-            return 'ERROR', 400
-
-        order = Order.query.get(order_id)
-        if not order:
-            current_app.logger.error(f'Order not found: {order_id}')
-            return 'ERROR', 400
-
-        # Marcar orden como pagada
-        order.status = 'pagado'
-        db.session.commit()
+    # Extraer order_id de reference_sale (formato: ORDER_{order_id}_{random})
+    try:
+        order_id = int(reference_sale.split('_')[1])
+    except (AttributeError, IndexError, ValueError):
+        current_app.logger.error(f'Invalid reference_sale format: {reference_sale}')
+        return 'ERROR', 400
 
-        # Procesar carrito (si existe)
-        cart = Cart.query.filter_by(user_id=order.user_id).first()
-        if cart:
-            for item in cart.items:
-                detail = OrderDetail(
-                    order_id=order.id,
-                    product_id=item.product_id,
-                    quantity=item.quantity,
-                    price=item.price_snapshot
-                )
-                db.session.add(detail)
-                product = Product.query.get(item.product_id)
-                if product:
-                    product.stock = max(0, product.stock - item.quantity)
-                db.session.delete(item)
-            db.session.delete(cart)
-            db.session.commit()
+    if db.session.query(Order.id).filter_by(id=order_id).scalar() is None:
+        current_app.logger.error(f'Order not found: {order_id}')
+        return 'ERROR', 400
 
-        current_app.logger.info(f'PayU payment approved for order {order_id}')
+    # Registrar la confirmación una sola vez y responder enseguida; el
+    # cambio de estado lo aplica el worker de pagos.
+    notification_id = record_notification(order_id, data)
+    if notification_id is not None:
+        payment_queue.enqueue_notification(notification_id)
+        current_app.logger.info(
+            f'PayU notification {reference_sale} state {state_pol}'
+            f' queued for order {order_id}'
+        )
 
     return 'OK', 200
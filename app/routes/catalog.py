@@ -5,98 +5,154 @@ Este módulo maneja todas las rutas relacionadas con el catálogo
 de productos: mostrar productos, detalles, filtros, etc.
 """
 
-from flask import Blueprint, render_template, request
+from flask import Blueprint, current_app, render_template, request, session
 from flask_login import current_user
-from app import cache
+from sqlalchemy.exc import SQLAlchemyError
+from app.db import db
 from app.models.products import Product, Category
 from app.models.wishlist import Wishlist
-from app.models.reviews import Review
-from app.models.users import Users
+from app.models.reviews import ProductRating
+from app.services import ratings
+from app.services.conditional import conditional
+from app.services.page_cache import CATALOG_TAGS, cached_page, normalize_catalog_args
+from app.services.search import product_search
 
 catalog_bp = Blueprint('catalog', __name__, url_prefix='/catalog')
 
 @catalog_bp.route('/destacados')
-@cache.cached(timeout=300)
 def destacados():
     """Mostrar productos destacados."""
-    products = Product.query.filter_by(destacado=True)\
-        .order_by(Product.created_at.desc()).limit(12).all()
-    return render_template(
-        'catalog/catalog.html',
-        products=products,
-        categories=Category.query.all(),
-        favoritos=[],
-        pagination=None
-    )
+    def render():
+        products = Product.query.filter_by(destacado=True)\
+            .order_by(Product.created_at.desc()).limit(12).all()
+        return render_template(
+            'catalog/catalog.html',
+            products=products,
+            categories=Category.query.all(),
+            favoritos=[],
+            pagination=None,
+            filters={},
+            link_args={}
+        )
+    return cached_page('destacados', {}, CATALOG_TAGS, render)
 
 @catalog_bp.route('/')
 def catalog():
     """Mostrar el catálogo de productos con filtros y paginación."""
-    category_id = request.args.get('category')
-    q = request.args.get('q', '').strip()
-    min_price = request.args.get('min_price', type=float)
-    max_price = request.args.get('max_price', type=float)
-    color = request.args.get('color', '').strip()
-    size = request.args.get('size', '').strip()
-    page = request.args.get('page', 1, type=int)
-    per_page = 12  # Número de productos por página
+    filters = normalize_catalog_args(request.args)
+    favoritos = []
+    if hasattr(current_user, 'idUser'):
+        favoritos = [
+            w.product_id
+            for w in Wishlist.query.filter_by(user_id=current_user.idUser).all()
+        ]
+    return cached_page(
+        'catalog', filters, CATALOG_TAGS, lambda: _render_catalog(filters, favoritos)
+    )
+
+
+def _catalog_query(filters, use_index=True):
+    """
+    Consulta de productos con los filtros del catálogo, ya ordenada.
+
+    Con texto de búsqueda se une a la subconsulta del índice, así filtros
+    y paginación recorren todas las coincidencias en orden de relevancia;
+    sin índice se busca con ILIKE.
+    """
     products_query = Product.query
-    if category_id:
-        products_query = products_query.filter_by(category_id=category_id)
+    order_by = [Product.created_at.desc()]
+    if filters.get('category'):
+        products_query = products_query.filter_by(category_id=filters['category'])
+    q = filters.get('q')
     if q:
-        products_query = products_query.filter(
-            (Product.name.ilike(f'%{q}%')) | (Product.description.ilike(f'%{q}%'))
-        )
-    if min_price is not None:
-        products_query = products_query.filter(Product.price >= min_price)
-    if max_price is not None:
-        products_query = products_query.filter(Product.price <= max_price)
+        ranked = product_search.ranked(q) if use_index else None
+        if ranked is None:
+            # Sin índice disponible: búsqueda lineal como respaldo
+            products_query = products_query.filter(
+                (Product.name.ilike(f'%{q}%')) | (Product.description.ilike(f'%{q}%'))
+            )
+        else:
+            products_query = products_query.join(
+                ranked, ranked.c.product_id == Product.id
+            )
+            order_by = [ranked.c.rank, Product.id.desc()]
+    if filters.get('min_price') is not None:
+        products_query = products_query.filter(Product.price >= filters['min_price'])
+    if filters.get('max_price') is not None:
+        products_query = products_query.filter(Product.price <= filters['max_price'])
+    color = filters.get('color')
     if color:
         products_query = products_query.filter(Product.color.ilike(f'%{color}%'))
+    size = filters.get('size')
     if size:
         products_query = products_query.filter(Product.size.ilike(f'%{size}%'))
-    products_pagination = products_query.order_by(Product.created_at.desc())\
-        .paginate(page=page, per_page=per_page, error_out=False)
+    return products_query.order_by(*order_by)
+
+
+def _render_catalog(filters, favoritos):
+    """Consulta y renderiza una página del catálogo con filtros ya normalizados."""
+    page = filters.get('page', 1)
+    per_page = 12  # Número de productos por página
+    try:
+        products_pagination = _catalog_query(filters)\
+            .paginate(page=page, per_page=per_page, error_out=False)
+    except SQLAlchemyError as exc:
+        db.session.rollback()
+        current_app.logger.warning(f'Índice de búsqueda no disponible: {exc}')
+        products_pagination = _catalog_query(filters, use_index=False)\
+            .paginate(page=page, per_page=per_page, error_out=False)
     categories = Category.query.all()
-    favoritos = []
-    if hasattr(current_user, 'idUser'):
-        favoritos = [
-            w.product_id for w in Wishlist.query.filter_by(user_id=current_user.idUser).all()
-        ]
     return render_template(
         'catalog/catalog.html',
         products=products_pagination.items,
         categories=categories,
         favoritos=favoritos,
-        pagination=products_pagination
+        pagination=products_pagination,
+        filters=filters,
+        # Filtros que conservan los enlaces de paginación
+        link_args={key: value for key, value in filters.items() if key != 'page'}
     )
 
+
+def _product_version(product_id):
+    """Validadores del detalle: producto, agregados de reseñas y estado del usuario."""
+    row = db.session.query(
+        Product.updated_at, ProductRating.count, ProductRating.updated_at
+    ).outerjoin(
+        ProductRating, ProductRating.product_id == Product.id
+    ).filter(Product.id == product_id).first()
+    if row is None:
+        return None
+    updated_at, reviews, reviews_updated_at = row
+    parts = [product_id, updated_at, reviews, reviews_updated_at]
+    if current_user.is_authenticated:
+        parts += [_is_favorite(product_id), current_user.role.name,
+                  session.get('wishlist_count')]
+    dates = [date for date in (updated_at, reviews_updated_at) if date is not None]
+    return parts, max(dates) if dates else None
+
+
+def _is_favorite(product_id):
+    return db.session.query(Wishlist.id).filter_by(
+        user_id=current_user.idUser, product_id=product_id
+    ).first() is not None
+
+
 @catalog_bp.route('/product/<int:product_id>', endpoint='product_detail')
+@conditional(_product_version, weak=True, csrf=True)
 def product_detail(product_id):
     """Mostrar detalles de un producto específico."""
     product = Product.query.get_or_404(product_id)
     favoritos = []
-    if hasattr(current_user, 'idUser'):
-        favoritos = [
-            w.product_id for w in Wishlist.query.filter_by(user_id=current_user.idUser).all()
-        ]
-    # Obtener reseñas del producto
-    reviews = Review.query.filter_by(product_id=product_id, aprobada=True)\
-        .order_by(Review.created_at.desc()).all()
-    # Enriquecer con nombre de usuario
-    reviews_data = []
-    for r in reviews:
-        user = Users.query.get(r.user_id)
-        reviews_data.append({
-            'user_name': user.nameUser if user else 'Usuario',
-            'rating': r.rating,
-            'comment': r.comment,
-            'date': r.created_at,
-            'image_path': r.image_path
-        })
+    if current_user.is_authenticated and _is_favorite(product_id):
+        favoritos = [product_id]
+    # Agregados y primera página de reseñas aprobadas, con el autor en la misma consulta
+    reviews, more_reviews = ratings.approved_reviews(product_id)
     return render_template(
         'catalog/product_detail.html',
         product=product,
-        reviews=reviews_data,
+        rating=ratings.get_rating(product_id),
+        reviews=reviews,
+        more_reviews=more_reviews,
         favoritos=favoritos
     )
@@ -13,13 +13,12 @@ from flask import (
 )
 from flask_login import login_required, current_user
 from werkzeug.utils import secure_filename
-from sqlalchemy import func
 import bcrypt
 from app import db
-from app.models.products import Product
 from app.models.support_ticket import SupportTicket
-from app.models.orders import Order, OrderDetail
 from app.models.users import Users
+from app.services.feed import build_feed
+from app.services.images import image_pipeline
 
 client_bp = Blueprint('client', __name__)
 
@@ -60,50 +59,8 @@ def social():
 @client_bp.route('/')
 def feed():
     """Mostrar el feed principal con productos."""
-    destacados = Product.query.filter_by(destacado=True).all()
-    normales = Product.query.filter_by(destacado=False).all()
-    promociones = Product.query.filter(Product.promo is not None).all()
-    recomendaciones_historial = []
-    if hasattr(current_user, 'idUser'):
-        user_orders = Order.query.filter_by(user_id=current_user.idUser).all()
-        product_ids = set()
-        for order in user_orders:
-            for detail in order.details:
-                product_ids.add(detail.product_id)
-        if product_ids:
-            categorias = set([
-                Product.query.get(pid).category_id
-                for pid in product_ids if Product.query.get(pid)
-            ])
-            recomendaciones_historial = Product.query.filter(
-                Product.category_id.in_(categorias), ~Product.id.in_(product_ids)
-            ).limit(8).all()
-    # Consulta robusta para productos más vendidos
-    populares_ids = (
-        db.session.query(
-            OrderDetail.product_id,
-            func.count(OrderDetail.id).label('ventas')  # pylint: disable=E1102
-        )
-        .group_by(OrderDetail.product_id)
-        .order_by(func.count(OrderDetail.id).desc())  # pylint: disable=E1102
-        .limit(8)
-        .all()
-    )
-    populares = []
-    for pid, _ in populares_ids:
-        prod = Product.query.get(pid)
-        if prod:
-            populares.append(prod)
-    # Mezcla destacados y normales para el feed
-    products = destacados + [p for p in normales if p not in destacados]
-    return render_template(
-        'client/feed.html',
-        products=products,
-        promociones=promociones,
-        destacados=destacados,
-        recomendaciones_historial=recomendaciones_historial,
-        populares=populares
-    )
+    user_id = current_user.idUser if hasattr(current_user, 'idUser') else None
+    return render_template('client/feed.html', **build_feed(user_id))
 
 @client_bp.route('/dashboard')
 @login_required
@@ -150,6 +107,8 @@ def profile():
             file.save(path)
             user.profile_pic = filename
         db.session.commit()
+        if file and file.filename:
+            image_pipeline.enqueue_profile_pic(user)
         flash('Perfil actualizado correctamente.', 'success')
         return redirect(url_for('client.profile'))
     return render_template('client/profile.html')
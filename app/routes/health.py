@@ -20,6 +20,7 @@ except ImportError:
 
 # Import de base de datos
 from app.db import db
+from app.services.payu import payu_client
 
 health_bp = Blueprint('health', __name__)
 
@@ -98,7 +99,8 @@ def metrics():
             'used_gb': psutil.disk_usage('/').used / 1024 / 1024 / 1024,
             'free_gb': psutil.disk_usage('/').free / 1024 / 1024 / 1024,
             'percentage': psutil.disk_usage('/').percent
-        }
+        },
+        'payment_gateway': payu_client.metrics()
     })
 
 
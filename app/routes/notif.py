@@ -1,20 +1,24 @@
 
-from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify
+from flask import Blueprint, render_template, request, jsonify
 from flask_login import login_required, current_user
+from flask_socketio import join_room
 from app import db
+from app.extensions import socketio
 from app.models.notifications import Notification
-from datetime import datetime
+from app.services.notifications import emit_unread_count, user_room
 
 notif_bp = Blueprint('notif', __name__, url_prefix='/notificaciones')
 
-@notif_bp.route('/api/check', methods=['GET'])
-@login_required
-def check_new():
-    # Devuelve la notificación más reciente no leída
-    notif = Notification.query.filter_by(user_id=current_user.idUser, leida=False).order_by(Notification.fecha.desc()).first()
-    if notif:
-        return jsonify({'new': True, 'mensaje': notif.mensaje, 'id': notif.id})
-    return jsonify({'new': False})
+
+@socketio.on('connect')
+def connect():
+    # Cada usuario autenticado escucha solo su sala privada; los anónimos no
+    # reciben notificaciones, así que se rechaza la conexión.
+    if not current_user.is_authenticated:
+        return False
+    join_room(user_room(current_user.idUser))
+    emit_unread_count(current_user.idUser, to=request.sid)
+    return True
 
 
 def get_user_notifs():
@@ -35,6 +39,7 @@ def marcar_leida(notif_id):
     if notif:
         notif.leida = True
         db.session.commit()
+        emit_unread_count(current_user.idUser)
     return jsonify({'ok': True})
 
 
@@ -45,4 +50,5 @@ def eliminar(notif_id):
     if notif:
         db.session.delete(notif)
         db.session.commit()
+        emit_unread_count(current_user.idUser)
     return jsonify({'ok': True})
@@ -1,28 +1,20 @@
 from flask import Blueprint, render_template, redirect, url_for, flash, request
 from flask_login import login_required, current_user
 from app import db
-from app.models.orders import Order, OrderDetail
-from app.models.cart import Cart, CartItem
-from app.models.products import Product
+from app.models.orders import Order
+from app.services import sales_rollup
+from app.services.checkout import checkout_cart
+from app.services.notifications import notify
 
 orders_bp = Blueprint('orders', __name__, url_prefix='/orders')
 
 @orders_bp.route('/checkout', methods=['POST'])
 @login_required
 def checkout():
-    cart = Cart.query.filter_by(user_id=current_user.idUser).first()
-    if not cart or not cart.items:
-        flash('Tu carrito está vacío.', 'danger')
+    result = checkout_cart(current_user.idUser)
+    if not result.ok:
+        flash(result.message(), 'danger')
         return redirect(url_for('cart.view_cart'))
-    total = sum(item.quantity * item.product.price for item in cart.items)
-    order = Order(user_id=current_user.idUser, total=total, status='pendiente')
-    db.session.add(order)
-    db.session.commit()
-    for item in cart.items:
-        detail = OrderDetail(order_id=order.id, product_id=item.product_id, quantity=item.quantity, price=item.product.price)
-        db.session.add(detail)
-        db.session.delete(item)
-    db.session.commit()
     flash('Pedido realizado correctamente. (Simulación, falta pago real)', 'success')
     return redirect(url_for('orders.history'))
 
@@ -41,16 +33,11 @@ def detail(order_id):
         return redirect(url_for('orders.history'))
     # Simulación: Si el usuario accede al detalle y el pedido está pendiente, lo marcamos como enviado y notificamos
     if order.status == 'pendiente':
-        order.status = 'enviado'
-        db.session.commit()
-        # Crear notificación
-        from app.models.notifications import Notification
-        notif = Notification(user_id=current_user.idUser, mensaje=f'Tu pedido #{order.id} ha sido enviado.')
-        db.session.add(notif)
-        db.session.commit()
-        # Emitir notificación en tiempo real por WebSocket
-        from app import socketio
-        socketio.emit('nueva_notificacion', {'mensaje': notif.mensaje}, room=None)
+        # UPDATE condicional: si otra petición ya lo cambió no se cuenta dos veces
+        if sales_rollup.change_status(order, 'pendiente', 'enviado'):
+            db.session.commit()
+            # Crear la notificación y enviarla solo a la sala del usuario
+            notify(order.user_id, f'Tu pedido #{order.id} ha sido enviado.')
         return redirect(url_for('orders.history'))
     return render_template('orders/detail.html', order=order)
 
@@ -69,18 +56,10 @@ def pay(order_id):
 
     # Si el pedido no tiene detalles (creado desde simulación), intentar crearlos desde el carrito
     if not order.details:
-        cart = Cart.query.filter_by(user_id=current_user.idUser).first()
-        if cart and cart.items:
-            # Crear detalles del pedido desde el carrito
-            for item in cart.items:
-                detail = OrderDetail(
-                    order_id=order.id,
-                    product_id=item.product_id,
-                    quantity=item.quantity,
-                    price=item.product.price
-                )
-                db.session.add(detail)
-            db.session.commit()
+        result = checkout_cart(current_user.idUser, order=order)
+        if not result.ok and not result.empty:
+            flash(result.message(), 'danger')
+            return redirect(url_for('cart.view_cart'))
 
     if request.method == 'POST':
         # Redirigir a la pasarela de pago simulada
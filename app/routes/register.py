@@ -19,7 +19,7 @@ def register():
     """Maneja el registro de nuevos usuarios."""
     from app import db
     from app.models.users import Users, UserRole
-    from app import mail
+    from app.services.mailer import mail_outbox
 
     if request.method == 'POST':
         nameUser = request.form.get('nameUser', '').strip()
@@ -97,8 +97,8 @@ def register():
                           recipients=[email])
             msg.body = f'Hola {nameUser},\n\nPara activar tu cuenta, haz clic en el siguiente enlace:\n{verify_url}\n\nSi no solicitaste esta cuenta, ignora este mensaje.'
             msg.html = f'<p>Hola {nameUser},</p><p>Para activar tu cuenta, haz clic en el siguiente enlace:</p><p><a href="{verify_url}">Verificar cuenta</a></p><p>Si no solicitaste esta cuenta, ignora este mensaje.</p>'
-            mail.send(msg)
-            print(f"Email enviado a: {email}")
+            mail_outbox.send(msg)
+            print(f"Email encolado para: {email}")
         except Exception as e:
             print(f"Error enviando email: {e}")
             # Para desarrollo: mostrar URL en consola
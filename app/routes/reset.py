@@ -1,8 +1,10 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app
 from app.models.users import Users
-from app import db, mail
+from app import db
 from app.extensions import csrf
 from flask_mail import Message
+from app.services.mailer import mail_outbox
+from app.services.sms import sms_sender
 import secrets
 from datetime import datetime, timedelta
 
@@ -27,7 +29,7 @@ def request_reset():
             reset_url = url_for('reset.reset_password', token=token, _external=True)
             msg = Message('Recupera tu contraseña', recipients=[user.email])
             msg.body = f'Para restablecer tu contraseña, haz clic en el siguiente enlace: {reset_url}\nEste enlace expirará en 1 hora.'
-            mail.send(msg)
+            mail_outbox.send(msg)
             flash('Se ha enviado un correo con instrucciones para restablecer tu contraseña.', 'success')
             return redirect(url_for('auth.login'))
 
@@ -43,36 +45,23 @@ def request_reset():
                 flash('No existe una cuenta con ese número de teléfono.', 'danger')
                 return render_template('reset/request_reset.html')
 
+            if not sms_sender.allow(phone):
+                flash('Se enviaron demasiados SMS a este número. Intenta más tarde.',
+                      'warning')
+                return render_template('reset/request_reset.html')
+
             # Generar token para recuperación
             token = secrets.token_urlsafe(32)
             user.verification_token = token
             user.token_expiry = datetime.utcnow() + timedelta(hours=1)
             db.session.commit()
 
-            # Enviar SMS real usando Twilio
+            # El SMS sale en segundo plano por el proveedor configurado
             sms_body = f'SAMMS.FO - Código de recuperación: {token[:6].upper()}\nIngresa este código para restablecer tu contraseña. Vence en 1 hora.'
-
-            try:
-                from twilio.rest import Client
-                import os
-
-                # Configuración de Twilio (deberías usar variables de entorno)
-                account_sid = os.getenv('TWILIO_ACCOUNT_SID', 'your_account_sid')
-                auth_token = os.getenv('TWILIO_AUTH_TOKEN', 'your_auth_token')
-                twilio_phone = os.getenv('TWILIO_PHONE_NUMBER', '+1234567890')
-
-                client = Client(account_sid, auth_token)
-                message = client.messages.create(
-                    body=sms_body,
-                    from_=twilio_phone,
-                    to=phone
-                )
-                print(f"SMS enviado exitosamente a {phone}, SID: {message.sid}")
-            except ImportError:
-                print(f"SMS simulado (Twilio no instalado) enviado a {phone}: {sms_body}")
-            except Exception as e:
-                print(f"Error enviando SMS a {phone}: {e}")
-                # Fallback: podrías enviar por email si el SMS falla
+            if not sms_sender.send(phone, sms_body):
+                flash('No pudimos enviar el SMS en este momento. Intenta más tarde.',
+                      'warning')
+                return render_template('reset/request_reset.html')
 
             flash('Se ha enviado un SMS con instrucciones para restablecer tu contraseña.', 'success')
             return redirect(url_for('auth.login'))
@@ -6,9 +6,15 @@ Este módulo maneja todas las rutas relacionadas con las reseñas
 de productos: mostrar reseñas, agregar reseñas, etc.
 """
 
-from flask import Blueprint, redirect, url_for, flash
+from flask import (
+    Blueprint, abort, jsonify, redirect, render_template, request, url_for, flash
+)
 from flask_login import login_required
 
+from app.db import db
+from app.models.products import Product
+from app.services import ratings
+
 reviews_bp = Blueprint('reviews', __name__)
 
 @reviews_bp.route('/reviews')
@@ -16,6 +22,20 @@ def reviews_home():
     """Mostrar la página principal de reseñas."""
     return 'Página de reseñas'
 
+
+@reviews_bp.route('/reviews/product/<int:product_id>')
+def product_reviews(product_id):
+    """Página siguiente de reseñas aprobadas de un producto (botón "Cargar más")."""
+    if db.session.get(Product, product_id) is None:
+        abort(404)
+    page = max(request.args.get('page', 1, type=int), 1)
+    reviews, more = ratings.approved_reviews(product_id, page)
+    return jsonify({
+        'html': render_template('reviews/_review_cards.html', reviews=reviews),
+        'count': len(reviews),
+        'next_page': page + 1 if more else None
+    })
+
 # Nueva ruta para agregar reseña
 @reviews_bp.route('/reviews/add/<int:product_id>', methods=['POST'])
 @login_required
@@ -0,0 +1,136 @@
+"""
+Archivos estáticos empaquetados y con huella de contenido.
+
+``scripts/build_assets.py`` concatena los paquetes de BUNDLES, minifica
+cada CSS y JS y los escribe en ``static/dist/`` con el hash del
+contenido en el nombre, junto con ``dist/manifest.json`` (nombre lógico
+→ archivo generado). En las plantillas, ``asset_url('static',
+filename=...)`` funciona igual que ``url_for`` pero devuelve el archivo
+con huella si existe, y ``asset_urls(paquete)`` devuelve la URL del
+paquete (o, sin compilar, las de sus archivos fuente). Como el nombre
+cambia con el contenido, ``/static/dist/`` se sirve con
+``Cache-Control: immutable`` por un año.
+"""
+
+import json
+import os
+import threading
+
+from flask import current_app, request, url_for
+
+DIST_DIR = 'dist'
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+# Paquetes: nombre lógico → archivos fuente (relativos a static/), en orden de carga
+BUNDLES = {
+    'css/site.css': [
+        'css/star-bg.css',
+        'css/home-cards.css',
+        'css/base-theme.css',
+        'css/components.css',
+        'css/layout.css',
+        'css/animations.css',
+        'css/utilities.css',
+        'css/base-inline.css',
+    ],
+    'css/auth.css': [
+        'css/star-bg.css',
+        'css/base-theme.css',
+        'change-theme-advanced.css',
+    ],
+    'js/site.js': [
+        'js/change-theme-advanced.js',
+        'js/star-bg.js',
+    ],
+}
+
+
+class Assets:
+    """Extensión que resuelve los nombres lógicos con el manifiesto."""
+
+    def __init__(self, app=None):
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Registra los helpers de plantilla y las cabeceras de caché."""
+        app.config.setdefault(
+            'ASSETS_MANIFEST',
+            os.path.join(app.static_folder, DIST_DIR, 'manifest.json')
+        )
+        app.config.setdefault('ASSETS_AUTO_RELOAD', app.debug)
+        app.extensions['assets'] = None
+        app.jinja_env.globals['asset_url'] = asset_url
+        app.jinja_env.globals['asset_urls'] = asset_urls
+        app.after_request(self._cache_headers)
+
+    @staticmethod
+    def _cache_headers(response):
+        prefix = f'{current_app.static_url_path}/{DIST_DIR}/'
+        if response.status_code == 200 and request.path.startswith(prefix):
+            response.cache_control.no_cache = None
+            response.cache_control.public = True
+            response.cache_control.max_age = IMMUTABLE_MAX_AGE
+            response.cache_control.immutable = True
+        return response
+
+    def manifest(self, app=None):
+        """
+        Manifiesto de la aplicación ({} si no se compilaron los archivos).
+
+        Se lee una sola vez; con ASSETS_AUTO_RELOAD se vuelve a leer
+        cuando el archivo cambia.
+        """
+        app = app or current_app
+        path = app.config['ASSETS_MANIFEST']
+        state = app.extensions.get('assets')
+        if state is not None and not app.config['ASSETS_AUTO_RELOAD']:
+            return state[1]
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            mtime = None
+        if state is not None and state[0] == mtime:
+            return state[1]
+        with self._lock:
+            manifest = {}
+            if mtime is not None:
+                with open(path, encoding='utf-8') as manifest_file:
+                    manifest = json.load(manifest_file)
+            else:
+                app.logger.info(
+                    'Sin manifiesto de estáticos; se sirven los archivos fuente'
+                )
+            app.extensions['assets'] = (mtime, manifest)
+            return manifest
+
+
+assets = Assets()
+
+
+def asset_url(endpoint, **values):
+    """
+    ``url_for`` que usa el archivo con huella de ``static`` si existe.
+
+    Args:
+        endpoint: Endpoint, como en ``url_for`` (normalmente 'static')
+        **values: Argumentos de ``url_for``; ``filename`` es el nombre lógico
+    """
+    if endpoint == 'static' and 'filename' in values:
+        filename = values['filename']
+        values['filename'] = assets.manifest().get(filename, filename)
+    return url_for(endpoint, **values)
+
+
+def asset_urls(name):
+    """
+    URLs a incluir para un paquete de BUNDLES (o un archivo suelto).
+
+    Compilado, es una sola URL con huella; sin compilar, las de los
+    archivos fuente en orden.
+    """
+    built = assets.manifest().get(name)
+    if built is not None:
+        return [url_for('static', filename=built)]
+    return [url_for('static', filename=source) for source in BUNDLES.get(name, [name])]
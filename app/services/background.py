@@ -0,0 +1,107 @@
+"""
+Pool de hilos compartido por las colas de trabajos en segundo plano.
+
+``BackgroundPool`` es la base de las extensiones que sacan trabajo de la
+petición HTTP (pagos, imágenes, SMS): crea un ``ThreadPoolExecutor`` por
+aplicación con el primer trabajo, ejecuta cada uno dentro de un contexto
+de aplicación (con rollback y ``db.session.remove()`` al terminar), lleva
+la cuenta de los trabajos pendientes para ``drain()`` y, con la opción
+``*_EAGER`` de la subclase (tests), ejecuta el trabajo en el acto.
+
+Cada subclase define el nombre de la extensión y de los hilos, las claves
+de configuración de workers, modo inmediato y máximo de pendientes, y el
+mensaje con el que se registran los errores.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from flask import current_app
+
+from app.db import db
+
+
+class QueueFullError(Exception):
+    """La cola ya tiene el máximo de trabajos pendientes."""
+
+
+class BackgroundPool:
+    """Base de las colas de trabajos atendidas por un pool de hilos por aplicación."""
+
+    # Clave en app.extensions y prefijo de los hilos
+    name = None
+    thread_name_prefix = None
+    # Claves de configuración: número de hilos, modo inmediato y máximo de pendientes
+    workers_config = None
+    eager_config = None
+    max_pending_config = None
+    error_message = 'Error en el trabajo en segundo plano'
+
+    def __init__(self, app=None):
+        self._lock = threading.Lock()
+        self._pending = set()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Registra la extensión; el pool se crea con el primer trabajo."""
+        app.extensions[self.name] = None
+
+    def _executor(self, app):
+        with self._lock:
+            executor = app.extensions.get(self.name)
+            if executor is None:
+                executor = ThreadPoolExecutor(
+                    max_workers=app.config[self.workers_config],
+                    thread_name_prefix=self.thread_name_prefix or self.name
+                )
+                app.extensions[self.name] = executor
+            return executor
+
+    def _run(self, app, func, *args):
+        with app.app_context():
+            try:
+                return func(*args)
+            except Exception:  # pylint: disable=broad-except
+                db.session.rollback()
+                app.logger.exception(f'{self.error_message} {func.__name__}{args}')
+                return None
+            finally:
+                db.session.remove()
+
+    def submit(self, func, *args):
+        """
+        Ejecuta `func(*args)` en el pool, dentro de un contexto de aplicación.
+
+        En modo inmediato (``eager_config``) el trabajo se ejecuta en el
+        acto y se devuelve su resultado.
+
+        Returns:
+            El ``Future`` del trabajo (o su resultado en modo inmediato)
+
+        Raises:
+            QueueFullError: Si ya hay ``max_pending_config`` trabajos pendientes
+        """
+        app = current_app._get_current_object()  # pylint: disable=protected-access
+        if app.config[self.eager_config]:
+            return func(*args)
+        executor = self._executor(app)
+        limit = app.config[self.max_pending_config] if self.max_pending_config else None
+        with self._lock:
+            if limit is not None and len(self._pending) >= limit:
+                raise QueueFullError(f'{self.name}: {limit} trabajos pendientes')
+            future = executor.submit(self._run, app, func, *args)
+            self._pending.add(future)
+        future.add_done_callback(self._discard)
+        return future
+
+    def _discard(self, future):
+        with self._lock:
+            self._pending.discard(future)
+
+    def drain(self, timeout=None):
+        """Espera a que terminen los trabajos encolados; devuelve True si terminaron."""
+        with self._lock:
+            pending = list(self._pending)
+        _, not_done = wait(pending, timeout=timeout)
+        return not not_done
@@ -0,0 +1,370 @@
+"""
+Servicio de checkout.
+
+Este módulo convierte el carrito de un usuario en un pedido dentro de una
+sola transacción: calcula el total, descuenta el stock con un ``UPDATE``
+condicional (``stock >= cantidad``) para que dos compras simultáneas no
+puedan vender la misma unidad, inserta las líneas del pedido en bloque y
+vacía el carrito. Si algún producto no alcanza, no se guarda nada y se
+informa qué productos fallaron.
+
+El stock queda reservado mientras el pedido espera el pago. Si la
+pasarela no responde o rechaza el pago, ``cancel_checkout`` anula el
+pedido, devuelve el stock y rellena el carrito; los pedidos que siguen
+``pendiente`` o ``procesando`` después de CHECKOUT_RESERVATION_MINUTES
+(el cliente abandonó el pago o el trabajo de pago se perdió en un
+reinicio) los cancela ``release_stale_orders``, desde
+``scripts/release_stale_orders.py``. ``release_stock`` devuelve las
+unidades una sola vez por pedido y ``retake_stock`` las vuelve a tomar
+si un pago se aprueba después de haberlas devuelto. El panel de
+administración usa las mismas funciones al cancelar o reactivar un pedido.
+"""
+
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import case, delete, func, insert, update
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.db import db
+from app.models.cart import Cart, CartItem
+from app.models.orders import Order, OrderDetail
+from app.models.products import Product
+from app.services import sales_rollup
+
+PENDING = 'pendiente'
+PROCESSING = 'procesando'
+CANCELLED = 'cancelado'
+
+# Estados en los que un pedido sigue reservando stock sin haberse pagado
+RESERVED_STATUSES = (PENDING, PROCESSING)
+
+
+class CheckoutResult:
+    """Resultado de un checkout: el pedido creado o los productos que fallaron."""
+
+    def __init__(self, order=None, failures=None):
+        self.order = order
+        self.failures = failures or []
+
+    @property
+    def ok(self):
+        """True si se creó el pedido."""
+        return self.order is not None
+
+    @property
+    def empty(self):
+        """True si no había nada en el carrito."""
+        return self.order is None and not self.failures
+
+    def message(self):
+        """Mensaje para el usuario con los productos sin stock suficiente."""
+        if self.empty:
+            return 'Tu carrito está vacío.'
+        detalles = ', '.join(
+            f"{f['name']} (pediste {f['requested']}, quedan {f['available']})"
+            for f in self.failures
+        )
+        return f'No hay stock suficiente para: {detalles}.'
+
+
+def _cart_lines(user_id):
+    """Líneas del carrito con el precio actual, agrupadas por producto."""
+    rows = db.session.query(
+        CartItem.cart_id, CartItem.product_id, CartItem.quantity,
+        Product.name, Product.price
+    ).join(Cart, CartItem.cart_id == Cart.id)\
+        .join(Product, CartItem.product_id == Product.id)\
+        .filter(Cart.user_id == user_id)\
+        .all()
+    cart_ids = set()
+    lines = {}
+    for cart_id, product_id, quantity, name, price in rows:
+        cart_ids.add(cart_id)
+        line = lines.setdefault(product_id, {
+            'product_id': product_id, 'name': name,
+            'price': float(price), 'quantity': 0
+        })
+        line['quantity'] += quantity or 0
+    # Orden fijo por producto para que los bloqueos de fila se tomen
+    # siempre en el mismo orden y dos checkouts no se bloqueen mutuamente.
+    return sorted(cart_ids), [lines[pid] for pid in sorted(lines)]
+
+
+def _reserve_stock(lines):
+    """
+    Descuenta el stock de todas las líneas que alcanzan.
+
+    Returns:
+        Conjunto de IDs de producto cuyo stock se descontó
+    """
+    quantities = {line['product_id']: line['quantity'] for line in lines}
+    if db.engine.dialect.update_returning:
+        # Una sola sentencia para todo el carrito
+        requested = case(quantities, value=Product.id)
+        stmt = update(Product)\
+            .where(Product.id.in_(quantities), Product.stock >= requested)\
+            .values(stock=Product.stock - requested)\
+            .returning(Product.id)
+        result = db.session.execute(
+            stmt, execution_options={'synchronize_session': False}
+        )
+        return set(result.scalars())
+    reserved = set()
+    for product_id, quantity in quantities.items():
+        result = db.session.execute(
+            update(Product)
+            .where(Product.id == product_id, Product.stock >= quantity)
+            .values(stock=Product.stock - quantity),
+            execution_options={'synchronize_session': False}
+        )
+        if result.rowcount:
+            reserved.add(product_id)
+    return reserved
+
+
+def _failures(lines, reserved):
+    """Describe las líneas que no se pudieron reservar, con el stock actual."""
+    failed = [line for line in lines if line['product_id'] not in reserved]
+    available = dict(
+        db.session.query(Product.id, Product.stock)
+        .filter(Product.id.in_([line['product_id'] for line in failed]))
+        .all()
+    )
+    return [{
+        'product_id': line['product_id'],
+        'name': line['name'],
+        'requested': line['quantity'],
+        'available': available.get(line['product_id']) or 0,
+    } for line in failed]
+
+
+def _delete_carts(cart_ids):
+    db.session.execute(delete(CartItem).where(CartItem.cart_id.in_(cart_ids)))
+    db.session.execute(delete(Cart).where(Cart.id.in_(cart_ids)))
+
+
+def checkout_cart(user_id, order=None, status='pendiente'):
+    """
+    Convierte el carrito del usuario en un pedido, todo o nada.
+
+    Args:
+        user_id: ID del usuario dueño del carrito
+        order: Pedido ya creado y sin líneas que se debe completar con el
+            carrito (pedidos antiguos); si es None se crea uno nuevo
+        status: Estado del pedido nuevo
+
+    Returns:
+        CheckoutResult con el pedido o con las líneas sin stock suficiente
+    """
+    cart_ids, lines = _cart_lines(user_id)
+    # Las cantidades no positivas se ignoran y se borran junto con el carrito,
+    # también cuando no queda ninguna línea válida
+    lines = [line for line in lines if line['quantity'] > 0]
+    if not lines:
+        if cart_ids:
+            _delete_carts(cart_ids)
+            db.session.commit()
+        return CheckoutResult()
+    try:
+        reserved = _reserve_stock(lines)
+        if len(reserved) != len(lines):
+            db.session.rollback()
+            return CheckoutResult(failures=_failures(lines, reserved))
+
+        total = sum(line['price'] * line['quantity'] for line in lines)
+        if order is None:
+            order = Order(user_id=user_id, total=total, status=status)
+            db.session.add(order)
+        else:
+            if order.status in sales_rollup.SALE_STATUSES:
+                # Ya estaba en los resúmenes sin líneas: se vuelve a sumar completo
+                sales_rollup.remove_order(order)
+            order.total = total
+            # El stock se toma ahora con el carrito actual
+            order.stock_released = False
+        db.session.flush()
+        db.session.execute(insert(OrderDetail), [{
+            'order_id': order.id,
+            'product_id': line['product_id'],
+            'quantity': line['quantity'],
+            'price': line['price'],
+        } for line in lines])
+        if order.status in sales_rollup.SALE_STATUSES:
+            sales_rollup.add_order(order)
+        _delete_carts(cart_ids)
+        db.session.commit()
+    except SQLAlchemyError:
+        db.session.rollback()
+        raise
+    return CheckoutResult(order=order)
+
+
+def _order_lines(order_id):
+    """(product_id, unidades) del pedido, en orden fijo por producto."""
+    return db.session.query(
+        OrderDetail.product_id, func.sum(OrderDetail.quantity)
+    ).filter(OrderDetail.order_id == order_id)\
+        .group_by(OrderDetail.product_id)\
+        .order_by(OrderDetail.product_id)\
+        .all()
+
+
+def _set_released(order, released):
+    """Cambia ``stock_released`` solo si tenía el valor contrario; True si cambió."""
+    return bool(db.session.execute(
+        update(Order)
+        .where(Order.id == order.id, Order.stock_released.is_(not released))
+        .values(stock_released=released)
+    ).rowcount)
+
+
+def release_stock(order):
+    """
+    Devuelve al inventario las unidades reservadas por el pedido (sin commit).
+
+    Solo la llamada que cambia ``stock_released`` con un UPDATE condicional
+    repone el stock, así que los reintentos o dos procesos a la vez no
+    duplican unidades.
+
+    Returns:
+        True si esta llamada devolvió el stock
+    """
+    if not _set_released(order, True):
+        return False
+    for product_id, quantity in _order_lines(order.id):
+        db.session.execute(
+            update(Product)
+            .where(Product.id == product_id)
+            .values(stock=Product.stock + quantity),
+            execution_options={'synchronize_session': False}
+        )
+    return True
+
+
+def retake_stock(order):
+    """
+    Vuelve a descontar el stock de un pedido cuyas unidades se devolvieron (sin commit).
+
+    Se usa cuando un pago se aprueba después de vencer o rechazarse. Es
+    todo o nada: si alguna línea ya no alcanza, las unidades tomadas se
+    devuelven y el pedido sigue con ``stock_released``, así que un
+    ``release_stock`` posterior no repone unidades que no se tomaron.
+
+    Returns:
+        IDs de producto que ya no tenían stock suficiente (vacío si todo
+        se pudo tomar o si el stock no se había devuelto)
+    """
+    if not _set_released(order, False):
+        return []
+    taken = []
+    short = []
+    for product_id, quantity in _order_lines(order.id):
+        result = db.session.execute(
+            update(Product)
+            .where(Product.id == product_id, Product.stock >= quantity)
+            .values(stock=Product.stock - quantity),
+            execution_options={'synchronize_session': False}
+        )
+        if result.rowcount:
+            taken.append((product_id, quantity))
+        else:
+            short.append(product_id)
+    if short:
+        for product_id, quantity in taken:
+            db.session.execute(
+                update(Product)
+                .where(Product.id == product_id)
+                .values(stock=Product.stock + quantity),
+                execution_options={'synchronize_session': False}
+            )
+        _set_released(order, True)
+    return short
+
+
+def _restore_cart(order):
+    """Vuelve a poner las líneas del pedido en el carrito del usuario."""
+    cart = Cart.query.filter_by(user_id=order.user_id).first()
+    if cart is None:
+        cart = Cart(user_id=order.user_id)
+        db.session.add(cart)
+        db.session.flush()
+    items = {item.product_id: item for item in cart.items}
+    for detail in OrderDetail.query.filter_by(order_id=order.id):
+        item = items.get(detail.product_id)
+        if item is None:
+            item = CartItem(cart_id=cart.id, product_id=detail.product_id,
+                            quantity=0, price_snapshot=detail.price)
+            db.session.add(item)
+            items[detail.product_id] = item
+        item.quantity = (item.quantity or 0) + detail.quantity
+
+
+def cancel_checkout(order):
+    """
+    Anula un pedido cuyo pago no se pudo iniciar y hace commit.
+
+    El pedido pasa de 'pendiente' a 'cancelado' con un UPDATE condicional;
+    solo si cambió se devuelve el stock y se rellena el carrito, para que
+    el cliente pueda reintentar.
+
+    Returns:
+        True si se anuló el pedido
+    """
+    try:
+        changed = db.session.execute(
+            update(Order)
+            .where(Order.id == order.id, Order.status == PENDING)
+            .values(status=CANCELLED),
+            execution_options={'synchronize_session': False}
+        ).rowcount
+        if changed:
+            release_stock(order)
+            _restore_cart(order)
+        db.session.commit()
+    except SQLAlchemyError:
+        db.session.rollback()
+        raise
+    db.session.refresh(order)
+    return bool(changed)
+
+
+def release_stale_orders(max_age_minutes=None):
+    """
+    Cancela los pedidos sin pagar que superan el tiempo de reserva.
+
+    Incluye los 'procesando' cuyo trabajo de pago no terminó (la cola está
+    en memoria y se pierde si el proceso se reinicia). Solo considera
+    pedidos con líneas (los que reservaron stock). Cada pedido se cancela
+    con un UPDATE condicional sobre el estado leído y su propio commit, así
+    que un pago que llega a la vez gana o pierde sin dejar el stock a
+    medias; si el pago se aprueba después, ``retake_stock`` vuelve a tomar
+    las unidades.
+
+    Args:
+        max_age_minutes: Minutos de reserva (por defecto
+            CHECKOUT_RESERVATION_MINUTES)
+
+    Returns:
+        Número de pedidos cancelados
+    """
+    if max_age_minutes is None:
+        max_age_minutes = current_app.config.get('CHECKOUT_RESERVATION_MINUTES', 60)
+    limit = datetime.utcnow() - timedelta(minutes=max_age_minutes)
+    stale = Order.query.filter(
+        Order.status.in_(RESERVED_STATUSES), Order.created_at < limit,
+        Order.details.any()
+    ).all()
+    cancelled = 0
+    for order in stale:
+        changed = db.session.execute(
+            update(Order)
+            .where(Order.id == order.id, Order.status == order.status)
+            .values(status=CANCELLED),
+            execution_options={'synchronize_session': False}
+        ).rowcount
+        if changed:
+            release_stock(order)
+            cancelled += 1
+        db.session.commit()
+    return cancelled
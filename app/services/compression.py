@@ -0,0 +1,136 @@
+"""
+Compresión de respuestas sin proxy delante.
+
+En Coolify gunicorn atiende directamente y la configuración gzip de
+``deploy/nginx.conf`` no aplica, así que la aplicación comprime sola:
+
+- Estáticos: si el cliente acepta ``br`` o ``gzip`` y existe el hermano
+  ``.br``/``.gz`` generado por ``scripts/build_assets.py``, se envía ese
+  archivo con ``Content-Encoding``; comprimir en cada petición no cuesta
+  CPU.
+- Respuestas dinámicas (HTML, JSON…): se comprimen en ``after_request``
+  si superan COMPRESS_MIN_SIZE, con el nivel de COMPRESS_LEVELS según el
+  tipo de contenido. Las respuestas en streaming, los archivos enviados
+  con ``send_file`` y las que ya vienen codificadas pasan sin tocar.
+
+Brotli es opcional: sin el paquete ``brotli`` solo se usa gzip.
+"""
+
+import gzip
+import mimetypes
+import os
+
+from flask import current_app, request
+from werkzeug.security import safe_join
+
+# Import opcional de brotli
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    brotli = None
+    BROTLI_AVAILABLE = False
+
+# Extensión del archivo precomprimido por codificación
+PRECOMPRESSED = {'br': '.br', 'gzip': '.gz'}
+
+
+def compress(data, encoding, level):
+    """Comprime `data` con 'br' o 'gzip' al nivel indicado."""
+    if encoding == 'br':
+        return brotli.compress(data, quality=level)
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def available_encodings():
+    """Codificaciones soportadas, en orden de preferencia del servidor."""
+    return ['br', 'gzip'] if BROTLI_AVAILABLE else ['gzip']
+
+
+def _add_vary(response):
+    response.vary.add('Accept-Encoding')
+
+
+class Compression:
+    """Extensión que comprime estáticos (precomprimidos) y respuestas dinámicas."""
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Registra el envío de precomprimidos y la compresión dinámica."""
+        app.config.setdefault('COMPRESS_ENABLED', True)
+        app.config.setdefault('COMPRESS_MIN_SIZE', 1024)
+        # Nivel por tipo de contenido: {'br': calidad 0-11, 'gzip': nivel 1-9}
+        app.config.setdefault('COMPRESS_LEVELS', {
+            'text/html': {'br': 4, 'gzip': 6},
+            'application/json': {'br': 4, 'gzip': 6},
+            'text/css': {'br': 5, 'gzip': 6},
+            'application/javascript': {'br': 5, 'gzip': 6},
+            'text/javascript': {'br': 5, 'gzip': 6},
+            'text/plain': {'br': 4, 'gzip': 6},
+            'text/xml': {'br': 4, 'gzip': 6},
+            'application/xml': {'br': 4, 'gzip': 6},
+            'image/svg+xml': {'br': 5, 'gzip': 6},
+        })
+        app.extensions['compression'] = self
+        if app.config['COMPRESS_ENABLED'] and 'static' in app.view_functions:
+            app.view_functions['static'] = self._static_view(
+                app.view_functions['static']
+            )
+        app.after_request(self._after_request)
+
+    @staticmethod
+    def _static_view(send_static_file):
+        def static(filename):
+            path = safe_join(current_app.static_folder, filename)
+            if path is None:
+                return send_static_file(filename=filename)
+            siblings = [encoding for encoding, suffix in PRECOMPRESSED.items()
+                        if os.path.isfile(path + suffix)]
+            if not siblings:
+                return send_static_file(filename=filename)
+            encoding = request.accept_encodings.best_match(siblings)
+            if encoding is None:
+                response = send_static_file(filename=filename)
+            else:
+                response = send_static_file(filename=filename + PRECOMPRESSED[encoding])
+                response.mimetype = (mimetypes.guess_type(filename)[0]
+                                     or 'application/octet-stream')
+                response.content_encoding = encoding
+            _add_vary(response)
+            return response
+        return static
+
+    @staticmethod
+    def _after_request(response):
+        config = current_app.config
+        levels = config['COMPRESS_LEVELS'].get(response.mimetype)
+        if not config['COMPRESS_ENABLED'] or levels is None:
+            return response
+        if (response.is_streamed or response.direct_passthrough
+                or response.content_encoding or response.status_code < 200
+                or response.status_code in (204, 206, 304)
+                or 'no-transform' in response.headers.get('Cache-Control', '')):
+            return response
+        _add_vary(response)
+        if request.method == 'HEAD':
+            return response
+        data = response.get_data()
+        if len(data) < config['COMPRESS_MIN_SIZE']:
+            return response
+        encoding = request.accept_encodings.best_match(
+            [name for name in available_encodings() if name in levels]
+        )
+        if encoding is None:
+            return response
+        response.set_data(compress(data, encoding, levels[encoding]))
+        response.content_encoding = encoding
+        etag, weak = response.get_etag()
+        if etag:
+            response.set_etag(f'{etag}-{encoding}', weak)
+        return response
+
+
+compression = Compression()
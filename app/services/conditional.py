@@ -0,0 +1,121 @@
+"""
+Respuestas condicionales (ETag / Last-Modified / 304).
+
+Las vistas decoradas con ``conditional`` declaran una función de
+validadores que, con consultas baratas (fechas de modificación,
+conteos), describe la versión de lo que se va a mostrar. Si el cliente
+ya tiene esa versión (``If-None-Match`` o, en su defecto,
+``If-Modified-Since``) se responde 304 sin ejecutar la vista: ni las
+consultas pesadas ni el renderizado de la plantilla. Si no, la vista se
+ejecuta normalmente y la respuesta sale con los validadores para la
+próxima visita.
+
+El ETag es un hash de las partes devueltas por la función más, en las
+páginas privadas, el usuario de la sesión. Las páginas con formularios
+(``csrf=True``) también incluyen el token CSRF de la sesión y una ventana
+de la mitad de WTF_CSRF_TIME_LIMIT, para que el navegador no reutilice
+una página con un token vencido. La compresión agrega ``-gzip``/``-br``
+al ETag enviado; al comparar se aceptan ambas formas.
+"""
+
+import hashlib
+import time
+from functools import wraps
+
+from flask import current_app, make_response, request, session
+from flask_login import current_user
+
+from app.services.compression import PRECOMPRESSED
+
+# Cache-Control de las respuestas validadas: el navegador guarda la copia
+# pero la revalida en cada visita
+PRIVATE_CACHE_CONTROL = 'private, no-cache'
+PUBLIC_CACHE_CONTROL = 'public, no-cache'
+
+
+def make_etag(parts):
+    """Hash estable de las partes de la versión (cualquier valor con repr)."""
+    return hashlib.sha1(repr(list(parts)).encode('utf-8')).hexdigest()[:20]
+
+
+def _session_parts(private, csrf):
+    parts = []
+    if private:
+        parts.append(current_user.get_id() if current_user.is_authenticated else None)
+    if csrf and current_app.config.get('WTF_CSRF_ENABLED', True):
+        limit = current_app.config.get('WTF_CSRF_TIME_LIMIT', 3600)
+        parts.append(session.get('csrf_token'))
+        parts.append(int(time.time() // max(limit // 2, 1)) if limit else None)
+    return parts
+
+
+def _matching_etag(etag):
+    """ETag del cliente que coincide con `etag` (con o sin sufijo de compresión)."""
+    candidates = [etag] + [f'{etag}-{encoding}' for encoding in PRECOMPRESSED]
+    for candidate in candidates:
+        if request.if_none_match.contains_weak(candidate):
+            return candidate
+    return None
+
+
+def _not_modified(etag, last_modified):
+    """Etag a devolver en el 304, o None si el cliente no tiene esta versión."""
+    if request.if_none_match:
+        return _matching_etag(etag)
+    since = request.if_modified_since
+    if since is None or last_modified is None:
+        return None
+    if last_modified.replace(microsecond=0, tzinfo=None) <= since.replace(tzinfo=None):
+        return etag
+    return None
+
+
+def conditional(validators, weak=False, private=True, csrf=False):
+    """
+    Decorador que responde 304 si el cliente ya tiene la versión actual.
+
+    Args:
+        validators: Función que recibe los argumentos de la vista y devuelve
+            ``(partes, last_modified)``, o None si no se puede validar
+            (p. ej. el recurso no existe y la vista debe responder 404)
+        weak: ETag débil (para HTML equivalente aunque no idéntico byte a byte)
+        private: La respuesta depende del usuario de la sesión
+        csrf: La página incluye formularios con token CSRF
+
+    Returns:
+        Decorador para la vista
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            # Los mensajes flash pendientes se deben mostrar en la página
+            if request.method not in ('GET', 'HEAD') or '_flashes' in session:
+                return view(*args, **kwargs)
+            version = validators(*args, **kwargs)
+            if version is None:
+                return view(*args, **kwargs)
+            parts, last_modified = version
+            etag = make_etag(list(parts) + _session_parts(private, csrf))
+            cache_control = PRIVATE_CACHE_CONTROL if private else PUBLIC_CACHE_CONTROL
+
+            matched = _not_modified(etag, last_modified)
+            if matched is not None:
+                response = current_app.response_class(status=304)
+                response.set_etag(matched, weak)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200 or '_flashes' in session:
+                    return response
+                # La vista pudo crear el token CSRF de la sesión
+                response.set_etag(
+                    make_etag(list(parts) + _session_parts(private, csrf)), weak
+                )
+            if last_modified is not None:
+                response.last_modified = last_modified
+            response.headers['Cache-Control'] = cache_control
+            if private:
+                response.vary.add('Cookie')
+            response.vary.add('Accept-Encoding')
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,189 @@
+"""
+Contadores del panel de administración mantenidos de forma incremental.
+
+El panel muestra cuántos usuarios, productos, pedidos y notificaciones
+hay y la suma de ventas. En vez de contar las tablas completas en cada
+visita, ``dashboard_stats`` guarda esos totales y eventos de SQLAlchemy
+los actualizan con un UPDATE atómico (``value = value + 1``) en la misma
+transacción que inserta o elimina el registro; cambiar el total de un
+pedido ajusta la suma de ventas.
+
+Los borrados masivos (``query.delete()``) y los cambios hechos fuera de
+la aplicación no disparan eventos, así que los contadores se recalculan
+desde las tablas cuando tienen más de DASHBOARD_STATS_RECONCILE_SECONDS
+(o con ``scripts/reconcile_dashboard_stats.py`` desde cron).
+
+La lista de usuarios del panel se busca por prefijo de nombre o email
+sin distinguir mayúsculas, que usa los índices ``ix_user_name_lower`` e
+``ix_user_email_lower`` (``scripts/add_indexes.py`` los crea en bases
+existentes), y se pagina usando el contador de usuarios en vez de un COUNT.
+"""
+
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import case, event, func, inspect, or_, update
+
+from app.db import db
+from app.models.notifications import Notification
+from app.models.orders import Order
+from app.models.products import Product
+from app.models.stats import DashboardStat
+from app.models.users import Users
+
+# Contador por modelo (número de filas)
+COUNTED = {
+    'users': Users,
+    'products': Product,
+    'orders': Order,
+    'notifications': Notification,
+}
+SALES_TOTAL = 'sales_total'
+NAMES = set(COUNTED) | {SALES_TOTAL}
+
+USERS_PER_PAGE = 20
+# Límite superior de una búsqueda por prefijo: 'ana' <= nombre < 'ana\uffff'
+_PREFIX_END = '\uffff'
+
+
+def _bump(connection, deltas):
+    # Una sola sentencia aunque cambien varios contadores (p. ej. pedidos y ventas)
+    deltas = {name: delta for name, delta in deltas.items() if delta}
+    if deltas:
+        connection.execute(
+            update(DashboardStat)
+            .where(DashboardStat.name.in_(deltas))
+            .values(value=DashboardStat.value + case(deltas, value=DashboardStat.name))
+        )
+
+
+def _mark_stale(connection, name):
+    # El valor anterior no está cargado: se recalcula en la próxima lectura
+    connection.execute(
+        update(DashboardStat)
+        .where(DashboardStat.name == name)
+        .values(reconciled_at=None)
+    )
+
+
+def _order_total(connection, target):
+    total = inspect(target).dict.get('total')
+    if total is None:
+        _mark_stale(connection, SALES_TOTAL)
+    return total or 0
+
+
+def _counter_listener(name, sign):
+    def listener(_mapper, connection, target):
+        deltas = {name: sign}
+        if name == 'orders':
+            deltas[SALES_TOTAL] = sign * _order_total(connection, target)
+        _bump(connection, deltas)
+    return listener
+
+
+def _order_updated(_mapper, connection, target):
+    history = inspect(target).attrs.total.history
+    if not history.added:
+        return
+    if not history.deleted:
+        _mark_stale(connection, SALES_TOTAL)
+        return
+    delta = (history.added[0] or 0) - (history.deleted[0] or 0)
+    _bump(connection, {SALES_TOTAL: delta})
+
+
+def reconcile():
+    """
+    Recalcula todos los contadores desde las tablas y hace commit.
+
+    Returns:
+        Diccionario nombre -> valor
+    """
+    values = {name: model.query.count() for name, model in COUNTED.items()}
+    values[SALES_TOTAL] = float(db.session.query(func.sum(Order.total)).scalar() or 0)
+    now = datetime.utcnow()
+    for name, value in values.items():
+        db.session.merge(DashboardStat(name=name, value=value, reconciled_at=now))
+    db.session.commit()
+    return values
+
+
+def get_stats():
+    """
+    Contadores del panel, recalculándolos si faltan o están vencidos.
+
+    Returns:
+        Diccionario con users, products, orders, notifications (enteros)
+        y sales_total
+    """
+    rows = DashboardStat.query.all()
+    limit = datetime.utcnow() - timedelta(
+        seconds=current_app.config['DASHBOARD_STATS_RECONCILE_SECONDS']
+    )
+    if {row.name for row in rows} != NAMES or any(
+        row.reconciled_at is None or row.reconciled_at < limit for row in rows
+    ):
+        values = reconcile()
+    else:
+        values = {row.name: row.value for row in rows}
+    stats = {name: int(values[name]) for name in COUNTED}
+    stats[SALES_TOTAL] = float(values[SALES_TOTAL])
+    return stats
+
+
+def search_users(search='', page=1, per_page=USERS_PER_PAGE, total=None):
+    """
+    Una página de usuarios, filtrada por prefijo de nombre o email.
+
+    Args:
+        search: Inicio del nombre o del email (sin distinguir mayúsculas)
+        page: Número de página (desde 1)
+        per_page: Usuarios por página
+        total: Número de usuarios sin filtro (evita el COUNT si no hay búsqueda)
+
+    Returns:
+        Objeto Pagination de Flask-SQLAlchemy
+    """
+    query = Users.query
+    prefix = search.strip().lower()
+    if prefix:
+        name = func.lower(Users.nameUser)
+        email = func.lower(Users.email)
+        query = query.filter(or_(
+            (name >= prefix) & (name < prefix + _PREFIX_END),
+            (email >= prefix) & (email < prefix + _PREFIX_END)
+        ))
+    count = bool(prefix) or total is None
+    pagination = query.order_by(Users.idUser).paginate(
+        page=page, per_page=per_page, error_out=False, count=count
+    )
+    if not count:
+        pagination.total = total
+    return pagination
+
+
+# Eventos de SQLAlchemy: (modelo, evento) -> función
+_LISTENERS = {(Order, 'after_update'): _order_updated}
+for _name, _model in COUNTED.items():
+    _LISTENERS[(_model, 'after_insert')] = _counter_listener(_name, 1)
+    _LISTENERS[(_model, 'after_delete')] = _counter_listener(_name, -1)
+
+
+class DashboardStats:
+    """Extensión que registra los eventos que mantienen los contadores."""
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Configura el intervalo de recálculo y registra los eventos (una sola vez)."""
+        app.config.setdefault('DASHBOARD_STATS_RECONCILE_SECONDS', 3600)
+        app.extensions['dashboard_stats'] = self
+        for (model, identifier), listener in _LISTENERS.items():
+            if not event.contains(model, identifier, listener):
+                event.listen(model, identifier, listener)
+
+
+dashboard_stats = DashboardStats()
@@ -0,0 +1,121 @@
+"""
+Servicio de exportaciones CSV en streaming.
+
+Este módulo genera los CSV de administración por bloques usando
+paginación por clave (keyset) sobre la llave primaria, de modo que la
+memoria del worker se mantiene constante sin importar el tamaño de la
+tabla. Opcionalmente comprime la salida con gzip sobre la marcha.
+"""
+
+import csv
+import zlib
+from io import StringIO
+
+from flask import current_app
+
+from app.db import db
+from app.models.orders import Order, OrderDetail
+from app.models.products import Product
+from app.models.users import Users
+
+USERS_HEADER = ['ID', 'Nombre', 'Email', 'Rol', 'Activo', 'Fecha registro']
+PRODUCTS_HEADER = ['ID', 'Nombre', 'Precio', 'Stock', 'Categoría', 'Fecha creación']
+ORDERS_HEADER = ['ID', 'Usuario', 'Total', 'Estado', 'Fecha']
+ORDER_LINES_HEADER = [
+    'Pedido', 'Usuario', 'Estado', 'Fecha', 'Total pedido',
+    'Línea', 'Producto ID', 'Producto', 'Cantidad', 'Precio unitario'
+]
+
+
+def _iter_keyset(query, key_column, chunk_size):
+    """Recorre una consulta de columnas por bloques ordenados por `key_column`."""
+    last_key = None
+    while True:
+        chunk_query = query
+        if last_key is not None:
+            chunk_query = chunk_query.filter(key_column > last_key)
+        rows = chunk_query.order_by(key_column).limit(chunk_size).all()
+        if not rows:
+            return
+        yield rows
+        last_key = rows[-1][0]
+
+
+def _filter_dates(query, column, start=None, end=None):
+    """Aplica un rango de fechas [start, end) sobre `column`."""
+    if start is not None:
+        query = query.filter(column >= start)
+    if end is not None:
+        query = query.filter(column < end)
+    return query
+
+
+def _csv_chunks(header, query, key_column, reorder=None):
+    """Genera el CSV como una secuencia de cadenas, un bloque por consulta."""
+    chunk_size = current_app.config.get('EXPORT_CHUNK_SIZE', 1000)
+    buffer = StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    yield buffer.getvalue()
+    for rows in _iter_keyset(query, key_column, chunk_size):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(map(reorder, rows) if reorder else rows)
+        yield buffer.getvalue()
+
+
+def gzip_stream(chunks, level=6):
+    """Comprime con gzip una secuencia de cadenas sin acumularla en memoria."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8'))
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def users_csv(start=None, end=None):
+    """CSV de usuarios registrados."""
+    query = db.session.query(
+        Users.idUser, Users.nameUser, Users.email,
+        Users.role, Users.is_active_db, Users.created_at
+    )
+    query = _filter_dates(query, Users.created_at, start, end)
+    return _csv_chunks(USERS_HEADER, query, Users.idUser)
+
+
+def products_csv(start=None, end=None):
+    """CSV de productos."""
+    query = db.session.query(
+        Product.id, Product.name, Product.price,
+        Product.stock, Product.category_id, Product.created_at
+    )
+    query = _filter_dates(query, Product.created_at, start, end)
+    return _csv_chunks(PRODUCTS_HEADER, query, Product.id)
+
+
+def orders_csv(start=None, end=None):
+    """CSV de pedidos, una fila por pedido."""
+    query = db.session.query(
+        Order.id, Order.user_id, Order.total, Order.status, Order.created_at
+    )
+    query = _filter_dates(query, Order.created_at, start, end)
+    return _csv_chunks(ORDERS_HEADER, query, Order.id)
+
+
+def order_lines_csv(start=None, end=None):
+    """CSV de pedidos con sus líneas de detalle, una fila por producto."""
+    query = db.session.query(
+        OrderDetail.id, Order.id, Order.user_id, Order.status, Order.created_at,
+        Order.total, OrderDetail.product_id, Product.name,
+        OrderDetail.quantity, OrderDetail.price
+    ).join(Order, OrderDetail.order_id == Order.id)\
+        .outerjoin(Product, OrderDetail.product_id == Product.id)
+    query = _filter_dates(query, Order.created_at, start, end)
+
+    def reorder(row):
+        # La llave de paginación va primero en la consulta; en el CSV se
+        # muestra después de las columnas del pedido.
+        return list(row[1:6]) + [row[0]] + list(row[6:])
+
+    return _csv_chunks(ORDER_LINES_HEADER, query, OrderDetail.id, reorder)
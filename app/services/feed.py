@@ -0,0 +1,120 @@
+"""
+Servicio de armado del feed principal.
+
+Este módulo construye las secciones del feed (destacados, promociones,
+populares y últimos productos) con consultas acotadas y el ranking de
+``app.services.popularity``, guarda los IDs resultantes en la caché
+compartida y solo calcula por petición las recomendaciones
+personalizadas del usuario. Las secciones están acotadas: cuando hay más
+destacados o productos de los que caben, el feed enlaza al catálogo
+paginado (``/catalog/``) para ver el resto.
+"""
+
+from flask import current_app
+
+from app.db import db
+from app.extensions import cache
+from app.models.orders import Order, OrderDetail
+from app.models.products import Product
+from app.services import popularity
+
+FEED_CACHE_KEY = 'feed:sections'
+
+# Tamaño máximo de cada sección del feed
+DESTACADOS_LIMIT = 12
+PROMOCIONES_LIMIT = 12
+POPULARES_LIMIT = 8
+NORMALES_LIMIT = 24
+RECOMENDACIONES_LIMIT = 8
+
+# Secciones guardadas en la caché como listas de IDs
+SECTIONS = ('destacados', 'normales', 'promociones', 'populares')
+
+
+def _build_sections():
+    """Consulta la base de datos y devuelve los IDs de cada sección."""
+    # Una fila de más indica si quedan productos fuera del feed
+    destacados = db.session.query(Product.id).filter(
+        Product.destacado.is_(True)
+    ).order_by(Product.created_at.desc()).limit(DESTACADOS_LIMIT + 1).all()
+    normales = db.session.query(Product.id).filter(
+        Product.destacado.is_(False)
+    ).order_by(Product.created_at.desc()).limit(NORMALES_LIMIT + 1).all()
+    promociones = db.session.query(Product.id).filter(
+        Product.promo.isnot(None), Product.promo != ''
+    ).order_by(Product.updated_at.desc()).limit(PROMOCIONES_LIMIT).all()
+    return {
+        'destacados': [row[0] for row in destacados[:DESTACADOS_LIMIT]],
+        'normales': [row[0] for row in normales[:NORMALES_LIMIT]],
+        'promociones': [row[0] for row in promociones],
+        # Ranking mantenido al pagar pedidos, con decaimiento en el tiempo
+        'populares': popularity.top_ids(POPULARES_LIMIT),
+        'hay_mas': len(destacados) > DESTACADOS_LIMIT or len(normales) > NORMALES_LIMIT,
+    }
+
+
+def get_feed_sections():
+    """Devuelve los IDs de las secciones del feed, usando la caché si existe."""
+    sections = cache.get(FEED_CACHE_KEY)
+    if sections is None:
+        sections = _build_sections()
+        timeout = current_app.config.get('FEED_CACHE_TIMEOUT', 300)
+        cache.set(FEED_CACHE_KEY, sections, timeout=timeout)
+    return sections
+
+
+def invalidate_feed():
+    """Elimina las secciones cacheadas para que se recalculen en la próxima visita."""
+    cache.delete(FEED_CACHE_KEY)
+
+
+def get_recommendations(user_id, limit=RECOMENDACIONES_LIMIT):
+    """Recomienda productos de las categorías que el usuario ya ha comprado."""
+    purchased = (
+        db.session.query(OrderDetail.product_id)
+        .join(Order, OrderDetail.order_id == Order.id)
+        .filter(Order.user_id == user_id)
+    )
+    categorias = (
+        db.session.query(Product.category_id)
+        .filter(Product.id.in_(purchased.scalar_subquery()))
+        .distinct()
+    )
+    return Product.query.filter(
+        Product.category_id.in_(categorias.scalar_subquery()),
+        ~Product.id.in_(purchased.scalar_subquery())
+    ).limit(limit).all()
+
+
+def build_feed(user_id=None):
+    """
+    Arma el contexto completo del feed.
+
+    Args:
+        user_id: ID del usuario autenticado, o None para visitantes
+
+    Returns:
+        Diccionario con las listas de productos de cada sección y
+        ``hay_mas_productos`` si el catálogo tiene productos que no caben
+    """
+    sections = get_feed_sections()
+    ids = set()
+    for key in SECTIONS:
+        ids.update(sections[key])
+    by_id = {}
+    if ids:
+        by_id = {p.id: p for p in Product.query.filter(Product.id.in_(ids)).all()}
+
+    def resolve(key):
+        return [by_id[pid] for pid in sections[key] if pid in by_id]
+
+    destacados = resolve('destacados')
+    recomendaciones = get_recommendations(user_id) if user_id is not None else []
+    return {
+        'products': destacados + resolve('normales'),
+        'promociones': resolve('promociones'),
+        'destacados': destacados,
+        'recomendaciones_historial': recomendaciones,
+        'populares': resolve('populares'),
+        'hay_mas_productos': sections.get('hay_mas', False),
+    }
@@ -0,0 +1,195 @@
+"""
+Almacenamiento de imágenes de productos por contenido.
+
+``image_store.save(file)`` guarda la subida con el nombre
+``<sha256[:32]>.<ext>``: dos productos que suben ``foto.jpg`` ya no se
+pisan y la misma imagen subida dos veces ocupa un solo archivo. Cada
+archivo lleva un contador de referencias en ``stored_images``; al editar
+o eliminar un producto se libera su imagen y ``collect_garbage()`` borra
+el archivo y sus variantes cuando nadie la usa desde hace
+IMAGE_GC_GRACE segundos (``scripts/collect_images.py``, desde cron).
+Como la URL cambia cuando cambia el contenido, estas rutas se sirven con
+``Cache-Control: immutable`` por un año.
+"""
+
+import glob
+import hashlib
+import os
+import re
+import tempfile
+from datetime import datetime, timedelta
+
+from flask import current_app, request
+from sqlalchemy import delete, update
+from werkzeug.utils import secure_filename
+
+from app.db import db
+from app.models.stored_image import StoredImage
+from app.services.images import VARIANTS_DIR, product_image_folder
+
+HASH_LENGTH = 32
+ALLOWED_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.gif', '.webp', '.avif'}
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+# Originales y variantes con nombre por contenido: <hash>.<ext> y
+# variants/<hash>-<ancho>.<fmt>
+STORED_NAME = re.compile(rf'^[0-9a-f]{{{HASH_LENGTH}}}\.[a-z]+$')
+IMMUTABLE_PATH = re.compile(
+    rf'^/static/product_images/(?:{VARIANTS_DIR}/)?'
+    rf'[0-9a-f]{{{HASH_LENGTH}}}(?:-\d+)?\.[a-z]+$'
+)
+
+
+class InvalidImageError(ValueError):
+    """El archivo subido no tiene una extensión de imagen permitida."""
+
+
+def is_stored_name(name):
+    """True si `name` es un archivo guardado por contenido (y no uno antiguo)."""
+    return bool(name) and bool(STORED_NAME.match(name))
+
+
+class ImageStore:
+    """Extensión con el almacenamiento de imágenes por contenido."""
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Registra la extensión y las cabeceras de caché de las imágenes."""
+        app.config.setdefault('IMAGE_GC_GRACE', 3600)
+        app.after_request(self._cache_headers)
+
+    @staticmethod
+    def _cache_headers(response):
+        if response.status_code == 200 and IMMUTABLE_PATH.match(request.path):
+            response.cache_control.no_cache = None
+            response.cache_control.public = True
+            response.cache_control.max_age = IMMUTABLE_MAX_AGE
+            response.cache_control.immutable = True
+        return response
+
+    def save(self, file_storage):
+        """
+        Guarda una imagen subida y suma una referencia.
+
+        La referencia queda en la sesión: se confirma con el commit de
+        la ruta, junto con el producto que la usa.
+
+        Args:
+            file_storage: Archivo subido (``werkzeug.FileStorage``)
+
+        Returns:
+            Nombre del archivo guardado
+        """
+        extension = os.path.splitext(secure_filename(file_storage.filename))[1].lower()
+        if extension not in ALLOWED_EXTENSIONS:
+            raise InvalidImageError(
+                f'Extensión de imagen no permitida: {extension or "(ninguna)"}'
+            )
+        if extension == '.jpeg':
+            extension = '.jpg'
+        folder = product_image_folder()
+        os.makedirs(folder, exist_ok=True)
+
+        # Copiar a un temporal calculando el hash sin cargar el archivo en memoria
+        digest, size = hashlib.sha256(), 0
+        with tempfile.NamedTemporaryFile(
+            dir=folder, prefix='.upload-', delete=False
+        ) as tmp:
+            try:
+                for chunk in iter(lambda: file_storage.stream.read(1024 * 1024), b''):
+                    digest.update(chunk)
+                    tmp.write(chunk)
+                    size += len(chunk)
+            except BaseException:
+                os.remove(tmp.name)
+                raise
+        name = f'{digest.hexdigest()[:HASH_LENGTH]}{extension}'
+        self.acquire(name, size)
+        # Reemplazar siempre, aunque ya exista: el contenido es el mismo y
+        # así no importa si collect_garbage lo borró justo antes del acquire
+        os.chmod(tmp.name, 0o644)
+        os.replace(tmp.name, os.path.join(folder, name))
+        return name
+
+    @staticmethod
+    def acquire(name, size=0):
+        """Suma una referencia a `name` (sin commit)."""
+        result = db.session.execute(
+            update(StoredImage)
+            .where(StoredImage.name == name)
+            .values(refcount=StoredImage.refcount + 1, released_at=None)
+        )
+        if not result.rowcount:
+            db.session.add(StoredImage(name=name, size=size, refcount=1))
+            db.session.flush()
+
+    @staticmethod
+    def release(name):
+        """Resta una referencia a `name` (sin commit); ignora las imágenes antiguas."""
+        if not is_stored_name(name):
+            return
+        db.session.execute(
+            update(StoredImage)
+            .where(StoredImage.name == name, StoredImage.refcount > 0)
+            .values(refcount=StoredImage.refcount - 1)
+        )
+        db.session.execute(
+            update(StoredImage)
+            .where(StoredImage.name == name, StoredImage.refcount == 0,
+                   StoredImage.released_at.is_(None))
+            .values(released_at=datetime.utcnow())
+        )
+
+    def collect_garbage(self, grace=None):
+        """
+        Borra las imágenes sin referencias liberadas hace más de `grace` segundos.
+
+        El margen evita borrar un archivo que otra petición acaba de volver
+        a subir y todavía no confirmó. Los archivos se borran antes del
+        commit, con la fila ya eliminada y bloqueada: una subida idéntica
+        espera ese commit en ``acquire``, crea una fila nueva y vuelve a
+        escribir el archivo.
+
+        Returns:
+            Nombres de los archivos borrados
+        """
+        grace = current_app.config['IMAGE_GC_GRACE'] if grace is None else grace
+        cutoff = datetime.utcnow() - timedelta(seconds=grace)
+        candidates = db.session.execute(
+            db.select(StoredImage.name)
+            .where(StoredImage.refcount <= 0, StoredImage.released_at <= cutoff)
+        ).scalars().all()
+        removed = []
+        folder = product_image_folder()
+        for name in candidates:
+            # Solo si nadie la volvió a tomar mientras tanto
+            result = db.session.execute(
+                delete(StoredImage)
+                .where(StoredImage.name == name, StoredImage.refcount <= 0)
+            )
+            if not result.rowcount:
+                db.session.rollback()
+                continue
+            stem = os.path.splitext(name)[0]
+            paths = [os.path.join(folder, name)]
+            paths += glob.glob(os.path.join(folder, VARIANTS_DIR, f'{stem}-*'))
+            try:
+                for path in paths:
+                    try:
+                        os.remove(path)
+                    except FileNotFoundError:
+                        pass
+            except OSError as exc:
+                # La fila se conserva para reintentarlo en la próxima pasada
+                db.session.rollback()
+                current_app.logger.error(f'No se pudo borrar la imagen {name}: {exc}')
+                continue
+            db.session.commit()
+            removed.append(name)
+        return removed
+
+
+image_store = ImageStore()
@@ -0,0 +1,196 @@
+"""
+Procesamiento de imágenes subidas.
+
+Las rutas guardan el archivo original y llaman a
+``image_pipeline.enqueue_product(product)`` o
+``image_pipeline.enqueue_profile_pic(user)``. Un pool de hilos propio
+(``BackgroundPool``) decodifica la imagen una sola vez con Pillow, aplica
+la orientación EXIF, descarta los metadatos y genera variantes WebP (y
+AVIF si se configura) en los anchos de IMAGE_VARIANTS, sin agrandar
+nunca el original. Las
+variantes quedan en ``<carpeta>/variants/`` y el producto guarda en
+``image_variants`` qué anchos y formatos existen, para que ``image_url``
+y ``image_srcset`` no tengan que mirar el disco.
+"""
+
+import os
+
+from flask import current_app
+from PIL import Image, ImageOps
+from sqlalchemy import update
+
+from app.db import db
+from app.models.products import Product
+from app.models.users import Users
+from app.services.background import BackgroundPool
+from app.services.page_cache import PRODUCTS_TAG, invalidate_pages
+
+VARIANTS_DIR = 'variants'
+
+# Opciones de guardado por formato (sin exif ni icc: se descartan los metadatos)
+SAVE_OPTIONS = {
+    'webp': {'format': 'WEBP', 'method': 4},
+    'avif': {'format': 'AVIF', 'speed': 6},
+}
+
+
+def variant_name(filename, width, fmt):
+    """Ruta relativa de una variante: ``variants/<nombre>-<ancho>.<formato>``."""
+    stem = os.path.splitext(filename)[0]
+    return f'{VARIANTS_DIR}/{stem}-{width}.{fmt}'
+
+
+def product_image_folder():
+    """Carpeta donde se guardan las imágenes de productos."""
+    return os.path.join(
+        current_app.root_path,
+        current_app.config.get('UPLOAD_FOLDER', 'static/product_images')
+    )
+
+
+def profile_pic_folder():
+    """Carpeta donde se guardan las fotos de perfil."""
+    return os.path.join(current_app.root_path, 'static', 'profile_pics')
+
+
+def planned_widths(source_width, widths):
+    """Anchos a generar para un original de `source_width` px, sin agrandarlo."""
+    planned = []
+    for width in sorted(set(widths)):
+        target = min(width, source_width)
+        if planned and target == planned[-1]:
+            break
+        planned.append(target)
+    return planned
+
+
+def oriented_width(path):
+    """Ancho del original ya aplicada la orientación EXIF, leyendo solo la cabecera."""
+    with Image.open(path) as image:
+        orientation = image.getexif().get(0x0112, 1)
+        return image.height if orientation in (5, 6, 7, 8) else image.width
+
+
+def variants_record(widths, formats, views):
+    """Valor de ``Product.image_variants`` para los anchos generados."""
+    return {
+        'widths': widths,
+        'formats': list(formats),
+        # Ancho a usar en cada vista, ajustado a los anchos generados
+        'views': {view: min(width, widths[-1]) for view, width in views.items()},
+    }
+
+
+def generate_variants(path, widths, formats=('webp',), quality=80):
+    """
+    Genera las variantes de una imagen decodificándola una sola vez.
+
+    Args:
+        path: Ruta del archivo original
+        widths: Anchos deseados en píxeles
+        formats: Formatos de salida ('webp', 'avif')
+        quality: Calidad de compresión (0-100)
+
+    Returns:
+        Anchos realmente generados, de menor a mayor (los que superan el
+        original se reemplazan por el ancho del original)
+    """
+    folder, filename = os.path.split(path)
+    os.makedirs(os.path.join(folder, VARIANTS_DIR), exist_ok=True)
+    with Image.open(path) as original:
+        # JPEG: decodificar directamente a una escala reducida si alcanza
+        original.draft('RGB', (max(widths), max(widths)))
+        image = ImageOps.exif_transpose(original)
+        has_alpha = image.mode in ('RGBA', 'LA', 'PA') or 'transparency' in image.info
+        image = image.convert('RGBA' if has_alpha else 'RGB')
+
+    generated = planned_widths(image.width, widths)
+    for target in generated:
+        if target == image.width:
+            resized = image
+        else:
+            height = max(1, round(image.height * target / image.width))
+            resized = image.resize((target, height), Image.Resampling.LANCZOS)
+        for fmt in formats:
+            resized.save(os.path.join(folder, variant_name(filename, target, fmt)),
+                         quality=quality, **SAVE_OPTIONS[fmt])
+    return generated
+
+
+def process_product_image(product_id, filename):
+    """Genera las variantes de la imagen de un producto y las registra."""
+    config = current_app.config
+    views = config['IMAGE_VARIANTS']
+    formats = list(config['IMAGE_FORMATS'])
+    # Con imágenes guardadas por contenido otro producto puede tener ya las variantes
+    shared = next(filter(None, db.session.execute(
+        db.select(Product.image_variants)
+        .where(Product.image == filename, Product.id != product_id)
+    ).scalars()), None)
+    if shared and shared == variants_record(shared['widths'], formats, views):
+        variants = shared
+    else:
+        widths = generate_variants(os.path.join(product_image_folder(), filename),
+                                   views.values(), formats, config['IMAGE_QUALITY'])
+        variants = variants_record(widths, formats, views)
+    # Solo si la imagen no cambió mientras se procesaba
+    db.session.execute(
+        update(Product)
+        .where(Product.id == product_id, Product.image == filename)
+        .values(image_variants=variants)
+    )
+    db.session.commit()
+    # Las páginas cacheadas todavía apuntan al original
+    invalidate_pages(PRODUCTS_TAG)
+    return variants
+
+
+def process_profile_pic(user_id, filename):
+    """Reemplaza la foto de perfil por una WebP del ancho de IMAGE_PROFILE_WIDTH."""
+    width = current_app.config['IMAGE_PROFILE_WIDTH']
+    widths = generate_variants(os.path.join(profile_pic_folder(), filename), [width],
+                               ('webp',), current_app.config['IMAGE_QUALITY'])
+    optimized = variant_name(filename, widths[0], 'webp')
+    db.session.execute(
+        update(Users)
+        .where(Users.idUser == user_id, Users.profile_pic == filename)
+        .values(profile_pic=optimized)
+    )
+    db.session.commit()
+    return optimized
+
+
+class ImagePipeline(BackgroundPool):
+    """Extensión que procesa las imágenes subidas en segundo plano."""
+
+    name = 'image_pipeline'
+    thread_name_prefix = 'images'
+    workers_config = 'IMAGE_WORKERS'
+    eager_config = 'IMAGE_PIPELINE_EAGER'
+    error_message = 'Error procesando imagen'
+
+    def init_app(self, app):
+        """Registra la extensión; el pool se crea con el primer trabajo."""
+        app.config.setdefault('IMAGE_WORKERS', 1)
+        app.config.setdefault('IMAGE_PIPELINE_EAGER', False)
+        app.config.setdefault('IMAGE_VARIANTS',
+                              {'grid': 400, 'detail': 800, 'zoom': 1600})
+        app.config.setdefault('IMAGE_FORMATS', ('webp',))
+        app.config.setdefault('IMAGE_QUALITY', 80)
+        app.config.setdefault('IMAGE_PROFILE_WIDTH', 256)
+        super().init_app(app)
+
+    def enqueue_product(self, product):
+        """Encola las variantes de la imagen actual del producto."""
+        if product.image:
+            return self.submit(process_product_image, product.id, product.image)
+        return None
+
+    def enqueue_profile_pic(self, user):
+        """Encola la optimización de la foto de perfil actual del usuario."""
+        if user.profile_pic:
+            return self.submit(process_profile_pic, user.idUser, user.profile_pic)
+        return None
+
+
+image_pipeline = ImagePipeline()
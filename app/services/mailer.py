@@ -0,0 +1,262 @@
+"""
+Servicio de envío de correos con bandeja de salida.
+
+Las rutas llaman a ``mail_outbox.send(msg)`` con el ``Message`` ya armado:
+el correo se guarda en ``mail_outbox`` y la petición termina sin hablar
+con el servidor SMTP. Un worker por proceso envía la bandeja por lotes
+sobre una sola conexión (``mail.connect()``), reintenta los fallos con
+backoff exponencial y jitter y respeta un máximo de envíos por minuto.
+Cada lote se reclama con un ``UPDATE`` condicional, así varios procesos
+pueden drenar la misma bandeja sin enviar dos veces el mismo correo.
+"""
+
+import random
+import smtplib
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime, timedelta
+from email.utils import formataddr
+
+from flask import current_app
+from flask_mail import Message
+from sqlalchemy import and_, or_, update
+
+from app.db import db
+from app.extensions import mail
+from app.models.mail_outbox import OutboxEmail
+
+
+def _connection_lost(exc):
+    """True si tras el error la conexión SMTP ya no sirve y hay que cortar el lote."""
+    # SMTPException hereda de OSError: solo los errores de socket y la
+    # desconexión invalidan la conexión; el resto afecta a un solo correo.
+    return isinstance(exc, smtplib.SMTPServerDisconnected) or \
+        not isinstance(exc, smtplib.SMTPException)
+
+
+class SendThrottle:
+    """Máximo de envíos por minuto del proceso, con ventana deslizante."""
+
+    def __init__(self, per_minute, clock=time.monotonic):
+        self.per_minute = per_minute
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._sent = deque()
+
+    def _expire(self, now):
+        while self._sent and now - self._sent[0] >= 60:
+            self._sent.popleft()
+
+    def available(self):
+        """Envíos que todavía caben en el último minuto."""
+        with self._lock:
+            self._expire(self._clock())
+            return max(0, self.per_minute - len(self._sent))
+
+    def wait_time(self):
+        """Segundos hasta que quepa otro envío (0 si ya cabe)."""
+        with self._lock:
+            now = self._clock()
+            self._expire(now)
+            if len(self._sent) < self.per_minute:
+                return 0.0
+            return 60 - (now - self._sent[0])
+
+    def record(self):
+        with self._lock:
+            self._sent.append(self._clock())
+
+
+class _OutboxState:
+    """Límite de envíos y worker de una aplicación."""
+
+    def __init__(self, app):
+        self.throttle = SendThrottle(app.config['MAIL_RATE_PER_MINUTE'])
+        self.wakeup = threading.Event()
+        self.thread = None
+
+
+class MailOutbox:
+    """Extensión con la bandeja de salida de correos."""
+
+    def __init__(self, app=None):
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Registra la extensión; el worker arranca con start() o el primer envío."""
+        app.config.setdefault('MAIL_OUTBOX_EAGER', False)
+        app.config.setdefault('MAIL_BATCH_SIZE', 50)
+        app.config.setdefault('MAIL_MAX_ATTEMPTS', 5)
+        app.config.setdefault('MAIL_RETRY_BACKOFF', 30.0)
+        app.config.setdefault('MAIL_RATE_PER_MINUTE', 120)
+        app.config.setdefault('MAIL_WORKER_INTERVAL', 5.0)
+        app.config.setdefault('MAIL_CLAIM_TIMEOUT', 600)
+        app.extensions['mail_outbox'] = None
+
+    def _state(self, app):
+        with self._lock:
+            state = app.extensions.get('mail_outbox')
+            if state is None:
+                state = _OutboxState(app)
+                app.extensions['mail_outbox'] = state
+            return state
+
+    def send(self, msg):
+        """
+        Guarda un ``flask_mail.Message`` en la bandeja de salida.
+
+        Con MAIL_OUTBOX_EAGER (tests) se envía en el acto.
+
+        Returns:
+            ID del correo en la bandeja
+        """
+        sender = formataddr(msg.sender) if isinstance(msg.sender, tuple) else msg.sender
+        email = OutboxEmail(
+            subject=msg.subject, sender=sender, recipients=list(msg.recipients),
+            body=msg.body, html=msg.html, status='pendiente', attempts=0,
+            next_attempt_at=datetime.utcnow()
+        )
+        db.session.add(email)
+        db.session.commit()
+        app = current_app._get_current_object()  # pylint: disable=protected-access
+        if app.config['MAIL_OUTBOX_EAGER']:
+            self.deliver_pending()
+        else:
+            self.start(app)
+            self._state(app).wakeup.set()
+        return email.id
+
+    def start(self, app):
+        """Arranca el worker de la aplicación si no está corriendo."""
+        state = self._state(app)
+        with self._lock:
+            if state.thread is None or not state.thread.is_alive():
+                state.thread = threading.Thread(
+                    target=self._work, args=(app, state), name='mail-outbox',
+                    daemon=True
+                )
+                state.thread.start()
+
+    def _work(self, app, state):
+        while True:
+            state.wakeup.wait(app.config['MAIL_WORKER_INTERVAL'])
+            state.wakeup.clear()
+            with app.app_context():
+                try:
+                    # Drenar mientras salgan lotes completos
+                    while self.deliver_pending() >= app.config['MAIL_BATCH_SIZE']:
+                        pass
+                except Exception:  # pylint: disable=broad-except
+                    db.session.rollback()
+                    app.logger.exception('Error enviando la bandeja de salida')
+                finally:
+                    db.session.remove()
+            pause = state.throttle.wait_time()
+            if pause:
+                time.sleep(pause)
+
+    @staticmethod
+    def _due(now, claim_timeout):
+        """Correos listos para enviar, incluidos los reclamados por un proceso caído."""
+        return or_(
+            and_(OutboxEmail.status.in_(('pendiente', 'error')),
+                 OutboxEmail.next_attempt_at <= now),
+            and_(OutboxEmail.status == 'enviando',
+                 OutboxEmail.claimed_at < now - timedelta(seconds=claim_timeout)),
+        )
+
+    def _claim(self, size):
+        """Reclama hasta `size` correos para este lote y los devuelve."""
+        now = datetime.utcnow()
+        due = self._due(now, current_app.config['MAIL_CLAIM_TIMEOUT'])
+        ids = [row.id for row in db.session.query(OutboxEmail.id).filter(due)
+               .order_by(OutboxEmail.next_attempt_at, OutboxEmail.id).limit(size)]
+        if not ids:
+            return []
+        batch_id = uuid.uuid4().hex
+        db.session.execute(
+            update(OutboxEmail)
+            .where(OutboxEmail.id.in_(ids), due)
+            .values(status='enviando', batch_id=batch_id, claimed_at=now),
+            execution_options={'synchronize_session': False}
+        )
+        db.session.commit()
+        return OutboxEmail.query.filter_by(batch_id=batch_id)\
+            .order_by(OutboxEmail.id).all()
+
+    def _retry(self, emails, exc):
+        """Programa un reintento con backoff y jitter, o da el correo por fallido."""
+        config = current_app.config
+        now = datetime.utcnow()
+        for email in emails:
+            email.attempts += 1
+            email.last_error = str(exc)[:1000]
+            email.batch_id = None
+            if email.attempts >= config['MAIL_MAX_ATTEMPTS']:
+                email.status = 'fallido'
+                continue
+            delay = config['MAIL_RETRY_BACKOFF'] * 2 ** (email.attempts - 1)
+            email.status = 'error'
+            email.next_attempt_at = now + timedelta(
+                seconds=random.uniform(delay / 2, delay)
+            )
+        db.session.commit()
+        current_app.logger.warning(
+            f'No se pudieron enviar {len(emails)} correos: {exc}'
+        )
+
+    @staticmethod
+    def _message(email):
+        return Message(subject=email.subject, recipients=email.recipients,
+                       body=email.body, html=email.html, sender=email.sender)
+
+    def deliver_pending(self, limit=None):
+        """
+        Envía un lote de la bandeja sobre una sola conexión SMTP.
+
+        Args:
+            limit: Máximo de correos del lote (por defecto MAIL_BATCH_SIZE)
+
+        Returns:
+            Cantidad de correos enviados
+        """
+        app = current_app._get_current_object()  # pylint: disable=protected-access
+        throttle = self._state(app).throttle
+        size = min(limit or app.config['MAIL_BATCH_SIZE'], throttle.available())
+        if size <= 0:
+            return 0
+        emails = self._claim(size)
+        if not emails:
+            return 0
+
+        sent = 0
+        try:
+            with mail.connect() as connection:
+                for index, email in enumerate(emails):
+                    try:
+                        connection.send(self._message(email))
+                    except OSError as exc:
+                        if _connection_lost(exc):
+                            # La conexión se cayó: este y los que faltan se reintentan
+                            self._retry(emails[index:], exc)
+                            break
+                        self._retry([email], exc)
+                        continue
+                    email.status = 'enviado'
+                    email.sent_at = datetime.utcnow()
+                    email.batch_id = None
+                    email.last_error = None
+                    db.session.commit()
+                    throttle.record()
+                    sent += 1
+        except OSError as exc:
+            # Falló la conexión o el cierre: reintentar lo que no salió
+            self._retry([email for email in emails if email.status == 'enviando'], exc)
+        return sent
+
+
+mail_outbox = MailOutbox()
@@ -0,0 +1,57 @@
+"""
+Servicio de notificaciones en tiempo real.
+
+Este módulo guarda las notificaciones de los usuarios y las envía por
+Socket.IO únicamente a la sala privada de cada usuario, junto con el
+contador de no leídas, para que el cliente no tenga que consultar al
+servidor periódicamente.
+"""
+
+from app.db import db
+from app.extensions import socketio
+from app.models.notifications import Notification
+
+NEW_NOTIFICATION_EVENT = 'nueva_notificacion'
+UNREAD_COUNT_EVENT = 'notificaciones_no_leidas'
+
+
+def user_room(user_id):
+    """Nombre de la sala Socket.IO privada de un usuario."""
+    return f'user:{user_id}'
+
+
+def unread_count(user_id):
+    """Cantidad de notificaciones no leídas de un usuario."""
+    return Notification.query.filter_by(user_id=user_id, leida=False).count()
+
+
+def emit_unread_count(user_id, to=None):
+    """Envía el contador de no leídas a la sala del usuario o a `to`."""
+    socketio.emit(
+        UNREAD_COUNT_EVENT,
+        {'count': unread_count(user_id)},
+        to=to or user_room(user_id)
+    )
+
+
+def notify(user_id, mensaje):
+    """
+    Crea una notificación y la envía en tiempo real al usuario.
+
+    Args:
+        user_id: ID del usuario destinatario
+        mensaje: Texto de la notificación
+
+    Returns:
+        La notificación creada
+    """
+    notif = Notification(user_id=user_id, mensaje=mensaje)
+    db.session.add(notif)
+    db.session.commit()
+    socketio.emit(
+        NEW_NOTIFICATION_EVENT,
+        {'id': notif.id, 'mensaje': notif.mensaje},
+        to=user_room(user_id)
+    )
+    emit_unread_count(user_id)
+    return notif
@@ -0,0 +1,153 @@
+"""
+Caché de páginas completas del catálogo para visitantes anónimos.
+
+La mayor parte del tráfico del catálogo es anónimo y repite las mismas
+combinaciones de categoría, filtros y página. ``cached_page`` guarda el
+HTML ya renderizado bajo una clave con los argumentos normalizados
+(``normalize_catalog_args``: ordenados, sin valores por defecto, precios
+redondeados), así que ``?page=1&category=3`` y ``?category=3`` comparten
+entrada. Solo se cachea para visitantes anónimos sin mensajes flash
+pendientes; lo que depende del usuario (favoritos, menú de la cuenta)
+nunca llega a la caché.
+
+La invalidación es por etiquetas: cada etiqueta tiene una versión en la
+caché que forma parte de la clave, e ``invalidate_pages('products')`` la
+reemplaza, dejando inalcanzables todas las páginas que dependían de ella
+(vencen solas con CATALOG_CACHE_TIMEOUT). Funciona igual con SimpleCache,
+FileSystemCache o Redis.
+"""
+
+import hashlib
+import json
+import uuid
+
+from flask import current_app, make_response, request, session
+from flask_login import current_user
+
+from app.extensions import cache
+
+PRODUCTS_TAG = 'products'
+CATEGORIES_TAG = 'categories'
+CATALOG_TAGS = (PRODUCTS_TAG, CATEGORIES_TAG)
+
+MAX_QUERY_LENGTH = 100
+
+
+def _tag_key(tag):
+    return f'page:tag:{tag}'
+
+
+def _new_version():
+    return uuid.uuid4().hex[:12]
+
+
+def tag_versions(tags):
+    """Versión actual de cada etiqueta (se crea si no existe)."""
+    versions = cache.get_many(*[_tag_key(tag) for tag in tags])
+    for index, version in enumerate(versions):
+        if version is None:
+            # add: si otro proceso la creó primero, se usa la suya
+            cache.add(_tag_key(tags[index]), _new_version(), timeout=0)
+            versions[index] = cache.get(_tag_key(tags[index]))
+    return versions
+
+
+def invalidate_pages(*tags):
+    """Invalida todas las páginas cacheadas que dependen de `tags`."""
+    for tag in tags:
+        cache.set(_tag_key(tag), _new_version(), timeout=0)
+
+
+def _text(value):
+    return ' '.join((value or '').split()).lower()[:MAX_QUERY_LENGTH]
+
+
+def _positive_int(value):
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        return None
+    return number if number > 0 else None
+
+
+def _price(value):
+    try:
+        return max(round(float(value)), 0)
+    except (TypeError, ValueError, OverflowError):
+        return None
+
+
+def normalize_catalog_args(args):
+    """
+    Filtros del catálogo normalizados, sin los valores por defecto.
+
+    Los textos quedan en minúsculas y sin espacios repetidos (las
+    búsquedas no distinguen mayúsculas), los precios redondeados a pesos
+    y se descartan la página 1 y los argumentos desconocidos o inválidos.
+    La ruta filtra con estos mismos valores, así que dos peticiones con la
+    misma clave siempre muestran lo mismo.
+
+    Args:
+        args: ``request.args``
+
+    Returns:
+        Diccionario con las claves presentes de category, q, min_price,
+        max_price, color, size y page
+    """
+    filters = {
+        'category': _positive_int(args.get('category')),
+        'q': _text(args.get('q')),
+        'min_price': _price(args.get('min_price')) if args.get('min_price') else None,
+        'max_price': _price(args.get('max_price')) if args.get('max_price') else None,
+        'color': _text(args.get('color')),
+        'size': _text(args.get('size')),
+        'page': _positive_int(args.get('page')),
+    }
+    if filters['page'] == 1:
+        filters['page'] = None
+    return {key: value for key, value in filters.items() if value not in (None, '')}
+
+
+def page_key(name, params, tags):
+    """Clave de la página: nombre, versiones de etiquetas y hash de los parámetros."""
+    digest = hashlib.sha1(
+        json.dumps(params, sort_keys=True).encode('utf-8')
+    ).hexdigest()[:16]
+    return f"page:{name}:{'.'.join(tag_versions(tags))}:{digest}"
+
+
+def cacheable():
+    """True si la respuesta puede salir de (o ir a) la caché compartida."""
+    return (request.method == 'GET'
+            and not current_user.is_authenticated
+            and '_flashes' not in session)
+
+
+def cached_page(name, params, tags, render):
+    """
+    Devuelve la página desde la caché o la renderiza y la guarda.
+
+    Args:
+        name: Nombre de la página (parte de la clave)
+        params: Parámetros normalizados de la página
+        tags: Etiquetas de las que depende
+        render: Función sin argumentos que devuelve el HTML
+
+    Returns:
+        Respuesta con la cabecera ``X-Cache`` (HIT, MISS o BYPASS)
+    """
+    timeout = current_app.config.get('CATALOG_CACHE_TIMEOUT', 300)
+    if not timeout or not cacheable():
+        response = make_response(render())
+        response.headers['X-Cache'] = 'BYPASS'
+        return response
+    key = page_key(name, params, tags)
+    html = cache.get(key)
+    status = 'HIT'
+    if html is None:
+        html = render()
+        cache.set(key, html, timeout=timeout)
+        status = 'MISS'
+    response = make_response(html)
+    response.headers['X-Cache'] = status
+    return response
@@ -0,0 +1,358 @@
+"""
+Servicio de procesamiento de pagos en segundo plano.
+
+Las rutas de pago solo encolan el trabajo y responden de inmediato; un
+pool de hilos completa el pedido (líneas y stock si faltan, estado
+``pagado``) y avisa al usuario por Socket.IO. Si el pago se rechaza, el
+stock reservado en el checkout vuelve al inventario. La pasarela simulada y la
+confirmación de PayU usan el mismo flujo.
+
+Las confirmaciones de PayU se guardan primero en ``payment_notifications``
+(una sola vez por ``reference_sale`` y ``state_pol``) y el webhook
+responde en cuanto quedan registradas; el worker reclama cada
+notificación con un ``UPDATE`` condicional para aplicarla una única vez.
+Una notificación reclamada por un worker que se cae queda libre otra vez
+pasado PAYMENT_NOTIFICATION_CLAIM_TIMEOUT.
+"""
+
+import time
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import and_, insert, or_, update
+from sqlalchemy.exc import IntegrityError
+
+from app.db import db
+from app.extensions import socketio
+from app.models.orders import Order
+from app.models.payments import PaymentNotification
+from app.services import sales_rollup
+from app.services.background import BackgroundPool
+from app.services.checkout import checkout_cart, release_stock, retake_stock
+from app.services.notifications import notify, user_room
+
+PAYMENT_STATUS_EVENT = 'pago_actualizado'
+
+STATUS_PROCESSING = 'procesando'
+STATUS_PAID = 'pagado'
+STATUS_REJECTED = 'pago_rechazado'
+
+# Estados desde los que el cliente todavía puede pagar un pedido
+PAYABLE_STATUSES = ('pendiente', STATUS_PROCESSING, STATUS_REJECTED)
+# PayU ya cobró: su confirmación tardía también aplica a un pedido cancelado
+# (cuyo carrito ya se rellenó), que vuelve a tomar su stock
+PAYU_PAYABLE_STATUSES = PAYABLE_STATUSES + ('cancelado',)
+
+# Intentos de aplicar el estado final si otra petición lo cambia a la vez
+STATUS_RETRIES = 3
+
+# Valores de state_pol de PayU
+PAYU_APPROVED = '4'
+PAYU_DECLINED = frozenset({'5', '6'})  # expirada, rechazada
+
+
+def _simulated_gateway():
+    """Simula la latencia de una pasarela real, fuera de la petición HTTP."""
+    time.sleep(current_app.config.get('PAYMENT_SIMULATED_DELAY', 0))
+    return True
+
+
+def _payu_gateway():
+    """PayU ya aprobó el pago cuando llega su confirmación."""
+    return True
+
+
+def _payu_declined():
+    """PayU informó que la transacción fue rechazada o expiró."""
+    return False
+
+
+PROVIDERS = {
+    'simulada': _simulated_gateway,
+    'payu': _payu_gateway,
+    'payu_rechazado': _payu_declined,
+}
+
+
+def _emit_status(order):
+    socketio.emit(
+        PAYMENT_STATUS_EVENT,
+        {'order_id': order.id, 'status': order.status},
+        to=user_room(order.user_id)
+    )
+
+
+def _take_stock(order, provider):
+    """
+    Asegura que un pedido aprobado tenga su stock tomado.
+
+    Returns:
+        False si falta stock y el pago debe rechazarse; con PayU el cobro
+        ya se hizo, así que el pedido sigue adelante y se revisa a mano
+    """
+    if not order.details:
+        # Pedidos antiguos creados sin líneas: completarlos con el carrito
+        result = checkout_cart(order.user_id, order=order)
+        if result.ok or result.empty:
+            return True
+        current_app.logger.error(
+            f'Stock insuficiente al pagar el pedido {order.id}: {result.failures}'
+        )
+    elif order.stock_released:
+        # El pedido venció o se rechazó antes y devolvió su stock: volver a tomarlo
+        short = retake_stock(order)
+        if not short:
+            return True
+        current_app.logger.error(
+            f'Stock insuficiente al pagar el pedido {order.id}: productos {short}'
+        )
+    else:
+        return True
+    return provider == 'payu'
+
+
+def _payable_statuses(provider):
+    """Estados desde los que `provider` puede cambiar el pedido."""
+    return PAYU_PAYABLE_STATUSES if provider == 'payu' else PAYABLE_STATUSES
+
+
+def process_payment(order_id, provider):
+    """
+    Completa el pago de un pedido.
+
+    Es idempotente: un pedido ya vendido (pagado, enviado o entregado) no
+    cambia, así que repetir una confirmación no lo hace retroceder. Un
+    pedido cancelado solo lo cambia una confirmación aprobada de PayU.
+
+    Args:
+        order_id: ID del pedido
+        provider: Clave de PROVIDERS ('simulada' o 'payu')
+
+    Returns:
+        Estado final del pedido, o None si el pedido no existe
+    """
+    order = db.session.get(Order, order_id)
+    if order is None:
+        current_app.logger.error(f'Pago de un pedido inexistente: {order_id}')
+        return None
+    payable = _payable_statuses(provider)
+    if order.status not in payable:
+        return order.status
+
+    approved = PROVIDERS[provider]() and _take_stock(order, provider)
+    status = STATUS_PAID if approved else STATUS_REJECTED
+    # UPDATE condicional sobre el estado actual: si otra petición lo cambia
+    # entre la lectura y el UPDATE se vuelve a leer; si ya no admite el pago
+    # (vendido, cancelado) o ya está en ese estado no se toca y los
+    # resúmenes no se suman dos veces
+    changed = False
+    for _ in range(STATUS_RETRIES):
+        old_status = db.session.query(Order.status)\
+            .filter(Order.id == order_id).scalar()
+        if old_status not in payable or old_status == status:
+            break
+        changed = sales_rollup.change_status(order, old_status, status)
+        if changed:
+            break
+    if changed and not approved:
+        # El pago no se hizo: las unidades reservadas vuelven al inventario
+        release_stock(order)
+    db.session.commit()
+    db.session.refresh(order)
+    if not changed:
+        return order.status
+
+    _emit_status(order)
+    if approved:
+        notify(order.user_id, f'El pago de tu pedido #{order.id} fue aprobado.')
+    else:
+        notify(order.user_id, f'No pudimos completar el pago del pedido #{order.id}.')
+    return order.status
+
+
+def record_notification(order_id, form, provider='payu'):
+    """
+    Guarda una confirmación de la pasarela si no se había recibido antes.
+
+    Args:
+        order_id: ID del pedido al que se refiere
+        form: Campos recibidos en el webhook
+        provider: Pasarela que envía la confirmación
+
+    Returns:
+        ID de la notificación a procesar, o None si es un duplicado de
+        una que ya se aplicó o se está aplicando
+    """
+    try:
+        result = db.session.execute(insert(PaymentNotification).values(
+            provider=provider,
+            reference_sale=form['reference_sale'],
+            state_pol=form['state_pol'],
+            order_id=order_id,
+            payload=dict(form),
+            status='pendiente',
+            attempts=0,
+            received_at=datetime.utcnow(),
+        ))
+        db.session.commit()
+    except IntegrityError:
+        # Reintento de la pasarela: solo se vuelve a encolar si la
+        # notificación original no llegó a aplicarse
+        db.session.rollback()
+        return db.session.query(PaymentNotification.id).filter(
+            PaymentNotification.reference_sale == form['reference_sale'],
+            PaymentNotification.state_pol == form['state_pol'],
+            _claimable(datetime.utcnow())
+        ).scalar()
+    return result.inserted_primary_key[0]
+
+
+def _claimable(now, statuses=('pendiente', 'error')):
+    """Notificaciones en `statuses` o reclamadas por un worker que no terminó."""
+    timeout = current_app.config['PAYMENT_NOTIFICATION_CLAIM_TIMEOUT']
+    return or_(
+        PaymentNotification.status.in_(statuses),
+        and_(PaymentNotification.status == 'procesando',
+             PaymentNotification.claimed_at < now - timedelta(seconds=timeout)),
+    )
+
+
+def process_notification(notification_id):
+    """
+    Aplica una confirmación de PayU guardada.
+
+    La notificación se reclama con un UPDATE condicional, así que aunque
+    dos workers la reciban solo uno la aplica. Una que sigue 'procesando'
+    pasado PAYMENT_NOTIFICATION_CLAIM_TIMEOUT (su worker se cayó) se
+    puede volver a reclamar.
+
+    Returns:
+        Estado final del pedido, o None si otro worker la tenía o no
+        cambia el pedido (p. ej. una transacción pendiente en PayU)
+    """
+    now = datetime.utcnow()
+    claimed = db.session.execute(
+        update(PaymentNotification)
+        .where(PaymentNotification.id == notification_id, _claimable(now))
+        .values(status='procesando', claimed_at=now,
+                attempts=PaymentNotification.attempts + 1)
+    ).rowcount
+    db.session.commit()
+    if not claimed:
+        return None
+
+    notification = db.session.get(PaymentNotification, notification_id)
+    try:
+        status = None
+        if notification.state_pol == PAYU_APPROVED:
+            status = process_payment(notification.order_id, 'payu')
+        elif notification.state_pol in PAYU_DECLINED:
+            status = process_payment(notification.order_id, 'payu_rechazado')
+    except Exception as exc:
+        db.session.rollback()
+        notification.status = 'error'
+        notification.error = str(exc)
+        db.session.commit()
+        raise
+    notification.status = 'procesada'
+    notification.error = None
+    notification.processed_at = datetime.utcnow()
+    db.session.commit()
+    return status
+
+
+def replay_notifications(statuses=('pendiente', 'error'), reference_sale=None,
+                         limit=None):
+    """
+    Vuelve a procesar notificaciones guardadas, en orden de llegada.
+
+    Sirve para recuperar las que quedaron pendientes tras un reinicio o
+    fallaron; siempre incluye las 'procesando' cuyo reclamo venció.
+    Las 'procesando' recientes solo se incluyen si se piden en `statuses`
+    (p. ej. sin workers corriendo). Un pedido ya vendido no cambia (ver
+    ``process_payment``), pero una notificación ya procesada sí puede
+    volver a cambiar un pedido
+    que no llegó a venderse (p. ej. uno cancelado que vuelve a pagarse),
+    así que las procesadas solo se incluyen si se piden en `statuses`.
+
+    Args:
+        statuses: Estados de las notificaciones a reprocesar
+        reference_sale: Limita el reproceso a una referencia de PayU
+        limit: Máximo de notificaciones a reprocesar
+
+    Returns:
+        Diccionario {id de notificación: estado final del pedido}
+    """
+    query = db.session.query(PaymentNotification.id)\
+        .filter(_claimable(datetime.utcnow(), statuses))
+    if reference_sale:
+        query = query.filter(PaymentNotification.reference_sale == reference_sale)
+    ids = [row.id for row in query.order_by(PaymentNotification.received_at,
+                                            PaymentNotification.id).limit(limit)]
+    if not ids:
+        return {}
+    # Volver a dejarlas pendientes para que process_notification las reclame
+    db.session.execute(
+        update(PaymentNotification)
+        .where(PaymentNotification.id.in_(ids))
+        .values(status='pendiente')
+    )
+    db.session.commit()
+    results = {}
+    for notification_id in ids:
+        try:
+            results[notification_id] = process_notification(notification_id)
+        except Exception:  # pylint: disable=broad-except
+            current_app.logger.exception(
+                f'Error reprocesando la notificación {notification_id}'
+            )
+            results[notification_id] = None
+    return results
+
+
+class PaymentQueue(BackgroundPool):
+    """Cola de trabajos de pago atendida por un pool de hilos por aplicación."""
+
+    name = 'payment_queue'
+    thread_name_prefix = 'payments'
+    workers_config = 'PAYMENT_WORKERS'
+    eager_config = 'PAYMENT_QUEUE_EAGER'
+    error_message = 'Error en el trabajo de pago'
+
+    def init_app(self, app):
+        """Registra la extensión; el pool se crea con el primer trabajo."""
+        app.config.setdefault('PAYMENT_WORKERS', 2)
+        app.config.setdefault('PAYMENT_QUEUE_EAGER', False)
+        app.config.setdefault('PAYMENT_SIMULATED_DELAY', 2)
+        app.config.setdefault('PAYMENT_NOTIFICATION_CLAIM_TIMEOUT', 600)
+        super().init_app(app)
+
+    def enqueue(self, order_id, provider):
+        """
+        Marca el pedido como en proceso y encola su pago.
+
+        Returns:
+            El trabajo encolado (o su resultado en modo inmediato), o None si
+            el pedido ya no admite pagos
+        """
+        # Si el trabajo se pierde (reinicio del proceso), release_stale_orders
+        # cancela el pedido 'procesando' y devuelve su stock al vencer la reserva.
+        # Un pedido ya vendido (pagado, enviado...) no vuelve a 'procesando':
+        # saldría de los resúmenes de ventas sin pasar por sales_rollup
+        # ni tampoco uno cancelado, cuyas líneas ya volvieron al carrito
+        changed = db.session.execute(
+            update(Order)
+            .where(Order.id == order_id, Order.status.in_(PAYABLE_STATUSES))
+            .values(status=STATUS_PROCESSING)
+        ).rowcount
+        db.session.commit()
+        if not changed:
+            return None
+        return self.submit(process_payment, order_id, provider)
+
+    def enqueue_notification(self, notification_id):
+        """Encola la aplicación de una confirmación de la pasarela ya guardada."""
+        return self.submit(process_notification, notification_id)
+
+
+payment_queue = PaymentQueue()
@@ -0,0 +1,316 @@
+"""
+Cliente HTTP compartido para la pasarela PayU.
+
+Todas las llamadas salientes a PayU pasan por aquí: una ``Session`` de
+requests con pool de conexiones keep-alive por aplicación, timeouts
+cortos de conexión y lectura con un tope total por llamada, reintentos
+acotados con backoff exponencial y jitter ante errores de conexión o
+respuestas 429/5xx (no ante un timeout de lectura), y un circuit
+breaker que responde de inmediato mientras PayU está degradado en lugar
+de retener hilos del servidor. Las métricas de latencia y fallos se
+publican en ``/metrics``.
+"""
+
+import random
+import threading
+import time
+from collections import deque
+
+import requests
+from flask import current_app
+from requests.adapters import HTTPAdapter
+
+SANDBOX_URL = 'https://sandbox.checkout.payulatam.com'
+PRODUCTION_URL = 'https://checkout.payulatam.com'
+CHECKOUT_PATH = '/ppp-web-gateway-payu/'
+
+# Respuestas que indican un problema transitorio de PayU
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class PaymentGatewayError(Exception):
+    """PayU no respondió correctamente tras los reintentos."""
+
+
+class CircuitOpenError(PaymentGatewayError):
+    """El circuito está abierto: no se intenta llamar a PayU."""
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker por fallos consecutivos.
+
+    Tras ``threshold`` llamadas fallidas seguidas se abre y rechaza las
+    llamadas durante ``reset_after`` segundos; después deja pasar una
+    sola llamada de prueba que lo cierra si sale bien o lo vuelve a abrir.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, threshold=5, reset_after=30.0, clock=time.monotonic):
+        self.threshold = threshold
+        self.reset_after = reset_after
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+
+    @property
+    def state(self):
+        """Estado actual del circuito."""
+        with self._lock:
+            return self._state()
+
+    def _state(self):
+        if self._opened_at is None:
+            return self.CLOSED
+        if self._clock() - self._opened_at >= self.reset_after:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def allow(self):
+        """True si la llamada puede hacerse."""
+        with self._lock:
+            state = self._state()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._probing or self._failures >= self.threshold:
+                self._opened_at = self._clock()
+            self._probing = False
+
+
+class GatewayMetrics:
+    """Contadores y latencias de las llamadas a PayU en este proceso."""
+
+    def __init__(self, window=1000):
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=window)
+        self.requests = 0
+        self.failures = 0
+        self.retries = 0
+        self.rejected = 0
+
+    def record(self, seconds, ok):
+        """Registra un intento con su duración."""
+        with self._lock:
+            self.requests += 1
+            self._latencies.append(seconds * 1000)
+            if not ok:
+                self.failures += 1
+
+    def record_retry(self):
+        with self._lock:
+            self.retries += 1
+
+    def record_rejected(self):
+        with self._lock:
+            self.rejected += 1
+
+    def snapshot(self, breaker=None):
+        """
+        Resumen de las métricas.
+
+        Returns:
+            Diccionario con intentos, fallos, tasa de fallos, reintentos,
+            llamadas rechazadas por el circuito y latencias en milisegundos
+        """
+        with self._lock:
+            latencies = sorted(self._latencies)
+            data = {
+                'requests': self.requests,
+                'failures': self.failures,
+                'failure_rate': self.failures / self.requests if self.requests else 0.0,
+                'retries': self.retries,
+                'rejected': self.rejected,
+            }
+        data['latency_ms'] = {
+            'p50': latencies[len(latencies) // 2] if latencies else None,
+            'p95': latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+            if latencies else None,
+            'max': latencies[-1] if latencies else None,
+        }
+        if breaker is not None:
+            data['circuit'] = breaker.state
+        return data
+
+
+class _Gateway:
+    """Sesión, circuito y métricas de una aplicación."""
+
+    def __init__(self, config):
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=2,
+            pool_maxsize=config['PAYU_POOL_SIZE'],
+            max_retries=0
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.breaker = CircuitBreaker(
+            config['PAYU_BREAKER_THRESHOLD'], config['PAYU_BREAKER_RESET']
+        )
+        self.metrics = GatewayMetrics()
+
+
+class PayUClient:
+    """Extensión con el cliente de PayU de la aplicación actual."""
+
+    def __init__(self, app=None):
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Registra la extensión; la sesión se crea en el primer uso."""
+        app.config.setdefault('PAYU_BASE_URL', None)
+        app.config.setdefault('PAYU_CONNECT_TIMEOUT', 2.0)
+        app.config.setdefault('PAYU_READ_TIMEOUT', 3.0)
+        app.config.setdefault('PAYU_TOTAL_TIMEOUT', 8.0)
+        app.config.setdefault('PAYU_MAX_RETRIES', 2)
+        app.config.setdefault('PAYU_RETRY_BACKOFF', 0.2)
+        app.config.setdefault('PAYU_POOL_SIZE', 32)
+        app.config.setdefault('PAYU_BREAKER_THRESHOLD', 5)
+        app.config.setdefault('PAYU_BREAKER_RESET', 30.0)
+        app.extensions['payu_client'] = None
+
+    @property
+    def _gateway(self):
+        gateway = current_app.extensions.get('payu_client')
+        if gateway is None:
+            with self._lock:
+                gateway = current_app.extensions.get('payu_client')
+                if gateway is None:
+                    gateway = _Gateway(current_app.config)
+                    current_app.extensions['payu_client'] = gateway
+        return gateway
+
+    @property
+    def base_url(self):
+        """URL de PayU: PAYU_BASE_URL o la de sandbox/producción según el modo."""
+        configured = current_app.config.get('PAYU_BASE_URL')
+        if configured:
+            return configured.rstrip('/')
+        if current_app.config.get('PAYU_TEST_MODE', True):
+            return SANDBOX_URL
+        return PRODUCTION_URL
+
+    @property
+    def breaker(self):
+        """Circuit breaker de la aplicación actual."""
+        return self._gateway.breaker
+
+    def metrics(self):
+        """Métricas de la aplicación actual, con el estado del circuito."""
+        gateway = self._gateway
+        return gateway.metrics.snapshot(gateway.breaker)
+
+    def post_checkout(self, data, allow_redirects=True):
+        """
+        Envía el formulario de WebCheckout a PayU.
+
+        Args:
+            data: Campos del formulario de pago
+            allow_redirects: Si se sigue la redirección a la página de pago
+
+        Returns:
+            Respuesta de PayU (cualquier código que no sea 429/5xx)
+
+        Raises:
+            CircuitOpenError: Si PayU está marcado como degradado
+            PaymentGatewayError: Si fallaron todos los intentos
+        """
+        return self._request('POST', f'{self.base_url}{CHECKOUT_PATH}',
+                             data=data, allow_redirects=allow_redirects)
+
+    @staticmethod
+    def _attempt(gateway, method, url, timeout, kwargs):
+        """
+        Hace un intento y registra su latencia.
+
+        Returns:
+            (respuesta válida o None, error del intento o None, si se puede
+            reintentar)
+        """
+        started = time.perf_counter()
+        try:
+            response = gateway.session.request(method, url, timeout=timeout, **kwargs)
+        except requests.RequestException as exc:
+            gateway.metrics.record(time.perf_counter() - started, False)
+            # Un ReadTimeout significa que PayU recibió la petición pero está
+            # lento: reintentar solo duplicaría el tiempo que se retiene el hilo
+            return None, exc, not isinstance(exc, requests.ReadTimeout)
+        ok = response.status_code not in RETRY_STATUSES
+        gateway.metrics.record(time.perf_counter() - started, ok)
+        if ok:
+            return response, None, False
+        return None, PaymentGatewayError(f'PayU respondió {response.status_code}'), True
+
+    @staticmethod
+    def _backoff(gateway, attempt, deadline, error):
+        """
+        Espera antes del siguiente intento.
+
+        Backoff exponencial con jitter completo, sin pasar del tope total.
+
+        Returns:
+            False si la espera superaría el tope y no se debe reintentar
+        """
+        pause = random.uniform(
+            0, current_app.config['PAYU_RETRY_BACKOFF'] * 2 ** attempt
+        )
+        if time.monotonic() + pause >= deadline:
+            return False
+        gateway.metrics.record_retry()
+        current_app.logger.warning(f'Reintentando llamada a PayU: {error}')
+        time.sleep(pause)
+        return True
+
+    def _request(self, method, url, **kwargs):
+        config = current_app.config
+        gateway = self._gateway
+        if not gateway.breaker.allow():
+            gateway.metrics.record_rejected()
+            raise CircuitOpenError('PayU no está disponible en este momento')
+
+        deadline = time.monotonic() + config['PAYU_TOTAL_TIMEOUT']
+        attempts = config['PAYU_MAX_RETRIES'] + 1
+        error = None
+        for attempt in range(attempts):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            timeout = (min(config['PAYU_CONNECT_TIMEOUT'], remaining),
+                       min(config['PAYU_READ_TIMEOUT'], remaining))
+            response, error, retryable = self._attempt(
+                gateway, method, url, timeout, kwargs
+            )
+            if response is not None:
+                gateway.breaker.record_success()
+                return response
+            if not retryable or attempt + 1 == attempts:
+                break
+            if not self._backoff(gateway, attempt, deadline, error):
+                break
+
+        gateway.breaker.record_failure()
+        raise PaymentGatewayError(f'PayU no respondió: {error}') from error
+
+
+payu_client = PayUClient()
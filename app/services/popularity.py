@@ -0,0 +1,173 @@
+"""
+Ranking de productos populares con decaimiento exponencial en el tiempo.
+
+Cada unidad vendida suma a la popularidad de su producto un peso que se
+reduce a la mitad cada POPULARITY_HALF_LIFE_DAYS, así que lo que se vende
+ahora pesa más que lo que se vendió hace meses. Para no reescribir todos
+los puntajes a medida que pasa el tiempo se usa decaimiento hacia
+adelante: en vez de reducir los puntajes viejos, cada venta suma
+``unidades × 2^((fecha - EPOCH) / vida media)``. Todos los puntajes
+decaen al mismo ritmo, así que ordenar por el valor guardado da el mismo
+ranking que ordenar por el valor decaído; ``current_score`` lo convierte
+a unidades de hoy.
+
+``sales_rollup`` llama a ``record_order`` cada vez que un pedido entra o
+sale de los estados de venta, con el peso de la fecha de creación del
+pedido, así que cancelar un pedido resta exactamente lo que sumó. Los
+primeros POPULARITY_TOP_K productos se guardan en la caché compartida
+(vencen cada POPULARITY_CACHE_TIMEOUT); cada venta los borra después del
+commit, para que nadie cachee puntajes sin confirmar, y la siguiente
+lectura los recarga con una consulta sobre el índice de ``score``.
+``top_products`` devuelve los N primeros con una sola consulta.
+``rebuild`` recalcula todo desde los pedidos
+(``scripts/rebuild_popularity.py``).
+
+Con una vida media de 7 días los pesos caben en un float hasta cerca de
+2043; antes de eso basta con mover EPOCH y ejecutar ``rebuild``.
+"""
+
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import event, func, update
+from sqlalchemy.exc import IntegrityError
+
+from app.db import db
+from app.extensions import cache
+from app.models.orders import Order, OrderDetail
+from app.models.popularity import ProductPopularity
+from app.models.products import Product
+
+TOP_CACHE_KEY = 'popularity:top'
+# Marca en Session.info: la transacción cambió puntajes y hay que borrar el top
+TOP_STALE = 'popularity_top_stale'
+
+# Origen de los pesos: una venta en EPOCH pesa 1 por unidad
+EPOCH = datetime(2024, 1, 1)
+
+
+def _half_life_seconds():
+    return current_app.config.get('POPULARITY_HALF_LIFE_DAYS', 7) * 86400
+
+
+def _top_k():
+    return current_app.config.get('POPULARITY_TOP_K', 50)
+
+
+def weight(when):
+    """Peso de una unidad vendida en `when`."""
+    return 2 ** ((when - EPOCH).total_seconds() / _half_life_seconds())
+
+
+def current_score(score, now=None):
+    """Convierte un puntaje guardado a unidades decaídas hasta `now` (UTC)."""
+    return score / weight(now or datetime.utcnow())
+
+
+def _add_score(product_id, amount):
+    condition = ProductPopularity.product_id == product_id
+    increment = {'score': ProductPopularity.score + amount}
+    stmt = update(ProductPopularity).where(condition).values(increment)
+    if db.session.execute(stmt).rowcount:
+        return
+    try:
+        with db.session.begin_nested():
+            db.session.add(ProductPopularity(product_id=product_id, score=amount))
+    except IntegrityError:
+        # Otra transacción creó la fila entre el UPDATE y el INSERT
+        db.session.execute(stmt)
+
+
+def record_order(when, lines, sign=1):
+    """
+    Suma (o resta) las unidades de un pedido a la popularidad (sin commit).
+
+    Args:
+        when: Fecha del pedido, que fija el peso de sus unidades
+        lines: Pares (product_id, unidades)
+        sign: 1 al pagarse el pedido, -1 si deja de contar como venta
+    """
+    lines = [(product_id, units) for product_id, units in lines if units]
+    if not lines:
+        return
+    factor = sign * weight(when)
+    for product_id, units in lines:
+        _add_score(product_id, factor * units)
+    _invalidate_top_after_commit()
+
+
+def _invalidate_top_after_commit():
+    # Borrar antes del commit dejaría que otra petición cachee el top
+    # anterior; fusionar puntajes en la caché pisaría ventas concurrentes
+    session = db.session()
+    session.info[TOP_STALE] = True
+    if not event.contains(session, 'after_commit', _top_committed):
+        event.listen(session, 'after_commit', _top_committed)
+
+
+def _top_committed(session):
+    if session.info.pop(TOP_STALE, False):
+        invalidate_top()
+
+
+def _cache_top(top):
+    cache.set(TOP_CACHE_KEY, top,
+              timeout=current_app.config.get('POPULARITY_CACHE_TIMEOUT', 300))
+
+
+def _load_top():
+    top = db.session.query(
+        ProductPopularity.product_id, ProductPopularity.score
+    ).join(Product, Product.id == ProductPopularity.product_id).filter(
+        ProductPopularity.score > 0
+    ).order_by(ProductPopularity.score.desc()).limit(_top_k()).all()
+    return [(product_id, score) for product_id, score in top]
+
+
+def top_ids(limit):
+    """IDs de los `limit` productos más populares (como mucho POPULARITY_TOP_K)."""
+    top = cache.get(TOP_CACHE_KEY)
+    if top is None:
+        top = _load_top()
+        _cache_top(top)
+    return [product_id for product_id, score in top[:limit] if score > 0]
+
+
+def top_products(limit):
+    """Los `limit` productos más populares, en orden, con una sola consulta."""
+    ids = top_ids(limit)
+    if not ids:
+        return []
+    by_id = {p.id: p for p in Product.query.filter(Product.id.in_(ids)).all()}
+    return [by_id[product_id] for product_id in ids if product_id in by_id]
+
+
+def invalidate_top():
+    """Elimina el top cacheado para que se recalcule en la próxima lectura."""
+    cache.delete(TOP_CACHE_KEY)
+
+
+def rebuild(sale_statuses):
+    """
+    Recalcula la popularidad de todos los productos desde los pedidos.
+
+    Args:
+        sale_statuses: Estados de pedido que cuentan como venta
+
+    Returns:
+        Número de productos con ventas
+    """
+    scores = {}
+    rows = db.session.query(
+        Order.created_at, OrderDetail.product_id, func.sum(OrderDetail.quantity)
+    ).join(Order, OrderDetail.order_id == Order.id).filter(
+        Order.status.in_(sale_statuses)
+    ).group_by(Order.id, OrderDetail.product_id).yield_per(10000)
+    for created_at, product_id, units in rows:
+        scores[product_id] = scores.get(product_id, 0) + units * weight(created_at)
+    ProductPopularity.query.delete(synchronize_session=False)
+    db.session.add_all(ProductPopularity(product_id=product_id, score=score)
+                       for product_id, score in scores.items())
+    db.session.commit()
+    invalidate_top()
+    return len(scores)
@@ -0,0 +1,135 @@
+"""
+Agregados de calificaciones y reseñas paginadas de los productos.
+
+El detalle de un producto muestra el promedio, el total y el histograma
+por estrellas de sus reseñas aprobadas. En vez de leer todas las reseñas
+en cada visita, ``ProductRating`` guarda esos agregados y se actualiza
+con un UPDATE atómico (``count = count + 1``) en la misma transacción en
+la que el administrador aprueba o rechaza una reseña. Si un producto aún
+no tiene fila (bases anteriores a esta tabla) se calcula desde las
+reseñas; ``scripts/rebuild_ratings.py`` reconstruye todos.
+
+Las reseñas se muestran por páginas con el nombre del autor en la misma
+consulta (JOIN con usuarios), así que la página del producto hace un
+número fijo de consultas sin importar cuántas reseñas tenga.
+"""
+
+from sqlalchemy import func, update
+from sqlalchemy.exc import IntegrityError
+
+from app.db import db
+from app.models.reviews import ProductRating, Review
+from app.models.users import Users
+
+REVIEWS_PER_PAGE = 10
+
+
+def _stars(rating):
+    return min(max(int(rating), 1), 5)
+
+
+def rebuild_rating(product_id):
+    """Recalcula desde las reseñas aprobadas los agregados de un producto."""
+    rows = db.session.query(
+        Review.rating, func.count(Review.id)  # pylint: disable=E1102
+    ).filter(
+        Review.product_id == product_id, Review.aprobada.is_(True)
+    ).group_by(Review.rating).all()
+    rating = db.session.get(ProductRating, product_id) \
+        or ProductRating(product_id=product_id)
+    counts = {stars: 0 for stars in range(1, 6)}
+    for value, count in rows:
+        counts[_stars(value)] += count
+    rating.count = sum(counts.values())
+    rating.total = sum(stars * count for stars, count in counts.items())
+    for stars, count in counts.items():
+        setattr(rating, f'stars_{stars}', count)
+    db.session.add(rating)
+    return rating
+
+
+def rebuild_all():
+    """Reconstruye los agregados de los productos con reseñas; devuelve cuántos."""
+    product_ids = {row[0] for row in db.session.query(Review.product_id).distinct()}
+    product_ids.update(row[0] for row in db.session.query(ProductRating.product_id))
+    for product_id in product_ids:
+        rebuild_rating(product_id)
+    db.session.commit()
+    return len(product_ids)
+
+
+def _apply(review, delta):
+    column = f'stars_{_stars(review.rating)}'
+    stmt = (
+        update(ProductRating)
+        .where(ProductRating.product_id == review.product_id)
+        .values({
+            'count': ProductRating.count + delta,
+            'total': ProductRating.total + delta * _stars(review.rating),
+            column: getattr(ProductRating, column) + delta,
+        })
+        .execution_options(synchronize_session='fetch')
+    )
+    if db.session.execute(stmt).rowcount:
+        return
+    # Sin fila todavía: se calcula con el estado ya modificado de la reseña
+    db.session.flush()
+    try:
+        with db.session.begin_nested():
+            rebuild_rating(review.product_id)
+    except IntegrityError:
+        # Otra transacción creó la fila entre el UPDATE y el INSERT; su
+        # cálculo no incluye esta reseña, así que se suma como siempre
+        db.session.execute(stmt)
+
+
+def approve(review):
+    """Aprueba la reseña y la suma a los agregados (sin hacer commit)."""
+    if review.aprobada:
+        return
+    review.aprobada = True
+    _apply(review, 1)
+
+
+def remove(review):
+    """Elimina la reseña; si estaba aprobada la resta de los agregados (sin commit)."""
+    was_approved = review.aprobada
+    db.session.delete(review)
+    if was_approved:
+        _apply(review, -1)
+
+
+def get_rating(product_id):
+    """Agregados del producto, o None si no tiene reseñas aprobadas."""
+    rating = db.session.get(ProductRating, product_id)
+    return rating if rating is not None and rating.count else None
+
+
+def approved_reviews(product_id, page=1, per_page=REVIEWS_PER_PAGE):
+    """
+    Una página de reseñas aprobadas con el nombre de su autor.
+
+    Args:
+        product_id: ID del producto
+        page: Número de página (desde 1)
+        per_page: Reseñas por página
+
+    Returns:
+        Tupla (reseñas, hay_más); cada reseña es un diccionario con
+        user_name, rating, comment, date e image_path
+    """
+    rows = db.session.query(Review, Users.nameUser).outerjoin(
+        Users, Users.idUser == Review.user_id
+    ).filter(
+        Review.product_id == product_id, Review.aprobada.is_(True)
+    ).order_by(
+        Review.created_at.desc(), Review.id.desc()
+    ).offset((page - 1) * per_page).limit(per_page + 1).all()
+    reviews = [{
+        'user_name': user_name or 'Usuario',
+        'rating': review.rating,
+        'comment': review.comment,
+        'date': review.created_at,
+        'image_path': review.image_path
+    } for review, user_name in rows[:per_page]]
+    return reviews, len(rows) > per_page
@@ -0,0 +1,258 @@
+"""
+Resúmenes diarios de ventas mantenidos de forma incremental.
+
+Los reportes del administrador y el gráfico de ventas por día leen
+``sales_daily`` y ``product_sales_daily`` en vez de agrupar todo el
+historial de pedidos en cada visita, así que su costo depende del rango
+de fechas pedido y no del número de pedidos.
+
+Un pedido cuenta como venta mientras su estado está en SALE_STATUSES
+(pagado y los estados de envío posteriores). Cada cambio de estado que
+entra o sale de ese conjunto llama a ``order_status_changed`` antes del
+commit, que suma o resta el pedido con UPDATE atómicos (``units = units
++ n``) en el día de creación del pedido. ``change_status`` hace la
+transición con un UPDATE condicional sobre el estado leído y solo
+actualiza los resúmenes si la aplicó. Los reembolsos se suman en el
+día en que se registran. ``rebuild`` recalcula un rango (o todo) desde
+los pedidos y sirve de backfill: ``scripts/rebuild_sales_rollup.py``.
+Los mismos cambios actualizan la popularidad de los productos
+(``app.services.popularity``).
+"""
+
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import func, update
+from sqlalchemy.exc import IntegrityError
+
+from app.db import db
+from app.models.orders import Order, OrderDetail
+from app.models.products import Product
+from app.models.returns import ReturnRequest
+from app.models.sales import ProductSalesDaily, SalesDaily
+from app.services import popularity
+
+# Estados de un pedido que cuentan como venta
+SALE_STATUSES = ('pagado', 'enviado', 'entregado')
+REFUNDED = 'reembolsado'
+
+# Rango de los reportes si no se indica otro
+DEFAULT_RANGE_DAYS = 90
+
+
+def _add(model, key, values):
+    """Suma `values` a la fila `key` de `model`, creándola si no existe."""
+    conditions = [getattr(model, column) == value for column, value in key.items()]
+    increments = {
+        column: getattr(model, column) + value for column, value in values.items()
+    }
+    if db.session.execute(update(model).where(*conditions).values(increments)).rowcount:
+        return
+    try:
+        with db.session.begin_nested():
+            db.session.add(model(**key, **values))
+    except IntegrityError:
+        # Otra transacción creó la fila entre el UPDATE y el INSERT
+        db.session.execute(update(model).where(*conditions).values(increments))
+
+
+def _apply_order(order, sign):
+    db.session.flush()
+    day = order.created_at.date()
+    lines = db.session.query(
+        OrderDetail.product_id,
+        func.sum(OrderDetail.quantity),
+        func.sum(OrderDetail.price * OrderDetail.quantity)
+    ).filter(OrderDetail.order_id == order.id).group_by(OrderDetail.product_id).all()
+    _add(SalesDaily, {'day': day}, {
+        'orders': sign,
+        'units': sign * sum(units for _, units, _ in lines),
+        'revenue': sign * order.total,
+    })
+    for product_id, units, revenue in lines:
+        _add(ProductSalesDaily, {'day': day, 'product_id': product_id},
+             {'units': sign * units, 'revenue': sign * revenue})
+    popularity.record_order(
+        order.created_at, [(product_id, units) for product_id, units, _ in lines], sign
+    )
+
+
+def add_order(order):
+    """Suma el pedido (total y líneas) a los resúmenes de su día (sin commit)."""
+    _apply_order(order, 1)
+
+
+def remove_order(order):
+    """Resta el pedido de los resúmenes de su día (sin commit)."""
+    _apply_order(order, -1)
+
+
+def order_status_changed(order, old_status, new_status=None):
+    """
+    Actualiza los resúmenes si el pedido entró o salió de SALE_STATUSES.
+
+    Se llama después de cambiar el estado y antes del commit, para que el
+    pedido y los resúmenes se guarden en la misma transacción.
+
+    Args:
+        order: Pedido
+        old_status: Estado anterior
+        new_status: Estado nuevo (por defecto ``order.status``; útil si se
+            cambió con un UPDATE y el objeto aún no se refrescó)
+    """
+    was_sale = old_status in SALE_STATUSES
+    is_sale = (new_status or order.status) in SALE_STATUSES
+    if was_sale != is_sale:
+        _apply_order(order, 1 if is_sale else -1)
+
+
+def change_status(order, old_status, new_status):
+    """
+    Pasa el pedido a `new_status` solo si sigue en `old_status` (sin commit).
+
+    El UPDATE condicional hace que dos peticiones que leyeron el mismo
+    estado no apliquen la transición (ni la sumen a los resúmenes) dos
+    veces. El objeto no se refresca: ``order.status`` conserva el valor
+    leído hasta el commit.
+
+    Returns:
+        True si esta llamada cambió el estado
+    """
+    changed = db.session.execute(
+        update(Order)
+        .where(Order.id == order.id, Order.status == old_status)
+        .values(status=new_status),
+        execution_options={'synchronize_session': False}
+    ).rowcount == 1
+    if changed:
+        order_status_changed(order, old_status, new_status)
+    return changed
+
+
+def product_deleted(product_id):
+    """
+    Quita de los resúmenes las líneas de un producto que se elimina (sin commit).
+
+    Llamar antes de borrar sus ``OrderDetail``: resta sus unidades vendidas
+    de ``sales_daily`` (el total de cada pedido no cambia) y borra su
+    historial de ``product_sales_daily``, así los resúmenes siguen
+    coincidiendo con ``rebuild`` y un ``remove_order`` posterior resta lo
+    mismo que quedó sumado.
+    """
+    rows = db.session.query(
+        func.date(Order.created_at), func.sum(OrderDetail.quantity)
+    ).join(Order, OrderDetail.order_id == Order.id).filter(
+        OrderDetail.product_id == product_id, Order.status.in_(SALE_STATUSES)
+    ).group_by(func.date(Order.created_at)).all()
+    for day, units in rows:
+        _add(SalesDaily, {'day': _as_date(day)}, {'units': -units})
+    ProductSalesDaily.query.filter_by(product_id=product_id)\
+        .delete(synchronize_session=False)
+
+
+def refund_recorded(day, amount):
+    """Suma `amount` (negativo para corregir) a los reembolsos del día (sin commit)."""
+    if amount:
+        _add(SalesDaily, {'day': day}, {'refunds': amount})
+
+
+def rebuild(start=None, end=None):
+    """
+    Recalcula los resúmenes desde los pedidos y reembolsos (backfill).
+
+    Args:
+        start: Primer día a recalcular (None: desde el primer pedido)
+        end: Último día a recalcular (None: hasta el último)
+
+    Returns:
+        Número de días con ventas o reembolsos en el rango
+    """
+    def in_range(column):
+        conditions = []
+        if start is not None:
+            conditions.append(func.date(column) >= start.isoformat())
+        if end is not None:
+            conditions.append(func.date(column) <= end.isoformat())
+        return conditions
+
+    for model in (SalesDaily, ProductSalesDaily):
+        query = model.query
+        if start is not None:
+            query = query.filter(model.day >= start)
+        if end is not None:
+            query = query.filter(model.day <= end)
+        query.delete(synchronize_session=False)
+
+    sales = Order.status.in_(SALE_STATUSES)
+    days = {}
+    for day, orders, revenue in db.session.query(
+        func.date(Order.created_at),
+        func.count(Order.id),  # pylint: disable=E1102
+        func.sum(Order.total)
+    ).filter(sales, *in_range(Order.created_at)).group_by(func.date(Order.created_at)):
+        days[_as_date(day)] = SalesDaily(day=_as_date(day), orders=orders, units=0,
+                                         revenue=revenue or 0, refunds=0)
+    for day, product_id, units, revenue in db.session.query(
+        func.date(Order.created_at), OrderDetail.product_id,
+        func.sum(OrderDetail.quantity),
+        func.sum(OrderDetail.price * OrderDetail.quantity)
+    ).join(Order, OrderDetail.order_id == Order.id).filter(
+        sales, *in_range(Order.created_at)
+    ).group_by(func.date(Order.created_at), OrderDetail.product_id):
+        db.session.add(ProductSalesDaily(day=_as_date(day), product_id=product_id,
+                                         units=units, revenue=revenue))
+        days[_as_date(day)].units += units
+    for day, refunds in db.session.query(
+        func.date(ReturnRequest.processed_at), func.sum(ReturnRequest.refund_amount)
+    ).filter(
+        ReturnRequest.status == REFUNDED, *in_range(ReturnRequest.processed_at)
+    ).group_by(func.date(ReturnRequest.processed_at)):
+        day = _as_date(day)
+        days.setdefault(
+            day, SalesDaily(day=day, orders=0, units=0, revenue=0, refunds=0)
+        )
+        days[day].refunds = refunds or 0
+    db.session.add_all(days.values())
+    db.session.commit()
+    return len(days)
+
+
+def _as_date(value):
+    # func.date devuelve texto en SQLite y date en PostgreSQL
+    return date.fromisoformat(value) if isinstance(value, str) else value
+
+
+def date_range(args):
+    """
+    Rango de fechas de los parámetros ``start`` y ``end`` (YYYY-MM-DD).
+
+    Sin parámetros (o con fechas inválidas) devuelve los últimos
+    DEFAULT_RANGE_DAYS días hasta hoy (UTC, como ``Order.created_at``).
+    """
+    today = datetime.utcnow().date()
+    try:
+        end = date.fromisoformat(args.get('end', ''))
+    except ValueError:
+        end = today
+    try:
+        start = date.fromisoformat(args.get('start', ''))
+    except ValueError:
+        start = end - timedelta(days=DEFAULT_RANGE_DAYS - 1)
+    return min(start, end), end
+
+
+def daily_sales(start, end):
+    """Filas de SalesDaily del rango, en orden de fecha."""
+    return SalesDaily.query.filter(
+        SalesDaily.day >= start, SalesDaily.day <= end
+    ).order_by(SalesDaily.day).all()
+
+
+def product_sales(start, end):
+    """(nombre, unidades, ingresos) por producto del rango, de mayor a menor ingreso."""
+    revenue = func.sum(ProductSalesDaily.revenue)
+    return db.session.query(
+        Product.name, func.sum(ProductSalesDaily.units), revenue
+    ).join(Product, ProductSalesDaily.product_id == Product.id).filter(
+        ProductSalesDaily.day >= start, ProductSalesDaily.day <= end
+    ).group_by(ProductSalesDaily.product_id, Product.name)\
+        .order_by(revenue.desc()).all()
@@ -0,0 +1,437 @@
+"""
+Servicio de búsqueda de productos.
+
+Este módulo mantiene un índice invertido de nombre y descripción de los
+productos para que la búsqueda del catálogo no tenga que recorrer la
+tabla con ``ILIKE '%q%'``. Según el motor de base de datos se usa:
+
+- SQLite: tabla virtual FTS5 con ``remove_diacritics``.
+- PostgreSQL: tabla ``product_search`` con ``tsvector`` e índice GIN.
+- Cualquier otro caso (y los tests): un índice en memoria del proceso.
+
+La tokenización normaliza acentos, descarta palabras vacías del español
+y reduce plurales simples, de modo que "Camisetas Rojas" encuentra
+"camiseta roja".
+
+El catálogo usa ``product_search.ranked(q)``: una subconsulta
+``(product_id, rank)`` con todas las coincidencias que se une a
+``products``, así los filtros y la paginación se aplican en la misma
+consulta ordenada por relevancia y ninguna coincidencia queda fuera.
+"""
+
+import bisect
+import math
+import re
+import threading
+import unicodedata
+from collections import defaultdict
+
+from flask import current_app
+from sqlalchemy import Float, Integer, case, false, select, text
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.db import db
+from app.models.products import Product
+
+# Peso relativo del nombre frente a la descripción en el ranking
+NAME_WEIGHT = 10.0
+DESCRIPTION_WEIGHT = 1.0
+
+STOPWORDS = frozenset(
+    'a al con de del el en es la las lo los o para por que se sin su sus '
+    'un una unas unos y'.split()
+)
+
+_TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+
+def normalize(value):
+    """Pasa a minúsculas y elimina tildes y diéresis (también la ñ -> n)."""
+    decomposed = unicodedata.normalize('NFKD', value or '')
+    return ''.join(c for c in decomposed if not unicodedata.combining(c)).lower()
+
+
+def stem(token):
+    """Reduce plurales regulares: 'colores' -> 'color', 'rojas' -> 'roja'."""
+    if len(token) > 4 and token.endswith('es') and token[-3] not in 'aeiou':
+        return token[:-2]
+    if len(token) > 3 and token.endswith('s'):
+        return token[:-1]
+    return token
+
+
+def tokenize(value):
+    """Devuelve los términos indexables de un texto."""
+    return [
+        stem(token) for token in _TOKEN_RE.findall(normalize(value))
+        if token not in STOPWORDS
+    ]
+
+
+class MemorySearchBackend:
+    """Índice invertido en memoria; se construye desde la base al primer uso."""
+
+    name = 'memory'
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._postings = defaultdict(dict)
+        self._documents = {}
+        self._vocabulary = None
+        self._built = False
+
+    def ensure_schema(self):
+        """No requiere esquema en la base de datos; se construye al primer uso."""
+        return False
+
+    def _add(self, product_id, name, description):
+        weights = defaultdict(float)
+        for term in tokenize(name):
+            weights[term] += NAME_WEIGHT
+        for term in tokenize(description):
+            weights[term] += DESCRIPTION_WEIGHT
+        self._documents[product_id] = list(weights)
+        for term, weight in weights.items():
+            self._postings[term][product_id] = weight
+        self._vocabulary = None
+
+    def _remove(self, product_id):
+        for term in self._documents.pop(product_id, []):
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(product_id, None)
+                if not postings:
+                    del self._postings[term]
+        self._vocabulary = None
+
+    def rebuild(self):
+        """Reconstruye el índice completo desde la tabla de productos."""
+        with self._lock:
+            self._postings.clear()
+            self._documents.clear()
+            rows = db.session.query(Product.id, Product.name, Product.description)
+            for product_id, name, description in rows.yield_per(1000):
+                self._add(product_id, name, description)
+            self._vocabulary = None
+            self._built = True
+
+    def _ensure_built(self):
+        if not self._built:
+            self.rebuild()
+
+    def index_product(self, product):
+        """Agrega o reemplaza un producto en el índice."""
+        with self._lock:
+            self._ensure_built()
+            self._remove(product.id)
+            self._add(product.id, product.name, product.description)
+
+    def remove_product(self, product_id):
+        """Quita un producto del índice."""
+        with self._lock:
+            self._ensure_built()
+            self._remove(product_id)
+
+    def _matching(self, term):
+        """Postings de todos los términos del vocabulario que empiezan por `term`."""
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self._postings)
+        start = bisect.bisect_left(self._vocabulary, term)
+        matched = defaultdict(float)
+        for candidate in self._vocabulary[start:]:
+            if not candidate.startswith(term):
+                break
+            for product_id, weight in self._postings[candidate].items():
+                matched[product_id] = max(matched[product_id], weight)
+        return matched
+
+    def _ranking(self, terms):
+        """IDs que contienen todos los términos, del más al menos relevante."""
+        with self._lock:
+            self._ensure_built()
+            total = len(self._documents) or 1
+            scores = None
+            for term in terms:
+                matched = self._matching(term)
+                idf = math.log(1 + total / (len(matched) or 1))
+                if scores is None:
+                    scores = {pid: weight * idf for pid, weight in matched.items()}
+                else:
+                    scores = {
+                        pid: score + matched[pid] * idf
+                        for pid, score in scores.items() if pid in matched
+                    }
+                if not scores:
+                    return []
+            ranked = sorted(scores.items(), key=lambda item: (-item[1], -item[0]))
+            return [pid for pid, _ in ranked]
+
+    def search(self, terms, limit):
+        """Devuelve los IDs que contienen todos los términos, por relevancia."""
+        return self._ranking(terms)[:limit]
+
+    def ranked(self, terms):
+        """Subconsulta (product_id, rank) con la posición de cada coincidencia."""
+        ids = self._ranking(terms)
+        if not ids:
+            return select(Product.id.label('product_id'), Product.id.label('rank'))\
+                .where(false()).subquery('search_rank')
+        positions = {pid: position for position, pid in enumerate(ids)}
+        rank = case(positions, value=Product.id)
+        return select(Product.id.label('product_id'), rank.label('rank'))\
+            .where(Product.id.in_(ids)).subquery('search_rank')
+
+
+def _ranked_search(ranked, limit):
+    """Primeros `limit` IDs de una subconsulta (product_id, rank)."""
+    rows = db.session.execute(
+        select(ranked.c.product_id)
+        .order_by(ranked.c.rank, ranked.c.product_id.desc())
+        .limit(limit)
+    )
+    return [row[0] for row in rows]
+
+
+class SQLiteSearchBackend:
+    """Índice FTS5 de SQLite; el rowid de la tabla virtual es el ID del producto."""
+
+    name = 'sqlite'
+
+    def ensure_schema(self):
+        """Crea la tabla virtual si no existe; devuelve True si la creó."""
+        exists = db.session.execute(text(
+            "SELECT 1 FROM sqlite_master WHERE name = 'product_search'"
+        )).first()
+        if exists:
+            return False
+        db.session.execute(text(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS product_search USING fts5("
+            "name, description, tokenize = 'unicode61 remove_diacritics 2')"
+        ))
+        db.session.commit()
+        return True
+
+    def rebuild(self):
+        """Reconstruye el índice completo desde la tabla de productos."""
+        self.ensure_schema()
+        db.session.execute(text("DELETE FROM product_search"))
+        db.session.execute(text(
+            "INSERT INTO product_search (rowid, name, description) "
+            "SELECT id, name, COALESCE(description, '') FROM products"
+        ))
+        db.session.commit()
+
+    def index_product(self, product):
+        """Agrega o reemplaza un producto en el índice."""
+        db.session.execute(
+            text("DELETE FROM product_search WHERE rowid = :id"), {'id': product.id}
+        )
+        db.session.execute(
+            text(
+                "INSERT INTO product_search (rowid, name, description) "
+                "VALUES (:id, :name, :description)"
+            ),
+            {'id': product.id, 'name': product.name,
+             'description': product.description or ''}
+        )
+        db.session.commit()
+
+    def remove_product(self, product_id):
+        """Quita un producto del índice."""
+        db.session.execute(
+            text("DELETE FROM product_search WHERE rowid = :id"), {'id': product_id}
+        )
+        db.session.commit()
+
+    def ranked(self, terms):
+        """Subconsulta (product_id, rank) con el bm25 de cada coincidencia."""
+        match = ' '.join(f'"{term}"*' for term in terms)
+        return text(
+            "SELECT rowid AS product_id, "
+            f"bm25(product_search, {NAME_WEIGHT}, {DESCRIPTION_WEIGHT}) AS rank "
+            "FROM product_search WHERE product_search MATCH :match"
+        ).bindparams(match=match)\
+            .columns(product_id=Integer, rank=Float).subquery('search_rank')
+
+    def search(self, terms, limit):
+        """Devuelve los IDs que contienen todos los términos, ordenados por bm25."""
+        return _ranked_search(self.ranked(terms), limit)
+
+
+class PostgresSearchBackend:
+    """
+    Índice ``tsvector`` con GIN en PostgreSQL, con el nombre pesando más (A).
+
+    Se indexan los términos ya tokenizados por :func:`tokenize` con la
+    configuración ``simple``, para que índice y consulta compartan la
+    misma normalización en los tres motores.
+    """
+
+    name = 'postgresql'
+
+    _DOCUMENT = (
+        "setweight(to_tsvector('simple', :name), 'A') || "
+        "setweight(to_tsvector('simple', :description), 'B')"
+    )
+
+    def ensure_schema(self):
+        """Crea la tabla del índice y su índice GIN; devuelve True si los creó."""
+        exists = db.session.execute(
+            text("SELECT to_regclass('product_search')")
+        ).scalar()
+        if exists:
+            return False
+        db.session.execute(text(
+            "CREATE TABLE IF NOT EXISTS product_search ("
+            "product_id INTEGER PRIMARY KEY REFERENCES products(id) ON DELETE CASCADE, "
+            "document tsvector NOT NULL)"
+        ))
+        db.session.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_product_search_document "
+            "ON product_search USING GIN (document)"
+        ))
+        db.session.commit()
+        return True
+
+    def _upsert(self, product_id, name, description):
+        db.session.execute(
+            text(
+                "INSERT INTO product_search (product_id, document) "
+                f"VALUES (:id, {self._DOCUMENT}) "
+                "ON CONFLICT (product_id) DO UPDATE SET document = EXCLUDED.document"
+            ),
+            {'id': product_id, 'name': ' '.join(tokenize(name)),
+             'description': ' '.join(tokenize(description))}
+        )
+
+    def rebuild(self):
+        """Reconstruye el índice completo desde la tabla de productos."""
+        self.ensure_schema()
+        db.session.execute(text("DELETE FROM product_search"))
+        rows = db.session.query(Product.id, Product.name, Product.description)
+        for product_id, name, description in rows.yield_per(1000):
+            self._upsert(product_id, name, description)
+        db.session.commit()
+
+    def index_product(self, product):
+        """Agrega o reemplaza un producto en el índice."""
+        self._upsert(product.id, product.name, product.description)
+        db.session.commit()
+
+    def remove_product(self, product_id):
+        """Quita un producto del índice."""
+        db.session.execute(
+            text("DELETE FROM product_search WHERE product_id = :id"),
+            {'id': product_id}
+        )
+        db.session.commit()
+
+    def ranked(self, terms):
+        """Subconsulta (product_id, rank) con el ts_rank negado de cada coincidencia."""
+        query = ' & '.join(f'{term}:*' for term in terms)
+        return text(
+            "SELECT product_id, -ts_rank(document, query) AS rank "
+            "FROM product_search, to_tsquery('simple', :query) AS query "
+            "WHERE document @@ query"
+        ).bindparams(query=query)\
+            .columns(product_id=Integer, rank=Float).subquery('search_rank')
+
+    def search(self, terms, limit):
+        """Devuelve los IDs que contienen todos los términos, ordenados por ts_rank."""
+        return _ranked_search(self.ranked(terms), limit)
+
+
+_BACKENDS = {
+    'memory': MemorySearchBackend,
+    'sqlite': SQLiteSearchBackend,
+    'postgresql': PostgresSearchBackend,
+}
+
+
+class ProductSearch:
+    """Punto de acceso al índice de productos, configurado por aplicación."""
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Registra la extensión; el motor se elige en el primer uso."""
+        app.config.setdefault('SEARCH_BACKEND', 'auto')
+        app.config.setdefault('SEARCH_MAX_RESULTS', 240)
+        app.extensions['product_search'] = None
+
+    @property
+    def backend(self):
+        """Motor de búsqueda de la aplicación actual."""
+        backend = current_app.extensions.get('product_search')
+        if backend is None:
+            name = current_app.config.get('SEARCH_BACKEND', 'auto')
+            if name == 'auto':
+                dialect = db.engine.dialect.name
+                name = dialect if dialect in _BACKENDS else 'memory'
+            backend = _BACKENDS[name]()
+            current_app.extensions['product_search'] = backend
+        return backend
+
+    def _safe(self, operation, *args):
+        try:
+            return operation(*args)
+        except SQLAlchemyError as exc:
+            db.session.rollback()
+            current_app.logger.warning(f'Índice de búsqueda no disponible: {exc}')
+            return None
+
+    def index_product(self, product):
+        """Sincroniza un producto creado o editado."""
+        self._safe(self.backend.index_product, product)
+
+    def remove_product(self, product_id):
+        """Sincroniza un producto eliminado."""
+        self._safe(self.backend.remove_product, product_id)
+
+    def ensure_index(self):
+        """Crea el índice si no existe y lo llena; no hace nada si ya existía."""
+        if self.backend.ensure_schema():
+            self.backend.rebuild()
+
+    def rebuild(self):
+        """Crea el esquema si hace falta y reindexa todos los productos."""
+        self.backend.rebuild()
+
+    def search(self, query, limit=None):
+        """
+        Busca productos por nombre y descripción.
+
+        Args:
+            query: Texto ingresado por el usuario
+            limit: Máximo de resultados (por defecto SEARCH_MAX_RESULTS)
+
+        Returns:
+            Lista de IDs ordenada por relevancia, o None si el índice no
+            está disponible y se debe usar la búsqueda con ILIKE
+        """
+        terms = tokenize(query)
+        if not terms:
+            return None
+        limit = limit or current_app.config.get('SEARCH_MAX_RESULTS', 240)
+        return self._safe(self.backend.search, terms, limit)
+
+    def ranked(self, query):
+        """
+        Subconsulta con todas las coincidencias, para unirla a ``products``.
+
+        Tiene las columnas ``product_id`` y ``rank`` (menor es más
+        relevante). Los errores del índice aparecen al ejecutar la consulta
+        que la usa, donde se puede volver a la búsqueda con ILIKE.
+
+        Returns:
+            La subconsulta, o None si el texto no tiene términos buscables
+        """
+        terms = tokenize(query)
+        if not terms:
+            return None
+        return self.backend.ranked(terms)
+
+
+product_search = ProductSearch()
@@ -0,0 +1,201 @@
+"""
+Servicio de envío de SMS.
+
+Las rutas comprueban el límite del número con ``sms_sender.allow(phone)``
+y llaman a ``sms_sender.send(phone, body)``, que encola el mensaje en un
+pool de hilos propio: así la petición responde en tiempo constante aunque el proveedor
+esté lento o caído. El proveedor se elige con SMS_PROVIDER y se crea una
+sola vez por aplicación: ``twilio`` reutiliza el mismo cliente (con su
+pool de conexiones y timeout) y ``fake`` guarda los mensajes en memoria
+para desarrollo y tests. Sin SMS_PROVIDER no se envía nada: se registra
+un error y ``send`` devuelve False para que la ruta avise al usuario.
+"""
+
+import threading
+import time
+from abc import ABC, abstractmethod
+
+from flask import current_app
+from limits import parse
+
+from app.extensions import limiter
+from app.services.background import BackgroundPool, QueueFullError
+
+
+class SMSError(Exception):
+    """El proveedor no pudo enviar el SMS."""
+
+
+class SMSProvider(ABC):
+    """Interfaz de los proveedores de SMS."""
+
+    name = None
+
+    @abstractmethod
+    def send(self, to, body):
+        """
+        Envía un SMS.
+
+        Args:
+            to: Número de destino
+            body: Texto del mensaje
+
+        Returns:
+            Identificador del mensaje en el proveedor
+
+        Raises:
+            SMSError: Si el proveedor rechazó o no respondió
+        """
+
+
+class TwilioProvider(SMSProvider):
+    """Proveedor Twilio con un cliente reutilizable."""
+
+    name = 'twilio'
+
+    def __init__(self, config):
+        from twilio.http.http_client import TwilioHttpClient
+        from twilio.rest import Client
+
+        self.from_number = config['TWILIO_PHONE_NUMBER']
+        http_client = TwilioHttpClient(pool_connections=True,
+                                       timeout=config['SMS_TIMEOUT'])
+        self.client = Client(config['TWILIO_ACCOUNT_SID'], config['TWILIO_AUTH_TOKEN'],
+                             http_client=http_client)
+
+    def send(self, to, body):
+        from twilio.base.exceptions import TwilioException
+
+        try:
+            message = self.client.messages.create(
+                body=body, from_=self.from_number, to=to
+            )
+        except (TwilioException, OSError) as exc:
+            raise SMSError(f'Twilio no envió el SMS: {exc}') from exc
+        return message.sid
+
+
+class FakeSMSProvider(SMSProvider):
+    """Proveedor local: guarda los mensajes, con demora y fallos configurables."""
+
+    name = 'fake'
+
+    def __init__(self, config=None, delay=None):
+        config = config or {}
+        self.delay = config.get('SMS_FAKE_DELAY', 0) if delay is None else delay
+        self._lock = threading.Lock()
+        self._failures = 0
+        self.sent = []
+
+    def fail_next(self, count):
+        """Hace fallar los próximos `count` envíos."""
+        with self._lock:
+            self._failures += count
+
+    def send(self, to, body):
+        if self.delay:
+            time.sleep(self.delay)
+        with self._lock:
+            if self._failures:
+                self._failures -= 1
+                raise SMSError('Fallo simulado del proveedor')
+            self.sent.append({'to': to, 'body': body})
+            return f'fake-{len(self.sent)}'
+
+
+PROVIDERS = {
+    'twilio': TwilioProvider,
+    'fake': FakeSMSProvider,
+}
+
+
+class SMSSender(BackgroundPool):
+    """Extensión que envía los SMS en segundo plano."""
+
+    name = 'sms_sender'
+    thread_name_prefix = 'sms'
+    workers_config = 'SMS_WORKERS'
+    eager_config = 'SMS_QUEUE_EAGER'
+    max_pending_config = 'SMS_MAX_PENDING'
+    error_message = 'Error enviando SMS'
+
+    def init_app(self, app):
+        """Registra la extensión; proveedor y pool se crean con el primer envío."""
+        app.config.setdefault('SMS_PROVIDER', None)
+        app.config.setdefault('SMS_WORKERS', 2)
+        app.config.setdefault('SMS_QUEUE_EAGER', False)
+        app.config.setdefault('SMS_MAX_PENDING', 100)
+        app.config.setdefault('SMS_TIMEOUT', 10.0)
+        app.config.setdefault('SMS_PHONE_LIMIT', '3 per hour')
+        app.config.setdefault('SMS_FAKE_DELAY', 0)
+        app.extensions['sms_provider'] = None
+        if not app.config['SMS_PROVIDER']:
+            app.logger.error('SMS_PROVIDER no está configurado: no se enviarán SMS')
+        super().init_app(app)
+
+    def _provider(self, app):
+        with self._lock:
+            provider = app.extensions.get('sms_provider')
+            if provider is None:
+                provider = PROVIDERS[app.config['SMS_PROVIDER']](app.config)
+                app.extensions['sms_provider'] = provider
+            return provider
+
+    @property
+    def provider(self):
+        """Proveedor de la aplicación actual."""
+        app = current_app._get_current_object()  # pylint: disable=protected-access
+        return self._provider(app)
+
+    @staticmethod
+    def allow(phone):
+        """
+        Registra un intento de envío al número y dice si entra en el límite.
+
+        El contador vive en el almacenamiento de Flask-Limiter
+        (RATELIMIT_STORAGE_URL), compartido entre procesos.
+        """
+        limit = parse(current_app.config['SMS_PHONE_LIMIT'])
+        return limiter.limiter.hit(limit, 'sms', phone)
+
+    def send(self, phone, body):
+        """
+        Encola un SMS para enviarlo en segundo plano.
+
+        Con SMS_QUEUE_EAGER (tests) se envía en el acto.
+
+        Returns:
+            True si el mensaje se encoló, False si no hay proveedor
+            configurado o se descartó porque la cola está llena
+        """
+        if not current_app.config['SMS_PROVIDER']:
+            current_app.logger.error(
+                f'Sin proveedor de SMS, no se envía el mensaje a {phone}'
+            )
+            return False
+        try:
+            self.submit(self._deliver, self.provider, phone, body)
+        except QueueFullError:
+            current_app.logger.error(
+                f'Cola de SMS llena, se descarta el mensaje a {phone}'
+            )
+            return False
+        return True
+
+    @staticmethod
+    def _deliver(provider, phone, body):
+        started = time.perf_counter()
+        try:
+            sid = provider.send(phone, body)
+        except SMSError as exc:
+            current_app.logger.error(f'Error enviando SMS a {phone}: {exc}')
+            return None
+        except Exception:  # pylint: disable=broad-except
+            current_app.logger.exception(f'Error inesperado enviando SMS a {phone}')
+            return None
+        current_app.logger.info(f'SMS enviado a {phone} con {provider.name} ({sid}) '
+                                f'en {(time.perf_counter() - started) * 1000:.0f} ms')
+        return sid
+
+
+sms_sender = SMSSender()
@@ -1,8 +1,14 @@
-from flask_socketio import SocketIO
+"""
+Servidor Socket.IO independiente para desarrollo.
+
+Usa la misma instancia de la extensión que la aplicación, así que los
+manejadores registrados y la cola de mensajes configurada aplican igual.
+"""
+
 from app import create_app
+from app.extensions import socketio
 
 app = create_app()
-socketio = SocketIO(app, cors_allowed_origins="*")
 
 if __name__ == "__main__":
     socketio.run(app, debug=True, host='0.0.0.0', port=8095)
@@ -0,0 +1,30 @@
+// Espera el resultado de un pago en segundo plano.
+// El worker emite el evento a la sala del usuario; al conectar se consulta
+// el estado una sola vez por si el pago terminó antes de abrir el socket.
+window.addEventListener('load', function() {
+  const card = document.getElementById('payment-status');
+  if (!card || typeof socket === 'undefined') {
+    return;
+  }
+  const orderId = Number(card.dataset.orderId);
+  const statusUrl = card.dataset.statusUrl;
+
+  function handle(data) {
+    if (data.order_id === orderId && data.status !== 'procesando') {
+      window.location.href = statusUrl;
+    }
+  }
+
+  function checkStatus() {
+    fetch(statusUrl + '?format=json', { credentials: 'same-origin' })
+      .then(function(response) { return response.json(); })
+      .then(handle)
+      .catch(function() {});
+  }
+
+  socket.on(card.dataset.event, handle);
+  socket.on('connect', checkStatus);
+  if (socket.connected) {
+    checkStatus();
+  }
+});
@@ -1,5 +1,9 @@
-// Cliente Socket.IO para notificaciones en tiempo real
-const socket = io();
+// Cliente Socket.IO para notificaciones en tiempo real.
+// El servidor envía los eventos solo a la sala del usuario autenticado,
+// así que no hace falta consultar periódicamente si hay novedades.
+// Solo WebSocket: la conexión queda en un único worker y no hace falta
+// afinidad de sesión en el balanceador cuando hay varios procesos.
+const socket = io({ transports: ['websocket'] });
 socket.on('connect', () => {
   console.log('Conectado a WebSocket');
 });
@@ -8,3 +12,11 @@ socket.on('nueva_notificacion', function(data) {
     new Notification('¡Tienes una nueva notificación!', { body: data.mensaje });
   }
 });
+socket.on('notificaciones_no_leidas', function(data) {
+  const badge = document.getElementById('notifCount');
+  if (!badge) {
+    return;
+  }
+  badge.textContent = data.count;
+  badge.classList.toggle('d-none', data.count === 0);
+});
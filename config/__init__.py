@@ -42,6 +42,13 @@ class Config:
     MAIL_USERNAME = os.getenv("MAIL_USERNAME")
     MAIL_PASSWORD = os.getenv("MAIL_PASSWORD")
     MAIL_DEFAULT_SENDER = os.getenv("MAIL_DEFAULT_SENDER")
+    # Bandeja de salida: lotes por conexión SMTP, reintentos y envíos por
+    # minuto (por proceso)
+    MAIL_BATCH_SIZE = int(os.getenv("MAIL_BATCH_SIZE", "50"))
+    MAIL_MAX_ATTEMPTS = int(os.getenv("MAIL_MAX_ATTEMPTS", "5"))
+    MAIL_RETRY_BACKOFF = float(os.getenv("MAIL_RETRY_BACKOFF", "30"))
+    MAIL_RATE_PER_MINUTE = int(os.getenv("MAIL_RATE_PER_MINUTE", "120"))
+    MAIL_WORKER_INTERVAL = float(os.getenv("MAIL_WORKER_INTERVAL", "5"))
 
     # PayU (pagos) - Reemplaza completamente a Stripe
     PAYU_API_KEY = os.getenv("PAYU_API_KEY")
@@ -49,11 +56,74 @@ class Config:
     PAYU_MERCHANT_ID = os.getenv("PAYU_MERCHANT_ID")
     PAYU_ACCOUNT_ID = os.getenv("PAYU_ACCOUNT_ID")
     PAYU_TEST_MODE = os.getenv("PAYU_TEST_MODE", "True").lower() == "true"
+    # URL base de PayU; vacía usa sandbox o producción según PAYU_TEST_MODE
+    PAYU_BASE_URL = os.getenv("PAYU_BASE_URL")
+    # Cliente HTTP de PayU: timeouts en segundos, reintentos y circuit breaker
+    PAYU_CONNECT_TIMEOUT = float(os.getenv("PAYU_CONNECT_TIMEOUT", "2"))
+    PAYU_READ_TIMEOUT = float(os.getenv("PAYU_READ_TIMEOUT", "3"))
+    PAYU_TOTAL_TIMEOUT = float(os.getenv("PAYU_TOTAL_TIMEOUT", "8"))
+    PAYU_MAX_RETRIES = int(os.getenv("PAYU_MAX_RETRIES", "2"))
+    PAYU_RETRY_BACKOFF = float(os.getenv("PAYU_RETRY_BACKOFF", "0.2"))
+    PAYU_POOL_SIZE = int(os.getenv("PAYU_POOL_SIZE", "32"))
+    PAYU_BREAKER_THRESHOLD = int(os.getenv("PAYU_BREAKER_THRESHOLD", "5"))
+    PAYU_BREAKER_RESET = float(os.getenv("PAYU_BREAKER_RESET", "30"))
     STRIPE_SECRET_KEY = os.getenv("STRIPE_SECRET_KEY")
 
     # Caché
     CACHE_TYPE = os.getenv("CACHE_TYPE", "SimpleCache")
     CACHE_DEFAULT_TIMEOUT = int(os.getenv("CACHE_DEFAULT_TIMEOUT", "300"))
+    FEED_CACHE_TIMEOUT = int(os.getenv("FEED_CACHE_TIMEOUT", "300"))
+    # Páginas del catálogo para visitantes anónimos (0 desactiva la caché)
+    CATALOG_CACHE_TIMEOUT = int(os.getenv("CATALOG_CACHE_TIMEOUT", "300"))
+    # Fragmentos de plantilla ({% cache %}) como las tarjetas de producto
+    FRAGMENT_CACHE_TIMEOUT = int(os.getenv("FRAGMENT_CACHE_TIMEOUT", "3600"))
+    # Populares: vida media del peso de una venta, tamaño del top cacheado y su vigencia
+    POPULARITY_HALF_LIFE_DAYS = float(os.getenv("POPULARITY_HALF_LIFE_DAYS", "7"))
+    POPULARITY_TOP_K = int(os.getenv("POPULARITY_TOP_K", "50"))
+    POPULARITY_CACHE_TIMEOUT = int(os.getenv("POPULARITY_CACHE_TIMEOUT", "300"))
+    # Segundos entre recálculos de los contadores del panel de administración
+    DASHBOARD_STATS_RECONCILE_SECONDS = int(
+        os.getenv("DASHBOARD_STATS_RECONCILE_SECONDS", "3600")
+    )
+    # Bytecode de las plantillas compiladas, compartido entre workers
+    # (vacío lo desactiva)
+    JINJA_BYTECODE_CACHE_DIR = os.getenv(
+        "JINJA_BYTECODE_CACHE_DIR", os.path.join(basedir, "instance", "jinja_cache")
+    )
+
+    # Búsqueda de productos: auto (según el motor de BD), sqlite, postgresql o memory
+    SEARCH_BACKEND = os.getenv("SEARCH_BACKEND", "auto")
+    SEARCH_MAX_RESULTS = int(os.getenv("SEARCH_MAX_RESULTS", "240"))
+
+    # Socket.IO: cola de mensajes compartida entre procesos
+    # (p. ej. redis://host:6379/0).
+    # Sin cola, los eventos solo llegan a los sockets del proceso que los emite.
+    SOCKETIO_MESSAGE_QUEUE = os.getenv("SOCKETIO_MESSAGE_QUEUE")
+    SOCKETIO_CHANNEL = os.getenv("SOCKETIO_CHANNEL", "flask-socketio")
+
+    # Minutos que un pedido 'pendiente' conserva el stock reservado antes de cancelarse
+    CHECKOUT_RESERVATION_MINUTES = int(os.getenv("CHECKOUT_RESERVATION_MINUTES", "60"))
+
+    # Cola de pagos en segundo plano
+    PAYMENT_WORKERS = int(os.getenv("PAYMENT_WORKERS", "2"))
+    PAYMENT_QUEUE_EAGER = os.getenv("PAYMENT_QUEUE_EAGER", "False").lower() == "true"
+    PAYMENT_SIMULATED_DELAY = float(os.getenv("PAYMENT_SIMULATED_DELAY", "2"))
+    # Segundos tras los que una notificación de PayU 'procesando' se puede
+    # volver a reclamar
+    PAYMENT_NOTIFICATION_CLAIM_TIMEOUT = int(
+        os.getenv("PAYMENT_NOTIFICATION_CLAIM_TIMEOUT", "600")
+    )
+
+    # SMS: 'twilio' si hay credenciales; sin proveedor no se envían SMS
+    # (desarrollo y tests usan el proveedor local 'fake')
+    TWILIO_ACCOUNT_SID = os.getenv("TWILIO_ACCOUNT_SID")
+    TWILIO_AUTH_TOKEN = os.getenv("TWILIO_AUTH_TOKEN")
+    TWILIO_PHONE_NUMBER = os.getenv("TWILIO_PHONE_NUMBER")
+    SMS_PROVIDER = os.getenv("SMS_PROVIDER", "twilio" if TWILIO_ACCOUNT_SID else None)
+    SMS_WORKERS = int(os.getenv("SMS_WORKERS", "2"))
+    SMS_MAX_PENDING = int(os.getenv("SMS_MAX_PENDING", "100"))
+    SMS_TIMEOUT = float(os.getenv("SMS_TIMEOUT", "10"))
+    SMS_PHONE_LIMIT = os.getenv("SMS_PHONE_LIMIT", "3 per hour")
 
     # Flask
     FLASK_ENV = os.getenv("FLASK_ENV", "development")
@@ -69,6 +139,20 @@ class Config:
     )
     MAX_CONTENT_LENGTH = int(os.getenv("MAX_CONTENT_LENGTH", "16777216"))  # 16MB
 
+    # Variantes de imágenes subidas (pipeline en segundo plano)
+    IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", "1"))
+    IMAGE_VARIANTS = {"grid": 400, "detail": 800, "zoom": 1600}
+    # 'webp' o 'webp,avif' (AVIF necesita Pillow con soporte AVIF)
+    IMAGE_FORMATS = tuple(os.getenv("IMAGE_FORMATS", "webp").split(","))
+    IMAGE_QUALITY = int(os.getenv("IMAGE_QUALITY", "80"))
+
+    # Compresión de respuestas (desactivar si un proxy ya comprime)
+    COMPRESS_ENABLED = os.getenv("COMPRESS_ENABLED", "true").lower() == "true"
+    COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", "1024"))
+
+    # Exportaciones CSV (filas leídas por consulta)
+    EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", "1000"))
+
     # Rate limiting
     RATELIMIT_DEFAULT = os.getenv("RATELIMIT_DEFAULT", "10 per minute")
     RATELIMIT_STORAGE_URL = os.getenv("RATELIMIT_STORAGE_URL", "memory://")
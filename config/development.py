@@ -24,6 +24,9 @@ class DevelopmentConfig(Config):
     # Logging más verboso en desarrollo
     LOG_LEVEL = "DEBUG"
 
+    # SMS en memoria si no hay credenciales de Twilio
+    SMS_PROVIDER = Config.SMS_PROVIDER or "fake"
+
     # Rate limiting menos restrictivo en desarrollo
     RATELIMIT_DEFAULT = "100 per minute"
 
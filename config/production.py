@@ -30,6 +30,11 @@ class ProductionConfig(Config):
     RATELIMIT_DEFAULT = "10 per minute"
     RATELIMIT_STORAGE_URL = "memory://"
 
+    # Gunicorn corre varios workers: los eventos de Socket.IO pasan por Redis
+    SOCKETIO_MESSAGE_QUEUE = (
+        os.getenv("SOCKETIO_MESSAGE_QUEUE") or os.getenv("REDIS_URL")
+    )
+
     # Caché filesystem para producción (sin Redis)
     CACHE_TYPE = "FileSystemCache"
     CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "instance", "cache")
@@ -28,6 +28,16 @@ class TestingConfig(Config):
     # Caché en memoria para tests
     CACHE_TYPE = "SimpleCache"
 
+    # Plantillas compiladas solo en memoria para tests
+    JINJA_BYTECODE_CACHE_DIR = None
+
+    # Índice de búsqueda en memoria del proceso para tests
+    SEARCH_BACKEND = "memory"
+
+    # Pagos procesados en la misma petición y sin demora simulada
+    PAYMENT_QUEUE_EAGER = True
+    PAYMENT_SIMULATED_DELAY = 0
+
     # Sesión en memoria para tests
     SESSION_TYPE = "filesystem"
     SESSION_FILE_DIR = None
@@ -38,6 +48,15 @@ class TestingConfig(Config):
 
     # Configuración de correo deshabilitada en tests
     MAIL_SUPPRESS_SEND = True
+    # Correos de la bandeja de salida enviados en la misma petición
+    MAIL_OUTBOX_EAGER = True
+
+    # SMS con el proveedor local, enviados en la misma petición
+    SMS_PROVIDER = "fake"
+    SMS_QUEUE_EAGER = True
+
+    # Variantes de imágenes generadas en la misma petición
+    IMAGE_PIPELINE_EAGER = True
 
     # WTF forms sin CSRF en tests
     WTF_CSRF_ENABLED = False
@@ -5,6 +5,8 @@ Script principal para ejecutar la aplicación Flask.
 
 import os
 from app import create_app, db
+from app.services.mailer import mail_outbox
+from app.services.search import product_search
 
 # Asegurar que los directorios necesarios existen
 os.makedirs('instance', exist_ok=True)
@@ -21,11 +23,16 @@ print("Contenido de instance:", os.listdir("instance"))
 with app.app_context():
     try:
         db.create_all()
+        product_search.ensure_index()
         print("Base de datos inicializada correctamente.")
     except Exception as e:
         print(f"Error al crear tablas (posiblemente ya existen): {e}")
         # No fallar si las tablas ya existen
 
+# Worker de la bandeja de salida de correos; también envía los que quedaron
+# pendientes de una ejecución anterior
+mail_outbox.start(app)
+
 if __name__ == '__main__':
     # Solo ejecutar el servidor de desarrollo si no estamos en producción
     if os.environ.get('FLASK_ENV') != 'production':
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Script para agregar la columna 'image_variants' a la tabla de productos.
+
+db.create_all() no agrega columnas a tablas que ya existen, así que las
+bases de datos creadas antes del pipeline de imágenes necesitan este
+paso. Funciona con SQLite y PostgreSQL y es seguro ejecutarlo varias
+veces. Mientras un producto no tenga variantes se sigue sirviendo su
+imagen original.
+"""
+
+import os
+import sys
+
+# Agregar el directorio raíz del proyecto al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def add_image_variants_column():
+    """Agrega la columna image_variants a la tabla products si no existe."""
+    from sqlalchemy import inspect, text
+
+    from app import create_app
+    from app.db import db
+
+    app = create_app()
+    with app.app_context():
+        columns = {
+            column['name'] for column in inspect(db.engine).get_columns('products')
+        }
+        if 'image_variants' in columns:
+            print("ℹ️ La columna 'image_variants' ya existe.")
+            return False
+        db.session.execute(text("ALTER TABLE products ADD COLUMN image_variants JSON"))
+        db.session.commit()
+        print("✅ Columna 'image_variants' agregada a 'products'.")
+        return True
+
+
+if __name__ == "__main__":
+    add_image_variants_column()
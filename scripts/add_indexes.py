@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Script para crear los índices declarados en los modelos.
+
+db.create_all() no agrega índices a tablas que ya existen, así que las
+bases de datos creadas antes de declararlos necesitan este paso. Funciona
+con SQLite y PostgreSQL y es seguro ejecutarlo varias veces: solo crea
+los índices que faltan.
+"""
+
+import os
+import sys
+
+# Agregar el directorio raíz del proyecto al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def add_indexes():
+    """Crea los índices de los modelos que aún no existen en la base de datos."""
+    from sqlalchemy import inspect, text
+
+    from app import create_app
+    from app.db import db
+
+    app = create_app()
+    with app.app_context():
+        inspector = inspect(db.engine)
+        existing_tables = set(inspector.get_table_names())
+        created = 0
+        for table in db.metadata.sorted_tables:
+            if not table.indexes or table.name not in existing_tables:
+                continue
+            if db.engine.dialect.name == 'sqlite':
+                # La reflexión de SQLite omite los índices sobre expresiones
+                with db.engine.connect() as conn:
+                    existing = set(conn.execute(text(
+                        "SELECT name FROM sqlite_master"
+                        " WHERE type = 'index' AND tbl_name = :table"
+                    ), {'table': table.name}).scalars())
+            else:
+                existing = {
+                    index['name'] for index in inspector.get_indexes(table.name)
+                }
+            for index in sorted(table.indexes, key=lambda i: i.name):
+                if index.name in existing:
+                    print(f"ℹ️ {index.name} ya existe.")
+                    continue
+                index.create(bind=db.engine)
+                created += 1
+                print(f"✅ {index.name} creado en '{table.name}'.")
+        print(f"✅ Índices creados: {created}.")
+
+
+if __name__ == "__main__":
+    add_indexes()
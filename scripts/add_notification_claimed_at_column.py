@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Script para agregar la columna 'claimed_at' a la tabla payment_notifications.
+
+db.create_all() no agrega columnas a tablas que ya existen, así que las
+bases de datos creadas antes del vencimiento de los reclamos de
+notificaciones necesitan este paso. Funciona con SQLite y PostgreSQL y es
+seguro ejecutarlo varias veces. Las notificaciones que ya estaban
+'procesando' quedan sin fecha de reclamo: se recuperan con
+``replay_payu_notifications.py --stuck``.
+"""
+
+import os
+import sys
+
+# Agregar el directorio raíz del proyecto al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def add_notification_claimed_at_column():
+    """Agrega la columna claimed_at a la tabla payment_notifications si no existe."""
+    from sqlalchemy import inspect, text
+
+    from app import create_app
+    from app.db import db
+
+    app = create_app()
+    with app.app_context():
+        columns = {
+            column['name']
+            for column in inspect(db.engine).get_columns('payment_notifications')
+        }
+        if 'claimed_at' in columns:
+            print("ℹ️ La columna 'claimed_at' ya existe.")
+            return False
+        db.session.execute(text(
+            "ALTER TABLE payment_notifications ADD COLUMN claimed_at TIMESTAMP"
+        ))
+        db.session.commit()
+        print("✅ Columna 'claimed_at' agregada a 'payment_notifications'.")
+        return True
+
+
+if __name__ == "__main__":
+    add_notification_claimed_at_column()
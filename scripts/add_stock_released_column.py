@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Script para agregar la columna 'stock_released' a la tabla de pedidos.
+
+db.create_all() no agrega columnas a tablas que ya existen, así que las
+bases de datos creadas antes de devolver el stock de los pagos fallidos
+necesitan este paso. Funciona con SQLite y PostgreSQL y es seguro
+ejecutarlo varias veces. Los pedidos existentes quedan con el stock
+tomado (false).
+"""
+
+import os
+import sys
+
+# Agregar el directorio raíz del proyecto al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def add_stock_released_column():
+    """Agrega la columna stock_released a la tabla orders si no existe."""
+    from sqlalchemy import inspect, text
+
+    from app import create_app
+    from app.db import db
+
+    app = create_app()
+    with app.app_context():
+        columns = {
+            column['name'] for column in inspect(db.engine).get_columns('orders')
+        }
+        if 'stock_released' in columns:
+            print("ℹ️ La columna 'stock_released' ya existe.")
+            return False
+        db.session.execute(text(
+            "ALTER TABLE orders ADD COLUMN stock_released BOOLEAN NOT NULL "
+            "DEFAULT false"
+        ))
+        db.session.commit()
+        print("✅ Columna 'stock_released' agregada a 'orders'.")
+        return True
+
+
+if __name__ == "__main__":
+    add_stock_released_column()
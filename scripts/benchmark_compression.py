@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Benchmark de bytes y CPU por petición con y sin compresión.
+
+Crea un catálogo y un carrito sintéticos en una base SQLite en memoria,
+compila los estáticos en una carpeta temporal y pide N veces el HTML del
+catálogo, el JSON del carrito y el CSS principal sin compresión, con
+gzip y con brotli. Para cada caso muestra los bytes enviados y el tiempo
+de CPU por petición; el CSS sale precomprimido, sin costo por petición.
+Al final compara los niveles de gzip y brotli sobre el HTML del catálogo
+para elegir COMPRESS_LEVELS.
+
+Uso:
+    python scripts/benchmark_compression.py          # 200 peticiones por caso
+    python scripts/benchmark_compression.py 1000
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+# Agregar el directorio raíz del proyecto al path
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+os.environ.setdefault('FLASK_ENV', 'testing')
+
+PRODUCTS = 48
+CART_ITEMS = 40
+ENCODINGS = (('sin comprimir', 'identity'), ('gzip', 'gzip'), ('brotli', 'br'))
+LEVELS = (('gzip', 1), ('gzip', 6), ('gzip', 9), ('br', 1), ('br', 4), ('br', 11))
+
+
+def _seed():
+    from datetime import date
+
+    from app.db import db
+    from app.models.cart import Cart, CartItem
+    from app.models.products import Category, Product
+    from app.models.users import UserRole, Users
+
+    category = Category(name='Benchmark')
+    user = Users(nameUser='Cliente', email='cliente@example.com', password_user='hash',
+                 birthdate=date(1990, 1, 1), role=UserRole.USER, is_active_db=True)
+    db.session.add_all([category, user])
+    db.session.commit()
+    products = [Product(name=f'Zapatilla urbana {index}',
+                        description='Cuero y lona ' * 10,
+                        price=100000 + index * 1000, stock=10, size='40', color='Negro',
+                        category_id=category.id, image=f'producto{index}.jpg')
+                for index in range(PRODUCTS)]
+    cart = Cart(user_id=user.idUser)
+    db.session.add_all(products + [cart])
+    db.session.commit()
+    db.session.add_all([CartItem(cart_id=cart.id, product_id=product.id, quantity=1,
+                                 price_snapshot=product.price)
+                        for product in products[:CART_ITEMS]])
+    db.session.commit()
+    return user.idUser
+
+
+def _measure(client, path, encoding, requests):
+    """Bytes de la respuesta y ms de CPU por petición."""
+    headers = {'Accept-Encoding': encoding}
+    response = client.get(path, headers=headers)
+    assert response.status_code == 200, (path, response.status_code)
+    size = len(response.get_data())
+    started = time.process_time()
+    for _ in range(requests):
+        client.get(path, headers=headers).close()
+    return size, (time.process_time() - started) / requests * 1000
+
+
+def benchmark(requests):
+    """Ejecuta el benchmark e imprime los resultados."""
+    from app import create_app
+    from app.db import db
+    from app.services.compression import BROTLI_AVAILABLE, compress
+    from scripts.build_assets import build
+
+    static_dir = tempfile.mkdtemp(prefix='benchmark_compression_')
+    try:
+        shutil.copytree(os.path.join(ROOT_DIR, 'app', 'static'), static_dir,
+                        dirs_exist_ok=True,
+                        ignore=shutil.ignore_patterns('dist', 'product_images',
+                                                      'profile_pics'))
+        manifest = build(static_dir)['manifest']
+        app = create_app(
+            {'ASSETS_MANIFEST': os.path.join(static_dir, 'dist', 'manifest.json')}
+        )
+        app.static_folder = static_dir
+        with app.app_context():
+            db.create_all()
+            user_id = _seed()
+            client = app.test_client()
+            with client.session_transaction() as sess:
+                sess['_user_id'] = str(user_id)
+
+            targets = (('HTML catálogo', '/catalog/'), ('JSON carrito', '/api/cart/'),
+                       ('CSS site (precomprimido)',
+                        f"/static/{manifest['css/site.css']}"))
+            brotli = 'disponible' if BROTLI_AVAILABLE else 'no instalado'
+            print(f"{requests} peticiones por caso; brotli {brotli}")
+            print(f"{'respuesta':<28}{'codificación':<16}{'bytes':>10}{'ahorro':>9}"
+                  f"{'CPU ms/pet.':>13}")
+            for label, path in targets:
+                plain = None
+                for name, encoding in ENCODINGS:
+                    if encoding == 'br' and not BROTLI_AVAILABLE:
+                        continue
+                    size, cpu_ms = _measure(client, path, encoding, requests)
+                    plain = plain or size
+                    print(f"{label:<28}{name:<16}{size:>10}{1 - size / plain:>9.0%}"
+                          f"{cpu_ms:>13.2f}")
+
+            html = client.get('/catalog/').get_data()
+            print(f"\nNiveles sobre el HTML del catálogo ({len(html)} bytes)")
+            print(f"{'codificación':<16}{'nivel':>6}{'bytes':>10}{'CPU ms':>10}")
+            for encoding, level in LEVELS:
+                if encoding == 'br' and not BROTLI_AVAILABLE:
+                    continue
+                started = time.process_time()
+                for _ in range(requests):
+                    size = len(compress(html, encoding, level))
+                cpu_ms = (time.process_time() - started) / requests * 1000
+                print(f"{encoding:<16}{level:>6}{size:>10}{cpu_ms:>10.3f}")
+            db.session.remove()
+    finally:
+        shutil.rmtree(static_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Benchmark de registros por segundo con y sin la bandeja de salida.
+
+Levanta la aplicación en un servidor HTTP local sobre una base SQLite
+temporal y un servidor SMTP local con demora por respuesta (simula el
+handshake, TLS y la latencia de un SMTP real). Registra N usuarios en
+paralelo enviando el correo de verificación dentro de la petición y
+luego dejándolo en la bandeja para el worker, y compara registros por
+segundo, latencias, conexiones SMTP abiertas y correos entregados. El
+costo de bcrypt se baja al mínimo para que la diferencia no quede oculta
+detrás del hash de la contraseña.
+
+Uso:
+    python scripts/benchmark_mail.py              # 200 registros, 30 ms por respuesta
+    python scripts/benchmark_mail.py 500 0.1      # 500 registros, 100 ms por respuesta
+"""
+
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Agregar el directorio raíz del proyecto al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('FLASK_ENV', 'testing')
+
+from scripts.local_smtp_server import LocalSMTPServer  # noqa: E402
+
+CONCURRENCY = 8
+DRAIN_TIMEOUT = 300
+
+
+def _register(base_url, index):
+    """Registra un usuario; devuelve (código, segundos)."""
+    import requests
+
+    started = time.perf_counter()
+    response = requests.post(f'{base_url}/register', data={
+        'nameUser': f'Cliente {index}', 'email': f'cliente{index}@example.com',
+        'passwordUser': 'Clave1234', 'confirm_password': 'Clave1234',
+        'birthdate': '1990-01-01', 'terms': 'on',
+    }, timeout=120)
+    return response.status_code, time.perf_counter() - started
+
+
+def _run(count, delay, eager):
+    import bcrypt
+    import email_validator
+    from werkzeug.serving import make_server
+
+    from app import create_app
+    from app.db import db
+    from app.models.users import Users
+
+    # Sin consultas DNS del dominio: el benchmark corre sin red
+    email_validator.CHECK_DELIVERABILITY = False
+    gensalt = bcrypt.gensalt
+    bcrypt.gensalt = lambda rounds=4, prefix=b'2b': gensalt(rounds, prefix)
+
+    smtp = LocalSMTPServer(delay=delay).start()
+    tmpdir = tempfile.mkdtemp(prefix='benchmark_mail_')
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(tmpdir, 'bench.db')}",
+        'SQLALCHEMY_ENGINE_OPTIONS': {'connect_args': {'timeout': 60}},
+        'MAIL_SERVER': smtp.host, 'MAIL_PORT': smtp.port,
+        'MAIL_USE_TLS': False, 'MAIL_SUPPRESS_SEND': False, 'MAIL_DEBUG': False,
+        'MAIL_USERNAME': None, 'MAIL_PASSWORD': None,
+        'MAIL_DEFAULT_SENDER': 'tienda@example.com',
+        'MAIL_OUTBOX_EAGER': eager,
+        'MAIL_RATE_PER_MINUTE': count * 10,
+        'MAIL_WORKER_INTERVAL': 0.5,
+    })
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f'http://127.0.0.1:{server.server_port}'
+    try:
+        with app.app_context():
+            db.create_all()
+        started = time.perf_counter()
+        with ThreadPoolExecutor(CONCURRENCY) as pool:
+            replies = list(
+                pool.map(lambda index: _register(base_url, index), range(count))
+            )
+        elapsed = time.perf_counter() - started
+
+        # Esperar a que el worker entregue lo que quedó en la bandeja
+        deadline = time.monotonic() + DRAIN_TIMEOUT
+        while len(smtp.messages) < count and time.monotonic() < deadline:
+            time.sleep(0.1)
+        delivered_s = time.perf_counter() - started
+
+        with app.app_context():
+            latencies = sorted(seconds for _, seconds in replies)
+            stats = {
+                'ok': sum(1 for status, _ in replies if status == 200),
+                'per_s': count / elapsed,
+                'p50_ms': statistics.median(latencies) * 1000,
+                'p95_ms': latencies[int(len(latencies) * 0.95)] * 1000,
+                'delivered_s': delivered_s,
+                'users': Users.query.count(),
+                'received': len(smtp.messages),
+                'connections': smtp.connections,
+            }
+            db.session.remove()
+    finally:
+        server.shutdown()
+        smtp.stop()
+        shutil.rmtree(tmpdir, ignore_errors=True)
+        bcrypt.gensalt = gensalt
+    return stats
+
+
+def benchmark(count, delay):
+    """Ejecuta el benchmark en ambos modos e imprime los resultados."""
+    print(f"{count} registros, {CONCURRENCY} conexiones,"
+          f" SMTP con {delay * 1000:.0f} ms por respuesta")
+    print(f"{'modo':<24}{'reg/s':>8}{'p50 ms':>9}{'p95 ms':>9}{'entrega s':>11}"
+          f"{'correos':>9}{'conex. SMTP':>13}")
+    for label, eager in (('enviar en la petición', True), ('bandeja de salida', False)):
+        stats = _run(count, delay, eager)
+        mark = '✅' if (stats['ok'] == count and stats['users'] == count
+                       and stats['received'] == count) else '❌'
+        print(f"{label:<24}{stats['per_s']:>8.1f}{stats['p50_ms']:>9.1f}"
+              f"{stats['p95_ms']:>9.1f}{stats['delivered_s']:>11.1f}"
+              f"{stats['received']:>9}{stats['connections']:>13} {mark}")
+
+
+if __name__ == "__main__":
+    count_arg = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    delay_arg = float(sys.argv[2]) if len(sys.argv) > 2 else 0.03
+    benchmark(count_arg, delay_arg)
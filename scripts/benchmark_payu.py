@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Benchmark del cliente de PayU contra un PayU falso local.
+
+Compara ``requests.post`` con una conexión nueva por llamada (como se
+hacía antes) frente al cliente compartido con pool de conexiones, y mide
+cuánto tiempo retiene cada uno un hilo cuando PayU está degradado.
+
+Uso:
+    python scripts/benchmark_payu.py             # 200 llamadas, latencia 20 ms
+    python scripts/benchmark_payu.py 500 0.05
+"""
+
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Agregar el directorio raíz del proyecto al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('FLASK_ENV', 'testing')
+
+from scripts.fake_payu_server import FakePayUServer  # noqa: E402
+
+FORM = {'merchantId': '1', 'accountId': '2', 'referenceCode': 'ORDER_1_bench',
+        'amount': '10', 'currency': 'COP', 'signature': 'firma'}
+CONCURRENCY = 16
+DEGRADED_CALLS = 24
+DEGRADED_CONCURRENCY = 8
+# Más que PAYU_READ_TIMEOUT: cada intento del cliente agota su timeout
+DEGRADED_DELAY = 5.0
+
+
+def _run(call, calls, concurrency=CONCURRENCY):
+    """Ejecuta `calls` llamadas en paralelo: (total s, latencias ms, errores)."""
+    latencies, errors = [], []
+
+    def timed(_):
+        start = time.perf_counter()
+        try:
+            call()
+        except Exception as exc:  # pylint: disable=broad-except
+            errors.append(exc)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(timed, range(calls)))
+    return time.perf_counter() - start, latencies, errors
+
+
+def _report(label, elapsed, latencies, errors, connections):
+    ordered = sorted(latencies)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    print(f"{label:<22}{len(latencies) / elapsed:>10.0f}"
+          f"{statistics.median(ordered):>10.1f}"
+          f"{p95:>10.1f}{connections:>10}{len(errors):>9}")
+
+
+def benchmark(calls, latency):
+    """Ejecuta el benchmark con `calls` llamadas y la latencia dada de PayU."""
+    import requests
+
+    from app import create_app
+    from app.services.payu import payu_client
+
+    print(f"\n{calls} llamadas, {CONCURRENCY} hilos,"
+          f" latencia de PayU {latency * 1000:.0f} ms")
+    print(f"{'cliente':<22}{'llam/s':>10}{'p50 ms':>10}{'p95 ms':>10}"
+          f"{'conex.':>10}{'errores':>9}")
+
+    server = FakePayUServer(delay=latency)
+    url = server.start()
+    try:
+        _report('requests.post', *_run(
+            lambda: requests.post(f'{url}/ppp-web-gateway-payu/', data=FORM,
+                                  timeout=30, allow_redirects=False), calls
+        ), server.connections)
+
+        server.connections = 0
+        app = create_app({'PAYU_BASE_URL': url})
+
+        def pooled():
+            with app.app_context():
+                payu_client.post_checkout(FORM, allow_redirects=False)
+        _report('cliente con pool', *_run(pooled, calls), server.connections)
+
+        # PayU degradado: responde más lento que el timeout de lectura
+        server.delay = DEGRADED_DELAY
+        print(f"\nPayU degradado ({DEGRADED_DELAY:.0f} s por respuesta),"
+              f" {DEGRADED_CALLS} llamadas, {DEGRADED_CONCURRENCY} hilos:"
+              f" tiempo que se retiene cada hilo")
+        elapsed, latencies, _ = _run(
+            lambda: requests.post(f'{url}/ppp-web-gateway-payu/', data=FORM,
+                                  timeout=30),
+            DEGRADED_CALLS, DEGRADED_CONCURRENCY
+        )
+        print(f"requests.post (timeout=30): media {statistics.mean(latencies):>7.0f} ms"
+              f" - total {elapsed:.1f} s")
+        elapsed, latencies, errors = _run(pooled, DEGRADED_CALLS, DEGRADED_CONCURRENCY)
+        with app.app_context():
+            metrics = payu_client.metrics()
+        print(f"cliente con circuito:       media {statistics.mean(latencies):>7.0f} ms"
+              f" - total {elapsed:.1f} s - {len(errors)} errores,"
+              f" {metrics['rejected']} rechazadas sin llamar,"
+              f" circuito {metrics['circuit']}")
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    calls_arg = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    latency_arg = float(sys.argv[2]) if len(sys.argv) > 2 else 0.02
+    benchmark(calls_arg, latency_arg)
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Benchmark del webhook de confirmaciones de PayU.
+
+Levanta la aplicación en un servidor HTTP local sobre una base SQLite
+temporal, crea N pedidos pendientes y les envía sus confirmaciones
+firmadas en paralelo (más un porcentaje de duplicados, como los
+reintentos de PayU). Compara aplicar el pago dentro de la petición con
+registrarlo y aplicarlo en el worker, y comprueba que cada pedido se
+pagó una sola vez.
+
+Uso:
+    python scripts/benchmark_payu_webhook.py              # 2000 confirmaciones
+    python scripts/benchmark_payu_webhook.py 5000 0.3     # 30 % de duplicados
+"""
+
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+# Agregar el directorio raíz del proyecto al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('FLASK_ENV', 'testing')
+
+from scripts.fake_payu_server import PayUConfirmationSender  # noqa: E402
+
+API_KEY = 'benchmark'
+CONCURRENCY = 16
+
+
+def _seed(count):
+    """Crea `count` clientes con un pedido pendiente; devuelve [(id, total)]."""
+    from datetime import date
+
+    from sqlalchemy import insert, select
+
+    from app.db import db
+    from app.models.orders import Order
+    from app.models.users import Users
+
+    db.session.execute(insert(Users), [{
+        'nameUser': f'Cliente {index}', 'email': f'c{index}@example.com',
+        'password_user': 'hash', 'birthdate': date(1990, 1, 1),
+    } for index in range(count)])
+    user_ids = db.session.execute(select(Users.idUser)).scalars().all()
+    db.session.execute(insert(Order), [
+        {'user_id': user_id, 'total': 10000 + user_id, 'status': 'pendiente'}
+        for user_id in user_ids
+    ])
+    db.session.commit()
+    return db.session.execute(select(Order.id, Order.total)).all()
+
+
+def _run(count, duplicates, eager):
+    from werkzeug.serving import make_server
+
+    from app import create_app
+    from app.db import db
+    from app.models.notifications import Notification
+    from app.models.orders import Order
+    from app.models.payments import PaymentNotification
+    from app.services.payments import payment_queue
+
+    tmpdir = tempfile.mkdtemp(prefix='benchmark_payu_webhook_')
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(tmpdir, 'bench.db')}",
+        'SQLALCHEMY_ENGINE_OPTIONS': {'connect_args': {'timeout': 60}},
+        'PAYU_API_KEY': API_KEY,
+        'PAYMENT_QUEUE_EAGER': eager,
+        'PAYMENT_WORKERS': 4,
+    })
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        with app.app_context():
+            db.create_all()
+            orders = _seed(count)
+        sender = PayUConfirmationSender(
+            f'http://127.0.0.1:{server.server_port}/webhook/payu', API_KEY
+        )
+        forms = [sender.confirmation(order_id, total) for order_id, total in orders]
+        rng = random.Random(7)
+        forms += rng.sample(forms, int(len(forms) * duplicates))
+        rng.shuffle(forms)
+
+        started = time.perf_counter()
+        replies = sender.fire(forms, CONCURRENCY)
+        acked = time.perf_counter() - started
+        with app.app_context():
+            payment_queue.drain()
+        applied = time.perf_counter() - started
+
+        with app.app_context():
+            stats = {
+                'sent': len(forms),
+                'ok': sum(1 for status, _ in replies if status == 200),
+                'ack_per_s': len(forms) / acked,
+                'ack_p50_ms': statistics.median(s for _, s in replies) * 1000,
+                'ack_p95_ms':
+                    sorted(s for _, s in replies)[int(len(replies) * 0.95)] * 1000,
+                'applied_s': applied,
+                'paid': Order.query.filter_by(status='pagado').count(),
+                'recorded': PaymentNotification.query.count(),
+                'user_notifications': Notification.query.count(),
+            }
+            db.session.remove()
+    finally:
+        server.shutdown()
+        shutil.rmtree(tmpdir, ignore_errors=True)
+    return stats
+
+
+def benchmark(count, duplicates):
+    """Ejecuta el benchmark en ambos modos e imprime los resultados."""
+    print(f"{count} pedidos + {duplicates:.0%} de confirmaciones duplicadas,"
+          f" {CONCURRENCY} conexiones")
+    print(f"{'modo':<26}{'resp/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'total s':>9}"
+          f"{'pagados':>9}{'avisos':>8}")
+    modes = (('aplicar en la petición', True), ('registrar y encolar', False))
+    for label, eager in modes:
+        stats = _run(count, duplicates, eager)
+        mark = '✅' if (stats['ok'] == stats['sent'] and stats['paid'] == count
+                       and stats['user_notifications'] == count) else '❌'
+        print(f"{label:<26}{stats['ack_per_s']:>9.0f}{stats['ack_p50_ms']:>9.1f}"
+              f"{stats['ack_p95_ms']:>9.1f}{stats['applied_s']:>9.1f}"
+              f"{stats['paid']:>9}{stats['user_notifications']:>8} {mark}")
+
+
+if __name__ == "__main__":
+    count_arg = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    duplicates_arg = float(sys.argv[2]) if len(sys.argv) > 2 else 0.2
+    benchmark(count_arg, duplicates_arg)
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Benchmark de los productos populares: GROUP BY frente al ranking mantenido.
+
+Crea N líneas de pedido sintéticas en una base SQLite en memoria y mide
+la consulta que usaba el feed (agrupar todas las líneas por producto),
+la lectura del top desde la tabla de popularidad y desde la caché, y el
+costo de registrar un pedido pagado.
+
+Uso:
+    python scripts/benchmark_popularity.py            # 1 millón de líneas
+    python scripts/benchmark_popularity.py 100000     # tamaños personalizados
+"""
+
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+# Agregar el directorio raíz del proyecto al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('FLASK_ENV', 'testing')
+
+PRODUCTS = 2000
+LINES_PER_ORDER = 4
+TOP = 8
+REPEAT = 5
+
+
+def _seed(lines):
+    from sqlalchemy import insert
+
+    from app.db import db
+    from app.models.orders import Order, OrderDetail
+    from app.models.products import Category, Product
+    from app.models.users import Users
+
+    rng = random.Random(42)
+    category = Category(name='Benchmark')
+    user = Users(nameUser='Benchmark', email='benchmark@example.com',
+                 password_user='hash', birthdate=date(1990, 1, 1))
+    db.session.add_all([category, user])
+    db.session.commit()
+    db.session.execute(insert(Product), [
+        {'name': f'Producto {index}', 'price': 1000, 'stock': 100,
+         'category_id': category.id}
+        for index in range(PRODUCTS)
+    ])
+    # Pocos productos concentran la mayoría de las ventas
+    weights = [1 / (rank + 1) for rank in range(PRODUCTS)]
+    start = datetime.utcnow() - timedelta(days=365)
+    orders = lines // LINES_PER_ORDER
+    for first in range(0, orders, 10000):
+        batch = range(first + 1, min(first + 10000, orders) + 1)
+        db.session.execute(insert(Order), [
+            {'id': order_id, 'user_id': user.idUser, 'total': 4000, 'status': 'pagado',
+             'created_at': start + timedelta(minutes=rng.randint(0, 365 * 24 * 60))}
+            for order_id in batch
+        ])
+        db.session.execute(insert(OrderDetail), [
+            {'order_id': order_id, 'product_id': product_id, 'quantity': 1,
+             'price': 1000}
+            for order_id in batch
+            for product_id in rng.choices(range(1, PRODUCTS + 1), weights,
+                                          k=LINES_PER_ORDER)
+        ])
+    db.session.commit()
+
+
+def _time(func):
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        func()
+    return (time.perf_counter() - start) / REPEAT * 1000
+
+
+def _group_by_top():
+    from sqlalchemy import func
+
+    from app.db import db
+    from app.models.orders import OrderDetail
+    from app.models.products import Product
+
+    ids = [row[0] for row in db.session.query(OrderDetail.product_id)
+           .join(Product, OrderDetail.product_id == Product.id)
+           .group_by(OrderDetail.product_id)
+           .order_by(func.count(OrderDetail.id).desc())  # pylint: disable=E1102
+           .limit(TOP)]
+    return Product.query.filter(Product.id.in_(ids)).all()
+
+
+def _record_order():
+    from app.db import db
+    from app.services import popularity
+
+    popularity.record_order(datetime.utcnow(), [(1, 1), (2, 1), (3, 2), (4, 1)])
+    db.session.commit()
+
+
+def benchmark(lines):
+    """Ejecuta el benchmark para `lines` líneas de pedido."""
+    from app import create_app
+    from app.db import db
+    from app.services import popularity
+    from app.services.sales_rollup import SALE_STATUSES
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        start = time.perf_counter()
+        _seed(lines)
+        seed_s = time.perf_counter() - start
+        start = time.perf_counter()
+        popularity.rebuild(SALE_STATUSES)
+        rebuild_ms = (time.perf_counter() - start) * 1000
+
+        def cold():
+            popularity.invalidate_top()
+            return popularity.top_products(TOP)
+
+        print(f"\n{lines} líneas de pedido (generadas en {seed_s:.0f} s)")
+        print(f"{'operación':<34}{'ms':>10}")
+        print(f"{'GROUP BY sobre todas las líneas':<34}{_time(_group_by_top):>10.1f}")
+        print(f"{'reconstruir popularidad (una vez)':<34}{rebuild_ms:>10.1f}")
+        print(f"{'top desde la tabla':<34}{_time(cold):>10.2f}")
+        cached_ms = _time(lambda: popularity.top_products(TOP))
+        print(f"{'top desde la caché':<34}{cached_ms:>10.2f}")
+        print(f"{'registrar un pedido pagado':<34}{_time(_record_order):>10.2f}")
+        db.session.remove()
+        db.drop_all()
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1000000]
+    for size in sizes:
+        benchmark(size)
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Benchmark de la búsqueda del catálogo: ILIKE frente al índice invertido.
+
+Crea N productos sintéticos en una base SQLite en memoria y mide, para un
+conjunto de consultas, la primera página del catálogo con cada estrategia.
+
+Uso:
+    python scripts/benchmark_search.py            # 10k y 100k productos
+    python scripts/benchmark_search.py 50000      # tamaños personalizados
+"""
+
+import os
+import random
+import sys
+import time
+
+# Agregar el directorio raíz del proyecto al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('FLASK_ENV', 'testing')
+
+WORDS = (
+    'zapato zapatilla camiseta camisa pantalón chaqueta bolso gorra vestido '
+    'falda cuero algodón lino deportivo urbano clásico elegante cómodo rojo '
+    'azul negro blanco verde rosado neón edición limitada básico oversize '
+    'running casual invierno verano niño niña hombre mujer unisex'
+).split()
+QUERIES = ['zapatos rojos', 'camiseta algodón', 'neon', 'edicion limitada', 'chaquetas']
+REPEAT = 5
+
+
+def _seed(count):
+    from sqlalchemy import insert
+
+    from app.db import db
+    from app.models.products import Category, Product
+
+    rng = random.Random(42)
+    # Vocabulario de relleno para que cada término real aparezca en pocos productos
+    filler = [f'{rng.choice(WORDS)[:3]}{index}' for index in range(5000)]
+    category = Category(name='Benchmark')
+    db.session.add(category)
+    db.session.commit()
+    batch = []
+    for index in range(count):
+        batch.append({
+            'name': ' '.join(rng.sample(WORDS, 2) + rng.sample(filler, 1)).capitalize(),
+            'description': ' '.join(rng.sample(WORDS, 3) + rng.sample(filler, 30)),
+            'price': rng.randint(10, 500) * 1000,
+            'stock': rng.randint(0, 50),
+            'category_id': category.id,
+        })
+        if len(batch) == 5000 or index == count - 1:
+            db.session.execute(insert(Product), batch)
+            batch = []
+    db.session.commit()
+
+
+def _time(func):
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        func()
+    return (time.perf_counter() - start) / REPEAT * 1000
+
+
+def _ilike_page(q):
+    from app.models.products import Product
+
+    return Product.query.filter(
+        (Product.name.ilike(f'%{q}%')) | (Product.description.ilike(f'%{q}%'))
+    ).order_by(Product.created_at.desc()).paginate(page=1, per_page=12, error_out=False)
+
+
+def _index_page(q):
+    from app.models.products import Product
+    from app.services.search import product_search
+
+    ranked = product_search.ranked(q)
+    return Product.query.join(ranked, ranked.c.product_id == Product.id)\
+        .order_by(ranked.c.rank, Product.id.desc())\
+        .paginate(page=1, per_page=12, error_out=False)
+
+
+def benchmark(count):
+    """Ejecuta el benchmark para `count` productos."""
+    from app import create_app
+    from app.db import db
+    from app.services.search import product_search
+
+    for backend in ('sqlite', 'memory'):
+        app = create_app()
+        app.config['SEARCH_BACKEND'] = backend
+        with app.app_context():
+            db.create_all()
+            _seed(count)
+            start = time.perf_counter()
+            product_search.rebuild()
+            build_ms = (time.perf_counter() - start) * 1000
+            print(f"\n{count} productos - índice '{backend}' "
+                  f"construido en {build_ms:.0f} ms")
+            print(f"{'consulta':<20}{'ilike (ms)':>12}{'índice (ms)':>14}"
+                  f"{'resultados':>12}")
+            for q in QUERIES:
+                ilike_ms = _time(lambda: _ilike_page(q))
+                index_ms = _time(lambda: _index_page(q))
+                hits = _index_page(q).total
+                print(f"{q:<20}{ilike_ms:>12.1f}{index_ms:>14.1f}{hits:>12}")
+            db.session.remove()
+            db.drop_all()
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10000, 100000]
+    for size in sizes:
+        benchmark(size)
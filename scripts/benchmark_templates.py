@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Benchmark de compilación y renderizado de plantillas.
+
+Mide dos costos: el arranque en frío de un worker, que compila las
+plantillas grandes (catálogo, feed y dashboard) la primera vez que las
+usa, con y sin la caché de bytecode en disco; y el renderizado del
+catálogo y del feed para un cliente autenticado (que no pasa por la caché
+de páginas) con y sin la caché de fragmentos de las tarjetas de producto.
+
+Uso:
+    python scripts/benchmark_templates.py          # 50 repeticiones por caso
+    python scripts/benchmark_templates.py 200
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+# Agregar el directorio raíz del proyecto al path
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+os.environ.setdefault('FLASK_ENV', 'testing')
+
+PRODUCTS = 48
+TEMPLATES = ('base.html', 'catalog/catalog.html', 'client/feed.html',
+             'admin/dashboard.html')
+PAGES = (('catálogo', '/catalog/'), ('feed', '/feed'))
+
+
+def _seed():
+    from datetime import date
+
+    from app.db import db
+    from app.models.products import Category, Product
+    from app.models.users import UserRole, Users
+
+    category = Category(name='Benchmark')
+    user = Users(nameUser='Cliente', email='cliente@example.com', password_user='hash',
+                 birthdate=date(1990, 1, 1), role=UserRole.USER, is_active_db=True)
+    db.session.add_all([category, user])
+    db.session.commit()
+    db.session.add_all([
+        Product(name=f'Zapatilla urbana {index}', description='Cuero y lona ' * 10,
+                price=100000 + index * 1000, stock=index % 15, size='40', color='Negro',
+                category_id=category.id, image=f'producto{index}.jpg',
+                promo='2x1' if index % 4 == 0 else None, destacado=index % 3 == 0)
+        for index in range(PRODUCTS)
+    ])
+    db.session.commit()
+    return user.idUser
+
+
+def _cold_start(bytecode_dir, rounds):
+    """ms para compilar TEMPLATES en un worker nuevo."""
+    from app import create_app
+
+    total = 0.0
+    for _ in range(rounds):
+        env = create_app({'JINJA_BYTECODE_CACHE_DIR': bytecode_dir}).jinja_env
+        started = time.perf_counter()
+        for name in TEMPLATES:
+            env.get_template(name)
+        total += time.perf_counter() - started
+    return total / rounds * 1000
+
+
+def _render(client, path, rounds):
+    """ms por petición y tarjetas de producto en la página."""
+    html = client.get(path).get_data(as_text=True)
+    started = time.perf_counter()
+    for _ in range(rounds):
+        client.get(path).close()
+    elapsed_ms = (time.perf_counter() - started) / rounds * 1000
+    return elapsed_ms, html.count('class="product-title')
+
+
+def benchmark(rounds):
+    """Ejecuta el benchmark e imprime los resultados."""
+    from app import create_app
+    from app.db import db
+
+    bytecode_dir = tempfile.mkdtemp(prefix='benchmark_templates_')
+    try:
+        _cold_start(bytecode_dir, 1)
+        print(f"Arranque en frío: {', '.join(TEMPLATES)} ({rounds} workers por caso)")
+        without = _cold_start(None, rounds)
+        with_cache = _cold_start(bytecode_dir, rounds)
+        print(f"{'sin caché de bytecode':<28}{without:>10.2f} ms")
+        print(f"{'con caché de bytecode':<28}{with_cache:>10.2f} ms"
+              f"{1 - with_cache / without:>9.0%}")
+    finally:
+        shutil.rmtree(bytecode_dir, ignore_errors=True)
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        user_id = _seed()
+        client = app.test_client()
+        with client.session_transaction() as sess:
+            sess['_user_id'] = str(user_id)
+
+        print(f"\nRenderizado para un cliente autenticado"
+              f" ({rounds} peticiones por caso)")
+        print(f"{'página':<12}{'fragmentos':<14}{'ms/pet.':>10}{'tarjetas':>10}"
+              f"{'ms/tarjeta':>12}")
+        timeout = app.config['FRAGMENT_CACHE_TIMEOUT']
+        for label, path in PAGES:
+            # 'del' hace que {% cache %} borre y renderice el fragmento cada vez
+            app.config['FRAGMENT_CACHE_TIMEOUT'] = 'del'
+            plain_ms, cards = _render(client, path, rounds)
+            app.config['FRAGMENT_CACHE_TIMEOUT'] = timeout
+            cached_ms, _ = _render(client, path, rounds)
+            for name, page_ms in (('sin caché', plain_ms), ('con caché', cached_ms)):
+                print(f"{label:<12}{name:<14}{page_ms:>10.2f}{cards:>10}"
+                      f"{page_ms / cards:>12.3f}")
+        db.session.remove()
+
+
+if __name__ == "__main__":
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 50)
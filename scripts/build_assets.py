@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Compila los archivos estáticos: paquetes, minificación y huellas.
+
+Minifica cada CSS y JS de ``app/static`` (con rcssmin y rjsmin), arma los
+paquetes de ``app.services.assets.BUNDLES`` y escribe todo en
+``app/static/dist/`` como ``<nombre>-<hash>.<ext>``, más el manifiesto
+``dist/manifest.json`` que usan ``asset_url`` y ``asset_urls``. En los
+CSS concatenados, los ``@import`` pasan al principio del paquete y las
+``url()`` relativas se reescriben para la nueva ubicación. Se conservan
+los archivos de la compilación anterior (para las páginas que todavía
+los referencian) y se borran los más viejos. Cada archivo generado
+lleva sus hermanos ``.gz`` y ``.br`` (si está instalado ``brotli``) con
+la máxima compresión, para que la aplicación los envíe sin comprimir en
+cada petición.
+
+Uso:
+    python scripts/build_assets.py
+"""
+
+import hashlib
+import json
+import os
+import posixpath
+import re
+import sys
+
+# Agregar el directorio raíz del proyecto al path
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+STATIC_DIR = os.path.join(ROOT_DIR, 'app', 'static')
+DIST_DIR = 'dist'
+# Archivos sueltos que también se minifican y reciben huella
+SOURCE_PATTERNS = (('', '.css'), ('css', '.css'), ('js', '.js'))
+HASH_LENGTH = 10
+
+URL_PATTERN = re.compile(r'url\(\s*([\'"]?)([^\'")]+)\1\s*\)')
+IMPORT_PATTERN = re.compile(r'@import\s*(?:url\([^)]*\)|"[^"]*"|\'[^\']*\')[^;]*;')
+CHARSET_PATTERN = re.compile(r'@charset\s[^;]+;')
+
+
+def _read(static_dir, name):
+    with open(os.path.join(static_dir, name), encoding='utf-8') as source:
+        return source.read()
+
+
+def rewrite_urls(css, source, target):
+    """Reescribe las ``url()`` relativas de `source` para servirlas desde `target`."""
+    def replace(match):
+        quote, ref = match.group(1), match.group(2).strip()
+        if ref.startswith(('data:', 'http:', 'https:', '//', '/', '#')):
+            return match.group(0)
+        path = posixpath.normpath(posixpath.join(posixpath.dirname(source), ref))
+        relative = posixpath.relpath(path, posixpath.dirname(target))
+        return f'url({quote}{relative}{quote})'
+    return URL_PATTERN.sub(replace, css)
+
+
+def build_css(static_dir, sources, target):
+    """Concatena y minifica hojas de estilo; los ``@import`` quedan al principio."""
+    import rcssmin
+
+    imports, bodies = [], []
+    for source in sources:
+        css = rcssmin.cssmin(rewrite_urls(_read(static_dir, source), source, target))
+        css = CHARSET_PATTERN.sub('', css)
+        for rule in IMPORT_PATTERN.findall(css):
+            if rule not in imports:
+                imports.append(rule)
+        bodies.append(IMPORT_PATTERN.sub('', css).strip())
+    return '\n'.join(imports + bodies) + '\n'
+
+
+def build_js(static_dir, sources):
+    """Concatena y minifica scripts (cada uno terminado en ';')."""
+    import rjsmin
+
+    return ';\n'.join(rjsmin.jsmin(_read(static_dir, source)).strip().rstrip(';')
+                      for source in sources) + ';\n'
+
+
+def precompress(path, content):
+    """
+    Escribe ``<path>.gz`` y ``<path>.br`` si resultan más chicos que el original.
+
+    Returns:
+        Bytes escritos por codificación
+    """
+    from app.services.compression import BROTLI_AVAILABLE, PRECOMPRESSED, compress
+
+    data = content.encode('utf-8')
+    levels = {'gzip': 9}
+    if BROTLI_AVAILABLE:
+        levels['br'] = 11
+    written = {}
+    for encoding, level in levels.items():
+        compressed = compress(data, encoding, level)
+        if len(compressed) < len(data):
+            with open(path + PRECOMPRESSED[encoding], 'wb') as output_file:
+                output_file.write(compressed)
+            written[encoding] = len(compressed)
+    return written
+
+
+def fingerprint(name, content):
+    """``css/site.css`` → ``dist/css/site-<hash>.css``."""
+    digest = hashlib.sha256(content.encode('utf-8')).hexdigest()[:HASH_LENGTH]
+    stem, extension = posixpath.splitext(name)
+    return f'{DIST_DIR}/{stem}-{digest}{extension}'
+
+
+def source_files(static_dir):
+    """Nombres (relativos a static/) de los CSS y JS sueltos a compilar."""
+    names = []
+    for folder, extension in SOURCE_PATTERNS:
+        path = os.path.join(static_dir, folder)
+        if os.path.isdir(path):
+            names += sorted(posixpath.join(folder, name) for name in os.listdir(path)
+                            if name.endswith(extension))
+    return names
+
+
+def build(static_dir=STATIC_DIR, bundles=None):
+    """
+    Compila los archivos sueltos y los paquetes y escribe el manifiesto.
+
+    Args:
+        static_dir: Carpeta ``static`` de la aplicación
+        bundles: Paquetes a armar (por defecto ``BUNDLES``)
+
+    Returns:
+        Diccionario con el manifiesto y los bytes antes y después
+    """
+    from app.services.assets import BUNDLES
+
+    bundles = BUNDLES if bundles is None else bundles
+    targets = {name: [name] for name in source_files(static_dir)}
+    targets.update(bundles)
+
+    dist_dir = os.path.join(static_dir, DIST_DIR)
+    manifest_path = os.path.join(dist_dir, 'manifest.json')
+    previous = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path, encoding='utf-8') as manifest_file:
+            previous = json.load(manifest_file)
+
+    manifest, bytes_in, bytes_out, bytes_compressed = {}, 0, 0, {}
+    for name, sources in sorted(targets.items()):
+        if name.endswith('.css'):
+            content = build_css(static_dir, sources, f'{DIST_DIR}/{name}')
+        else:
+            content = build_js(static_dir, sources)
+        manifest[name] = fingerprint(name, content)
+        output = os.path.join(static_dir, manifest[name])
+        os.makedirs(os.path.dirname(output), exist_ok=True)
+        with open(output, 'w', encoding='utf-8') as output_file:
+            output_file.write(content)
+        compressed = precompress(output, content)
+        bytes_in += sum(os.path.getsize(os.path.join(static_dir, source))
+                        for source in sources)
+        bytes_out += len(content.encode('utf-8'))
+        for encoding, size in compressed.items():
+            bytes_compressed[encoding] = bytes_compressed.get(encoding, 0) + size
+
+    tmp_path = f'{manifest_path}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as manifest_file:
+        json.dump(manifest, manifest_file, indent=1, sort_keys=True)
+    os.replace(tmp_path, manifest_path)
+
+    # Conservar la compilación actual y la anterior; borrar el resto
+    keep = set(manifest.values()) | set(previous.values())
+    removed = 0
+    for folder, _, files in os.walk(dist_dir):
+        for filename in files:
+            path = os.path.join(folder, filename)
+            relative = os.path.relpath(path, dist_dir).replace(os.sep, '/')
+            name = posixpath.join(DIST_DIR, relative)
+            if name.endswith(('.gz', '.br')):
+                name = name[:-3]
+            if path != manifest_path and name not in keep:
+                os.remove(path)
+                removed += 1
+    return {'manifest': manifest, 'bytes_in': bytes_in, 'bytes_out': bytes_out,
+            'bytes_compressed': bytes_compressed, 'removed': removed}
+
+
+def main():
+    """Punto de entrada de la línea de comandos."""
+    try:
+        result = build()
+    except ImportError as e:
+        print(f"❌ Falta un minificador ({e.name}); instala los requisitos:"
+              " pip install -r requirements.txt")
+        return 1
+    print(f"✅ {len(result['manifest'])} archivos compilados en app/static/{DIST_DIR}/")
+    print(f"ℹ️ {result['bytes_in'] / 1e3:.1f} KB de fuentes →"
+          f" {result['bytes_out'] / 1e3:.1f} KB;"
+          f" {result['removed']} archivos viejos borrados")
+    for encoding, size in sorted(result['bytes_compressed'].items()):
+        print(f"ℹ️ Precomprimidos con {encoding}: {size / 1e3:.1f} KB")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
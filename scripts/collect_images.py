@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Script para borrar las imágenes de productos que ya nadie usa.
+
+Editar o eliminar un producto libera su imagen; el archivo y sus
+variantes se borran cuando lleva más de IMAGE_GC_GRACE segundos sin
+referencias (o los segundos indicados). Eliminar un producto solo recoge
+las que ya vencieron, así que conviene ejecutarlo desde cron, por
+ejemplo cada hora. Es seguro ejecutarlo varias veces.
+"""
+
+import argparse
+import os
+import sys
+
+# Agregar el directorio raíz del proyecto al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def collect_images(grace=None):
+    """Borra los archivos de las imágenes sin referencias vencidas."""
+    from app import create_app
+    from app.services.image_store import image_store
+
+    app = create_app()
+    with app.app_context():
+        removed = image_store.collect_garbage(grace)
+        if removed:
+            print(f"✅ Imágenes borradas: {len(removed)}.")
+        else:
+            print("ℹ️ No hay imágenes sin usar para borrar.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    parser.add_argument('--grace', type=int, default=None,
+                        help='Segundos sin referencias (por defecto IMAGE_GC_GRACE)')
+    collect_images(parser.parse_args().grace)
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Servidor PayU falso para tests y benchmarks.
+
+Atiende ``POST /ppp-web-gateway-payu/`` como el WebCheckout de PayU:
+valida los campos obligatorios y redirige (302) a una página de pago
+``/checkout/<referenceCode>``. Mantiene las conexiones abiertas
+(HTTP/1.1 keep-alive) y cuenta peticiones y conexiones, de modo que se
+puede comprobar si el cliente reutiliza conexiones. Se le puede fijar
+una latencia o una secuencia de códigos de estado para simular un PayU
+degradado.
+
+``PayUConfirmationSender`` hace el camino inverso: firma y envía
+confirmaciones al webhook de la aplicación como lo haría PayU.
+
+Uso:
+    python scripts/fake_payu_server.py               # puerto 8099
+    python scripts/fake_payu_server.py 8099 0.5      # con 500 ms de latencia
+    PAYU_BASE_URL=http://127.0.0.1:8099 python run.py
+"""
+
+import hashlib
+import sys
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+import requests
+
+DEFAULT_PORT = 8099
+GATEWAY_PATH = '/ppp-web-gateway-payu/'
+REQUIRED_FIELDS = ('merchantId', 'accountId', 'referenceCode', 'amount',
+                   'currency', 'signature')
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Atiende una conexión; varias peticiones si el cliente la reutiliza."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        super().setup()
+        self.server.payu.connection_opened()
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        return
+
+    def handle(self):
+        try:
+            super().handle()
+        except (BrokenPipeError, ConnectionResetError):
+            # El cliente cortó por timeout antes de la respuesta
+            return
+
+    def _reply(self, status, body=b'', headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        payu = self.server.payu
+        length = int(self.headers.get('Content-Length') or 0)
+        form = {key: values[0] for key, values in
+                parse_qs(self.rfile.read(length).decode('utf-8')).items()}
+        status, delay = payu.next_response(form)
+        if delay:
+            time.sleep(delay)
+        if self.path != GATEWAY_PATH:
+            self._reply(404, b'Not found')
+        elif status != 302:
+            self._reply(status, b'Error simulado')
+        elif any(not form.get(field) for field in REQUIRED_FIELDS):
+            self._reply(400, b'Faltan campos obligatorios')
+        else:
+            location = f"{payu.url}/checkout/{form['referenceCode']}"
+            self._reply(302, headers={'Location': location})
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        if self.path.startswith('/checkout/'):
+            self._reply(200, b'<html><body>Pasarela PayU falsa</body></html>')
+        else:
+            self._reply(404, b'Not found')
+
+
+class FakePayUServer:
+    """PayU falso en un hilo, accesible en ``http://127.0.0.1:<puerto>``."""
+
+    def __init__(self, port=0, delay=0.0):
+        self.delay = delay
+        self._lock = threading.Lock()
+        self._script = deque()
+        self.requests = 0
+        self.connections = 0
+        self.forms = []
+        self._server = ThreadingHTTPServer(('127.0.0.1', port), _Handler)
+        self._server.daemon_threads = True
+        self._server.payu = self
+        self._thread = None
+
+    @property
+    def url(self):
+        """URL base para PAYU_BASE_URL."""
+        return f'http://127.0.0.1:{self._server.server_address[1]}'
+
+    def script(self, *statuses):
+        """Fija los códigos de las próximas respuestas (después, 302)."""
+        with self._lock:
+            self._script.extend(statuses)
+
+    def connection_opened(self):
+        with self._lock:
+            self.connections += 1
+
+    def next_response(self, form):
+        """Registra la petición y devuelve (código, demora) para responderla."""
+        with self._lock:
+            self.requests += 1
+            self.forms.append(form)
+            status = self._script.popleft() if self._script else 302
+            return status, self.delay
+
+    def serve_forever(self):
+        """Atiende peticiones en el hilo actual hasta que se llame a stop()."""
+        self._server.serve_forever()
+
+    def start(self):
+        """Empieza a atender en segundo plano y devuelve la URL."""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self.url
+
+    def stop(self):
+        """Detiene el servidor."""
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def sign_confirmation(api_key, form):
+    """
+    Firma de una confirmación de PayU.
+
+    MD5 de api_key~merchant~referencia~valor~moneda~estado.
+    """
+    fields = ('merchant_id', 'reference_sale', 'value', 'currency', 'state_pol')
+    raw = '~'.join([api_key] + [str(form[field]) for field in fields])
+    return hashlib.md5(raw.encode('utf-8')).hexdigest()  # nosec - así firma PayU
+
+
+class PayUConfirmationSender:
+    """Envía confirmaciones firmadas al webhook de la aplicación."""
+
+    def __init__(self, webhook_url, api_key, merchant_id='508029'):
+        self.webhook_url = webhook_url
+        self.api_key = api_key
+        self.merchant_id = merchant_id
+        self._local = threading.local()
+
+    def confirmation(self, order_id, value, state_pol='4', reference_sale=None):
+        """Formulario de confirmación firmado para un pedido."""
+        form = {
+            'merchant_id': self.merchant_id,
+            'reference_sale':
+                reference_sale or f'ORDER_{order_id}_{uuid.uuid4().hex[:8]}',
+            'value': f'{float(value):.1f}',
+            'currency': 'COP',
+            'state_pol': str(state_pol),
+            'transaction_id': str(uuid.uuid4()),
+        }
+        form['sign'] = sign_confirmation(self.api_key, form)
+        return form
+
+    def send(self, form):
+        """Envía una confirmación; devuelve (código HTTP, segundos)."""
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._local.session = requests.Session()
+        started = time.perf_counter()
+        response = session.post(self.webhook_url, data=form, timeout=30)
+        return response.status_code, time.perf_counter() - started
+
+    def fire(self, forms, concurrency=16):
+        """Envía las confirmaciones en paralelo; devuelve [(código, segundos)]."""
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            return list(pool.map(self.send, forms))
+
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_PORT
+    delay = float(sys.argv[2]) if len(sys.argv) > 2 else 0.0
+    server = FakePayUServer(port, delay)
+    print(f"✅ PayU falso en {server.url} (latencia {delay * 1000:.0f} ms)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("PayU falso detenido.")
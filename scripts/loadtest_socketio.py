@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Prueba de carga de notificaciones Socket.IO entre varios procesos.
+
+Levanta una cola de mensajes local, N procesos de la aplicación en
+puertos distintos (como ``gunicorn --workers N``) sobre una base SQLite
+temporal y reparte clientes autenticados entre ellos. Cada notificación
+se dispara con una petición HTTP al primer worker, así que solo llega a
+los clientes de los demás workers si pasa por la cola de mensajes.
+
+Uso:
+    python scripts/loadtest_socketio.py            # 4 workers, 40 clientes
+    python scripts/loadtest_socketio.py 4 200
+"""
+
+import json
+import os
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Agregar el directorio raíz del proyecto al path
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from scripts.local_message_queue import LocalMessageQueue  # noqa: E402
+
+STARTUP_TIMEOUT = 30
+DELIVERY_TIMEOUT = 15
+
+
+def _seed(count):
+    """Crea `count` usuarios con un pedido pendiente y devuelve sus sesiones."""
+    from datetime import date
+
+    from app import create_app
+    from app.db import db
+    from app.models.orders import Order
+    from app.models.users import Users
+
+    app = create_app()
+    serializer = app.session_interface.get_signing_serializer(app)
+    clients = []
+    with app.app_context():
+        db.create_all()
+        for index in range(count):
+            user = Users(nameUser=f'Carga {index}', email=f'carga{index}@example.com',
+                         password_user='hash', birthdate=date(1990, 1, 1))
+            db.session.add(user)
+            db.session.flush()
+            order = Order(user_id=user.idUser, total=10)
+            db.session.add(order)
+            db.session.flush()
+            clients.append({
+                'user_id': user.idUser,
+                'order_id': order.id,
+                'cookie': serializer.dumps({'_user_id': str(user.idUser)}),
+            })
+        db.session.commit()
+    print(json.dumps(clients))
+
+
+def _serve(port):
+    """Corre un worker de la aplicación en `port`."""
+    from app import create_app
+    from app.extensions import socketio
+
+    app = create_app()
+    socketio.run(app, host='127.0.0.1', port=port,
+                 allow_unsafe_werkzeug=True, log_output=False)
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _wait_ready(url, process):
+    import requests
+
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f'El worker {url} terminó al iniciar')
+        try:
+            if requests.get(f'{url}/health', timeout=1).status_code == 200:
+                return
+        except requests.ConnectionError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f'El worker {url} no respondió a tiempo')
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def run_load_test(workers=4, clients=40):
+    """
+    Ejecuta la prueba de carga.
+
+    Args:
+        workers: Procesos de la aplicación a levantar
+        clients: Clientes Socket.IO, repartidos entre los workers
+
+    Returns:
+        Diccionario con entregas esperadas, recibidas, fugas a otros
+        usuarios, entregas por worker y latencias en milisegundos
+    """
+    import requests
+    import socketio
+
+    queue = LocalMessageQueue()
+    tmpdir = tempfile.mkdtemp(prefix='loadtest_socketio_')
+    env = dict(
+        os.environ,
+        FLASK_ENV='loadtest',
+        FLASK_DEBUG='False',
+        SQLALCHEMY_DATABASE_URI=f"sqlite:///{os.path.join(tmpdir, 'loadtest.db')}",
+        SOCKETIO_MESSAGE_QUEUE=queue.start(),
+        SECRET_KEY='loadtest',
+        LOG_LEVEL='WARNING',
+        LOG_FILE=os.path.join(tmpdir, 'app.log'),
+        RATELIMIT_STORAGE_URL='memory://',
+        PYTHONPATH=ROOT,
+    )
+    script = os.path.abspath(__file__)
+    seeded = subprocess.run(
+        [sys.executable, script, '--seed', str(clients)],
+        env=env, cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    users = json.loads(seeded.stdout.strip().splitlines()[-1])
+
+    processes, urls = [], []
+    for _ in range(workers):
+        port = _free_port()
+        processes.append(subprocess.Popen(
+            [sys.executable, script, '--serve', str(port)], env=env, cwd=ROOT,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        ))
+        urls.append(f'http://127.0.0.1:{port}')
+
+    lock = threading.Lock()
+    sent_at, latencies, leaks = {}, [], []
+    per_worker = [0] * workers
+    done = threading.Event()
+    sockets = []
+    try:
+        for url, process in zip(urls, processes):
+            _wait_ready(url, process)
+
+        for index, user in enumerate(users):
+            worker = index % workers
+            client = socketio.Client(reconnection=False)
+
+            def on_notification(data, user=user, worker=worker):
+                received_at = time.perf_counter()
+                expected = f"Tu pedido #{user['order_id']} ha sido enviado."
+                with lock:
+                    if data.get('mensaje') != expected:
+                        leaks.append((user['user_id'], data))
+                        return
+                    latencies.append((received_at - sent_at[user['user_id']]) * 1000)
+                    per_worker[worker] += 1
+                    if len(latencies) == len(users):
+                        done.set()
+
+            client.on('nueva_notificacion', on_notification)
+            client.connect(urls[worker], transports=['polling'],
+                           headers={'Cookie': f"session={user['cookie']}"})
+            sockets.append(client)
+
+        def trigger(user):
+            with lock:
+                sent_at[user['user_id']] = time.perf_counter()
+            requests.get(f"{urls[0]}/orders/detail/{user['order_id']}",
+                         cookies={'session': user['cookie']},
+                         allow_redirects=False, timeout=10)
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(trigger, users))
+        done.wait(DELIVERY_TIMEOUT)
+    finally:
+        for client in sockets:
+            client.disconnect()
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait()
+        queue.stop()
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+    return {
+        'expected': len(users),
+        'delivered': len(latencies),
+        'leaks': len(leaks),
+        'per_worker': per_worker,
+        'latency_ms': {
+            'p50': statistics.median(latencies) if latencies else None,
+            'p95': _percentile(latencies, 0.95) if latencies else None,
+            'max': max(latencies) if latencies else None,
+        },
+    }
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ['--seed']:
+        _seed(int(sys.argv[2]))
+    elif sys.argv[1:2] == ['--serve']:
+        _serve(int(sys.argv[2]))
+    else:
+        workers_arg = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+        clients_arg = int(sys.argv[2]) if len(sys.argv) > 2 else 40
+        stats = run_load_test(workers_arg, clients_arg)
+        print(f"Workers: {workers_arg} - clientes: {clients_arg}")
+        ok = stats['delivered'] == stats['expected'] and not stats['leaks']
+        mark = '✅' if ok else '❌'
+        print(f"{mark} Entregadas: {stats['delivered']}/{stats['expected']}"
+              f" - fugas a otros usuarios: {stats['leaks']}")
+        print(f"Entregas por worker: {stats['per_worker']}")
+        latency = stats['latency_ms']
+        if latency['p50'] is not None:
+            print(f"Latencia (ms): p50 {latency['p50']:.1f}"
+                  f" - p95 {latency['p95']:.1f} - máx {latency['max']:.1f}")
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Cola de mensajes local compatible con Redis para Socket.IO.
+
+Implementa solo lo que usa la cola de mensajes de Socket.IO (HELLO,
+PUBLISH, SUBSCRIBE, UNSUBSCRIBE y PING) sobre el protocolo de Redis (RESP2
+y RESP3), escuchando en
+127.0.0.1. Sirve para correr varios procesos de la aplicación en local o
+en tests sin instalar Redis; en producción se usa un Redis real.
+
+Uso:
+    python scripts/local_message_queue.py            # puerto 6399
+    python scripts/local_message_queue.py 6380
+    SOCKETIO_MESSAGE_QUEUE=redis://127.0.0.1:6399/0 python run.py
+"""
+
+import socketserver
+import sys
+import threading
+from collections import defaultdict
+
+DEFAULT_PORT = 6399
+
+
+def _bulk(value):
+    if isinstance(value, str):
+        value = value.encode('utf-8')
+    return b'$%d\r\n%s\r\n' % (len(value), value)
+
+
+def _array(*items, kind=b'*'):
+    parts = [kind + b'%d\r\n' % len(items)]
+    for item in items:
+        parts.append(b':%d\r\n' % item if isinstance(item, int) else _bulk(item))
+    return b''.join(parts)
+
+
+class _Connection(socketserver.StreamRequestHandler):
+    """Atiende una conexión de cliente Redis."""
+
+    def setup(self):
+        super().setup()
+        self.write_lock = threading.Lock()
+        self.channels = set()
+        self.protocol = 2
+
+    def push(self, *items):
+        """Envía un mensaje pub/sub: arreglo en RESP2, push en RESP3."""
+        self.send(_array(*items, kind=b'>' if self.protocol == 3 else b'*'))
+
+    def send(self, data):
+        with self.write_lock:
+            self.wfile.write(data)
+            self.wfile.flush()
+
+    def _read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        if not line.startswith(b'*'):
+            return line.split()
+        args = []
+        for _ in range(int(line[1:])):
+            length = int(self.rfile.readline()[1:])
+            args.append(self.rfile.read(length + 2)[:-2])
+        return args
+
+    def handle(self):
+        broker = self.server.broker
+        try:
+            while True:
+                args = self._read_command()
+                if args is None:
+                    return
+                if args:
+                    self._dispatch(broker, args[0].upper(), args[1:])
+        except (ConnectionError, OSError, ValueError):
+            return
+        finally:
+            for channel in list(self.channels):
+                broker.unsubscribe(channel, self)
+
+    def _dispatch(self, broker, command, args):
+        handler = self.COMMANDS.get(command)
+        if handler is None:
+            # SELECT, CLIENT SETINFO y similares no afectan a pub/sub
+            self.send(b'+OK\r\n')
+        else:
+            handler(self, broker, args)
+
+    def _hello(self, broker, args):
+        self.protocol = int(args[0]) if args else self.protocol
+        self.send(b'%3\r\n' + _bulk('server') + _bulk('redis')
+                  + _bulk('version') + _bulk('7.0.0')
+                  + _bulk('proto') + b':%d\r\n' % self.protocol)
+
+    def _publish(self, broker, args):
+        self.send(b':%d\r\n' % broker.publish(args[0], args[1]))
+
+    def _subscribe(self, broker, args):
+        for channel in args:
+            broker.subscribe(channel, self)
+            self.channels.add(channel)
+            self.push(b'subscribe', channel, len(self.channels))
+
+    def _unsubscribe(self, broker, args):
+        for channel in args or list(self.channels):
+            broker.unsubscribe(channel, self)
+            self.channels.discard(channel)
+            self.push(b'unsubscribe', channel, len(self.channels))
+
+    def _ping(self, broker, args):
+        if self.channels:
+            self.push(b'pong', b'')
+        else:
+            self.send(b'+PONG\r\n')
+
+    COMMANDS = {
+        b'HELLO': _hello,
+        b'PUBLISH': _publish,
+        b'SUBSCRIBE': _subscribe,
+        b'UNSUBSCRIBE': _unsubscribe,
+        b'PING': _ping,
+    }
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class LocalMessageQueue:
+    """Broker pub/sub en un hilo, accesible como ``redis://127.0.0.1:<puerto>/0``."""
+
+    def __init__(self, port=0):
+        self._lock = threading.Lock()
+        self._subscribers = defaultdict(set)
+        self._server = _Server(('127.0.0.1', port), _Connection)
+        self._server.broker = self
+        self._thread = None
+
+    @property
+    def url(self):
+        """URL para SOCKETIO_MESSAGE_QUEUE."""
+        return f'redis://127.0.0.1:{self._server.server_address[1]}/0'
+
+    def subscribe(self, channel, connection):
+        with self._lock:
+            self._subscribers[channel].add(connection)
+
+    def unsubscribe(self, channel, connection):
+        with self._lock:
+            self._subscribers[channel].discard(connection)
+
+    def publish(self, channel, message):
+        """Reenvía el mensaje a los suscriptores; devuelve cuántos lo recibieron."""
+        with self._lock:
+            subscribers = list(self._subscribers[channel])
+        delivered = 0
+        for connection in subscribers:
+            try:
+                connection.push(b'message', channel, message)
+                delivered += 1
+            except OSError:
+                self.unsubscribe(channel, connection)
+        return delivered
+
+    def serve_forever(self):
+        """Atiende conexiones en el hilo actual hasta que se llame a stop()."""
+        self._server.serve_forever()
+
+    def start(self):
+        """Empieza a aceptar conexiones en segundo plano y devuelve la URL."""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self.url
+
+    def stop(self):
+        """Detiene el broker."""
+        self._server.shutdown()
+        self._server.server_close()
+
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_PORT
+    queue = LocalMessageQueue(port)
+    print(f"✅ Cola de mensajes local en {queue.url}")
+    try:
+        queue.serve_forever()
+    except KeyboardInterrupt:
+        print("Cola de mensajes detenida.")
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Servidor SMTP local para tests y benchmarks de correo.
+
+Implementa lo que usa ``smtplib`` para enviar (EHLO/HELO, MAIL, RCPT,
+DATA, RSET, NOOP y QUIT), sin TLS ni autenticación, escuchando en
+127.0.0.1. Guarda los mensajes recibidos y cuenta las conexiones, y se
+le puede fijar una demora por respuesta para simular un servidor remoto
+(handshake, TLS y latencia) o hacer fallar los próximos envíos.
+
+Uso:
+    python scripts/local_smtp_server.py              # puerto 8025
+    python scripts/local_smtp_server.py 8025 0.05    # 50 ms por respuesta
+    MAIL_SERVER=127.0.0.1 MAIL_PORT=8025 MAIL_USE_TLS=False python run.py
+"""
+
+import socketserver
+import sys
+import threading
+import time
+
+DEFAULT_PORT = 8025
+
+
+class _Session(socketserver.StreamRequestHandler):
+    """Atiende una conexión SMTP."""
+
+    def reply(self, line):
+        smtp = self.server.smtp
+        if smtp.delay:
+            time.sleep(smtp.delay)
+        self.wfile.write(line.encode('utf-8') + b'\r\n')
+        self.wfile.flush()
+
+    def _read_data(self):
+        lines = []
+        while True:
+            line = self.rfile.readline()
+            if not line or line in (b'.\r\n', b'.\n'):
+                return b''.join(lines)
+            # Quitar el punto de relleno de las líneas que empiezan con '.'
+            lines.append(line[1:] if line.startswith(b'..') else line)
+
+    def handle(self):
+        self.server.smtp.connection_opened()
+        self._reset()
+        try:
+            self.reply('220 localhost ESMTP prueba')
+            while True:
+                line = self.rfile.readline()
+                if not line:
+                    return
+                command = line.decode('utf-8', 'replace').strip()
+                verb = command.split(' ', 1)[0].upper()
+                handler = self.COMMANDS.get(verb)
+                if handler is None:
+                    self.reply('502 Comando no implementado')
+                elif handler(self, command) is False:
+                    return
+        except (ConnectionError, OSError):
+            return
+
+    def _reset(self):
+        self.mail_from, self.rcpt_tos = None, []
+
+    def _ehlo(self, command):
+        self.reply('250-localhost\r\n250-8BITMIME\r\n250 SMTPUTF8')
+
+    def _helo(self, command):
+        self.reply('250 localhost')
+
+    def _mail(self, command):
+        self.mail_from, self.rcpt_tos = command.split(':', 1)[1].strip(), []
+        self.reply('250 OK')
+
+    def _rcpt(self, command):
+        self.rcpt_tos.append(command.split(':', 1)[1].strip())
+        self.reply('250 OK')
+
+    def _data(self, command):
+        smtp = self.server.smtp
+        self.reply('354 Fin con <CRLF>.<CRLF>')
+        data = self._read_data()
+        if smtp.take_failure():
+            self.reply('451 Error temporal simulado')
+        else:
+            smtp.deliver(self.mail_from, self.rcpt_tos, data)
+            self.reply('250 OK')
+        self._reset()
+
+    def _rset(self, command):
+        self._reset()
+        self.reply('250 OK')
+
+    def _quit(self, command):
+        self.reply('221 Adiós')
+        return False
+
+    COMMANDS = {
+        'EHLO': _ehlo,
+        'HELO': _helo,
+        'MAIL': _mail,
+        'RCPT': _rcpt,
+        'DATA': _data,
+        'RSET': _rset,
+        'NOOP': _rset,
+        'QUIT': _quit,
+    }
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class LocalSMTPServer:
+    """Servidor SMTP en un hilo, accesible en ``127.0.0.1:<puerto>``."""
+
+    def __init__(self, port=0, delay=0.0):
+        self.delay = delay
+        self._lock = threading.Lock()
+        self._failures = 0
+        self.connections = 0
+        self.messages = []
+        self._server = _Server(('127.0.0.1', port), _Session)
+        self._server.smtp = self
+        self._thread = None
+
+    @property
+    def host(self):
+        return self._server.server_address[0]
+
+    @property
+    def port(self):
+        return self._server.server_address[1]
+
+    def fail_next(self, count):
+        """Responde con error temporal a los próximos `count` envíos."""
+        with self._lock:
+            self._failures += count
+
+    def take_failure(self):
+        with self._lock:
+            if self._failures:
+                self._failures -= 1
+                return True
+            return False
+
+    def connection_opened(self):
+        with self._lock:
+            self.connections += 1
+
+    def deliver(self, mail_from, rcpt_tos, data):
+        """Guarda un mensaje recibido."""
+        with self._lock:
+            self.messages.append({'from': mail_from, 'to': rcpt_tos, 'data': data})
+
+    def serve_forever(self):
+        """Atiende conexiones en el hilo actual hasta que se llame a stop()."""
+        self._server.serve_forever()
+
+    def start(self):
+        """Empieza a aceptar conexiones en segundo plano."""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Detiene el servidor."""
+        self._server.shutdown()
+        self._server.server_close()
+
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_PORT
+    delay = float(sys.argv[2]) if len(sys.argv) > 2 else 0.0
+    server = LocalSMTPServer(port, delay)
+    print(f"✅ Servidor SMTP local en {server.host}:{server.port}"
+          f" ({delay * 1000:.0f} ms por respuesta)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("Servidor SMTP detenido.")
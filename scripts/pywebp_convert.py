@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+Convierte en lote las imágenes del sitio a WebP (y AVIF si se configura).
+
+Genera lo mismo que sirve la aplicación: para ``product_images`` las
+variantes de IMAGE_VARIANTS en ``variants/`` (las del pipeline de
+subidas) y para ``review_images`` una ``.webp`` junto al original. Usa
+un pool de procesos con todos los núcleos y es incremental: un manifiesto
+con el hash SHA-256 de cada original evita volver a convertir lo que no
+cambió, y las salidas más nuevas que su original se dan por buenas. El
+manifiesto se guarda cada pocos cientos de imágenes, así que tras una
+caída basta con volver a ejecutarlo.
+
+Uso:
+    python scripts/pywebp_convert.py               # productos y reseñas
+    python scripts/pywebp_convert.py --workers 8 --update-db  # y registra
+    python scripts/pywebp_convert.py --force app/static/review_images
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# Agregar el directorio raíz del proyecto al path
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+DEFAULT_MANIFEST = os.path.join(ROOT_DIR, 'instance', 'pywebp_manifest.json')
+REVIEW_IMAGES = os.path.join(ROOT_DIR, 'app', 'static', 'review_images')
+SOURCE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+FLUSH_EVERY = 200
+
+
+def file_hash(path):
+    """SHA-256 del archivo, leído por bloques."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as source:
+        for chunk in iter(lambda: source.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _plan(job):
+    """Salidas esperadas de un trabajo: (rutas, anchos)."""
+    from app.services.images import oriented_width, planned_widths, variant_name
+
+    folder, filename = os.path.split(job['path'])
+    if job['mode'] == 'sibling':
+        return [os.path.splitext(job['path'])[0] + '.webp'], None
+    widths = planned_widths(oriented_width(job['path']), job['widths'])
+    return [os.path.join(folder, variant_name(filename, width, fmt))
+            for width in widths for fmt in job['formats']], widths
+
+
+def _convert_sibling(path, quality):
+    """WebP del mismo tamaño junto al original, sin metadatos."""
+    from PIL import Image, ImageOps
+
+    with Image.open(path) as original:
+        image = ImageOps.exif_transpose(original)
+        has_alpha = image.mode in ('RGBA', 'LA', 'PA') or 'transparency' in image.info
+        image = image.convert('RGBA' if has_alpha else 'RGB')
+    image.save(os.path.splitext(path)[0] + '.webp', 'WEBP', quality=quality, method=4)
+
+
+def convert(job):
+    """
+    Convierte una imagen (se ejecuta en un proceso del pool).
+
+    Returns:
+        Diccionario con el estado ('convertida', 'al día' o 'error'),
+        el hash del original, los anchos y los bytes leídos y escritos
+    """
+    from app.services.images import generate_variants
+
+    result = {'path': job['path'], 'bytes_in': 0, 'bytes_out': 0}
+    try:
+        stat = os.stat(job['path'])
+        result['bytes_in'] = stat.st_size
+        result['sha256'] = file_hash(job['path'])
+        outputs, widths = _plan(job)
+        fresh = all(os.path.exists(output)
+                    and os.path.getmtime(output) >= stat.st_mtime
+                    for output in outputs)
+        changed = job['known_hash'] not in (None, result['sha256'])
+        if job['force'] or not fresh or changed:
+            if job['mode'] == 'sibling':
+                _convert_sibling(job['path'], job['quality'])
+            else:
+                widths = generate_variants(job['path'], job['widths'],
+                                           job['formats'], job['quality'])
+            result['status'] = 'convertida'
+        else:
+            result['status'] = 'al día'
+        result.update({
+            'widths': widths, 'size': stat.st_size, 'mtime': stat.st_mtime,
+            'outputs': [os.path.relpath(output, ROOT_DIR) for output in outputs],
+            'bytes_out': sum(os.path.getsize(output) for output in outputs),
+        })
+    except Exception as exc:  # pylint: disable=broad-except
+        result.update({'status': 'error', 'error': f'{type(exc).__name__}: {exc}'})
+    return result
+
+
+def load_manifest(path):
+    """Lee el manifiesto ({} si todavía no existe)."""
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as manifest_file:
+        return json.load(manifest_file)
+
+
+def save_manifest(path, manifest):
+    """Escribe el manifiesto de forma atómica."""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as manifest_file:
+        json.dump(manifest, manifest_file, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def _settings(mode, widths, formats, quality):
+    if mode == 'sibling':
+        return f'sibling:webp:{quality}'
+    sizes = ','.join(map(str, sorted(widths)))
+    return f"variants:{','.join(formats)}:{quality}:{sizes}"
+
+
+def collect_jobs(folders, manifest, widths, formats, quality, force=False):
+    """
+    Arma los trabajos de conversión y descarta los que no cambiaron.
+
+    Args:
+        folders: Lista de (carpeta, modo); modo 'variants' o 'sibling'
+
+    Returns:
+        (trabajos, cantidad de imágenes sin cambios según el manifiesto)
+    """
+    jobs, unchanged = [], 0
+    for folder, mode in folders:
+        if not os.path.isdir(folder):
+            continue
+        settings = _settings(mode, widths, formats, quality)
+        for filename in sorted(os.listdir(folder)):
+            if not filename.lower().endswith(SOURCE_EXTENSIONS):
+                continue
+            path = os.path.join(folder, filename)
+            stat = os.stat(path)
+            entry = manifest.get(os.path.relpath(path, ROOT_DIR))
+            same_settings = entry is not None and entry['settings'] == settings
+            if (not force and same_settings and entry['size'] == stat.st_size
+                    and entry['mtime'] == stat.st_mtime
+                    and all(os.path.exists(os.path.join(ROOT_DIR, output))
+                            for output in entry['outputs'])):
+                unchanged += 1
+                continue
+            jobs.append({
+                'path': path, 'mode': mode, 'settings': settings, 'force': force,
+                'widths': list(widths), 'formats': list(formats), 'quality': quality,
+                'known_hash': entry['sha256'] if same_settings else None,
+            })
+    return jobs, unchanged
+
+
+def convert_all(folders, manifest_path, widths, formats, quality, workers=None,
+                force=False):
+    """
+    Convierte las imágenes de las carpetas en paralelo y actualiza el manifiesto.
+
+    Returns:
+        Diccionario con los contadores, los bytes y la duración
+    """
+    manifest = load_manifest(manifest_path)
+    jobs, unchanged = collect_jobs(folders, manifest, widths, formats, quality, force)
+    stats = {'convertida': 0, 'al día': 0, 'error': 0, 'sin cambios': unchanged,
+             'bytes_in': 0, 'bytes_out': 0, 'errors': []}
+    settings = {job['path']: (job['mode'], job['settings']) for job in jobs}
+    started = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(convert, job) for job in jobs]
+            try:
+                for done, future in enumerate(as_completed(futures), 1):
+                    result = future.result()
+                    stats[result['status']] += 1
+                    stats['bytes_in'] += result['bytes_in']
+                    stats['bytes_out'] += result['bytes_out']
+                    if result['status'] == 'error':
+                        stats['errors'].append((result['path'], result['error']))
+                    else:
+                        mode, job_settings = settings[result['path']]
+                        manifest[os.path.relpath(result['path'], ROOT_DIR)] = {
+                            'sha256': result['sha256'], 'size': result['size'],
+                            'mtime': result['mtime'], 'mode': mode,
+                            'settings': job_settings, 'widths': result['widths'],
+                            'outputs': result['outputs'],
+                        }
+                    if done % FLUSH_EVERY == 0:
+                        save_manifest(manifest_path, manifest)
+            except KeyboardInterrupt:
+                for future in futures:
+                    future.cancel()
+                raise
+    finally:
+        save_manifest(manifest_path, manifest)
+        stats['seconds'] = time.perf_counter() - started
+    return stats
+
+
+def update_products(folder, manifest, views, formats):
+    """
+    Registra en ``Product.image_variants`` las variantes ya generadas.
+
+    Requiere un contexto de aplicación. Returns: productos actualizados.
+    """
+    from sqlalchemy import select, update
+
+    from app.db import db
+    from app.models.products import Product
+    from app.services.images import variants_record
+
+    changes = []
+    rows = db.session.execute(
+        select(Product.id, Product.image, Product.image_variants)
+        .where(Product.image.isnot(None))
+    )
+    for product_id, image, current in rows:
+        entry = manifest.get(os.path.relpath(os.path.join(folder, image), ROOT_DIR))
+        if not entry or entry['mode'] != 'variants':
+            continue
+        record = variants_record(entry['widths'], formats, views)
+        if current != record:
+            changes.append({'id': product_id, 'image_variants': record})
+    if changes:
+        db.session.execute(update(Product), changes)
+        db.session.commit()
+    return len(changes)
+
+
+def _report(stats):
+    seconds = max(stats['seconds'], 1e-9)
+    processed = stats['convertida'] + stats['al día'] + stats['error']
+    print(f"✅ {stats['convertida']} convertidas, {stats['al día']} al día,"
+          f" {stats['sin cambios']} sin cambios, {stats['error']} con error"
+          f" en {stats['seconds']:.1f} s")
+    if processed:
+        megabytes_in = stats['bytes_in'] / 1e6
+        print(f"ℹ️ {processed / seconds:.1f} imágenes/s,"
+              f" {megabytes_in / seconds:.1f} MB/s leídos;"
+              f" {megabytes_in:.1f} MB de originales →"
+              f" {stats['bytes_out'] / 1e6:.1f} MB generados")
+    for path, error in stats['errors']:
+        relative = os.path.relpath(path, ROOT_DIR)
+        print(f"❌ {path if relative.startswith('..') else relative}: {error}")
+
+
+def main(argv=None):
+    """Punto de entrada de la línea de comandos."""
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n', 1)[0].strip())
+    parser.add_argument('folders', nargs='*',
+                        help='carpetas a convertir (por defecto productos y reseñas)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                        help='procesos en paralelo (por defecto, todos los núcleos)')
+    parser.add_argument('--manifest', default=DEFAULT_MANIFEST,
+                        help='ruta del manifiesto')
+    parser.add_argument('--formats',
+                        help="formatos de las variantes, p. ej. 'webp,avif'")
+    parser.add_argument('--quality', type=int, help='calidad de compresión (0-100)')
+    parser.add_argument('--force', action='store_true', help='reconvertir todo')
+    parser.add_argument('--update-db', action='store_true',
+                        help='registrar las variantes en los productos')
+    args = parser.parse_args(argv)
+
+    from app import create_app
+    from app.services.images import product_image_folder
+
+    app = create_app()
+    with app.app_context():
+        config = app.config
+        product_folder = os.path.realpath(product_image_folder())
+        views = config['IMAGE_VARIANTS']
+        formats = (args.formats.split(',') if args.formats
+                   else list(config['IMAGE_FORMATS']))
+        quality = args.quality or config['IMAGE_QUALITY']
+        folders = [os.path.realpath(folder) for folder in args.folders] or \
+            [product_folder, REVIEW_IMAGES]
+        folders = [(folder, 'variants' if folder == product_folder else 'sibling')
+                   for folder in folders]
+
+        stats = convert_all(folders, args.manifest, list(views.values()), formats,
+                            quality, args.workers, args.force)
+        _report(stats)
+        if args.update_db:
+            updated = update_products(product_folder, load_manifest(args.manifest),
+                                      views, formats)
+            print(f"✅ Productos con variantes actualizadas: {updated}.")
+    return 1 if stats['error'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
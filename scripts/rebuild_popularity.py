@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""
+Script para crear y reconstruir la popularidad de los productos.
+
+Crea la tabla product_popularity si no existe y recalcula, desde los
+pedidos pagados o enviados, el puntaje con decaimiento en el tiempo de
+cada producto. Después de esto la popularidad se mantiene sola al pagar
+o cancelar pedidos. Es seguro ejecutarlo varias veces.
+"""
+
+import os
+import sys
+
+# Agregar el directorio raíz del proyecto al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def rebuild_popularity():
+    """Crea la tabla si no existe y recalcula la popularidad de todos los productos."""
+    from app import create_app
+    from app.db import db
+    from app.models.popularity import ProductPopularity
+    from app.services import popularity
+    from app.services.sales_rollup import SALE_STATUSES
+
+    app = create_app()
+    with app.app_context():
+        ProductPopularity.__table__.create(db.engine, checkfirst=True)
+        count = popularity.rebuild(SALE_STATUSES)
+        print(f"✅ Popularidad reconstruida para {count} productos.")
+
+
+if __name__ == "__main__":
+    rebuild_popularity()
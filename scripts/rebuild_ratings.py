@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+Script para crear y reconstruir los agregados de calificaciones.
+
+Crea la tabla product_ratings si no existe y recalcula, desde las
+reseñas aprobadas, el total, la suma y el histograma por estrellas de
+cada producto. Después de esto los agregados se mantienen solos al
+aprobar o rechazar reseñas. Es seguro ejecutarlo varias veces.
+"""
+
+import os
+import sys
+
+# Agregar el directorio raíz del proyecto al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def rebuild_ratings():
+    """Crea la tabla si no existe y recalcula los agregados de todos los productos."""
+    from app import create_app
+    from app.db import db
+    from app.models.reviews import ProductRating
+    from app.services.ratings import rebuild_all
+
+    app = create_app()
+    with app.app_context():
+        ProductRating.__table__.create(db.engine, checkfirst=True)
+        print(f"✅ Calificaciones reconstruidas para {rebuild_all()} productos.")
+
+
+if __name__ == "__main__":
+    rebuild_ratings()
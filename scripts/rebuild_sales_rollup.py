@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Script para crear y reconstruir los resúmenes diarios de ventas.
+
+Crea las tablas sales_daily y product_sales_daily si no existen y las
+recalcula desde los pedidos y reembolsos, todo el historial o solo un
+rango de fechas. Después del backfill los resúmenes se mantienen solos
+al pagar, cancelar o reembolsar pedidos. Es seguro ejecutarlo varias
+veces.
+
+Uso:
+    python scripts/rebuild_sales_rollup.py
+    python scripts/rebuild_sales_rollup.py --start 2024-01-01 --end 2024-01-31
+"""
+
+import argparse
+import os
+import sys
+from datetime import date
+
+# Agregar el directorio raíz del proyecto al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def rebuild_sales_rollup(start=None, end=None):
+    """Crea las tablas si no existen y recalcula el rango (o todo el historial)."""
+    from app import create_app
+    from app.db import db
+    from app.models.sales import ProductSalesDaily, SalesDaily
+    from app.services.sales_rollup import rebuild
+
+    app = create_app()
+    with app.app_context():
+        for model in (SalesDaily, ProductSalesDaily):
+            model.__table__.create(db.engine, checkfirst=True)
+        days = rebuild(start, end)
+        print(f"✅ Resúmenes de ventas reconstruidos: {days} días con movimientos.")
+
+
+def main(argv=None):
+    """Punto de entrada de la línea de comandos."""
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    parser.add_argument('--start', type=date.fromisoformat,
+                        help='Primer día (YYYY-MM-DD)')
+    parser.add_argument('--end', type=date.fromisoformat,
+                        help='Último día (YYYY-MM-DD)')
+    args = parser.parse_args(argv)
+    rebuild_sales_rollup(args.start, args.end)
+
+
+if __name__ == "__main__":
+    main()
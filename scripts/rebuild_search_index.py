@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+"""
+Script para crear y reconstruir el índice de búsqueda de productos.
+
+Usa el motor configurado en SEARCH_BACKEND (FTS5 en SQLite, tsvector + GIN
+en PostgreSQL). Es seguro ejecutarlo varias veces.
+"""
+
+import os
+import sys
+
+# Agregar el directorio raíz del proyecto al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def rebuild_search_index():
+    """Crea el índice si no existe y reindexa todos los productos."""
+    from app import create_app
+    from app.models.products import Product
+    from app.services.search import product_search
+
+    app = create_app()
+    with app.app_context():
+        backend = product_search.backend
+        print(f"Motor de búsqueda: {backend.name}")
+        product_search.rebuild()
+        print(f"✅ Índice reconstruido con {Product.query.count()} productos.")
+
+
+if __name__ == "__main__":
+    rebuild_search_index()
@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""
+Script para recalcular los contadores del panel de administración.
+
+Crea la tabla dashboard_stats si no existe y recalcula desde las tablas
+los totales de usuarios, productos, pedidos, notificaciones y la suma de
+ventas. Entre recálculos los contadores se actualizan solos; conviene
+ejecutarlo desde cron si hay borrados masivos o cambios hechos fuera de
+la aplicación. Es seguro ejecutarlo varias veces.
+"""
+
+import os
+import sys
+
+# Agregar el directorio raíz del proyecto al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def reconcile_dashboard_stats():
+    """Crea la tabla si no existe y recalcula todos los contadores."""
+    from app import create_app
+    from app.db import db
+    from app.models.stats import DashboardStat
+    from app.services.dashboard_stats import reconcile
+
+    app = create_app()
+    with app.app_context():
+        DashboardStat.__table__.create(db.engine, checkfirst=True)
+        for name, value in reconcile().items():
+            print(f"✅ {name}: {value:g}")
+
+
+if __name__ == "__main__":
+    reconcile_dashboard_stats()
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Script para cancelar pedidos abandonados y devolver su stock.
+
+El checkout reserva el stock al crear el pedido. Si el cliente no llega
+a pagar, el pedido queda 'pendiente' con esas unidades tomadas (o
+'procesando' si el trabajo de pago se perdió en un reinicio); este
+script cancela los que superan CHECKOUT_RESERVATION_MINUTES (o los
+minutos indicados) y devuelve su stock. Conviene ejecutarlo desde cron,
+por ejemplo cada 10 minutos. Es seguro ejecutarlo varias veces.
+"""
+
+import argparse
+import os
+import sys
+
+# Agregar el directorio raíz del proyecto al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def release_stale_orders(minutes=None):
+    """Cancela los pedidos sin pagar vencidos y devuelve su stock."""
+    from app import create_app
+    from app.services.checkout import release_stale_orders as release
+
+    app = create_app()
+    with app.app_context():
+        cancelled = release(minutes)
+        if cancelled:
+            print(f"✅ Pedidos cancelados y stock devuelto: {cancelled}.")
+        else:
+            print("ℹ️ No hay pedidos pendientes vencidos.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    parser.add_argument('--minutes', type=int, default=None,
+                        help='Minutos de reserva '
+                             '(por defecto CHECKOUT_RESERVATION_MINUTES)')
+    release_stale_orders(parser.parse_args().minutes)
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Reprocesa las confirmaciones de PayU guardadas por el webhook.
+
+Por defecto aplica las que quedaron pendientes (p. ej. tras un reinicio
+con trabajos en la cola), con error o 'procesando' por más de
+PAYMENT_NOTIFICATION_CLAIM_TIMEOUT (su worker se cayó). Un pedido ya vendido (pagado,
+enviado o entregado) no cambia al reprocesar, pero una confirmación ya
+procesada sí puede volver a cambiar un pedido que no llegó a venderse:
+por eso las procesadas solo se reaplican con --reference y --processed.
+
+Uso:
+    # pendientes, con error y vencidas
+    python scripts/replay_payu_notifications.py
+    # todas las 'procesando'
+    python scripts/replay_payu_notifications.py --stuck
+    python scripts/replay_payu_notifications.py --reference ORDER_12_ab12cd34
+    python scripts/replay_payu_notifications.py --reference ORDER_12_ab12cd34 \
+        --processed
+"""
+
+import argparse
+import os
+import sys
+
+# Agregar el directorio raíz del proyecto al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def replay(reference_sale=None, stuck=False, limit=None, processed=False):
+    """Reprocesa las notificaciones y muestra el resultado de cada una."""
+    from app import create_app
+    from app.services.payments import replay_notifications
+
+    statuses = ['pendiente', 'error']
+    if stuck:
+        # Solo si no hay workers corriendo: también las reclamadas hace poco
+        statuses.append('procesando')
+    if reference_sale:
+        statuses.append('procesando')
+        if processed:
+            statuses.append('procesada')
+
+    app = create_app()
+    with app.app_context():
+        results = replay_notifications(tuple(set(statuses)), reference_sale, limit)
+        if not results:
+            print("ℹ️ No hay notificaciones para reprocesar.")
+            return results
+        for notification_id, status in results.items():
+            print(f"✅ Notificación {notification_id}: pedido {status or 'sin cambios'}")
+        print(f"✅ Notificaciones reprocesadas: {len(results)}.")
+        return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n', 1)[0].strip())
+    parser.add_argument('--reference', help='reprocesar solo esta reference_sale')
+    parser.add_argument('--stuck', action='store_true',
+                        help="incluir todas las 'procesando', también las recientes")
+    parser.add_argument('--processed', action='store_true',
+                        help='con --reference, reaplicar también las ya procesadas')
+    parser.add_argument('--limit', type=int, help='máximo de notificaciones')
+    args = parser.parse_args()
+    if args.processed and not args.reference:
+        parser.error('--processed requiere --reference')
+    replay(args.reference, args.stuck, args.limit, args.processed)
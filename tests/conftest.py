@@ -2,7 +2,10 @@
 Configuración de fixtures para pruebas con pytest.
 """
 
+from contextlib import contextmanager
+
 import pytest
+from sqlalchemy import event
 
 from app import create_app, db
 from app.models.users import Users
@@ -32,4 +35,31 @@ def user(app_fixture):
     db.session.add(user_instance)
     db.session.commit()  # Commit changes within the context
     yield user_instance
-    # Cleanup changes within the context
\ No newline at end of file
+    # Cleanup changes within the context
+
+
+@pytest.fixture
+def query_counter():
+    """
+    Fixture que cuenta las sentencias SQL emitidas dentro de un bloque.
+
+    Uso::
+
+        with query_counter() as statements:
+            client.get('/admin/orders')
+        assert len(statements) <= 5
+    """
+    @contextmanager
+    def _counter():
+        statements = []
+
+        def _record(_conn, _cursor, statement, *_args):
+            statements.append(statement)
+
+        event.listen(db.engine, 'before_cursor_execute', _record)
+        try:
+            yield statements
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', _record)
+
+    return _counter
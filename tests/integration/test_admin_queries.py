@@ -0,0 +1,110 @@
+"""
+Tests de regresión N+1 para los listados de administración.
+
+Cada vista debe emitir el mismo número de sentencias SQL sin importar
+cuántas filas existan en la base de datos.
+"""
+
+from datetime import date
+
+import pytest
+
+from app import create_app
+from app.db import db
+from app.models.audit_log import AuditLog
+from app.models.orders import Order, OrderDetail
+from app.models.products import Category, Product
+from app.models.returns import ReturnRequest
+from app.models.support_ticket import SupportTicket
+from app.models.users import UserRole, Users
+
+
+class TestAdminListingQueries:
+    """Tests que detectan consultas por fila en los listados del admin."""
+
+    @pytest.fixture
+    def app(self):
+        """Fixture para crear la aplicación de testing."""
+        app = create_app()
+        app.config['TESTING'] = True
+        with app.app_context():
+            db.create_all()
+            yield app
+            db.session.remove()
+            db.drop_all()
+
+    @pytest.fixture
+    def admin(self, app):
+        """Crea un administrador y su cliente de pruebas autenticado."""
+        admin_user = Users(
+            nameUser='Admin', email='admin@example.com', password_user='hash',
+            birthdate=date(1980, 1, 1), role=UserRole.ADMIN, is_active_db=True
+        )
+        db.session.add(admin_user)
+        db.session.commit()
+        client = app.test_client()
+        with client.session_transaction() as sess:
+            sess['_user_id'] = str(admin_user.idUser)
+        return admin_user, client
+
+    @pytest.fixture
+    def product(self, app):
+        """Crea un producto con su categoría."""
+        category = Category(name='General')
+        db.session.add(category)
+        db.session.commit()
+        product_obj = Product(name='Zapato', price=10, stock=100,
+                              category_id=category.id)
+        db.session.add(product_obj)
+        db.session.commit()
+        return product_obj
+
+    @staticmethod
+    def _seed(admin_id, product_id, count):
+        """Crea `count` clientes, cada uno con pedido, ticket, devolución y log."""
+        for _ in range(count):
+            index = Users.query.count()
+            user = Users(nameUser=f'Cliente {index}', email=f'c{index}@example.com',
+                         password_user='hash', birthdate=date(1990, 1, 1))
+            db.session.add(user)
+            db.session.flush()
+            order = Order(user_id=user.idUser, total=10)
+            db.session.add(order)
+            db.session.flush()
+            db.session.add_all([
+                OrderDetail(order_id=order.id, product_id=product_id,
+                            quantity=1, price=10),
+                SupportTicket(user_id=user.idUser, subject='Ayuda', message='...',
+                              assigned_admin_id=admin_id),
+                ReturnRequest(order_id=order.id, user_id=user.idUser, reason='Talla'),
+                AuditLog(admin_id=user.idUser, action='editar',
+                         target_type='usuario', target_id=user.idUser),
+                Order(user_id=admin_id, total=10, details=[
+                    OrderDetail(product_id=product_id, quantity=1, price=10)
+                ]),
+            ])
+        db.session.commit()
+
+    @pytest.mark.parametrize('url', [
+        '/admin/orders',
+        '/admin/support_tickets',
+        '/admin/returns',
+        '/admin/audit',
+        '/admin/users/{admin_id}/orders',
+    ])
+    def test_query_count_is_constant(self, admin, product, query_counter, url):
+        """El número de consultas no crece con el número de filas."""
+        admin_user, client = admin
+        admin_id, product_id = admin_user.idUser, product.id
+        url = url.format(admin_id=admin_id)
+
+        self._seed(admin_id, product_id, 2)
+        with query_counter() as few_rows:
+            assert client.get(url).status_code == 200
+
+        self._seed(admin_id, product_id, 10)
+        with query_counter() as many_rows:
+            assert client.get(url).status_code == 200
+
+        assert len(many_rows) == len(few_rows)
+        assert len(many_rows) <= 6
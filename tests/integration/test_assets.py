@@ -0,0 +1,129 @@
+"""
+Tests de integración para la compilación de archivos estáticos.
+"""
+
+import json
+import os
+
+import pytest
+
+from app import create_app
+from scripts.build_assets import build
+
+BUNDLES = {
+    'css/site.css': ['css/a.css', 'css/b.css'],
+    'js/site.js': ['js/a.js', 'js/b.js'],
+}
+
+
+@pytest.fixture
+def static_dir(tmp_path):
+    """Carpeta static mínima con dos CSS y dos JS."""
+    (tmp_path / 'css').mkdir()
+    (tmp_path / 'js').mkdir()
+    (tmp_path / 'css' / 'a.css').write_text(
+        "/* comentario */\n.a {\n    color: red;\n"
+        "    background: url('../img/fondo.png');\n}\n"
+    )
+    (tmp_path / 'css' / 'b.css').write_text(
+        "@import url('https://fonts.example.com/css2?family=Inter:wght@400;700');\n"
+        ".b { margin: 0 auto; }\n"
+    )
+    (tmp_path / 'js' / 'a.js').write_text(
+        "// comentario\nfunction a() {\n    return 1;\n}\n"
+    )
+    (tmp_path / 'js' / 'b.js').write_text("var b = a()\n")
+    return tmp_path
+
+
+class TestBuildAssets:
+    """Paquetes minificados con huella de contenido."""
+
+    def test_bundles_and_fingerprints(self, static_dir):
+        """Cada paquete y cada archivo suelto queda en dist/ con su hash."""
+        manifest = build(str(static_dir), BUNDLES)['manifest']
+
+        assert sorted(manifest) == ['css/a.css', 'css/b.css', 'css/site.css',
+                                    'js/a.js', 'js/b.js', 'js/site.js']
+        assert manifest['css/site.css'].startswith('dist/css/site-')
+        manifest_path = static_dir / 'dist' / 'manifest.json'
+        with open(manifest_path, encoding='utf-8') as manifest_file:
+            assert json.load(manifest_file) == manifest
+
+        css = (static_dir / manifest['css/site.css']).read_text()
+        assert css.startswith(
+            "@import url('https://fonts.example.com/css2?family=Inter:wght@400;700');\n"
+        )
+        assert "url('../../img/fondo.png')" in css
+        assert 'comentario' not in css and '    ' not in css
+
+        js = (static_dir / manifest['js/site.js']).read_text()
+        assert js == 'function a(){return 1;};\nvar b=a();\n'
+
+    def test_hash_changes_with_content_and_keeps_previous_build(self, static_dir):
+        """Un cambio genera otro nombre; la compilación previa dura un ciclo."""
+        first = build(str(static_dir), BUNDLES)['manifest']
+        (static_dir / 'css' / 'b.css').write_text('.b { margin: 1px; }\n')
+        second = build(str(static_dir), BUNDLES)['manifest']
+        (static_dir / 'css' / 'b.css').write_text('.b { margin: 2px; }\n')
+        third = build(str(static_dir), BUNDLES)
+
+        assert first['css/site.css'] != second['css/site.css'] \
+            != third['manifest']['css/site.css']
+        assert first['css/a.css'] == second['css/a.css']
+        assert os.path.exists(static_dir / second['css/site.css'])
+        assert not os.path.exists(static_dir / first['css/site.css'])
+        assert not os.path.exists(static_dir / (first['css/site.css'] + '.gz'))
+        assert third['removed'] >= 2
+
+
+class TestAssetHelpers:
+    """Resolución de los nombres lógicos en las plantillas."""
+
+    @staticmethod
+    def _app(manifest_path):
+        return create_app({'ASSETS_MANIFEST': str(manifest_path)})
+
+    def test_uses_manifest(self, tmp_path):
+        """Con manifiesto, las páginas cargan los paquetes con huella."""
+        manifest_path = tmp_path / 'manifest.json'
+        manifest_path.write_text(json.dumps({
+            'css/auth.css': 'dist/css/auth-0123456789.css',
+            'js/site.js': 'dist/js/site-0123456789.js',
+        }))
+        app = self._app(manifest_path)
+
+        page = app.test_client().get('/login').get_data(as_text=True)
+
+        assert page.count('<link rel="stylesheet" href="/static/') == 1
+        assert 'href="/static/dist/css/auth-0123456789.css"' in page
+        assert 'src="/static/dist/js/site-0123456789.js"' in page
+        assert 'js/star-bg.js' not in page
+        with app.test_request_context():
+            asset_url = app.jinja_env.globals['asset_url']
+            url = asset_url('static', filename='css/cart.css')
+            assert url == '/static/css/cart.css'
+
+    def test_falls_back_to_sources(self, tmp_path):
+        """Sin compilar, se cargan los archivos fuente del paquete en orden."""
+        app = self._app(tmp_path / 'no-existe.json')
+
+        page = app.test_client().get('/login').get_data(as_text=True)
+
+        assert page.index('/static/css/star-bg.css') \
+            < page.index('/static/css/base-theme.css')
+        assert page.index('/static/js/change-theme-advanced.js') \
+            < page.index('/static/js/star-bg.js')
+
+    def test_dist_is_immutable(self, tmp_path):
+        """Lo compilado se cachea un año; el resto de static no."""
+        app = self._app(tmp_path / 'no-existe.json')
+
+        def cache_control(path):
+            with app.test_request_context(path):
+                return app.process_response(app.make_response('x')).headers.get(
+                    'Cache-Control', '')
+
+        assert cache_control('/static/dist/css/site-0123456789.css') == \
+            'public, max-age=31536000, immutable'
+        assert 'immutable' not in cache_control('/static/css/layout.css')
@@ -0,0 +1,316 @@
+"""
+Tests de integración para el servicio de checkout.
+"""
+
+import threading
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from app import create_app
+from app.db import db
+from app.models.cart import Cart, CartItem
+from app.models.orders import Order, OrderDetail
+from app.models.products import Category, Product
+from app.models.users import UserRole, Users
+from app.services.checkout import (
+    cancel_checkout, checkout_cart, release_stale_orders, release_stock
+)
+from app.services.payments import process_payment
+
+
+def _user(index):
+    user = Users(nameUser=f'Cliente {index}', email=f'c{index}@example.com',
+                 password_user='hash', birthdate=date(1990, 1, 1))
+    db.session.add(user)
+    db.session.flush()
+    return user.idUser
+
+
+def _fill_cart(user_id, quantities):
+    """Crea el carrito del usuario con {product_id: cantidad}."""
+    cart = Cart(user_id=user_id)
+    db.session.add(cart)
+    db.session.flush()
+    for product_id, quantity in quantities.items():
+        db.session.add(CartItem(cart_id=cart.id, product_id=product_id,
+                                quantity=quantity, price_snapshot=1))
+    db.session.commit()
+
+
+class TestCheckoutService:
+    """Tests para el checkout en una sola transacción."""
+
+    @pytest.fixture
+    def app(self):
+        """Fixture para crear la aplicación de testing."""
+        app = create_app()
+        app.config['TESTING'] = True
+        with app.app_context():
+            db.create_all()
+            yield app
+            db.session.remove()
+            db.drop_all()
+
+    @pytest.fixture
+    def products(self, app):
+        """Crea diez productos con 5 unidades a $10."""
+        category = Category(name='General')
+        db.session.add(category)
+        db.session.commit()
+        items = [Product(name=f'Producto {index}', price=10, stock=5,
+                         category_id=category.id) for index in range(10)]
+        db.session.add_all(items)
+        db.session.commit()
+        return [product.id for product in items]
+
+    def test_creates_order_and_empties_cart(self, app, products):
+        """El pedido lleva las líneas, el total y descuenta el stock."""
+        user_id = _user(1)
+        _fill_cart(user_id, {products[0]: 2, products[1]: 1})
+
+        result = checkout_cart(user_id)
+
+        assert result.ok
+        assert result.order.total == 30
+        details = OrderDetail.query.filter_by(order_id=result.order.id).all()
+        assert sorted((d.product_id, d.quantity) for d in details) == [
+            (products[0], 2), (products[1], 1)
+        ]
+        assert db.session.get(Product, products[0]).stock == 3
+        assert Cart.query.count() == 0
+        assert CartItem.query.count() == 0
+
+    def test_reports_items_without_stock_and_saves_nothing(self, app, products):
+        """Si una línea no alcanza, no se crea el pedido ni se toca el stock."""
+        user_id = _user(1)
+        _fill_cart(user_id, {products[0]: 2, products[1]: 6})
+
+        result = checkout_cart(user_id)
+
+        assert not result.ok
+        assert result.failures == [{
+            'product_id': products[1], 'name': 'Producto 1',
+            'requested': 6, 'available': 5,
+        }]
+        assert 'Producto 1' in result.message()
+        assert Order.query.count() == 0
+        assert db.session.get(Product, products[0]).stock == 5
+        assert CartItem.query.count() == 2
+
+    def test_empty_cart(self, app, products):
+        """Un carrito vacío no crea pedido."""
+        result = checkout_cart(_user(1))
+
+        assert result.empty
+        assert Order.query.count() == 0
+
+    def test_cart_without_valid_quantities_is_deleted(self, app, products):
+        """Un carrito con solo cantidades no positivas no crea pedido y se borra."""
+        user_id = _user(1)
+        _fill_cart(user_id, {products[0]: 0, products[1]: -2})
+
+        result = checkout_cart(user_id)
+
+        assert result.empty
+        assert Order.query.count() == 0
+        assert (Cart.query.count(), CartItem.query.count()) == (0, 0)
+        assert db.session.get(Product, products[0]).stock == 5
+
+    def test_round_trips_do_not_grow_with_cart_size(self, app, products,
+                                                    query_counter):
+        """El número de sentencias es el mismo con 2 o 10 productos."""
+        small, large = _user(1), _user(2)
+        _fill_cart(small, {pid: 1 for pid in products[:2]})
+        _fill_cart(large, {pid: 1 for pid in products})
+
+        with query_counter() as few_items:
+            assert checkout_cart(small).ok
+        with query_counter() as many_items:
+            assert checkout_cart(large).ok
+
+        assert len(many_items) == len(few_items)
+        assert len(many_items) <= 7
+
+    def test_routes_use_the_service(self, app, products):
+        """El checkout web deja el pedido listo para pagar."""
+        user_id = _user(1)
+        _fill_cart(user_id, {products[0]: 1})
+        client = app.test_client()
+        with client.session_transaction() as sess:
+            sess['_user_id'] = str(user_id)
+
+        response = client.post('/orders/checkout')
+
+        assert response.status_code == 302
+        assert Order.query.filter_by(user_id=user_id).count() == 1
+        assert db.session.get(Product, products[0]).stock == 4
+
+
+class TestStockRelease:
+    """Devolución del stock reservado cuando el pedido no se paga."""
+
+    @pytest.fixture
+    def app(self):
+        """Fixture para crear la aplicación de testing."""
+        app = create_app()
+        app.config['TESTING'] = True
+        with app.app_context():
+            db.create_all()
+            yield app
+            db.session.remove()
+            db.drop_all()
+
+    @pytest.fixture
+    def order(self, app):
+        """Pedido pendiente de 2 + 1 unidades sobre productos con 5 de stock."""
+        category = Category(name='General')
+        db.session.add(category)
+        db.session.commit()
+        items = [Product(name=f'Producto {index}', price=10, stock=5,
+                         category_id=category.id) for index in range(2)]
+        db.session.add_all(items)
+        db.session.commit()
+        user_id = _user(1)
+        _fill_cart(user_id, {items[0].id: 2, items[1].id: 1})
+        return checkout_cart(user_id).order
+
+    @staticmethod
+    def _stock():
+        return [product.stock for product in Product.query.order_by(Product.id)]
+
+    def test_release_happens_once(self, app, order):
+        """Llamar dos veces a release_stock no duplica unidades."""
+        assert self._stock() == [3, 4]
+
+        assert release_stock(order)
+        assert not release_stock(order)
+        db.session.commit()
+
+        assert self._stock() == [5, 5]
+
+    def test_cancel_checkout_restores_cart(self, app, order):
+        """Anular el checkout devuelve el stock y los productos al carrito."""
+        assert cancel_checkout(order)
+        assert not cancel_checkout(order)
+
+        assert order.status == 'cancelado'
+        assert self._stock() == [5, 5]
+        assert sorted(item.quantity for item in CartItem.query) == [1, 2]
+
+    def test_stale_orders_are_released_and_retaken_on_payment(self, app, order):
+        """Un pedido abandonado devuelve el stock y al pagarse lo vuelve a tomar."""
+        order.created_at = datetime.utcnow() - timedelta(hours=2)
+        db.session.commit()
+
+        assert release_stale_orders(60) == 1
+        assert release_stale_orders(60) == 0
+        assert self._stock() == [5, 5]
+
+        assert process_payment(order.id, 'payu') == 'pagado'
+        assert self._stock() == [3, 4]
+
+    def test_short_retake_does_not_inflate_stock(self, app, order):
+        """Si al reintentar el pago ya no alcanza, no se toma ni se devuelve nada."""
+        assert process_payment(order.id, 'payu_rechazado') == 'pago_rechazado'
+        assert self._stock() == [5, 5]
+        # Otro comprador se lleva parte de las unidades devueltas
+        Product.query.order_by(Product.id).first().stock = 1
+        db.session.commit()
+
+        assert process_payment(order.id, 'simulada') == 'pago_rechazado'
+
+        assert self._stock() == [1, 5]
+        assert db.session.get(Order, order.id).stock_released
+
+    def test_stale_processing_orders_are_released(self, app, order):
+        """Un pedido 'procesando' cuyo pago se perdió también devuelve el stock."""
+        order.status = 'procesando'
+        order.created_at = datetime.utcnow() - timedelta(hours=2)
+        db.session.commit()
+
+        assert release_stale_orders(60) == 1
+
+        assert db.session.get(Order, order.id).status == 'cancelado'
+        assert self._stock() == [5, 5]
+
+    def test_admin_cancel_releases_and_reopen_retakes(self, app, order):
+        """Cancelar desde el panel devuelve el stock; reactivar lo vuelve a tomar."""
+        admin = Users(nameUser='Admin', email='admin@example.com',
+                      password_user='hash', birthdate=date(1980, 1, 1),
+                      role=UserRole.ADMIN, is_active_db=True)
+        db.session.add(admin)
+        db.session.commit()
+        client = app.test_client()
+        with client.session_transaction() as sess:
+            sess['_user_id'] = str(admin.idUser)
+        url = f'/admin/orders/update_status/{order.id}'
+
+        client.post(url, data={'status': 'cancelado'})
+        assert self._stock() == [5, 5]
+
+        client.post(url, data={'status': 'pagado'})
+        assert db.session.get(Order, order.id).status == 'pagado'
+        assert self._stock() == [3, 4]
+
+        client.post(url, data={'status': 'cancelado'})
+        Product.query.order_by(Product.id).first().stock = 1
+        db.session.commit()
+        client.post(url, data={'status': 'enviado'})
+        assert db.session.get(Order, order.id).status == 'cancelado'
+        assert self._stock() == [1, 5]
+
+
+class TestCheckoutConcurrency:
+    """Prueba de estrés: compras simultáneas del mismo producto."""
+
+    BUYERS = 24
+    STOCK = 10
+
+    @pytest.fixture
+    def app(self, tmp_path):
+        """Aplicación sobre un archivo SQLite para tener conexiones reales."""
+        app = create_app({
+            'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'checkout.db'}",
+            'SQLALCHEMY_ENGINE_OPTIONS': {'connect_args': {'timeout': 30}},
+        })
+        with app.app_context():
+            db.create_all()
+            yield app
+            db.session.remove()
+            db.drop_all()
+
+    def test_concurrent_checkouts_never_oversell(self, app):
+        """Con más compradores que stock, se venden exactamente las unidades."""
+        category = Category(name='General')
+        db.session.add(category)
+        db.session.commit()
+        product = Product(name='Edición limitada', price=10, stock=self.STOCK,
+                          category_id=category.id)
+        db.session.add(product)
+        db.session.commit()
+        buyers = [_user(index) for index in range(self.BUYERS)]
+        for user_id in buyers:
+            _fill_cart(user_id, {product.id: 1})
+        product_id = product.id
+        db.session.remove()
+
+        results = []
+        barrier = threading.Barrier(self.BUYERS)
+
+        def buy(user_id):
+            with app.app_context():
+                barrier.wait()
+                results.append(checkout_cart(user_id).ok)
+                db.session.remove()
+
+        threads = [threading.Thread(target=buy, args=(uid,)) for uid in buyers]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        sold = db.session.query(db.func.sum(OrderDetail.quantity)).scalar()
+        assert results.count(True) == self.STOCK
+        assert sold == self.STOCK
+        assert db.session.get(Product, product_id).stock == 0
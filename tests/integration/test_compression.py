@@ -0,0 +1,111 @@
+"""
+Tests de integración para la compresión de respuestas.
+"""
+
+import gzip
+
+import brotli
+import pytest
+from flask import Response, jsonify
+
+from app import create_app
+
+PAGE = '<html><body>' + '<p>Zapatillas en oferta</p>' * 200 + '</body></html>'
+
+
+@pytest.fixture
+def app(tmp_path):
+    """Aplicación con una carpeta static temporal y rutas de prueba."""
+    app = create_app()
+    app.static_folder = str(tmp_path)
+    (tmp_path / 'site.css').write_text('body{color:red}')
+    (tmp_path / 'site.css.gz').write_bytes(gzip.compress(b'body{color:red}'))
+    (tmp_path / 'site.css.br').write_bytes(brotli.compress(b'body{color:red}'))
+    (tmp_path / 'logo.svg').write_text('<svg></svg>')
+
+    @app.route('/_page')
+    def page():
+        return PAGE
+
+    @app.route('/_small')
+    def small():
+        return '<p>hola</p>'
+
+    @app.route('/_json')
+    def json_view():
+        return jsonify(
+            items=[{'id': index, 'name': 'Producto'} for index in range(200)]
+        )
+
+    @app.route('/_stream')
+    def stream():
+        return Response((PAGE for _ in range(3)), mimetype='text/html')
+
+    return app
+
+
+class TestPrecompressedStatic:
+    """Los estáticos compilados se envían con su hermano comprimido."""
+
+    def test_prefers_brotli(self, app):
+        """Con br y gzip aceptados, se envía el .br."""
+        response = app.test_client().get(
+            '/static/site.css', headers={'Accept-Encoding': 'gzip, deflate, br'}
+        )
+
+        assert response.headers['Content-Encoding'] == 'br'
+        assert response.mimetype == 'text/css'
+        assert 'Accept-Encoding' in response.headers['Vary']
+        assert brotli.decompress(response.get_data()) == b'body{color:red}'
+
+    def test_gzip_and_identity(self, app):
+        """Sin br se envía el .gz; sin Accept-Encoding, el original."""
+        client = app.test_client()
+
+        gzipped = client.get('/static/site.css', headers={'Accept-Encoding': 'gzip'})
+        plain = client.get('/static/site.css')
+        other = client.get('/static/logo.svg', headers={'Accept-Encoding': 'gzip'})
+
+        assert gzip.decompress(gzipped.get_data()) == b'body{color:red}'
+        assert plain.get_data() == b'body{color:red}'
+        assert 'Content-Encoding' not in plain.headers
+        assert 'Accept-Encoding' in plain.headers['Vary']
+        assert 'Content-Encoding' not in other.headers
+
+
+class TestDynamicCompression:
+    """HTML y JSON dinámicos comprimidos por encima del umbral."""
+
+    def test_compresses_html_and_json(self, app):
+        """Las respuestas grandes se comprimen con la codificación aceptada."""
+        client = app.test_client()
+
+        page = client.get('/_page', headers={'Accept-Encoding': 'gzip'})
+        data = client.get('/_json', headers={'Accept-Encoding': 'br, gzip'})
+
+        assert page.headers['Content-Encoding'] == 'gzip'
+        assert gzip.decompress(page.get_data()).decode() == PAGE
+        assert int(page.headers['Content-Length']) == len(page.get_data()) < len(PAGE)
+        assert data.headers['Content-Encoding'] == 'br'
+        assert len(brotli.decompress(data.get_data())) > len(data.get_data())
+
+    def test_skips_small_streamed_and_unlisted(self, app):
+        """Ni las respuestas chicas, ni las de streaming, ni los tipos sin nivel."""
+        app.config['COMPRESS_LEVELS'] = {'text/html': {'gzip': 1}}
+        client = app.test_client()
+        headers = {'Accept-Encoding': 'gzip, br'}
+
+        for path in ('/_small', '/_stream', '/_json'):
+            response = client.get(path, headers=headers)
+            assert 'Content-Encoding' not in response.headers, path
+        response = client.get('/_page', headers=headers)
+        assert response.headers['Content-Encoding'] == 'gzip'
+
+    def test_disabled(self, tmp_path):
+        """COMPRESS_ENABLED=False deja todo sin comprimir."""
+        app = create_app({'COMPRESS_ENABLED': False})
+
+        response = app.test_client().get('/login', headers={'Accept-Encoding': 'gzip'})
+
+        assert response.status_code == 200
+        assert 'Content-Encoding' not in response.headers
@@ -0,0 +1,161 @@
+"""
+Tests de integración para las respuestas condicionales (ETag / 304).
+"""
+
+from datetime import date
+
+import pytest
+
+from app import create_app
+from app.db import db
+from app.models.orders import Order
+from app.models.products import Category, Product
+from app.models.reviews import Review
+from app.models.users import UserRole, Users
+from app.routes.catalog import _product_version
+from app.services import ratings, sales_rollup
+
+
+@pytest.fixture
+def app():
+    """
+    Aplicación de testing con un producto, un cliente y un administrador.
+
+    Las peticiones se hacen fuera del contexto de la aplicación para que
+    cada una cargue su propio usuario.
+    """
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        category = Category(name='Calzado')
+        admin = Users(nameUser='Admin', email='admin@example.com',
+                      password_user='hash', birthdate=date(1980, 1, 1),
+                      role=UserRole.ADMIN, is_active_db=True)
+        user = Users(nameUser='Ana', email='ana@example.com',
+                     password_user='hash', birthdate=date(1990, 1, 1),
+                     role=UserRole.USER, is_active_db=True)
+        db.session.add_all([category, admin, user])
+        db.session.commit()
+        product = Product(name='Zapato rojo', price=10000, stock=5,
+                          category_id=category.id)
+        db.session.add(product)
+        db.session.commit()
+        db.session.add(Review(user_id=user.idUser, product_id=product.id, rating=4,
+                              comment='Cómodos', aprobada=False))
+        db.session.add(Order(user_id=user.idUser, total=10000, status='pagado'))
+        db.session.commit()
+        app.config['TEST_IDS'] = {'admin': admin.idUser, 'user': user.idUser,
+                                  'product': product.id}
+        db.session.remove()
+    yield app
+    with app.app_context():
+        db.drop_all()
+
+
+def _login(app, user_id):
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(user_id)
+    return client
+
+
+class TestProductDetail:
+    """El detalle del producto se revalida sin renderizar."""
+
+    def test_revalidation_skips_rendering(self, app, monkeypatch):
+        """Con el ETag vigente se responde 304 sin llamar a la plantilla."""
+        client = app.test_client()
+        url = f"/catalog/product/{app.config['TEST_IDS']['product']}"
+        first = client.get(url)
+        assert first.status_code == 200
+        assert first.headers['ETag'].startswith('W/"')
+        assert 'Last-Modified' in first.headers
+
+        def fail(*_args, **_kwargs):
+            raise AssertionError('plantilla renderizada')
+
+        monkeypatch.setattr('app.routes.catalog.render_template', fail)
+        by_etag = client.get(url, headers={'If-None-Match': first.headers['ETag']})
+        by_date = client.get(
+            url, headers={'If-Modified-Since': first.headers['Last-Modified']}
+        )
+
+        assert by_etag.status_code == 304 and by_etag.get_data() == b''
+        assert by_etag.headers['ETag'] == first.headers['ETag']
+        assert by_date.status_code == 304
+
+    def test_approved_review_and_user_change_version(self, app):
+        """Aprobar una reseña o iniciar sesión invalida la copia del cliente."""
+        product_id = app.config['TEST_IDS']['product']
+        url = f"/catalog/product/{product_id}"
+        etag = app.test_client().get(url).headers['ETag']
+
+        mine = _login(app, app.config['TEST_IDS']['user'])\
+            .get(url, headers={'If-None-Match': etag})
+        with app.test_request_context(url):
+            before = _product_version(product_id)
+            ratings.approve(Review.query.first())
+            db.session.commit()
+            after = _product_version(product_id)
+
+        assert mine.status_code == 200
+        assert mine.headers['ETag'] != etag
+        assert before[0] != after[0]
+
+    def test_compressed_etag_matches(self, app):
+        """El ETag con sufijo de compresión también valida."""
+        client = app.test_client()
+        url = f"/catalog/product/{app.config['TEST_IDS']['product']}"
+        first = client.get(url, headers={'Accept-Encoding': 'gzip'})
+        assert first.headers['Content-Encoding'] == 'gzip'
+        assert first.headers['ETag'].endswith('-gzip"')
+
+        again = client.get(url, headers={'Accept-Encoding': 'gzip',
+                                         'If-None-Match': first.headers['ETag']})
+
+        assert again.status_code == 304
+        assert 'Accept-Encoding' in again.headers['Vary']
+
+    def test_missing_product_still_404(self, app):
+        """Sin producto no hay validadores y la vista responde 404."""
+        assert app.test_client().get('/catalog/product/999').status_code == 404
+
+
+class TestJsonApis:
+    """Carrito y ventas por día con validadores."""
+
+    def test_cart_changes_version(self, app):
+        """Agregar un producto al carrito cambia el ETag."""
+        client = _login(app, app.config['TEST_IDS']['user'])
+        empty = client.get('/api/cart/')
+        headers = {'If-None-Match': empty.headers['ETag']}
+        assert client.get('/api/cart/', headers=headers).status_code == 304
+
+        client.post('/api/cart/add',
+                    json={'product_id': app.config['TEST_IDS']['product']})
+        cart = client.get('/api/cart/', headers=headers)
+
+        assert cart.status_code == 200
+        assert cart.get_json()['items'][0]['name'] == 'Zapato rojo'
+        assert cart.headers['Cache-Control'] == 'private, no-cache'
+
+    def test_sales_by_day(self, app):
+        """Un pedido pagado nuevo invalida la copia del gráfico de ventas."""
+        client = _login(app, app.config['TEST_IDS']['admin'])
+        with app.app_context():
+            sales_rollup.rebuild()
+        first = client.get('/admin/api/sales_by_day')
+        etag = first.headers['ETag']
+        assert client.get('/admin/api/sales_by_day', headers={'If-None-Match': etag}) \
+            .status_code == 304
+
+        with app.app_context():
+            order = Order(user_id=app.config['TEST_IDS']['user'], total=5000,
+                          status='pagado')
+            db.session.add(order)
+            sales_rollup.add_order(order)
+            db.session.commit()
+        changed = client.get('/admin/api/sales_by_day', headers={'If-None-Match': etag})
+
+        assert changed.status_code == 200
+        assert sum(changed.get_json()['totals']) == 15000
@@ -0,0 +1,135 @@
+"""
+Tests de integración para los contadores del panel y la lista paginada de usuarios.
+"""
+
+from datetime import date
+
+import pytest
+from sqlalchemy import event
+
+from app import create_app
+from app.db import db
+from app.models.notifications import Notification
+from app.models.orders import Order
+from app.models.products import Category, Product
+from app.models.stats import DashboardStat
+from app.models.users import UserRole, Users
+from app.services import dashboard_stats
+
+CLIENTS = 45
+
+
+@pytest.fixture
+def app():
+    """
+    Aplicación de testing con un administrador, CLIENTS clientes y un pedido.
+
+    Las peticiones se hacen fuera del contexto de la aplicación para que
+    cada una cargue su propio usuario.
+    """
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        category = Category(name='Calzado')
+        admin = Users(nameUser='Admin', email='Admin@Example.com',
+                      password_user='hash', birthdate=date(1980, 1, 1),
+                      role=UserRole.ADMIN, is_active_db=True)
+        clients = [Users(nameUser=f'Cliente {index:02d}',
+                         email=f'cliente{index:02d}@example.com',
+                         password_user='hash', birthdate=date(1990, 1, 1),
+                         role=UserRole.USER, is_active_db=True)
+                   for index in range(CLIENTS)]
+        db.session.add_all([category, admin] + clients)
+        db.session.commit()
+        db.session.add_all([
+            Product(name='Zapato', price=100, stock=5, category_id=category.id),
+            Order(user_id=clients[0].idUser, total=100, status='pagado'),
+        ])
+        db.session.commit()
+        app.config['TEST_IDS'] = {'admin': admin.idUser, 'client': clients[0].idUser}
+        db.session.remove()
+    yield app
+    with app.app_context():
+        db.drop_all()
+
+
+def _admin(app):
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(app.config['TEST_IDS']['admin'])
+    return client
+
+
+class TestCounters:
+    """Contadores actualizados por eventos y recalculados al vencer."""
+
+    def test_events_update_counters(self, app):
+        """Insertar, eliminar y cambiar el total ajustan los contadores."""
+        with app.app_context():
+            assert dashboard_stats.get_stats() == {
+                'users': CLIENTS + 1, 'products': 1, 'orders': 1,
+                'notifications': 0, 'sales_total': 100.0,
+            }
+            client_id = app.config['TEST_IDS']['client']
+            order = Order(user_id=client_id, total=50, status='pendiente')
+            db.session.add_all([order, Notification(user_id=client_id, mensaje='Hola')])
+            db.session.commit()
+            order.total = 80
+            db.session.commit()
+            db.session.delete(Product.query.one())
+            db.session.commit()
+
+            stats = dashboard_stats.get_stats()
+            assert (stats['orders'], stats['sales_total']) == (2, 180.0)
+            assert (stats['products'], stats['notifications']) == (0, 1)
+            assert stats == dashboard_stats.reconcile()
+
+    def test_stale_counters_are_reconciled(self, app):
+        """Los borrados masivos se corrigen en la siguiente lectura vencida."""
+        with app.app_context():
+            dashboard_stats.get_stats()
+            Order.query.delete()
+            db.session.commit()
+            assert dashboard_stats.get_stats()['orders'] == 1
+
+            DashboardStat.query.update({'reconciled_at': None})
+            db.session.commit()
+            assert dashboard_stats.get_stats()['orders'] == 0
+
+
+class TestDashboard:
+    """Panel con contadores guardados y usuarios paginados."""
+
+    def test_dashboard_without_table_scans(self, app):
+        """Con contadores vigentes, el panel no cuenta tablas completas."""
+        admin = _admin(app)
+        admin.get('/admin/dashboard')
+        statements = []
+
+        def record(_conn, _cursor, statement, *_args):
+            statements.append(statement)
+
+        with app.app_context():
+            engine = db.engine
+        event.listen(engine, 'before_cursor_execute', record)
+        try:
+            page = admin.get('/admin/dashboard').get_data(as_text=True)
+        finally:
+            event.remove(engine, 'before_cursor_execute', record)
+
+        assert not any('count(' in statement.lower() for statement in statements)
+        assert page.count('Ver compras') == dashboard_stats.USERS_PER_PAGE
+        assert 'page=3' in page and 'page=4' not in page
+
+    def test_prefix_search(self, app):
+        """El prefijo de nombre o email ignora mayúsculas y conserva la página."""
+        admin = _admin(app)
+
+        by_name = admin.get('/admin/dashboard?q=cliente 1').get_data(as_text=True)
+        by_email = admin.get('/admin/dashboard?q=ADMIN@').get_data(as_text=True)
+        paged = admin.get('/admin/dashboard?q=cliente&page=2').get_data(as_text=True)
+
+        assert by_name.count('Ver compras') == 10
+        assert by_email.count('Ver compras') == 1 and 'Admin@Example.com' in by_email
+        assert paged.count('Ver compras') == 20
+        assert 'q=cliente&amp;page=3' in paged or 'page=3&amp;q=cliente' in paged
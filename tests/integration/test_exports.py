@@ -0,0 +1,104 @@
+"""
+Tests de integración para las exportaciones CSV en streaming.
+"""
+
+import csv
+import gzip
+from datetime import date, datetime
+from io import StringIO
+
+import pytest
+
+from app import create_app
+from app.db import db
+from app.models.orders import Order, OrderDetail
+from app.models.products import Category, Product
+from app.models.users import UserRole, Users
+
+
+class TestStreamingExports:
+    """Tests para las exportaciones CSV del panel de administración."""
+
+    @pytest.fixture
+    def app(self):
+        """Fixture para crear la aplicación de testing con bloques pequeños."""
+        app = create_app()
+        app.config['TESTING'] = True
+        app.config['EXPORT_CHUNK_SIZE'] = 2
+        with app.app_context():
+            db.create_all()
+            yield app
+            db.session.remove()
+            db.drop_all()
+
+    @pytest.fixture
+    def client(self, app):
+        """Cliente autenticado como administrador, con cinco pedidos de prueba."""
+        admin = Users(
+            nameUser='Admin', email='admin@example.com', password_user='hash',
+            birthdate=date(1980, 1, 1), role=UserRole.ADMIN, is_active_db=True
+        )
+        category = Category(name='General')
+        db.session.add_all([admin, category])
+        db.session.commit()
+        product = Product(name='Zapato', price=10, stock=100, category_id=category.id)
+        db.session.add(product)
+        db.session.commit()
+        for day in range(1, 6):
+            db.session.add(Order(
+                user_id=admin.idUser, total=20, created_at=datetime(2025, 1, day),
+                details=[OrderDetail(product_id=product.id, quantity=2, price=10)]
+            ))
+        db.session.commit()
+        test_client = app.test_client()
+        with test_client.session_transaction() as sess:
+            sess['_user_id'] = str(admin.idUser)
+        return test_client
+
+    @staticmethod
+    def _rows(body):
+        return list(csv.reader(StringIO(body)))
+
+    def test_orders_export_streams_all_rows(self, client):
+        """Todas las filas llegan aunque se lean en varios bloques."""
+        response = client.get('/admin/export/orders')
+
+        assert response.is_streamed
+        rows = self._rows(response.get_data(as_text=True))
+        assert rows[0] == ['ID', 'Usuario', 'Total', 'Estado', 'Fecha']
+        assert [row[0] for row in rows[1:]] == ['1', '2', '3', '4', '5']
+
+    def test_date_range_is_inclusive(self, client):
+        """El rango de fechas incluye ambos extremos."""
+        response = client.get(
+            '/admin/export/orders?start_date=2025-01-02&end_date=2025-01-03'
+        )
+
+        rows = self._rows(response.get_data(as_text=True))
+        assert [row[0] for row in rows[1:]] == ['2', '3']
+
+    def test_invalid_date_redirects(self, client):
+        """Una fecha mal formada no inicia la descarga."""
+        response = client.get('/admin/export/orders?start_date=ayer')
+
+        assert response.status_code == 302
+
+    def test_order_lines_gzip(self, client):
+        """El modo detallado incluye las líneas y se puede comprimir."""
+        response = client.get('/admin/export/orders?lines=1&gzip=1')
+
+        assert response.mimetype == 'application/gzip'
+        rows = self._rows(gzip.decompress(response.get_data()).decode('utf-8'))
+        assert rows[0][0] == 'Pedido'
+        assert len(rows) == 6
+        assert rows[1][7:] == ['Zapato', '2', '10.0']
+
+    def test_users_and_products_exports(self, client):
+        """Usuarios y productos mantienen sus encabezados."""
+        users = self._rows(client.get('/admin/export/users').get_data(as_text=True))
+        products = self._rows(
+            client.get('/admin/export/products').get_data(as_text=True)
+        )
+
+        assert users[1][2] == 'admin@example.com'
+        assert products[1][1] == 'Zapato'
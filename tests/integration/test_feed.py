@@ -0,0 +1,117 @@
+"""
+Tests de integración para el armado cacheado del feed.
+"""
+
+from datetime import date
+
+import pytest
+
+from app import create_app
+from app.db import db
+from app.extensions import cache
+from app.models.orders import Order, OrderDetail
+from app.models.products import Category, Product
+from app.models.users import Users
+from app.services import sales_rollup
+from app.services.feed import (
+    FEED_CACHE_KEY, NORMALES_LIMIT, build_feed, invalidate_feed
+)
+
+
+class TestFeedService:
+    """Tests para el servicio de secciones del feed."""
+
+    @pytest.fixture
+    def app(self):
+        """Fixture para crear la aplicación de testing."""
+        app = create_app()
+        app.config['TESTING'] = True
+        with app.app_context():
+            db.create_all()
+            cache.clear()
+            yield app
+            db.session.remove()
+            db.drop_all()
+
+    @pytest.fixture
+    def catalog(self, app):
+        """Crea dos categorías con productos destacados, normales y en promoción."""
+        ropa = Category(name='Ropa')
+        calzado = Category(name='Calzado')
+        db.session.add_all([ropa, calzado])
+        db.session.commit()
+        products = {
+            'destacado': Product(name='Destacado', price=10, category_id=ropa.id,
+                                 destacado=True),
+            'normal': Product(name='Normal', price=20, category_id=ropa.id,
+                              destacado=False),
+            'promo': Product(name='Promo', price=30, category_id=calzado.id,
+                             destacado=False, promo='2x1'),
+            'calzado': Product(name='Calzado', price=40, category_id=calzado.id,
+                               destacado=False),
+        }
+        db.session.add_all(products.values())
+        db.session.commit()
+        return products
+
+    def test_sections_are_built_from_targeted_queries(self, catalog):
+        """Cada sección contiene solo los productos que le corresponden."""
+        feed = build_feed()
+
+        assert [p.name for p in feed['destacados']] == ['Destacado']
+        assert [p.name for p in feed['promociones']] == ['Promo']
+        assert feed['products'][0].name == 'Destacado'
+        assert len(feed['products']) == len(set(feed['products'])) == 4
+        assert feed['recomendaciones_historial'] == []
+        assert not feed['hay_mas_productos']
+
+    def test_sections_are_cached_until_invalidated(self, catalog):
+        """Las secciones se sirven de la caché hasta que se invalidan."""
+        build_feed()
+        assert cache.get(FEED_CACHE_KEY) is not None
+
+        catalog['normal'].destacado = True
+        db.session.commit()
+        assert len(build_feed()['destacados']) == 1
+
+        invalidate_feed()
+        assert len(build_feed()['destacados']) == 2
+
+    def test_popular_and_recommendations(self, catalog):
+        """Populares sale de los pedidos pagados y las recomendaciones del historial."""
+        user = Users(nameUser='Cliente', email='cliente@example.com',
+                     password_user='hash', birthdate=date(1990, 1, 1))
+        db.session.add(user)
+        db.session.commit()
+        order = Order(user_id=user.idUser, total=30, status='pagado')
+        db.session.add(order)
+        db.session.commit()
+        db.session.add(OrderDetail(order_id=order.id,
+                                   product_id=catalog['promo'].id,
+                                   quantity=1, price=30))
+        sales_rollup.add_order(order)
+        db.session.commit()
+
+        feed = build_feed(user.idUser)
+
+        assert [p.name for p in feed['populares']] == ['Promo']
+        assert [p.name for p in feed['recomendaciones_historial']] == ['Calzado']
+
+    def test_links_to_catalog_beyond_the_cap(self, app, catalog):
+        """Si hay más productos de los que caben, el feed enlaza al catálogo."""
+        category_id = catalog['normal'].category_id
+        db.session.add_all([
+            Product(name=f'Extra {index}', price=5, category_id=category_id,
+                    destacado=False)
+            for index in range(NORMALES_LIMIT)
+        ])
+        for product in Product.query:
+            product.description = product.name
+        db.session.commit()
+
+        feed = build_feed()
+        page = app.test_client().get('/feed')
+
+        assert feed['hay_mas_productos']
+        assert len(feed['products']) == 1 + NORMALES_LIMIT
+        assert b'Ver todo el cat' in page.data
@@ -0,0 +1,157 @@
+"""
+Tests de integración para el almacenamiento de imágenes por contenido.
+"""
+
+import io
+import os
+from datetime import date
+
+import pytest
+from PIL import Image
+
+from app import create_app
+from app.db import db
+from app.models.products import Category, Product
+from app.models.stored_image import StoredImage
+from app.models.users import UserRole, Users
+
+
+def _jpeg(color):
+    buffer = io.BytesIO()
+    Image.new('RGB', (600, 300), color).save(buffer, 'JPEG')
+    return buffer.getvalue()
+
+
+class TestImageStore:
+    """Subidas nombradas por hash, deduplicadas y con contador de referencias."""
+
+    @pytest.fixture
+    def app(self, tmp_path):
+        """Aplicación de testing con la carpeta de subidas en un directorio temporal."""
+        app = create_app({'UPLOAD_FOLDER': str(tmp_path), 'IMAGE_GC_GRACE': 0})
+        with app.app_context():
+            db.create_all()
+            yield app
+            db.session.remove()
+            db.drop_all()
+
+    @pytest.fixture
+    def client(self, app):
+        """Cliente autenticado como administrador."""
+        admin = Users(nameUser='Admin', email='admin@example.com',
+                      password_user='hash', birthdate=date(1980, 1, 1),
+                      role=UserRole.ADMIN, is_active_db=True)
+        db.session.add_all([admin, Category(name='Calzado')])
+        db.session.commit()
+        client = app.test_client()
+        with client.session_transaction() as sess:
+            sess['_user_id'] = str(admin.idUser)
+        return client
+
+    @staticmethod
+    def _add(client, name, data, filename='foto.jpg'):
+        response = client.post('/admin/products/add', data={
+            'name': name, 'description': '', 'price': '10000', 'stock': '5',
+            'size': '40', 'color': 'Rojo', 'category_id': str(Category.query.one().id),
+            'image': (io.BytesIO(data), filename),
+        }, content_type='multipart/form-data')
+        assert response.status_code == 302
+        return Product.query.filter_by(name=name).one()
+
+    @staticmethod
+    def _files(tmp_path):
+        return sorted(name for name in os.listdir(tmp_path) if not name.startswith('.'))
+
+    def test_same_filename_different_content_does_not_overwrite(self, client, tmp_path):
+        """Dos 'foto.jpg' distintas quedan en archivos distintos."""
+        first = self._add(client, 'Rojo', _jpeg((255, 0, 0)))
+        second = self._add(client, 'Azul', _jpeg((0, 0, 255)))
+
+        assert first.image != second.image
+        assert self._files(tmp_path) == sorted([first.image, second.image, 'variants'])
+
+    def test_identical_uploads_are_stored_once(self, client, tmp_path):
+        """La misma imagen subida dos veces es un archivo con dos referencias."""
+        data = _jpeg((0, 255, 0))
+        first = self._add(client, 'Uno', data, 'uno.jpg')
+        second = self._add(client, 'Dos', data, 'dos.JPEG')
+
+        assert first.image == second.image
+        assert first.image.endswith('.jpg')
+        assert self._files(tmp_path) == [first.image, 'variants']
+        assert db.session.get(StoredImage, first.image).refcount == 2
+        assert second.image_variants == first.image_variants
+
+    def test_identical_upload_rewrites_missing_file(self, client, tmp_path):
+        """Una subida idéntica vuelve a escribir el archivo aunque ya tenga fila."""
+        data = _jpeg((9, 9, 9))
+        first = self._add(client, 'Uno', data)
+        # Como si collect_garbage lo hubiera borrado justo antes del acquire
+        os.remove(tmp_path / first.image)
+
+        second = self._add(client, 'Dos', data)
+
+        assert second.image == first.image
+        assert os.path.exists(tmp_path / second.image)
+
+    def test_delete_collects_unused_files(self, client, tmp_path):
+        """El archivo y sus variantes se borran al eliminar su último producto."""
+        data = _jpeg((0, 0, 0))
+        first = self._add(client, 'Uno', data)
+        second = self._add(client, 'Dos', data)
+        name, first_id, second_id = first.image, first.id, second.id
+        stem = name.rsplit('.', 1)[0]
+
+        client.post(f'/admin/products/delete/{first_id}',
+                    data={'confirm_delete': 'yes'})
+        assert os.path.exists(tmp_path / name)
+        assert db.session.get(StoredImage, name).refcount == 1
+
+        client.post(f'/admin/products/delete/{second_id}',
+                    data={'confirm_delete': 'yes'})
+        assert not os.path.exists(tmp_path / name)
+        assert not [f for f in os.listdir(tmp_path / 'variants') if f.startswith(stem)]
+        assert db.session.get(StoredImage, name) is None
+
+    def test_edit_releases_previous_image(self, client, tmp_path):
+        """Al reemplazar la imagen la anterior deja de estar referenciada."""
+        product = self._add(client, 'Uno', _jpeg((1, 2, 3)))
+        previous, product_id = product.image, product.id
+
+        client.post(f'/admin/products/edit/{product_id}', data={
+            'name': 'Uno', 'price': '10000', 'stock': '5',
+            'image': (io.BytesIO(_jpeg((4, 5, 6))), 'nueva.png'),
+        }, content_type='multipart/form-data')
+
+        db.session.expire_all()
+        product = db.session.get(Product, product_id)
+        assert product.image != previous and product.image.endswith('.png')
+        assert product.image_variants is not None
+        assert db.session.get(StoredImage, previous).refcount == 0
+
+    def test_rejects_non_image_extension(self, client, tmp_path):
+        """Un archivo que no es imagen no se guarda."""
+        response = client.post('/admin/products/add', data={
+            'name': 'Malo', 'description': '', 'price': '10000', 'stock': '5',
+            'size': '40', 'color': 'Rojo', 'category_id': str(Category.query.one().id),
+            'image': (io.BytesIO(b'#!/bin/sh'), 'script.sh'),
+        }, content_type='multipart/form-data')
+
+        assert 'La imagen debe ser'.encode() in response.data
+        assert Product.query.count() == 0
+        assert self._files(tmp_path) == []
+
+    def test_hashed_paths_are_immutable(self, app):
+        """Las imágenes guardadas por contenido se cachean un año; las antiguas no."""
+        name = 'ab' * 16
+
+        def cache_control(path):
+            with app.test_request_context(path):
+                return app.process_response(app.make_response('imagen')).headers.get(
+                    'Cache-Control', '')
+
+        for path in (f'/static/product_images/{name}.jpg',
+                     f'/static/product_images/variants/{name}-400.webp'):
+            assert cache_control(path) == 'public, max-age=31536000, immutable'
+        assert 'immutable' not in cache_control('/static/product_images/zapato.jpg')
+        assert 'immutable' not in cache_control(f'/static/review_images/{name}.jpg')
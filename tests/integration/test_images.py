@@ -0,0 +1,124 @@
+"""
+Tests de integración para el pipeline de imágenes subidas.
+"""
+
+import io
+import os
+from datetime import date
+
+import pytest
+from PIL import Image
+
+from app import create_app
+from app.db import db
+from app.models.products import Category, Product
+from app.models.users import UserRole, Users
+from app.services.images import generate_variants, variant_name
+
+
+def _jpeg(width, height, **save_args):
+    buffer = io.BytesIO()
+    Image.new('RGB', (width, height), (200, 30, 30)).save(buffer, 'JPEG', **save_args)
+    buffer.seek(0)
+    return buffer
+
+
+class TestGenerateVariants:
+    """Variantes WebP generadas con Pillow."""
+
+    def test_widths_never_upscale(self, tmp_path):
+        """Los anchos mayores que el original se reemplazan por el original."""
+        path = tmp_path / 'foto.jpg'
+        path.write_bytes(_jpeg(1200, 600).read())
+
+        widths = generate_variants(str(path), [400, 800, 1600])
+
+        assert widths == [400, 800, 1200]
+        for width in widths:
+            path = tmp_path / variant_name('foto.jpg', width, 'webp')
+            with Image.open(path) as variant:
+                assert variant.format == 'WEBP'
+                assert variant.size == (width, width // 2)
+
+    def test_strips_metadata_and_applies_orientation(self, tmp_path):
+        """La orientación EXIF se aplica y los metadatos no pasan a la variante."""
+        exif = Image.Exif()
+        exif[0x0112] = 6  # Rotada 90° en sentido horario
+        exif[0x010F] = 'Camara'
+        path = tmp_path / 'rotada.jpg'
+        path.write_bytes(_jpeg(600, 300, exif=exif.tobytes()).read())
+
+        assert generate_variants(str(path), [400]) == [300]
+
+        with Image.open(tmp_path / variant_name('rotada.jpg', 300, 'webp')) as variant:
+            assert variant.size == (300, 600)
+            assert not variant.getexif()
+
+    def test_keeps_transparency(self, tmp_path):
+        """Las imágenes con canal alfa conservan la transparencia."""
+        path = tmp_path / 'logo.png'
+        Image.new('RGBA', (500, 500), (0, 0, 0, 0)).save(path)
+
+        generate_variants(str(path), [200])
+
+        with Image.open(tmp_path / variant_name('logo.png', 200, 'webp')) as variant:
+            assert variant.mode == 'RGBA'
+
+
+class TestProductImagePipeline:
+    """Las imágenes subidas por el admin se procesan y se sirven con srcset."""
+
+    @pytest.fixture
+    def app(self, tmp_path):
+        """Aplicación de testing con la carpeta de subidas en un directorio temporal."""
+        app = create_app({'UPLOAD_FOLDER': str(tmp_path)})
+        with app.app_context():
+            db.create_all()
+            yield app
+            db.session.remove()
+            db.drop_all()
+
+    @pytest.fixture
+    def client(self, app):
+        """Cliente autenticado como administrador."""
+        admin = Users(nameUser='Admin', email='admin@example.com',
+                      password_user='hash', birthdate=date(1980, 1, 1),
+                      role=UserRole.ADMIN, is_active_db=True)
+        category = Category(name='Calzado')
+        db.session.add_all([admin, category])
+        db.session.commit()
+        client = app.test_client()
+        with client.session_transaction() as sess:
+            sess['_user_id'] = str(admin.idUser)
+        return client
+
+    def test_upload_generates_variants_and_srcset(self, app, client, tmp_path):
+        """Subir un producto genera las variantes y el catálogo usa srcset."""
+        response = client.post('/admin/products/add', data={
+            'name': 'Zapato', 'description': 'Cuero', 'price': '10000', 'stock': '5',
+            'size': '40', 'color': 'Rojo', 'category_id': str(Category.query.one().id),
+            'image': (_jpeg(2000, 1000), 'zapato.jpg'),
+        }, content_type='multipart/form-data')
+
+        assert response.status_code == 302
+        product = Product.query.one()
+        stem = product.image.rsplit('.', 1)[0]
+        assert product.image_variants == {
+            'widths': [400, 800, 1600], 'formats': ['webp'],
+            'views': {'grid': 400, 'detail': 800, 'zoom': 1600},
+        }
+        assert os.path.exists(tmp_path / 'variants' / f'{stem}-400.webp')
+        assert product.image_url() == f'/static/product_images/variants/{stem}-400.webp'
+        assert product.image_url('detail') == \
+            f'/static/product_images/variants/{stem}-800.webp'
+
+        page = client.get('/catalog/').get_data(as_text=True)
+        assert f'variants/{stem}-400.webp 400w, ' in page
+        assert f'variants/{stem}-1600.webp 1600w"' in page
+
+    def test_product_without_variants_uses_original(self, app):
+        """Mientras no haya variantes se sirve el original, sin srcset."""
+        product = Product(name='Bolso', price=10, image='bolso.jpg')
+
+        assert product.image_url('detail') == '/static/product_images/bolso.jpg'
+        assert product.image_srcset() == ''
@@ -0,0 +1,78 @@
+"""
+Tests de integración para los índices de las consultas más frecuentes.
+
+Cada consulta se pasa por EXPLAIN QUERY PLAN de SQLite para comprobar que
+usa el índice declarado en el modelo en lugar de recorrer la tabla.
+"""
+
+import pytest
+
+from app import create_app
+from app.db import db
+from app.models.notifications import Notification
+from app.models.orders import Order, OrderDetail
+from app.models.products import Product
+from app.models.reviews import Review
+from app.models.wishlist import Wishlist
+
+
+def _plan(query):
+    """Devuelve el plan de ejecución de una consulta ORM como texto."""
+    sql = query.statement.compile(
+        dialect=db.engine.dialect, compile_kwargs={'literal_binds': True}
+    )
+    with db.engine.connect() as connection:
+        rows = connection.exec_driver_sql(f'EXPLAIN QUERY PLAN {sql}').fetchall()
+    return '\n'.join(row[-1] for row in rows)
+
+
+class TestHotQueryIndexes:
+    """Tests que verifican el uso de índices en las consultas frecuentes."""
+
+    @pytest.fixture
+    def app(self):
+        """Fixture para crear la aplicación de testing."""
+        app = create_app()
+        app.config['TESTING'] = True
+        with app.app_context():
+            db.create_all()
+            yield app
+            db.session.remove()
+            db.drop_all()
+
+    @pytest.mark.parametrize('build_query, index, sorted_by_index', [
+        (lambda: Product.query.filter_by(destacado=True)
+            .order_by(Product.created_at.desc()).limit(12),
+         'ix_products_destacado_created_at', True),
+        (lambda: Product.query.filter(Product.destacado.is_(True))
+            .order_by(Product.created_at.desc()).limit(12),
+         'ix_products_destacado_created_at', True),
+        (lambda: Product.query.order_by(Product.created_at.desc()).limit(12),
+         'ix_products_created_at', True),
+        (lambda: Product.query.filter_by(category_id=1)
+            .filter(Product.price >= 10, Product.price <= 50)
+            .order_by(Product.created_at.desc()),
+         'ix_products_category_price_created_at', False),
+        (lambda: Notification.query.filter_by(user_id=1, leida=False)
+            .order_by(Notification.fecha.desc()).limit(1),
+         'ix_notifications_user_leida_fecha', True),
+        (lambda: Order.query.filter_by(user_id=1)
+            .order_by(Order.created_at.desc()),
+         'ix_orders_user_created_at', True),
+        (lambda: Review.query.filter_by(product_id=1, aprobada=True)
+            .order_by(Review.created_at.desc()),
+         'ix_reviews_product_aprobada_created_at', True),
+        (lambda: OrderDetail.query.filter_by(product_id=1),
+         'ix_order_details_product_id', False),
+        (lambda: OrderDetail.query.filter_by(order_id=1),
+         'ix_order_details_order_id', False),
+        (lambda: Wishlist.query.filter_by(user_id=1),
+         'sqlite_autoindex_wishlists_1', False),
+    ])
+    def test_query_uses_index(self, app, build_query, index, sorted_by_index):
+        """La consulta busca por índice y, si aplica, evita ordenar en memoria."""
+        plan = _plan(build_query())
+
+        assert f'INDEX {index}' in plan
+        if sorted_by_index:
+            assert 'TEMP B-TREE' not in plan
@@ -0,0 +1,185 @@
+"""
+Tests de integración para la bandeja de salida de correos.
+"""
+
+import time
+from datetime import date, datetime, timedelta
+
+import pytest
+from flask_mail import Message
+
+from app import create_app
+from app.db import db
+from app.extensions import mail
+from app.models.mail_outbox import OutboxEmail
+from app.models.users import Users
+from app.services.mailer import SendThrottle, mail_outbox
+from scripts.local_smtp_server import LocalSMTPServer
+
+
+def _queue(count):
+    """Agrega `count` correos a la bandeja sin pasar por el worker."""
+    db.session.add_all([
+        OutboxEmail(subject=f'Correo {index}', sender='tienda@example.com',
+                    recipients=[f'c{index}@example.com'], body='Hola')
+        for index in range(count)
+    ])
+    db.session.commit()
+
+
+@pytest.fixture
+def smtp():
+    """Servidor SMTP local en un puerto libre."""
+    server = LocalSMTPServer().start()
+    yield server
+    server.stop()
+
+
+def _smtp_config(smtp, **extra):
+    return dict({
+        'MAIL_SERVER': smtp.host, 'MAIL_PORT': smtp.port,
+        'MAIL_USE_TLS': False, 'MAIL_SUPPRESS_SEND': False, 'MAIL_DEBUG': False,
+        'MAIL_USERNAME': None, 'MAIL_PASSWORD': None,
+        'MAIL_DEFAULT_SENDER': 'tienda@example.com',
+    }, **extra)
+
+
+class TestRouteMail:
+    """Las rutas dejan el correo en la bandeja."""
+
+    @pytest.fixture
+    def app(self):
+        """Fixture para crear la aplicación de testing."""
+        app = create_app({'MAIL_DEFAULT_SENDER': 'tienda@example.com'})
+        with app.app_context():
+            db.create_all()
+            yield app
+            db.session.remove()
+            db.drop_all()
+
+    def test_password_reset_queues_mail(self, app):
+        """La recuperación de contraseña guarda el correo y se envía."""
+        db.session.add(Users(nameUser='Ana', email='ana@example.com',
+                             password_user='hash', birthdate=date(1990, 1, 1)))
+        db.session.commit()
+
+        with mail.record_messages() as outbox:
+            response = app.test_client().post('/reset/password', data={
+                'recovery_method': 'email', 'email': 'ana@example.com',
+            })
+
+        assert response.status_code == 302
+        email = OutboxEmail.query.one()
+        assert email.recipients == ['ana@example.com']
+        assert email.status == 'enviado'
+        assert [msg.subject for msg in outbox] == ['Recupera tu contraseña']
+
+
+class TestOutboxDelivery:
+    """Envío por lotes contra el servidor SMTP local."""
+
+    @pytest.fixture
+    def app(self, smtp):
+        """Aplicación apuntando al SMTP local."""
+        app = create_app(_smtp_config(smtp, MAIL_RATE_PER_MINUTE=100))
+        with app.app_context():
+            db.create_all()
+            yield app
+            db.session.remove()
+            db.drop_all()
+
+    def test_batch_uses_one_connection(self, app, smtp):
+        """Un lote entero sale por una sola conexión SMTP."""
+        _queue(10)
+
+        assert mail_outbox.deliver_pending() == 10
+
+        assert smtp.connections == 1
+        assert len(smtp.messages) == 10
+        assert OutboxEmail.query.filter_by(status='enviado').count() == 10
+
+    def test_failed_message_is_retried_later(self, app, smtp):
+        """Un error temporal reprograma solo ese correo, con backoff."""
+        _queue(3)
+        smtp.fail_next(1)
+
+        assert mail_outbox.deliver_pending() == 2
+        failed = OutboxEmail.query.filter_by(status='error').one()
+        assert failed.attempts == 1
+        assert failed.next_attempt_at > datetime.utcnow()
+        assert mail_outbox.deliver_pending() == 0
+
+        failed.next_attempt_at = datetime.utcnow() - timedelta(seconds=1)
+        db.session.commit()
+        assert mail_outbox.deliver_pending() == 1
+        assert len(smtp.messages) == 3
+
+    def test_unreachable_server_keeps_mail(self, app, smtp):
+        """Si el servidor no responde, los correos quedan para reintentar."""
+        _queue(2)
+        smtp.stop()
+
+        assert mail_outbox.deliver_pending() == 0
+        assert OutboxEmail.query.filter_by(status='error').count() == 2
+
+    def test_gives_up_after_max_attempts(self, app, smtp):
+        """Tras MAIL_MAX_ATTEMPTS fallos el correo queda como fallido."""
+        app.config['MAIL_MAX_ATTEMPTS'] = 1
+        _queue(1)
+        smtp.fail_next(1)
+
+        mail_outbox.deliver_pending()
+
+        assert OutboxEmail.query.one().status == 'fallido'
+
+    def test_throttle_limits_sends_per_minute(self, app, smtp):
+        """No se envían más correos por minuto que MAIL_RATE_PER_MINUTE."""
+        app.config['MAIL_RATE_PER_MINUTE'] = 3
+        _queue(5)
+
+        assert mail_outbox.deliver_pending() == 3
+        assert mail_outbox.deliver_pending() == 0
+        assert OutboxEmail.query.filter_by(status='pendiente').count() == 2
+
+    def test_throttle_window_slides(self):
+        """Pasado un minuto vuelve a haber cupo."""
+        now = [0.0]
+        throttle = SendThrottle(2, clock=lambda: now[0])
+        throttle.record()
+        throttle.record()
+        assert throttle.available() == 0
+        assert throttle.wait_time() == 60
+
+        now[0] = 60
+        assert throttle.available() == 2
+
+
+class TestOutboxWorker:
+    """El worker envía lo que dejan las peticiones."""
+
+    @pytest.fixture
+    def app(self, smtp, tmp_path):
+        """Aplicación sobre un archivo SQLite para compartirla con el worker."""
+        app = create_app(_smtp_config(
+            smtp, SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'mail.db'}",
+            MAIL_OUTBOX_EAGER=False, MAIL_WORKER_INTERVAL=0.1,
+        ))
+        with app.app_context():
+            db.create_all()
+            yield app
+            db.session.remove()
+
+    def test_send_returns_before_delivery(self, app, smtp):
+        """send() solo guarda el correo; el worker lo entrega."""
+        smtp.delay = 0.05
+        started = time.perf_counter()
+        for index in range(3):
+            mail_outbox.send(
+                Message('Hola', recipients=[f'c{index}@example.com'], body='x')
+            )
+        assert time.perf_counter() - started < 0.05 * 7
+
+        deadline = time.monotonic() + 10
+        while len(smtp.messages) < 3 and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert len(smtp.messages) == 3
@@ -0,0 +1,128 @@
+"""
+Tests de integración para las notificaciones en tiempo real por Socket.IO.
+"""
+
+from datetime import date
+
+import pytest
+
+from app import create_app
+from app.db import db
+from app.extensions import socketio
+from app.models.notifications import Notification
+from app.models.orders import Order
+from app.models.users import Users
+from app.services.notifications import notify
+
+
+class TestRealtimeNotifications:
+    """Tests para las salas privadas y el contador de no leídas."""
+
+    @pytest.fixture
+    def app(self):
+        """Fixture para crear la aplicación de testing."""
+        app = create_app()
+        app.config['TESTING'] = True
+        with app.app_context():
+            db.create_all()
+            yield app
+            db.session.remove()
+            db.drop_all()
+
+    @pytest.fixture
+    def users(self, app):
+        """Crea dos clientes."""
+        ana = Users(nameUser='Ana', email='ana@example.com', password_user='hash',
+                    birthdate=date(1990, 1, 1))
+        luis = Users(nameUser='Luis', email='luis@example.com', password_user='hash',
+                     birthdate=date(1990, 1, 1))
+        db.session.add_all([ana, luis])
+        db.session.commit()
+        return ana.idUser, luis.idUser
+
+    @staticmethod
+    def _connect(app, user_id=None):
+        """Abre una conexión Socket.IO, autenticada si se pasa `user_id`."""
+        http_client = app.test_client()
+        if user_id is not None:
+            with http_client.session_transaction() as sess:
+                sess['_user_id'] = str(user_id)
+        # Contexto propio para que Flask-Login no reutilice el usuario de `g`
+        with app.app_context():
+            socket_client = socketio.test_client(app, flask_test_client=http_client)
+        return http_client, socket_client
+
+    @staticmethod
+    def _events(socket_client, name):
+        return [event['args'][0] for event in socket_client.get_received()
+                if event['name'] == name]
+
+    def test_connect_sends_unread_count(self, app, users):
+        """Al conectarse el usuario recibe su contador de no leídas."""
+        ana_id, _ = users
+        db.session.add_all([
+            Notification(user_id=ana_id, mensaje='Hola'),
+            Notification(user_id=ana_id, mensaje='Leída', leida=True),
+        ])
+        db.session.commit()
+
+        _, ana = self._connect(app, ana_id)
+
+        assert self._events(ana, 'notificaciones_no_leidas') == [{'count': 1}]
+
+    def test_anonymous_connection_is_rejected(self, app, users):
+        """Sin sesión no se abre el canal de notificaciones."""
+        _, anonymous = self._connect(app)
+
+        assert not anonymous.is_connected()
+
+    def test_notify_only_reaches_recipient(self, app, users):
+        """La notificación llega solo a la sala del destinatario."""
+        ana_id, luis_id = users
+        _, ana = self._connect(app, ana_id)
+        _, luis = self._connect(app, luis_id)
+        ana.get_received()
+        luis.get_received()
+
+        notif = notify(ana_id, 'Tu pedido #1 ha sido enviado.')
+
+        received = ana.get_received()
+        assert [e['name'] for e in received] == [
+            'nueva_notificacion', 'notificaciones_no_leidas'
+        ]
+        assert received[0]['args'][0] == {
+            'id': notif.id, 'mensaje': 'Tu pedido #1 ha sido enviado.'
+        }
+        assert received[1]['args'][0] == {'count': 1}
+        assert luis.get_received() == []
+
+    def test_order_detail_notifies_owner_only(self, app, users):
+        """Ver un pedido pendiente notifica solo a su dueño."""
+        ana_id, luis_id = users
+        order = Order(user_id=ana_id, total=10)
+        db.session.add(order)
+        db.session.commit()
+        http_client, ana = self._connect(app, ana_id)
+        _, luis = self._connect(app, luis_id)
+        ana.get_received()
+        luis.get_received()
+
+        http_client.get(f'/orders/detail/{order.id}')
+
+        assert self._events(ana, 'nueva_notificacion') == [
+            {'id': 1, 'mensaje': f'Tu pedido #{order.id} ha sido enviado.'}
+        ]
+        assert luis.get_received() == []
+
+    def test_mark_read_updates_count(self, app, users):
+        """Marcar como leída actualiza el contador en todas las pestañas."""
+        ana_id, _ = users
+        notif = notify(ana_id, 'Hola')
+        http_client, ana = self._connect(app, ana_id)
+        _, other_tab = self._connect(app, ana_id)
+        ana.get_received()
+        other_tab.get_received()
+
+        http_client.post(f'/notificaciones/marcar_leida/{notif.id}')
+
+        assert self._events(other_tab, 'notificaciones_no_leidas') == [{'count': 0}]
@@ -0,0 +1,141 @@
+"""
+Tests de integración para la caché de páginas del catálogo.
+"""
+
+from datetime import date
+
+import pytest
+from werkzeug.datastructures import MultiDict
+
+from app import create_app
+from app.db import db
+from app.models.products import Category, Product
+from app.models.users import UserRole, Users
+from app.models.wishlist import Wishlist
+from app.services.page_cache import normalize_catalog_args
+
+# Estilo del botón de favoritos de un producto que está en la lista
+FULL_HEART = 'color: #e74c3c; cursor: pointer; z-index: 3;'
+
+
+class TestNormalizeCatalogArgs:
+    """Claves de caché normalizadas."""
+
+    def test_equivalent_queries_share_key(self):
+        """Orden, página 1, mayúsculas, espacios y decimales no cambian la clave."""
+        first = normalize_catalog_args(MultiDict([
+            ('page', '1'), ('category', '3'), ('q', '  Zapatos   Rojos '),
+            ('min_price', '10000.4'), ('utm_source', 'correo'), ('color', ''),
+        ]))
+        second = normalize_catalog_args(MultiDict([
+            ('q', 'zapatos rojos'), ('min_price', '10000'), ('category', '3'),
+        ]))
+
+        expected = {'category': 3, 'q': 'zapatos rojos', 'min_price': 10000}
+        assert first == second == expected
+
+    def test_invalid_values_are_dropped(self):
+        """Los valores inválidos se descartan en vez de romper la consulta."""
+        assert normalize_catalog_args(MultiDict([
+            ('category', 'abc'), ('page', '-2'), ('max_price', 'nan'), ('size', '  '),
+        ])) == {}
+
+
+class TestCatalogPageCache:
+    """HTML del catálogo cacheado para visitantes anónimos."""
+
+    @pytest.fixture
+    def app(self):
+        """
+        Aplicación de testing con un producto, un cliente y un administrador.
+
+        Las peticiones se hacen fuera del contexto de la aplicación para que
+        cada una cargue su propio usuario.
+        """
+        app = create_app()
+        with app.app_context():
+            db.create_all()
+            category = Category(name='Calzado')
+            admin = Users(nameUser='Admin', email='admin@example.com',
+                          password_user='hash', birthdate=date(1980, 1, 1),
+                          role=UserRole.ADMIN, is_active_db=True)
+            user = Users(nameUser='Ana', email='ana@example.com',
+                         password_user='hash', birthdate=date(1990, 1, 1),
+                         role=UserRole.USER, is_active_db=True)
+            db.session.add_all([category, admin, user])
+            db.session.commit()
+            product = Product(name='Zapato rojo', price=10000, stock=5,
+                              category_id=category.id)
+            db.session.add(product)
+            db.session.commit()
+            db.session.add(Wishlist(user_id=user.idUser, product_id=product.id))
+            db.session.commit()
+            app.config['TEST_IDS'] = {'admin': admin.idUser, 'user': user.idUser,
+                                      'product': product.id}
+            db.session.remove()
+        yield app
+        with app.app_context():
+            db.drop_all()
+
+    @staticmethod
+    def _login(app, user_id):
+        client = app.test_client()
+        with client.session_transaction() as sess:
+            sess['_user_id'] = str(user_id)
+        return client
+
+    def test_anonymous_hits_with_normalized_args(self, app):
+        """La segunda visita equivalente sale de la caché."""
+        client = app.test_client()
+
+        first = client.get('/catalog/?q=Zapato&page=1')
+        second = client.get('/catalog/?q=zapato')
+        other = client.get('/catalog/?q=bolso')
+
+        assert first.headers['X-Cache'] == 'MISS'
+        assert second.headers['X-Cache'] == 'HIT'
+        assert second.get_data() == first.get_data()
+        assert 'Zapato rojo' in second.get_data(as_text=True)
+        assert other.headers['X-Cache'] == 'MISS'
+
+    def test_logged_in_users_bypass_and_keep_hearts(self, app):
+        """Los favoritos del usuario nunca pasan por la caché compartida."""
+        anonymous = app.test_client()
+
+        anonymous.get('/catalog/')
+        mine = self._login(app, app.config['TEST_IDS']['user']).get('/catalog/')
+        cached = anonymous.get('/catalog/')
+
+        assert mine.headers['X-Cache'] == 'BYPASS'
+        assert FULL_HEART in mine.get_data(as_text=True)
+        assert cached.headers['X-Cache'] == 'HIT'
+        assert FULL_HEART not in cached.get_data(as_text=True)
+
+    def test_admin_mutations_invalidate(self, app):
+        """Editar un producto o crear una categoría invalida las páginas."""
+        product_id = app.config['TEST_IDS']['product']
+        admin = self._login(app, app.config['TEST_IDS']['admin'])
+        anonymous = app.test_client()
+        anonymous.get('/catalog/')
+        assert anonymous.get('/catalog/').headers['X-Cache'] == 'HIT'
+
+        admin.post(f'/admin/inventory/update/{product_id}', data={'stock': '3'})
+        page = anonymous.get('/catalog/')
+        assert page.headers['X-Cache'] == 'MISS'
+        assert '¡Últimas 3!' in page.get_data(as_text=True)
+
+        admin.post('/admin/categories/add', data={'name': 'Bolsos', 'description': ''})
+        page = anonymous.get('/catalog/')
+        assert page.headers['X-Cache'] == 'MISS'
+        assert '>Bolsos</option>' in page.get_data(as_text=True)
+
+    def test_pending_flash_bypasses(self, app):
+        """Una página con mensajes flash pendientes no se cachea."""
+        client = app.test_client()
+        with client.session_transaction() as sess:
+            sess['_flashes'] = [('info', 'Sesión cerrada')]
+
+        response = client.get('/catalog/')
+
+        assert response.headers['X-Cache'] == 'BYPASS'
+        assert client.get('/catalog/').headers['X-Cache'] == 'MISS'
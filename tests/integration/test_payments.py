@@ -0,0 +1,206 @@
+"""
+Tests de integración para la cola de pagos en segundo plano.
+"""
+
+import hashlib
+import time
+from datetime import date
+
+import pytest
+
+from app import create_app
+from app.db import db
+from app.extensions import socketio
+from app.models.cart import Cart, CartItem
+from app.models.notifications import Notification
+from app.models.orders import Order
+from app.models.products import Category, Product
+from app.models.sales import SalesDaily
+from app.models.users import Users
+from app.services import sales_rollup
+from app.services.checkout import cancel_checkout, checkout_cart
+from app.services.payments import PAYMENT_STATUS_EVENT, payment_queue, process_payment
+
+
+def _order(status='pendiente'):
+    user = Users(nameUser='Ana', email='ana@example.com', password_user='hash',
+                 birthdate=date(1990, 1, 1))
+    db.session.add(user)
+    db.session.flush()
+    order = Order(user_id=user.idUser, total=10, status=status)
+    db.session.add(order)
+    db.session.commit()
+    return user.idUser, order.id
+
+
+def _checkout(user_id, stock=5, quantity=2):
+    """Reserva `quantity` unidades de un producto nuevo en un pedido del usuario."""
+    category = Category(name='General')
+    db.session.add(category)
+    db.session.flush()
+    product = Product(name='Camiseta', price=10, stock=stock, category_id=category.id)
+    cart = Cart(user_id=user_id)
+    db.session.add_all([product, cart])
+    db.session.flush()
+    db.session.add(CartItem(cart_id=cart.id, product_id=product.id,
+                            quantity=quantity, price_snapshot=10))
+    db.session.commit()
+    return checkout_cart(user_id).order, product.id
+
+
+def _login(app, user_id):
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(user_id)
+    return client
+
+
+class TestPaymentQueue:
+    """Tests del flujo de pago con la cola en modo inmediato."""
+
+    @pytest.fixture
+    def app(self):
+        """Fixture para crear la aplicación de testing."""
+        app = create_app()
+        app.config['TESTING'] = True
+        with app.app_context():
+            db.create_all()
+            yield app
+            db.session.remove()
+            db.drop_all()
+
+    def test_simulated_payment_redirects_to_status_page(self, app):
+        """El POST no espera al cobro y el resultado llega por Socket.IO."""
+        user_id, order_id = _order()
+        client = _login(app, user_id)
+        with app.app_context():
+            socket_client = socketio.test_client(app, flask_test_client=client)
+        socket_client.get_received()
+
+        response = client.post(f'/cart/payment/simulated/{order_id}')
+
+        assert response.status_code == 302
+        assert response.location.endswith(f'/cart/payment/status/{order_id}')
+        assert db.session.get(Order, order_id).status == 'pagado'
+        events = [event['args'][0] for event in socket_client.get_received()
+                  if event['name'] == PAYMENT_STATUS_EVENT]
+        assert events == [{'order_id': order_id, 'status': 'pagado'}]
+
+    def test_status_page_while_processing(self, app):
+        """Mientras el pago está en proceso se muestra la página de espera."""
+        user_id, order_id = _order(status='procesando')
+        client = _login(app, user_id)
+
+        page = client.get(f'/cart/payment/status/{order_id}')
+        status = client.get(f'/cart/payment/status/{order_id}?format=json')
+
+        assert page.status_code == 200
+        assert status.get_json() == {'order_id': order_id, 'status': 'procesando'}
+
+    def test_payu_confirmation_uses_the_queue(self, app):
+        """La confirmación aprobada de PayU completa el pedido por la cola."""
+        _, order_id = _order()
+        app.config['PAYU_API_KEY'] = 'clave'
+        form = {'merchant_id': '1', 'reference_sale': f'ORDER_{order_id}_abc',
+                'value': '10.0', 'currency': 'COP', 'state_pol': '4'}
+        form['sign'] = hashlib.md5('~'.join(
+            ['clave'] + [form[key] for key in
+                         ('merchant_id', 'reference_sale', 'value', 'currency',
+                          'state_pol')]
+        ).encode('utf-8')).hexdigest()
+
+        response = app.test_client().post('/webhook/payu', data=form)
+
+        assert response.data == b'OK'
+        assert db.session.get(Order, order_id).status == 'pagado'
+
+    def test_processing_is_idempotent(self, app):
+        """Un pago repetido no vuelve a notificar al usuario."""
+        user_id, order_id = _order()
+
+        assert process_payment(order_id, 'simulada') == 'pagado'
+        assert process_payment(order_id, 'payu') == 'pagado'
+        assert Notification.query.filter_by(user_id=user_id).count() == 1
+
+    def test_rejected_payment_releases_stock(self, app):
+        """Un rechazo de PayU devuelve el stock reservado, una sola vez."""
+        user_id, _ = _order()
+        order, product_id = _checkout(user_id)
+        assert db.session.get(Product, product_id).stock == 3
+
+        assert process_payment(order.id, 'payu_rechazado') == 'pago_rechazado'
+        assert process_payment(order.id, 'payu_rechazado') == 'pago_rechazado'
+
+        assert db.session.get(Product, product_id).stock == 5
+
+    def test_cancelled_order_only_accepts_payu(self, app):
+        """Un pedido cancelado solo admite la confirmación de PayU."""
+        user_id, _ = _order()
+        order, product_id = _checkout(user_id)
+        assert cancel_checkout(order)
+
+        response = _login(app, user_id).post(f'/cart/payment/simulated/{order.id}')
+
+        assert response.location.endswith(f'/orders/detail/{order.id}')
+        assert payment_queue.enqueue(order.id, 'simulada') is None
+        assert process_payment(order.id, 'simulada') == 'cancelado'
+        assert db.session.get(Product, product_id).stock == 5
+
+        assert process_payment(order.id, 'payu') == 'pagado'
+        assert db.session.get(Product, product_id).stock == 3
+
+    def test_shipped_order_is_not_changed(self, app):
+        """Confirmaciones repetidas o el pago simulado no retroceden un envío."""
+        user_id, _ = _order()
+        order, product_id = _checkout(user_id)
+        assert process_payment(order.id, 'simulada') == 'pagado'
+        assert sales_rollup.change_status(order, 'pagado', 'enviado')
+        db.session.commit()
+
+        assert process_payment(order.id, 'payu_rechazado') == 'enviado'
+        assert process_payment(order.id, 'payu') == 'enviado'
+        response = _login(app, user_id).post(f'/cart/payment/simulated/{order.id}')
+
+        assert response.location.endswith(f'/orders/detail/{order.id}')
+        assert db.session.get(Order, order.id).status == 'enviado'
+        assert db.session.get(Product, product_id).stock == 3
+        assert SalesDaily.query.one().orders == 1
+        assert Notification.query.filter_by(user_id=user_id).count() == 1
+
+
+class TestPaymentWorker:
+    """El cobro corre en un hilo aparte y la petición responde enseguida."""
+
+    DELAY = 0.5
+
+    @pytest.fixture
+    def app(self, tmp_path):
+        """Aplicación sobre un archivo SQLite para compartirla con el worker."""
+        app = create_app({
+            'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'payments.db'}",
+            'PAYMENT_QUEUE_EAGER': False,
+            'PAYMENT_SIMULATED_DELAY': self.DELAY,
+        })
+        with app.app_context():
+            db.create_all()
+            yield app
+            payment_queue.drain(timeout=10)
+            db.session.remove()
+            db.drop_all()
+
+    def test_request_does_not_wait_for_the_gateway(self, app):
+        """La petición vuelve antes de la demora y el worker paga el pedido."""
+        user_id, order_id = _order()
+        client = _login(app, user_id)
+
+        started = time.perf_counter()
+        response = client.post(f'/cart/payment/simulated/{order_id}')
+        elapsed = time.perf_counter() - started
+
+        assert response.status_code == 302
+        assert elapsed < self.DELAY
+        assert db.session.get(Order, order_id).status == 'procesando'
+
+        assert payment_queue.drain(timeout=10)
+        db.session.expire_all()
+        assert db.session.get(Order, order_id).status == 'pagado'
@@ -0,0 +1,177 @@
+"""
+Tests de integración para el cliente HTTP de PayU contra un PayU falso.
+"""
+
+import time
+from datetime import date
+
+import pytest
+
+from app import create_app
+from app.db import db
+from app.models.cart import Cart, CartItem
+from app.models.orders import Order
+from app.models.products import Category, Product
+from app.models.users import Users
+from app.services.payu import (
+    CircuitBreaker, CircuitOpenError, PaymentGatewayError, payu_client
+)
+from scripts.fake_payu_server import FakePayUServer
+
+FORM = {'merchantId': '1', 'accountId': '2', 'referenceCode': 'ORDER_1_abc',
+        'amount': '10', 'currency': 'COP', 'signature': 'firma'}
+
+
+@pytest.fixture
+def payu():
+    """PayU falso en un puerto libre."""
+    server = FakePayUServer()
+    server.start()
+    yield server
+    server.stop()
+
+
+class TestPayUClient:
+    """Tests del pool, los reintentos y el circuit breaker."""
+
+    @pytest.fixture
+    def app(self, payu):
+        """Aplicación apuntando al PayU falso, sin pausas entre reintentos."""
+        app = create_app({
+            'PAYU_BASE_URL': payu.url,
+            'PAYU_READ_TIMEOUT': 0.3,
+            'PAYU_RETRY_BACKOFF': 0,
+            'PAYU_BREAKER_THRESHOLD': 2,
+        })
+        with app.app_context():
+            yield app
+
+    def test_reuses_pooled_connections(self, app, payu):
+        """Varias llamadas seguidas usan una sola conexión keep-alive."""
+        for _ in range(10):
+            response = payu_client.post_checkout(FORM, allow_redirects=False)
+            assert response.status_code == 302
+
+        assert payu.requests == 10
+        assert payu.connections == 1
+
+    def test_retries_transient_errors(self, app, payu):
+        """Un 503 se reintenta y la llamada termina bien."""
+        payu.script(503, 502)
+
+        response = payu_client.post_checkout(FORM, allow_redirects=False)
+
+        assert response.status_code == 302
+        assert payu.requests == 3
+        metrics = payu_client.metrics()
+        assert metrics['retries'] == 2
+        assert metrics['failures'] == 2
+        assert metrics['circuit'] == CircuitBreaker.CLOSED
+
+    def test_slow_gateway_hits_read_timeout(self, app, payu):
+        """Con PayU lento la llamada se corta en el timeout de lectura."""
+        app.config['PAYU_MAX_RETRIES'] = 0
+        payu.delay = 2
+
+        started = time.perf_counter()
+        with pytest.raises(PaymentGatewayError):
+            payu_client.post_checkout(FORM)
+
+        assert time.perf_counter() - started < 1
+
+    def test_circuit_opens_and_fails_fast(self, app, payu):
+        """Tras fallos seguidos el circuito se abre y ya no se llama a PayU."""
+        payu.script(*[503] * 6)
+        for _ in range(2):
+            with pytest.raises(PaymentGatewayError):
+                payu_client.post_checkout(FORM)
+        calls = payu.requests
+
+        with pytest.raises(CircuitOpenError):
+            payu_client.post_checkout(FORM)
+
+        assert payu.requests == calls
+        assert payu_client.metrics()['rejected'] == 1
+        assert payu_client.breaker.state == CircuitBreaker.OPEN
+
+    def test_circuit_half_opens_after_reset(self):
+        """Pasado el tiempo de espera se permite una llamada de prueba."""
+        now = [0.0]
+        breaker = CircuitBreaker(threshold=1, reset_after=30, clock=lambda: now[0])
+        breaker.record_failure()
+        assert not breaker.allow()
+
+        now[0] = 31
+        assert breaker.allow()
+        assert not breaker.allow()
+        breaker.record_success()
+        assert breaker.state == CircuitBreaker.CLOSED
+
+
+class TestCheckoutSessionRoute:
+    """La API de checkout usa el cliente compartido."""
+
+    @pytest.fixture
+    def app(self, payu):
+        """Aplicación con credenciales PayU de prueba."""
+        app = create_app({
+            'PAYU_BASE_URL': payu.url,
+            'PAYU_API_KEY': 'clave', 'PAYU_API_LOGIN': 'login',
+            'PAYU_MERCHANT_ID': '1', 'PAYU_ACCOUNT_ID': '2',
+            'PAYU_RETRY_BACKOFF': 0,
+        })
+        with app.app_context():
+            db.create_all()
+            yield app
+            db.session.remove()
+            db.drop_all()
+
+    @pytest.fixture
+    def client(self, app):
+        """Cliente autenticado con un producto en el carrito."""
+        user = Users(nameUser='Ana', email='ana@example.com', password_user='hash',
+                     birthdate=date(1990, 1, 1))
+        category = Category(name='General')
+        db.session.add_all([user, category])
+        db.session.flush()
+        product = Product(name='Camiseta', price=10, stock=5, category_id=category.id)
+        cart = Cart(user_id=user.idUser)
+        db.session.add_all([product, cart])
+        db.session.flush()
+        db.session.add(CartItem(cart_id=cart.id, product_id=product.id,
+                                quantity=1, price_snapshot=10))
+        db.session.commit()
+        client = app.test_client()
+        with client.session_transaction() as sess:
+            sess['_user_id'] = str(user.idUser)
+        return client
+
+    def test_returns_payment_url(self, client, payu):
+        """La sesión de pago devuelve la URL de la pasarela."""
+        response = client.post('/api/cart/create-checkout-session')
+
+        assert response.status_code == 200
+        assert response.get_json()['url'].startswith(f'{payu.url}/checkout/ORDER_')
+
+    def test_degraded_gateway_returns_error(self, client, payu):
+        """Si PayU sigue fallando se responde con error sin colgar el hilo."""
+        payu.script(*[503] * 3)
+
+        response = client.post('/api/cart/create-checkout-session')
+
+        assert response.status_code == 502
+        # El pedido se anula: el stock y el carrito vuelven a como estaban
+        assert Order.query.one().status == 'cancelado'
+        assert Product.query.one().stock == 5
+        assert CartItem.query.one().quantity == 1
+
+    def test_payment_page_keeps_cart_when_gateway_fails(self, client, payu):
+        """El formulario de pago también devuelve el stock si PayU falla."""
+        payu.script(*[503] * 3)
+
+        response = client.post('/cart/payment', data={'metodo_pago': 'payu'})
+
+        assert response.status_code == 200
+        assert Order.query.one().status == 'cancelado'
+        assert Product.query.one().stock == 5
+        assert CartItem.query.one().quantity == 1
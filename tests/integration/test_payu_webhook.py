@@ -0,0 +1,174 @@
+"""
+Tests de integración para el registro idempotente de confirmaciones de PayU.
+"""
+
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from app import create_app
+from app.db import db
+from app.models.notifications import Notification
+from app.models.orders import Order
+from app.models.payments import PaymentNotification
+from app.models.users import Users
+from app.services.payments import (
+    payment_queue, process_notification, record_notification, replay_notifications
+)
+from scripts.fake_payu_server import PayUConfirmationSender
+
+API_KEY = 'clave'
+
+
+def _order():
+    user = Users(nameUser='Ana', email='ana@example.com', password_user='hash',
+                 birthdate=date(1990, 1, 1))
+    db.session.add(user)
+    db.session.flush()
+    order = Order(user_id=user.idUser, total=10000, status='pendiente')
+    db.session.add(order)
+    db.session.commit()
+    return user.idUser, order.id
+
+
+@pytest.fixture
+def sender():
+    """Firma confirmaciones como PayU (no las envía por HTTP en estos tests)."""
+    return PayUConfirmationSender('/webhook/payu', API_KEY)
+
+
+class TestPayUWebhook:
+    """Tests del webhook con la cola en modo inmediato."""
+
+    @pytest.fixture
+    def app(self):
+        """Fixture para crear la aplicación de testing."""
+        app = create_app({'PAYU_API_KEY': API_KEY})
+        with app.app_context():
+            db.create_all()
+            yield app
+            db.session.remove()
+            db.drop_all()
+
+    def test_duplicate_confirmation_is_applied_once(self, app, sender):
+        """Los reintentos de PayU se aceptan pero no repiten el pago."""
+        user_id, order_id = _order()
+        form = sender.confirmation(order_id, 10000)
+        client = app.test_client()
+
+        replies = [client.post('/webhook/payu', data=form) for _ in range(3)]
+
+        assert [reply.data for reply in replies] == [b'OK'] * 3
+        assert PaymentNotification.query.count() == 1
+        assert PaymentNotification.query.one().status == 'procesada'
+        assert db.session.get(Order, order_id).status == 'pagado'
+        assert Notification.query.filter_by(user_id=user_id).count() == 1
+
+    def test_declined_confirmation_rejects_order(self, app, sender):
+        """Una transacción rechazada deja el pedido como pago rechazado."""
+        _, order_id = _order()
+
+        reply = app.test_client().post(
+            '/webhook/payu', data=sender.confirmation(order_id, 10000, state_pol='6')
+        )
+
+        assert reply.data == b'OK'
+        assert db.session.get(Order, order_id).status == 'pago_rechazado'
+
+    def test_confirmation_does_not_need_csrf_token(self, app, sender):
+        """Con CSRF activo (fuera de los tests) PayU puede confirmar sin token."""
+        _, order_id = _order()
+        app.config['WTF_CSRF_ENABLED'] = True
+
+        reply = app.test_client().post('/webhook/payu',
+                                       data=sender.confirmation(order_id, 10000))
+
+        assert reply.data == b'OK'
+        assert db.session.get(Order, order_id).status == 'pagado'
+
+    def test_invalid_signature_is_not_recorded(self, app, sender):
+        """Sin firma válida no se guarda nada."""
+        _, order_id = _order()
+        form = dict(sender.confirmation(order_id, 10000), sign='falsa')
+
+        reply = app.test_client().post('/webhook/payu', data=form)
+
+        assert reply.status_code == 400
+        assert PaymentNotification.query.count() == 0
+
+    def test_notification_is_claimed_once(self, app, sender):
+        """Si dos workers reciben la misma notificación solo uno la aplica."""
+        _, order_id = _order()
+        notification_id = record_notification(
+            order_id, sender.confirmation(order_id, 10000)
+        )
+
+        assert process_notification(notification_id) == 'pagado'
+        assert process_notification(notification_id) is None
+        assert db.session.get(PaymentNotification, notification_id).attempts == 1
+
+    def test_replay_applies_pending_notifications(self, app, sender):
+        """El reproceso aplica las notificaciones que quedaron sin procesar."""
+        _, order_id = _order()
+        notification_id = record_notification(
+            order_id, sender.confirmation(order_id, 10000)
+        )
+
+        assert replay_notifications() == {notification_id: 'pagado'}
+        assert replay_notifications() == {}
+        assert db.session.get(Order, order_id).status == 'pagado'
+
+    def test_abandoned_claim_is_recovered(self, app, sender):
+        """El reclamo de un worker caído vence y la notificación se reprocesa."""
+        _, order_id = _order()
+        notification_id = record_notification(
+            order_id, sender.confirmation(order_id, 10000)
+        )
+        notification = db.session.get(PaymentNotification, notification_id)
+        notification.status = 'procesando'
+        notification.claimed_at = datetime.utcnow()
+        db.session.commit()
+
+        assert process_notification(notification_id) is None
+        assert replay_notifications() == {}
+
+        notification.claimed_at = datetime.utcnow() - timedelta(
+            seconds=app.config['PAYMENT_NOTIFICATION_CLAIM_TIMEOUT'] + 1
+        )
+        db.session.commit()
+
+        assert replay_notifications() == {notification_id: 'pagado'}
+        assert db.session.get(Order, order_id).status == 'pagado'
+
+
+class TestPayUWebhookQueue:
+    """El webhook responde antes de aplicar el pago."""
+
+    @pytest.fixture
+    def app(self, tmp_path):
+        """Aplicación sobre un archivo SQLite para compartirla con el worker."""
+        app = create_app({
+            'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'webhook.db'}",
+            'PAYU_API_KEY': API_KEY,
+            'PAYMENT_QUEUE_EAGER': False,
+        })
+        with app.app_context():
+            db.create_all()
+            yield app
+            payment_queue.drain(timeout=10)
+            db.session.remove()
+            db.drop_all()
+
+    def test_acknowledges_then_worker_applies(self, app, sender):
+        """La confirmación se registra al responder y el worker la aplica."""
+        _, order_id = _order()
+
+        reply = app.test_client().post('/webhook/payu',
+                                       data=sender.confirmation(order_id, 10000))
+
+        assert reply.data == b'OK'
+        assert PaymentNotification.query.count() == 1
+        assert payment_queue.drain(timeout=10)
+        db.session.expire_all()
+        assert PaymentNotification.query.one().status == 'procesada'
+        assert db.session.get(Order, order_id).status == 'pagado'
@@ -0,0 +1,129 @@
+"""
+Tests de integración para el ranking de productos populares.
+"""
+
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from app import create_app
+from app.db import db
+from app.extensions import cache
+from app.models.orders import Order, OrderDetail
+from app.models.popularity import ProductPopularity
+from app.models.products import Category, Product
+from app.models.users import UserRole, Users
+from app.services import popularity, sales_rollup
+from app.services.payments import process_payment
+
+NOW = datetime.utcnow()
+
+
+@pytest.fixture
+def app():
+    """
+    Aplicación de testing con tres productos y pedidos pendientes.
+
+    'Viejo' tiene muchas ventas de hace diez semanas, 'Nuevo' pocas de hoy
+    y 'Tibio' algunas de hace una semana.
+    """
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        cache.clear()
+        category = Category(name='Calzado')
+        user = Users(nameUser='Ana', email='ana@example.com', password_user='hash',
+                     birthdate=date(1990, 1, 1), role=UserRole.USER, is_active_db=True)
+        db.session.add_all([category, user])
+        db.session.commit()
+        products = {
+            name: Product(name=name, price=10, stock=100, category_id=category.id)
+            for name in ('Viejo', 'Tibio', 'Nuevo')
+        }
+        db.session.add_all(products.values())
+        db.session.commit()
+        orders = {}
+        for name, units, age in (('Viejo', 20, 70), ('Tibio', 3, 7), ('Nuevo', 2, 0)):
+            order = Order(user_id=user.idUser, total=10 * units, status='pendiente',
+                          created_at=NOW - timedelta(days=age))
+            order.details = [OrderDetail(product_id=products[name].id, quantity=units,
+                                         price=10)]
+            orders[name] = order
+        db.session.add_all(orders.values())
+        db.session.commit()
+        app.config['TEST_IDS'] = {
+            'orders': {name: order.id for name, order in orders.items()},
+            'products': {name: product.id for name, product in products.items()},
+        }
+        db.session.remove()
+    yield app
+    with app.app_context():
+        db.drop_all()
+
+
+def _pay_all(app):
+    for order_id in app.config['TEST_IDS']['orders'].values():
+        process_payment(order_id, 'simulada')
+
+
+class TestPopularity:
+    """Puntajes mantenidos al pagar y cancelar pedidos."""
+
+    def test_decay_ranks_recent_sales_first(self, app):
+        """Pocas ventas recientes superan a muchas ventas viejas."""
+        with app.app_context():
+            _pay_all(app)
+            names = [product.name for product in popularity.top_products(3)]
+            assert names == ['Nuevo', 'Tibio', 'Viejo']
+
+            product_id = app.config['TEST_IDS']['products']['Tibio']
+            score = db.session.get(ProductPopularity, product_id).score
+            assert popularity.current_score(score) == pytest.approx(1.5, rel=0.01)
+
+    def test_cancel_subtracts_and_matches_rebuild(self, app):
+        """Cancelar resta lo que sumó el pago; el backfill da lo mismo."""
+        with app.app_context():
+            _pay_all(app)
+            order = db.session.get(Order, app.config['TEST_IDS']['orders']['Nuevo'])
+            order.status = 'cancelado'
+            sales_rollup.order_status_changed(order, 'pagado')
+            db.session.commit()
+
+            assert [p.name for p in popularity.top_products(3)] == ['Tibio', 'Viejo']
+            incremental = {row.product_id: row.score for row in ProductPopularity.query}
+            assert popularity.rebuild(sales_rollup.SALE_STATUSES) == 2
+            rebuilt = {row.product_id: row.score for row in ProductPopularity.query}
+            nuevo = app.config['TEST_IDS']['products']['Nuevo']
+            assert incremental.pop(nuevo) == pytest.approx(0, abs=1e-6)
+            assert rebuilt == pytest.approx(incremental)
+
+
+class TestTopCache:
+    """Top cacheado e invalidado al confirmar cada venta."""
+
+    def test_cached_top_is_refreshed_after_commit(self, app):
+        """Sin commit una venta no toca el top cacheado; tras el commit se recarga."""
+        with app.app_context():
+            _pay_all(app)
+            nuevo = app.config['TEST_IDS']['products']['Nuevo']
+            assert popularity.top_ids(1) == [nuevo]
+
+            viejo = app.config['TEST_IDS']['products']['Viejo']
+            popularity.record_order(NOW, [(viejo, 10)])
+            assert cache.get(popularity.TOP_CACHE_KEY)[0][0] == nuevo
+            db.session.commit()
+            assert cache.get(popularity.TOP_CACHE_KEY) is None
+            assert popularity.top_ids(3)[0] == viejo
+
+            statements = []
+
+            def record(_conn, _cursor, statement, *_args):
+                statements.append(statement)
+
+            event.listen(db.engine, 'before_cursor_execute', record)
+            try:
+                ids = popularity.top_ids(3)
+            finally:
+                event.remove(db.engine, 'before_cursor_execute', record)
+            assert ids[0] == viejo and statements == []
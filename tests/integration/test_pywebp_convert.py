@@ -0,0 +1,117 @@
+"""
+Tests de integración para la conversión en lote de imágenes.
+"""
+
+import os
+
+import pytest
+from PIL import Image
+
+from app import create_app
+from app.db import db
+from app.models.products import Category, Product
+from scripts.pywebp_convert import convert_all, load_manifest, update_products
+
+WIDTHS = [400, 800, 1600]
+
+
+@pytest.fixture
+def folders(tmp_path):
+    """Carpetas de productos y reseñas con algunas imágenes."""
+    products = tmp_path / 'product_images'
+    reviews = tmp_path / 'review_images'
+    products.mkdir()
+    reviews.mkdir()
+    for index in range(3):
+        image = Image.new('RGB', (1000 + index, 500), (index, 0, 0))
+        image.save(products / f'p{index}.jpg')
+    Image.new('RGB', (300, 300)).save(reviews / 'r0.png')
+    (products / 'notas.txt').write_text('no es una imagen')
+    return [(str(products), 'variants'), (str(reviews), 'sibling')]
+
+
+def _convert(folders, tmp_path, **kwargs):
+    return convert_all(folders, str(tmp_path / 'manifest.json'), WIDTHS, ['webp'], 80,
+                       workers=2, **kwargs)
+
+
+class TestBulkConversion:
+    """Conversión paralela, incremental y reanudable."""
+
+    def test_generates_same_variants_as_app(self, folders, tmp_path):
+        """Productos: variantes por ancho; reseñas: .webp junto al original."""
+        stats = _convert(folders, tmp_path)
+
+        assert stats['convertida'] == 4 and stats['error'] == 0
+        variants = sorted(os.listdir(tmp_path / 'product_images' / 'variants'))
+        assert variants[:3] == ['p0-1000.webp', 'p0-400.webp', 'p0-800.webp']
+        assert os.path.exists(tmp_path / 'review_images' / 'r0.webp')
+        manifest = load_manifest(str(tmp_path / 'manifest.json'))
+        assert [entry['widths'] for key, entry in sorted(manifest.items())
+                if 'product_images' in key] == [[400, 800, 1000], [400, 800, 1001],
+                                                [400, 800, 1002]]
+
+    def test_second_run_only_converts_changes(self, folders, tmp_path):
+        """Lo que no cambió no se vuelve a leer ni a convertir."""
+        _convert(folders, tmp_path)
+        Image.new('RGB', (600, 300), (0, 255, 0))\
+            .save(tmp_path / 'product_images' / 'p1.jpg')
+
+        stats = _convert(folders, tmp_path)
+
+        assert stats['convertida'] == 1
+        assert stats['sin cambios'] == 3
+
+    def test_resumes_without_manifest(self, folders, tmp_path):
+        """Tras una caída, las salidas más nuevas que su original se dan por buenas."""
+        _convert(folders, tmp_path)
+        os.remove(tmp_path / 'manifest.json')
+
+        stats = _convert(folders, tmp_path)
+
+        assert stats['convertida'] == 0
+        assert stats['al día'] == 4
+        assert len(load_manifest(str(tmp_path / 'manifest.json'))) == 4
+
+    def test_reports_broken_images(self, folders, tmp_path):
+        """Una imagen dañada no detiene el lote."""
+        (tmp_path / 'product_images' / 'rota.jpg').write_bytes(b'no es un jpeg')
+
+        stats = _convert(folders, tmp_path)
+
+        assert stats['convertida'] == 4
+        assert [os.path.basename(path) for path, _ in stats['errors']] == ['rota.jpg']
+
+
+class TestUpdateProducts:
+    """Registro de las variantes en los productos."""
+
+    def test_records_variants(self, folders, tmp_path):
+        """Los productos con imagen convertida quedan con sus variantes."""
+        _convert(folders, tmp_path)
+        app = create_app()
+        with app.app_context():
+            db.create_all()
+            category = Category(name='General')
+            db.session.add(category)
+            db.session.commit()
+            db.session.add_all([
+                Product(name='Con imagen', price=10, image='p0.jpg',
+                        category_id=category.id),
+                Product(name='Sin convertir', price=10, image='otra.jpg',
+                        category_id=category.id),
+            ])
+            db.session.commit()
+
+            views = {'grid': 400, 'detail': 800, 'zoom': 1600}
+            manifest = load_manifest(str(tmp_path / 'manifest.json'))
+            assert update_products(folders[0][0], manifest, views, ['webp']) == 1
+            assert update_products(folders[0][0], manifest, views, ['webp']) == 0
+
+            product = Product.query.filter_by(image='p0.jpg').one()
+            views = product.image_variants['views']
+            assert views == {'grid': 400, 'detail': 800, 'zoom': 1000}
+            pending = Product.query.filter_by(image='otra.jpg').one()
+            assert pending.image_variants is None
+            db.session.remove()
+            db.drop_all()
@@ -0,0 +1,146 @@
+"""
+Tests de integración para los agregados de calificaciones y las reseñas paginadas.
+"""
+
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from app import create_app
+from app.db import db
+from app.models.products import Category, Product
+from app.models.reviews import ProductRating, Review
+from app.models.users import UserRole, Users
+from app.services import ratings
+
+REVIEWS = 25
+
+
+@pytest.fixture
+def app():
+    """
+    Aplicación de testing con un producto y REVIEWS reseñas pendientes.
+
+    Las peticiones se hacen fuera del contexto de la aplicación para que
+    cada una cargue su propio usuario.
+    """
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        category = Category(name='Calzado')
+        admin = Users(nameUser='Admin', email='admin@example.com',
+                      password_user='hash', birthdate=date(1980, 1, 1),
+                      role=UserRole.ADMIN, is_active_db=True)
+        authors = [Users(nameUser=f'Cliente {index}',
+                         email=f'cliente{index}@example.com',
+                         password_user='hash', birthdate=date(1990, 1, 1),
+                         role=UserRole.USER, is_active_db=True) for index in range(5)]
+        db.session.add_all([category, admin] + authors)
+        db.session.commit()
+        product = Product(name='Zapato rojo', price=10000, stock=5,
+                          category_id=category.id)
+        db.session.add(product)
+        db.session.commit()
+        start = datetime(2024, 1, 1)
+        db.session.add_all([
+            Review(user_id=authors[index % 5].idUser, product_id=product.id,
+                   rating=index % 5 + 1, comment=f'Reseña {index}',
+                   created_at=start + timedelta(days=index))
+            for index in range(REVIEWS)
+        ])
+        db.session.commit()
+        app.config['TEST_IDS'] = {'admin': admin.idUser, 'product': product.id}
+        db.session.remove()
+    yield app
+    with app.app_context():
+        db.drop_all()
+
+
+def _approve_all(app):
+    with app.app_context():
+        for review in Review.query.all():
+            ratings.approve(review)
+        db.session.commit()
+
+
+class TestRatingAggregates:
+    """Agregados mantenidos al moderar reseñas."""
+
+    def test_moderation_updates_aggregates(self, app):
+        """Aprobar suma, rechazar una aprobada resta, rechazar una pendiente no."""
+        admin = app.test_client()
+        with admin.session_transaction() as sess:
+            sess['_user_id'] = str(app.config['TEST_IDS']['admin'])
+        with app.app_context():
+            ids = [review.id for review in Review.query.order_by(Review.id).limit(3)]
+
+        admin.post(f'/admin/reviews/approve/{ids[0]}')
+        admin.post(f'/admin/reviews/approve/{ids[1]}')
+        admin.post(f'/admin/reviews/approve/{ids[1]}')
+        admin.post(f'/admin/reviews/reject/{ids[0]}')
+        admin.post(f'/admin/reviews/reject/{ids[2]}')
+
+        with app.app_context():
+            rating = db.session.get(ProductRating, app.config['TEST_IDS']['product'])
+            counts = (rating.count, rating.total, rating.stars_1, rating.stars_2)
+            assert counts == (1, 2, 0, 1)
+            assert rating.average == 2
+
+    def test_incremental_matches_rebuild(self, app):
+        """Los agregados incrementales coinciden con recalcular desde cero."""
+        _approve_all(app)
+        with app.app_context():
+            product_id = app.config['TEST_IDS']['product']
+            rating = db.session.get(ProductRating, product_id)
+            incremental = (rating.count, rating.total,
+                           [row[1] for row in rating.histogram])
+            db.session.delete(rating)
+            db.session.commit()
+
+            assert ratings.rebuild_all() == 1
+            rebuilt = db.session.get(ProductRating, product_id)
+            counts = (rebuilt.count, rebuilt.total,
+                      [row[1] for row in rebuilt.histogram])
+            assert counts == incremental == (25, 75, [5, 5, 5, 5, 5])
+
+
+class TestPaginatedReviews:
+    """Detalle del producto con agregados y primera página de reseñas."""
+
+    def test_detail_uses_constant_queries(self, app):
+        """El número de consultas no depende de cuántas reseñas haya."""
+        _approve_all(app)
+        url = f"/catalog/product/{app.config['TEST_IDS']['product']}"
+        statements = []
+
+        def count(*_args):
+            statements.append(1)
+
+        with app.app_context():
+            engine = db.engine
+        event.listen(engine, 'before_cursor_execute', count)
+        try:
+            page = app.test_client().get(url).get_data(as_text=True)
+        finally:
+            event.remove(engine, 'before_cursor_execute', count)
+
+        assert len(statements) <= 4
+        assert '(25 reseñas)' in page
+        assert page.count('class="review-card"') == ratings.REVIEWS_PER_PAGE
+        assert 'Reseña 24' in page and 'Cliente 4' in page
+        assert 'id="load-more-reviews"' in page
+
+    def test_load_more(self, app):
+        """El endpoint devuelve las páginas siguientes hasta agotar las reseñas."""
+        _approve_all(app)
+        client = app.test_client()
+        url = f"/reviews/product/{app.config['TEST_IDS']['product']}"
+
+        second = client.get(f'{url}?page=2').get_json()
+        last = client.get(f'{url}?page=3').get_json()
+
+        assert second['count'] == 10 and second['next_page'] == 3
+        assert 'Reseña 14' in second['html'] and 'Reseña 15' not in second['html']
+        assert last['count'] == 5 and last['next_page'] is None
+        assert client.get('/reviews/product/999').status_code == 404
@@ -0,0 +1,191 @@
+"""
+Tests de integración para los resúmenes diarios de ventas.
+"""
+
+from datetime import date, datetime
+
+import pytest
+
+from app import create_app
+from app.db import db
+from app.models.orders import Order, OrderDetail
+from app.models.products import Category, Product
+from app.models.returns import ReturnRequest
+from app.models.sales import ProductSalesDaily, SalesDaily
+from app.models.users import UserRole, Users
+from app.services import sales_rollup
+from app.services.payments import process_payment
+
+DAY = date(2024, 3, 10)
+
+
+@pytest.fixture
+def app():
+    """
+    Aplicación de testing con dos productos y tres pedidos pendientes del mismo día.
+
+    Las peticiones se hacen fuera del contexto de la aplicación para que
+    cada una cargue su propio usuario.
+    """
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        category = Category(name='Calzado')
+        admin = Users(nameUser='Admin', email='admin@example.com',
+                      password_user='hash', birthdate=date(1980, 1, 1),
+                      role=UserRole.ADMIN, is_active_db=True)
+        user = Users(nameUser='Ana', email='ana@example.com',
+                     password_user='hash', birthdate=date(1990, 1, 1),
+                     role=UserRole.USER, is_active_db=True)
+        db.session.add_all([category, admin, user])
+        db.session.commit()
+        shoes = Product(name='Zapato', price=100, stock=50, category_id=category.id)
+        bag = Product(name='Bolso', price=40, stock=50, category_id=category.id)
+        db.session.add_all([shoes, bag])
+        db.session.commit()
+        orders = []
+        for quantity in (1, 2, 3):
+            order = Order(user_id=user.idUser, total=100 * quantity + 40,
+                          status='pendiente', created_at=datetime(2024, 3, 10, 12))
+            order.details = [
+                OrderDetail(product_id=shoes.id, quantity=quantity, price=100),
+                OrderDetail(product_id=bag.id, quantity=1, price=40),
+            ]
+            orders.append(order)
+        db.session.add_all(orders)
+        db.session.commit()
+        app.config['TEST_IDS'] = {'admin': admin.idUser,
+                                  'orders': [o.id for o in orders],
+                                  'shoes': shoes.id, 'bag': bag.id}
+        db.session.remove()
+    yield app
+    with app.app_context():
+        db.drop_all()
+
+
+def _admin(app):
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(app.config['TEST_IDS']['admin'])
+    return client
+
+
+def _snapshot():
+    day = db.session.get(SalesDaily, DAY)
+    products = {row.product_id: (row.units, row.revenue)
+                for row in ProductSalesDaily.query.filter_by(day=DAY)}
+    return (day.orders, day.units, day.revenue, day.refunds) if day else None, products
+
+
+class TestIncrementalRollup:
+    """Los cambios de estado actualizan los resúmenes en la misma transacción."""
+
+    def test_payment_cancel_and_refund(self, app):
+        """Pagar suma, cancelar resta y reembolsar se registra en su día."""
+        first, second, third = app.config['TEST_IDS']['orders']
+        shoes = app.config['TEST_IDS']['shoes']
+        with app.app_context():
+            process_payment(first, 'simulada')
+            process_payment(second, 'simulada')
+            process_payment(second, 'simulada')
+        admin = _admin(app)
+        admin.post(f'/admin/orders/update_status/{third}', data={'status': 'enviado'})
+        admin.post(f'/admin/orders/update_status/{second}',
+                   data={'status': 'cancelado'})
+        admin.post(f'/admin/orders/update_status/{first}',
+                   data={'status': 'entregado'})
+
+        with app.app_context():
+            day, products = _snapshot()
+            assert day == (2, 6, 480, 0)
+            assert products[shoes] == (4, 400)
+
+            request_obj = ReturnRequest(order_id=first, user_id=1, reason='Talla')
+            db.session.add(request_obj)
+            db.session.commit()
+            return_id = request_obj.id
+        admin.post(f'/admin/returns/refund/{return_id}', data={'refund_amount': '50'})
+        admin.post(f'/admin/returns/refund/{return_id}', data={'refund_amount': '60'})
+
+        with app.app_context():
+            today = db.session.get(SalesDaily, datetime.utcnow().date())
+            assert today.refunds == 60
+
+    def test_incremental_matches_rebuild(self, app):
+        """El backfill produce lo mismo que las actualizaciones incrementales."""
+        first, second, _ = app.config['TEST_IDS']['orders']
+        with app.app_context():
+            process_payment(first, 'simulada')
+            process_payment(second, 'simulada')
+            incremental = _snapshot()
+            SalesDaily.query.delete()
+            ProductSalesDaily.query.delete()
+            db.session.commit()
+
+            assert sales_rollup.rebuild() == 1
+            assert _snapshot() == incremental
+            assert sales_rollup.rebuild(date(2024, 3, 11), date(2024, 3, 31)) == 0
+            assert _snapshot() == incremental
+
+    def test_stale_status_is_not_counted_twice(self, app):
+        """Una transición desde un estado que otra sesión ya cambió no suma de nuevo."""
+        _, _, third = app.config['TEST_IDS']['orders']
+        with app.app_context():
+            # Esta sesión lee el pedido pendiente; otra lo envía antes de que actúe
+            order = db.session.get(Order, third)
+            assert order.status == 'pendiente'
+            _admin(app).post(f'/admin/orders/update_status/{third}',
+                             data={'status': 'enviado'})
+
+            assert not sales_rollup.change_status(order, 'pendiente', 'enviado')
+            db.session.commit()
+            assert process_payment(third, 'simulada') == 'enviado'
+            day, _ = _snapshot()
+            assert day == (1, 4, 340, 0)
+
+        _admin(app).post(f'/admin/orders/update_status/{third}',
+                         data={'status': 'cancelado'})
+        with app.app_context():
+            assert _snapshot()[0] == (0, 0, 0, 0)
+
+    def test_deleted_product_matches_rebuild(self, app):
+        """Borrar un producto vendido resta sus unidades; cancelar luego cuadra."""
+        first, second, _ = app.config['TEST_IDS']['orders']
+        with app.app_context():
+            process_payment(first, 'simulada')
+            process_payment(second, 'simulada')
+        admin = _admin(app)
+        admin.post(f"/admin/products/delete/{app.config['TEST_IDS']['shoes']}",
+                   data={'confirm_delete': 'yes'})
+        admin.post(f'/admin/orders/update_status/{first}', data={'status': 'cancelado'})
+
+        with app.app_context():
+            incremental = _snapshot()
+            bag = app.config['TEST_IDS']['bag']
+            assert incremental == ((1, 1, 240, 0), {bag: (1, 40)})
+            sales_rollup.rebuild()
+            assert _snapshot() == incremental
+
+
+class TestReports:
+    """Reportes y API leen los resúmenes por rango de fechas."""
+
+    def test_reports_and_api_by_range(self, app):
+        """Solo se incluyen los días del rango pedido."""
+        first, second, _ = app.config['TEST_IDS']['orders']
+        with app.app_context():
+            process_payment(first, 'simulada')
+            process_payment(second, 'simulada')
+        admin = _admin(app)
+
+        march = 'start=2024-03-01&end=2024-03-31'
+        inside = admin.get(f'/admin/api/sales_by_day?{march}').get_json()
+        outside = admin.get(
+            '/admin/api/sales_by_day?start=2024-04-01&end=2024-04-30'
+        ).get_json()
+        page = admin.get(f'/admin/reports?{march}').get_data(as_text=True)
+
+        assert inside == {'labels': ['2024-03-10'], 'totals': [380.0], 'refunds': [0.0]}
+        assert outside == {'labels': [], 'totals': [], 'refunds': []}
+        assert 'Total de ventas: $380.00' in page
+        assert '<td>Zapato</td>' in page
@@ -0,0 +1,121 @@
+"""
+Tests de integración para el índice de búsqueda de productos.
+"""
+
+import pytest
+
+from app import create_app
+from app.db import db
+from app.models.products import Category, Product
+from app.services.search import product_search, tokenize
+
+
+def test_tokenize_is_accent_insensitive_spanish():
+    """Quita tildes, palabras vacías y plurales regulares."""
+    assert tokenize('Camisetas de Algodón ROJAS') == ['camiseta', 'algodon', 'roja']
+    assert tokenize('Colores neón') == ['color', 'neon']
+    assert tokenize('de la y') == []
+
+
+class TestProductSearch:
+    """Tests para los motores de búsqueda en memoria y FTS5."""
+
+    @pytest.fixture(params=['memory', 'sqlite'])
+    def app(self, request):
+        """Aplicación de testing con cada motor de búsqueda."""
+        app = create_app()
+        app.config['TESTING'] = True
+        app.config['SEARCH_BACKEND'] = request.param
+        with app.app_context():
+            db.create_all()
+            category = Category(name='Calzado')
+            db.session.add(category)
+            db.session.commit()
+            db.session.add_all([
+                Product(name='Zapato rojo', description='Cuero genuino',
+                        price=10, category_id=category.id),
+                Product(name='Bolso', description='Bolso con detalles en rojo',
+                        price=20, category_id=category.id),
+                Product(name='Camiseta neón', description='Algodón orgánico',
+                        price=30, category_id=category.id),
+            ])
+            db.session.commit()
+            product_search.rebuild()
+            yield app
+            db.session.remove()
+            db.drop_all()
+
+    @staticmethod
+    def _names(ids):
+        by_id = {p.id: p.name for p in Product.query.all()}
+        return [by_id[pid] for pid in ids]
+
+    def test_ranks_name_matches_first(self, app):
+        """Un término en el nombre pesa más que en la descripción."""
+        assert self._names(product_search.search('rojos')) == ['Zapato rojo', 'Bolso']
+
+    def test_requires_all_terms_and_ignores_accents(self, app):
+        """Todos los términos deben aparecer; las tildes no importan."""
+        assert self._names(product_search.search('camisetas NEON')) == ['Camiseta neón']
+        assert self._names(product_search.search('algodon')) == ['Camiseta neón']
+        assert product_search.search('zapato neon') == []
+
+    def test_index_is_kept_in_sync(self, app):
+        """Crear, editar y eliminar actualizan el índice."""
+        product = Product.query.filter_by(name='Bolso').first()
+        product.name = 'Mochila'
+        product.description = 'Lona azul'
+        db.session.commit()
+        product_search.index_product(product)
+        assert self._names(product_search.search('mochila')) == ['Mochila']
+        assert self._names(product_search.search('rojo')) == ['Zapato rojo']
+
+        product_search.remove_product(product.id)
+        assert product_search.search('mochila') == []
+
+    def test_catalog_route_uses_index(self, app):
+        """El catálogo filtra y ordena por relevancia."""
+        response = app.test_client().get('/catalog/?q=rojo')
+
+        body = response.get_data(as_text=True)
+        assert response.status_code == 200
+        assert 'Zapato rojo' in body
+        assert 'Camiseta neón' not in body
+        assert body.index('Zapato rojo') < body.index('Bolso')
+
+    def test_catalog_filters_see_every_match(self, app):
+        """Los filtros se aplican a todas las coincidencias, no solo a las primeras."""
+        app.config['SEARCH_MAX_RESULTS'] = 1
+        ropa = Category(name='Ropa')
+        db.session.add(ropa)
+        db.session.commit()
+        product = Product(name='Gorra', description='Visera con detalle rojo',
+                          price=15, category_id=ropa.id)
+        db.session.add(product)
+        db.session.commit()
+        product_search.index_product(product)
+
+        response = app.test_client().get(f'/catalog/?q=rojo&category={ropa.id}')
+
+        body = response.get_data(as_text=True)
+        assert 'Gorra' in body
+        assert 'Zapato rojo' not in body
+
+    def test_catalog_pages_past_the_result_cap(self, app):
+        """La paginación llega a coincidencias más allá de SEARCH_MAX_RESULTS."""
+        app.config['SEARCH_MAX_RESULTS'] = 1
+        category_id = Category.query.first().id
+        extra = [Product(name=f'Sandalia {index:02d}', description='Verano',
+                         price=5, category_id=category_id) for index in range(13)]
+        db.session.add_all(extra)
+        db.session.commit()
+        for product in extra:
+            product_search.index_product(product)
+
+        first = app.test_client().get('/catalog/?q=sandalia').get_data(as_text=True)
+        second = app.test_client().get('/catalog/?q=sandalia&page=2')\
+            .get_data(as_text=True)
+
+        shown = [p.name for p in extra if p.name in first or p.name in second]
+        assert len(shown) == 13
+        assert sum(p.name in second for p in extra) == 1
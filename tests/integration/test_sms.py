@@ -0,0 +1,144 @@
+"""
+Tests de integración para el envío de SMS en segundo plano.
+"""
+
+import time
+from datetime import date
+
+import pytest
+
+from app import create_app
+from app.db import db
+from app.models.users import Users
+from app.services.sms import FakeSMSProvider, SMSError, sms_sender
+
+
+def _user(phone):
+    user = Users(nameUser='Ana', email=f'{phone}@example.com', phone=phone,
+                 password_user='hash', birthdate=date(1990, 1, 1))
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+def _request_sms(app, phone):
+    return app.test_client().post('/reset/password', data={
+        'recovery_method': 'phone', 'phone': phone,
+    })
+
+
+def _make_app(**overrides):
+    app = create_app(overrides)
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+class TestPhoneRecovery:
+    """Recuperación de contraseña por SMS con el proveedor local."""
+
+    @pytest.fixture
+    def app(self):
+        """Fixture para crear la aplicación de testing."""
+        app = _make_app(SMS_PHONE_LIMIT='2 per hour')
+        with app.app_context():
+            yield app
+            db.session.remove()
+            db.drop_all()
+
+    def test_sends_recovery_code(self, app):
+        """El SMS lleva el código del token de recuperación."""
+        user = _user('+573001110001')
+
+        response = _request_sms(app, '+573001110001')
+
+        assert response.status_code == 302
+        sent = sms_sender.provider.sent
+        assert [message['to'] for message in sent] == ['+573001110001']
+        db.session.refresh(user)
+        assert user.verification_token[:6].upper() in sent[0]['body']
+
+    def test_limit_per_phone(self, app):
+        """Superado el límite del número no se envían más SMS."""
+        _user('+573001110002')
+        _user('+573001110003')
+
+        responses = [_request_sms(app, '+573001110002') for _ in range(3)]
+
+        assert [response.status_code for response in responses] == [302, 302, 200]
+        assert 'demasiados SMS'.encode() in responses[2].data
+        # El límite es por número: otro usuario sigue pudiendo recibir
+        assert _request_sms(app, '+573001110003').status_code == 302
+        assert len(sms_sender.provider.sent) == 3
+
+    def test_provider_failure_does_not_break_request(self, app):
+        """Si el proveedor falla la petición responde igual."""
+        _user('+573001110004')
+        sms_sender.provider.fail_next(1)
+
+        response = _request_sms(app, '+573001110004')
+
+        assert response.status_code == 302
+        assert sms_sender.provider.sent == []
+
+    def test_missing_provider_reports_failure(self, app):
+        """Sin proveedor configurado el usuario ve que el SMS no salió."""
+        _user('+573001110005')
+        app.config['SMS_PROVIDER'] = None
+
+        response = _request_sms(app, '+573001110005')
+
+        assert response.status_code == 200
+        assert 'No pudimos enviar el SMS'.encode() in response.data
+
+
+class TestBackgroundSending:
+    """Con la cola activa la petición no espera al proveedor."""
+
+    @pytest.fixture
+    def app(self):
+        """Aplicación con la cola de SMS en segundo plano y un proveedor lento."""
+        app = _make_app(SMS_QUEUE_EAGER=False, SMS_FAKE_DELAY=0.5, SMS_WORKERS=1)
+        with app.app_context():
+            yield app
+            sms_sender.drain(timeout=5)
+            db.session.remove()
+            db.drop_all()
+
+    def test_request_does_not_wait_for_provider(self, app):
+        """La respuesta llega antes de que el proveedor termine."""
+        _user('+573001110005')
+
+        started = time.perf_counter()
+        response = _request_sms(app, '+573001110005')
+        elapsed = time.perf_counter() - started
+
+        assert response.status_code == 302
+        assert elapsed < 0.5
+        assert sms_sender.drain(timeout=5)
+        sent = [message['to'] for message in sms_sender.provider.sent]
+        assert sent == ['+573001110005']
+
+    def test_full_queue_discards_message(self, app):
+        """Con la cola llena el mensaje se descarta sin bloquear."""
+        app.config['SMS_MAX_PENDING'] = 1
+
+        assert sms_sender.send('+573001110006', 'uno') is True
+        assert sms_sender.send('+573001110007', 'dos') is False
+        assert sms_sender.drain(timeout=5)
+        sent = [message['to'] for message in sms_sender.provider.sent]
+        assert sent == ['+573001110006']
+
+
+class TestFakeProvider:
+    """Proveedor local de SMS."""
+
+    def test_records_messages_and_failures(self):
+        """Guarda los mensajes y falla los envíos pedidos."""
+        provider = FakeSMSProvider(delay=0)
+        provider.fail_next(1)
+
+        with pytest.raises(SMSError):
+            provider.send('+570001', 'hola')
+        assert provider.send('+570001', 'hola') == 'fake-1'
+        assert provider.sent == [{'to': '+570001', 'body': 'hola'}]
@@ -0,0 +1,21 @@
+"""
+Prueba de carga de notificaciones Socket.IO entre varios procesos.
+
+Levanta workers reales de la aplicación conectados a la cola de mensajes
+local y comprueba que una notificación emitida en un worker llega a los
+clientes conectados a cualquiera de los demás.
+"""
+
+import pytest
+
+from scripts.loadtest_socketio import run_load_test
+
+
+@pytest.mark.slow
+def test_notifications_reach_clients_on_every_worker():
+    """Cada cliente recibe su notificación, sin importar su worker."""
+    stats = run_load_test(workers=3, clients=12)
+
+    assert stats['delivered'] == stats['expected'] == 12
+    assert stats['leaks'] == 0
+    assert stats['per_worker'] == [4, 4, 4]
@@ -0,0 +1,116 @@
+"""
+Tests de integración para la caché de fragmentos y de bytecode de plantillas.
+"""
+
+import os
+from datetime import date
+
+import pytest
+from flask_caching import make_template_fragment_key
+from markupsafe import Markup
+
+from app import create_app
+from app.db import db
+from app.extensions import cache
+from app.models.products import Category, Product
+from app.models.users import UserRole, Users
+from app.models.wishlist import Wishlist
+
+# Estilo del botón de favoritos de un producto que está en la lista
+FULL_HEART = 'color: #e74c3c; cursor: pointer; z-index: 3;'
+
+
+class TestProductCardFragments:
+    """Tarjetas de producto cacheadas por id y fecha de modificación."""
+
+    @pytest.fixture
+    def app(self):
+        """
+        Aplicación de testing con un producto en los favoritos de un cliente.
+
+        Las peticiones se hacen fuera del contexto de la aplicación para que
+        cada una cargue su propio usuario.
+        """
+        app = create_app()
+        with app.app_context():
+            db.create_all()
+            category = Category(name='Calzado')
+            user = Users(nameUser='Ana', email='ana@example.com',
+                         password_user='hash', birthdate=date(1990, 1, 1),
+                         role=UserRole.USER, is_active_db=True)
+            db.session.add_all([category, user])
+            db.session.commit()
+            product = Product(name='Zapato rojo', price=10000, stock=50,
+                              category_id=category.id)
+            db.session.add(product)
+            db.session.commit()
+            db.session.add(Wishlist(user_id=user.idUser, product_id=product.id))
+            db.session.commit()
+            app.config['TEST_IDS'] = {'user': user.idUser, 'product': product.id}
+            db.session.remove()
+        yield app
+        with app.app_context():
+            db.drop_all()
+
+    @staticmethod
+    def _card_key(app):
+        with app.app_context():
+            product = db.session.get(Product, app.config['TEST_IDS']['product'])
+            return make_template_fragment_key('catalog-card', [product.fragment_key])
+
+    def _user_client(self, app):
+        client = app.test_client()
+        with client.session_transaction() as sess:
+            sess['_user_id'] = str(app.config['TEST_IDS']['user'])
+        return client
+
+    def test_card_is_reused_but_hearts_stay_per_user(self, app):
+        """La tarjeta sale del fragmento; el botón de favoritos no."""
+        client = self._user_client(app)
+        client.get('/catalog/')
+        with app.app_context():
+            cache.set(self._card_key(app), Markup('<p>tarjeta cacheada</p>'))
+
+        mine = client.get('/catalog/').get_data(as_text=True)
+        anonymous = app.test_client().get('/catalog/').get_data(as_text=True)
+
+        assert 'tarjeta cacheada' in mine and 'tarjeta cacheada' in anonymous
+        assert FULL_HEART in mine
+        assert FULL_HEART not in anonymous
+
+    def test_editing_product_changes_key(self, app):
+        """Modificar el producto genera otra clave y la tarjeta se regenera."""
+        client = self._user_client(app)
+        client.get('/catalog/')
+        old_key = self._card_key(app)
+        with app.app_context():
+            db.session.get(Product, app.config['TEST_IDS']['product']).stock = 3
+            db.session.commit()
+
+        page = client.get('/catalog/').get_data(as_text=True)
+
+        assert self._card_key(app) != old_key
+        assert '¡Últimas 3!' in page
+
+
+class TestBytecodeCache:
+    """Plantillas compiladas compartidas entre procesos."""
+
+    def test_disabled_in_testing(self):
+        """La configuración de testing compila solo en memoria."""
+        assert create_app().jinja_env.bytecode_cache is None
+
+    def test_new_app_skips_compilation(self, tmp_path, monkeypatch):
+        """Un worker nuevo carga del disco lo que compiló otro."""
+        bytecode_dir = tmp_path / 'jinja'
+        first = create_app({'JINJA_BYTECODE_CACHE_DIR': str(bytecode_dir)})
+        assert first.test_client().get('/login').status_code == 200
+        assert os.listdir(bytecode_dir)
+
+        second = create_app({'JINJA_BYTECODE_CACHE_DIR': str(bytecode_dir)})
+
+        def fail(*_args, **_kwargs):
+            raise AssertionError('plantilla recompilada')
+
+        monkeypatch.setattr(second.jinja_env, 'compile', fail)
+        assert second.jinja_env.get_template('login.html') is not None